@@ -1,8 +1,23 @@
 import os
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Union
 from phidata.agent import Agent
 from phidata.models.openrouter import OpenRouter
 from phidata.tools.website import WebsiteReader
+from app.ingest.extraction import (
+    ContentExtraction,
+    StreamingExtractionParser,
+    build_extraction_prompt,
+    parse_extraction,
+)
+from app.ingest.fetcher import get_page_fetcher
+from app.ingest.summarizer import MapReduceSummarizer
+from app.models.registry import ModelRegistry
+
+# Characters of page text included in the summary / questions prompts
+# (longer documents are condensed with map-reduce summaries first)
+MAX_PROMPT_CHARS = 12000
+QUESTION_EXCERPT_CHARS = 3000
 
 class ContentAgent:
     """Agno agent for content ingestion and processing"""
@@ -16,46 +31,159 @@ class ContentAgent:
             api_key=os.getenv("OPENROUTER_API_KEY"),
         )
         
-        # Create agent with website reading tools
+        # Page text is fetched and cleaned by app.ingest.fetcher and passed in
+        # the prompt, so this agent needs no browsing tools
         self.agent = Agent(
             name="ContentAgent",
             role="Extract and summarize content from URLs",
             model=self.model,
             instructions="""You are a content extraction agent. Your job is to:
-1. Read and understand content from URLs
+1. Read and understand the content provided to you
 2. Extract key insights and information
 3. Summarize content in a structured format
 4. Identify relevant tags and topics
 5. Ask clarifying questions if needed""",
+            markdown=True,
+        )
+        # Single-call structured extraction (plain JSON, so no markdown formatting)
+        self.extractor = Agent(
+            name="ContentExtractor",
+            role="Extract a summary, insights, tags and clarifying questions as JSON",
+            model=self.model,
+            instructions="You turn content into the exact JSON object requested. Output JSON only.",
+            markdown=False,
+        )
+        # Section summaries for documents too long for one prompt, via the
+        # rate-limited model registry
+        self.registry = ModelRegistry()
+        self.summarizer = MapReduceSummarizer(
+            self._complete,
+            model=os.getenv("SUMMARY_CHUNK_MODEL", model_id),
+            chunk_tokens=int(os.getenv("SUMMARY_CHUNK_TOKENS", "1500")),
+            budget_tokens=int(os.getenv("SUMMARY_BUDGET_TOKENS", "3000")),
+            fan_in=int(os.getenv("SUMMARY_FAN_IN", "4")),
+        )
+        # Fallback for pages the first-party fetcher can't read
+        self.reader_agent = Agent(
+            name="ContentReaderAgent",
+            role="Extract and summarize content from URLs",
+            model=self.model,
+            instructions="Read the URL with your website tool, then extract and summarize its key insights.",
             tools=[WebsiteReader()],
             markdown=True,
         )
     
-    async def ingest_url(self, url: str, notes: Optional[str] = None) -> dict:
-        """Ingest content from URL"""
-        prompt = f"Extract and summarize the key insights from this URL: {url}"
-        if notes:
-            prompt += f"\n\nUser notes: {notes}"
+    async def ingest_url(self, url: str, notes: Optional[str] = None, text: Optional[str] = None) -> dict:
+        """Ingest content from URL (``text``: already-fetched page text)"""
+        if text is None:
+            try:
+                text = (await get_page_fetcher().fetch(url)).text
+            except Exception as e:
+                print(f"Page fetch failed for {url}, using website reader: {e}")
         
-        response = await self.agent.arun(prompt)
+        if text:
+            summary = await self.summarize_text(text, url, notes)
+        else:
+            prompt = f"Extract and summarize the key insights from this URL: {url}"
+            if notes:
+                prompt += f"\n\nUser notes: {notes}"
+            response = await self.reader_agent.arun(prompt)
+            summary = response.content if hasattr(response, 'content') else str(response)
         
         return {
             "url": url,
-            "summary": response.content if hasattr(response, 'content') else str(response),
-            "extracted_at": "now",  # TODO: Add proper timestamp
+            "summary": summary,
+            "extracted_at": datetime.now(timezone.utc).isoformat(),
         }
     
-    async def ask_clarifying_questions(self, url: str) -> List[str]:
+    async def summarize_text(
+        self,
+        text: str,
+        source: Optional[str] = None,
+        notes: Optional[str] = None,
+    ) -> str:
+        """Summarize already-extracted text without fetching the source again"""
+        text = (await self.summarizer.condense(text))[:MAX_PROMPT_CHARS]
+        prompt = "Extract and summarize the key insights from this content."
+        if source:
+            prompt += f"\nSource: {source}"
+        if notes:
+            prompt += f"\n\nUser notes: {notes}"
+        prompt += f"\n\nContent:\n{text}"
+        
+        response = await self.agent.arun(prompt)
+        return response.content if hasattr(response, 'content') else str(response)
+    
+    async def ask_clarifying_questions(self, url: str, text: Optional[str] = None) -> List[str]:
         """Ask AI to generate clarifying questions about the content"""
+        if text is None:
+            try:
+                # Served from the document cache when the page was just ingested
+                text = (await get_page_fetcher().fetch(url)).text
+            except Exception:
+                text = ""
         prompt = f"""Based on this URL: {url}
 Generate 2-3 clarifying questions in Hinglish to help extract the most relevant information.
 Questions should be like:
 - "Tumhe is article se kya extract karna hai?"
-- "Kis lens se dekhna hai — builder, economy, ya design?""""
+- "Kis lens se dekhna hai — builder, economy, ya design?"
+"""
+        if text:
+            prompt += f"\nContent excerpt:\n{text[:QUESTION_EXCERPT_CHARS]}\n"
         
         response = await self.agent.arun(prompt)
         # Parse questions from response
         content = response.content if hasattr(response, 'content') else str(response)
         questions = [q.strip() for q in content.split('\n') if q.strip() and '?' in q]
         return questions[:3]  # Return max 3 questions
+    
+    async def extract(
+        self,
+        text: str,
+        source: Optional[str] = None,
+        notes: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+    ) -> ContentExtraction:
+        """Summary, key insights, suggested tags and clarifying questions in one call"""
+        text = (await self.summarizer.condense(text))[:MAX_PROMPT_CHARS]
+        prompt = build_extraction_prompt(text, source, notes, tags)
+        response = await self.extractor.arun(prompt)
+        raw = response.content if hasattr(response, 'content') else str(response)
+        return _parse_or_summary(raw)
+    
+    async def extract_stream(
+        self,
+        text: str,
+        source: Optional[str] = None,
+        notes: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+    ) -> AsyncIterator[Union[str, ContentExtraction]]:
+        """Like extract, but yields summary text as it arrives and the validated result last"""
+        text = (await self.summarizer.condense(text))[:MAX_PROMPT_CHARS]
+        prompt = build_extraction_prompt(text, source, notes, tags)
+        parser = StreamingExtractionParser()
+        async for chunk in await self.extractor.arun(prompt, stream=True):
+            delta = chunk.content if hasattr(chunk, 'content') else str(chunk)
+            summary_delta = parser.feed(delta or "")
+            if summary_delta:
+                yield summary_delta
+        yield _parse_or_summary(parser.raw)
 
+    async def _complete(self, prompt: str) -> str:
+        """One map/reduce summary call"""
+        response = await self.registry.generate(
+            prompt,
+            self.summarizer.model,
+            system_prompt="You write dense, faithful summaries of document sections.",
+            temperature=0.3,
+            max_tokens=int(os.getenv("SUMMARY_CHUNK_MAX_OUTPUT", "400")),
+        )
+        return response.content
+    
+def _parse_or_summary(raw: str) -> ContentExtraction:
+    """Validated extraction, or the raw reply as a plain summary if it isn't valid JSON"""
+    try:
+        return parse_extraction(raw)
+    except ValueError as e:
+        print(f"Structured extraction failed, keeping raw summary: {e}")
+        return ContentExtraction(summary=raw.strip() or "No summary available")
@@ -5,6 +5,7 @@ from phidata.models.openai import OpenAIChat
 from phidata.models.anthropic import Claude
 from phidata.models.openrouter import OpenRouter
 
+from app.drafts.sections import DRAFT_INSTRUCTIONS, build_draft_prompt
 from app.models.registry import ModelRegistry
 
 class DraftAgent:
@@ -68,24 +69,7 @@ class DraftAgent:
     
     def _get_instructions(self) -> str:
         """Get agent instructions for Hinglish newsletter generation"""
-        return """You are a newsletter writer creating content in Hinglish (English script with Hindi words mixed naturally).
-
-Style Guidelines:
-- English for logic and technical concepts
-- Hindi for emotion and cultural context
-- Sharp, witty, builder-energy tone
-- Target audience: Engineers, designers, founders, builders
-- Length: 500-800 words
-
-Structure Required:
-1. Hook - Insightful or witty observation
-2. Context - Explain the topic simply
-3. Insight - Core argument or framework
-4. Takeaway - What reader learns / feels
-5. Closing - Punchline or curiosity loop
-
-References: Naval, Paul Graham, Sahil Bloom, Raj Shamani, Varun Mayya
-Write naturally, mixing English and Hindi words seamlessly."""
+        return DRAFT_INSTRUCTIONS
     
     async def generate(
         self,
@@ -94,13 +78,7 @@ Write naturally, mixing English and Hindi words seamlessly."""
         max_tokens: Optional[int] = 2000,
     ) -> dict:
         """Generate newsletter draft using Agno agent"""
-        prompt = f"""Generate a Hinglish newsletter based on this context:
-
-{context}
-
-Follow the structure and style guidelines provided. Make it engaging, informative, and naturally mixing English and Hindi."""
-        
-        response = await self.agent.arun(prompt, temperature=temperature, max_tokens=max_tokens)
+        response = await self.agent.arun(build_draft_prompt(context), temperature=temperature, max_tokens=max_tokens)
         
         return {
             "content": response.content if hasattr(response, 'content') else str(response),
@@ -2,6 +2,7 @@ import os
 from typing import List, Dict, Optional
 from phidata.agent import Agent
 from phidata.models.openrouter import OpenRouter
+from app.topics.engine import parse_cluster_labels
 
 class TopicAgent:
     """Agno agent for topic clustering and prioritization"""
@@ -19,52 +20,32 @@ class TopicAgent:
             role="Cluster content into topics and prioritize newsletter themes",
             model=self.model,
             instructions="""You are a topic clustering and prioritization agent. Your job is to:
-1. Analyze multiple content items
-2. Cluster them into related themes (e.g., "AI x Design", "Startup Economics")
-3. Rank topics based on:
-   - Interest weight (from user tags)
-   - Recency/trend signals
-   - Potential for engaging newsletter content
-4. Output 3-5 shortlisted topics for the week
-5. Provide reasoning for each ranking""",
-            markdown=True,
-            structured_outputs=True,
+1. Read digests of content clusters (already grouped by embedding similarity and ranked)
+2. Name each cluster as a newsletter theme (e.g., "AI x Design", "Startup Economics")
+3. Describe the theme in one sentence
+4. Give short reasoning on why it is worth writing about now
+5. Reply in the exact JSON format requested""",
+            markdown=False,
         )
     
-    async def prioritize_topics(
+    async def label_clusters(
         self,
-        content_items: List[Dict],
+        digests: List[str],
         interest_weights: Optional[Dict[str, float]] = None,
-    ) -> List[Dict]:
-        """Prioritize topics from content items"""
-        # Format content for agent
-        content_summary = "\n\n".join([
-            f"Item {i+1}: {item.get('summary', item.get('title', 'No title'))}\n"
-            f"Tags: {', '.join(item.get('tags', []))}"
-            for i, item in enumerate(content_items)
-        ])
-        
-        prompt = f"""Analyze these content items and create prioritized topics for newsletter:
+    ) -> Dict[int, Dict[str, str]]:
+        """Name pre-computed content clusters from their digests (clustering and scoring happen in app.topics)"""
+        clusters = "\n\n".join(digests)
+        prompt = f"""These clusters of saved content were ranked by size, recency and interest:
 
-{content_summary}
+{clusters}
 
 {f'Interest weights: {interest_weights}' if interest_weights else ''}
 
-Output 3-5 prioritized topics with:
-- Topic title
-- Description
-- Priority score (1-10)
-- Related content items
-- Reasoning for ranking"""
+For each cluster give a newsletter topic title, a one-sentence description and
+one sentence of reasoning on why it is worth writing about this week.
+Reply with ONLY a JSON array like:
+[{{"cluster": 1, "title": "...", "description": "...", "reasoning": "..."}}]"""
         
         response = await self.agent.arun(prompt)
-        
-        # Parse structured output (Agno will handle this)
-        # For now, return raw response - will be enhanced with structured output parsing
-        return [{
-            "title": "Topic",
-            "description": response.content if hasattr(response, 'content') else str(response),
-            "priority_score": 7.5,
-            "items": content_items,
-        }]
-
+        content = response.content if hasattr(response, 'content') else str(response)
+        return parse_cluster_labels(content)
@@ -1,8 +1,15 @@
 """API usage tracking and cost analytics"""
+from datetime import datetime
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
-from app.db.analytics import get_usage_stats, track_newsletter_analytics
+from app.db.analytics import (
+    get_usage_stats,
+    get_cost_breakdown,
+    get_usage_timeseries,
+    get_draft_run_stats,
+    track_newsletter_analytics,
+)
 
 router = APIRouter()
 
@@ -11,70 +18,91 @@ class UsageStatsRequest(BaseModel):
     days: int = 30
 
 @router.get("/usage")
-async def get_usage(provider: Optional[str] = None, days: int = 30):
-    """Get API usage statistics"""
+async def get_usage(
+    provider: Optional[str] = None,
+    days: int = 30,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """Get API usage statistics for the last N days or an explicit start/end range"""
     try:
-        stats = get_usage_stats(provider=provider, days=days)
+        stats = get_usage_stats(provider=provider, days=days, start=start, end=end)
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/costs")
-async def get_costs():
+async def get_costs(
+    provider: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
     """Get cost breakdown by provider and model"""
     try:
-        from app.db.client import get_supabase
-        
-        supabase = get_supabase()
-        
-        # Get costs grouped by provider
-        result = supabase.table("api_usage").select("provider, model, cost_estimated, created_at").execute()
-        
-        if not result.data:
-            return {
-                "total_cost": 0.0,
-                "by_provider": {},
-                "by_model": {},
-                "period": "all_time"
-            }
-        
-        # Aggregate costs
-        by_provider = {}
-        by_model = {}
-        total_cost = 0.0
-        
-        for record in result.data:
-            provider = record.get("provider", "unknown")
-            model = record.get("model", "unknown")
-            cost = record.get("cost_estimated", 0.0)
-            
-            total_cost += cost
-            
-            if provider not in by_provider:
-                by_provider[provider] = {"total": 0.0, "count": 0}
-            by_provider[provider]["total"] += cost
-            by_provider[provider]["count"] += 1
-            
-            model_key = f"{provider}:{model}"
-            if model_key not in by_model:
-                by_model[model_key] = {"total": 0.0, "count": 0}
-            by_model[model_key]["total"] += cost
-            by_model[model_key]["count"] += 1
-        
+        return get_cost_breakdown(provider=provider, start=start, end=end)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/timeseries")
+async def get_timeseries(
+    bucket: str = "day",
+    provider: Optional[str] = None,
+    days: int = 30,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """Get usage totals per hour or day bucket"""
+    try:
+        series = get_usage_timeseries(
+            bucket=bucket, provider=provider, days=days, start=start, end=end
+        )
         return {
-            "total_cost": round(total_cost, 6),
-            "by_provider": {k: {
-                "total": round(v["total"], 6),
-                "count": v["count"],
-                "avg_per_request": round(v["total"] / v["count"], 6) if v["count"] > 0 else 0
-            } for k, v in by_provider.items()},
-            "by_model": {k: {
-                "total": round(v["total"], 6),
-                "count": v["count"]
-            } for k, v in by_model.items()},
-            "period": "all_time",
-            "total_requests": len(result.data)
+            "bucket": bucket,
+            "series": series,
+            "count": len(series),
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/drafts")
+async def get_draft_stats(
+    days: int = 30,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """Compare cost and latency of draft generation modes, with per-stage averages"""
+    try:
+        return get_draft_run_stats(days=days, start=start, end=end)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/embedding-cache")
+async def get_embedding_cache_stats():
+    """Get embedding cache hit rates and batching stats for this process"""
+    from app.db.embedding_cache import get_embedding_cache
+    from app.db.embeddings import _embedding_batchers
+    return {
+        **get_embedding_cache().stats(),
+        "batching": {model: b.stats() for model, b in _embedding_batchers.items()},
+    }
+
+@router.get("/cpu-pool")
+async def get_cpu_pool_stats():
+    """Get process-pool task metrics and event-loop lag for this process"""
+    from app.compute.pool import get_cpu_pool, get_loop_lag_monitor
+    return {
+        **get_cpu_pool().stats(),
+        "event_loop_lag": get_loop_lag_monitor().stats(),
+    }
+
+@router.get("/summaries")
+async def get_summary_stats():
+    """Get summary cache hit rates and LLM rate-limiter stats for this process"""
+    from app.ingest.summarizer import get_summary_cache
+    from app.models.ratelimit import _limiters
+    return {
+        "cache": get_summary_cache().stats(),
+        "rate_limiters": {provider: limiter.stats() for provider, limiter in _limiters.items()},
+    }
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, HTTPException, UploadFile, File, Request, Query, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List
-from app.db.embeddings import create_content_with_embedding
+from uuid import UUID
+from app.ingest.dedup import canonicalize_url
 
 router = APIRouter()
 
@@ -24,116 +30,351 @@ class IngestContentRequest(BaseModel):
     tags: List[str] = []
     notes: Optional[str] = None
 
+class BulkIngestRequest(BaseModel):
+    urls: List[str]
+    tags: List[str] = []
+    notes: Optional[str] = None
+
+class NeighborsRequest(BaseModel):
+    content_ids: List[UUID]
+    limit: int = 10
+    min_similarity: float = 0.0
+    include_content: bool = True  # Add summary/url/tags of each neighbor
+
+MAX_BULK_URLS = 500
+MAX_NEIGHBOR_IDS = 500
+
 @router.post("/ingest")
 async def ingest_content(
     url: Optional[str] = None,
     tags: List[str] = [],
     notes: Optional[str] = None,
+    background: bool = False,
     file: Optional[UploadFile] = File(None)
 ):
-    """Ingest content from URL or file upload using Agno agent"""
+    """Ingest content from URL or file upload using Agno agent.
+
+    With ``background=true`` a URL is queued as a job and the response is
+    202 with a job id; follow progress at /api/content/jobs/{job_id}/events.
+    """
     try:
+        if url and background:
+            from app.ingest.jobs import get_job_store
+            
+            job = await asyncio.to_thread(
+                get_job_store().enqueue,
+                "url",
+                {"url": url, "tags": tags, "notes": notes},
+                idempotency_key=f"url:{canonicalize_url(url)}",
+            )
+            return JSONResponse(status_code=202, content={
+                "status": "accepted",
+                "job_id": job["id"],
+                "job_status": job["status"],
+                "status_url": f"/api/content/jobs/{job['id']}",
+                "events_url": f"/api/content/jobs/{job['id']}/events",
+            })
         if url:
             # Use Agno ContentAgent to extract content
-            content_agent = get_content_agent()
-            result = await content_agent.ingest_url(url, notes)
+            from app.ingest.url import ingest_single_url
             
-            # Ask clarifying questions
-            questions = await content_agent.ask_clarifying_questions(url)
+            return await ingest_single_url(
+                url=url,
+                tags=tags,
+                notes=notes,
+                content_agent=get_content_agent(),
+            )
+        elif file:
+            # Stream the upload to a spooled temp file and extract it by type
+            from app.ingest.uploads import UploadTooLarge, ingest_upload
             
-            # Store in Supabase with embedding
             try:
-                db_item = await create_content_with_embedding(
-                    url=url,
-                    extracted_text=result.get("summary", ""),
-                    summary=result.get("summary"),
-                    tags=tags if tags else [],
-                )
-                content_id = db_item.get("id")
-                embedding_status = db_item.get("embedding_status", "unknown")
-            except Exception as db_error:
-                # Continue even if DB fails (for testing)
-                content_id = None
-                embedding_status = "failed"
-                print(f"Database storage failed: {db_error}")
-            
-            return {
-                "status": "success",
-                "type": "url",
-                "url": url,
-                "summary": result.get("summary"),
-                "clarifying_questions": questions,
-                "tags": tags,
-                "content_id": content_id,
-                "stored_in_db": content_id is not None,
-                "embedding_status": embedding_status if 'embedding_status' in locals() else "unknown",
-            }
-        elif file:
-            # Process file upload
+                summarize = get_content_agent().summarize_text
+            except HTTPException:
+                summarize = None  # Fall back to an excerpt summary
             try:
-                # Read file content
-                file_content = await file.read()
-                file_text = file_content.decode('utf-8')
-                
-                # For now, treat file content as extracted text
-                # In the future, we can use ContentAgent to process file content better
-                extracted_text = file_text[:5000]  # Limit size
-                summary = extracted_text[:500]  # Simple summary from first 500 chars
-                
-                # If notes provided, use them to guide summary
-                if notes:
-                    # Could enhance this with AI summary generation
-                    summary = f"{summary}\n\nUser notes: {notes}"
-                
-                # Store in Supabase with embedding
-                try:
-                    db_item = await create_content_with_embedding(
-                        file_path=file.filename,
-                        extracted_text=extracted_text,
-                        summary=summary,
-                        tags=tags if tags else [],
-                    )
-                    content_id = db_item.get("id")
-                    embedding_status = db_item.get("embedding_status", "unknown")
-                except Exception as db_error:
-                    content_id = None
-                    embedding_status = "failed"
-                    print(f"Database storage failed: {db_error}")
-                
-                return {
-                    "status": "success",
-                    "type": "file",
-                    "filename": file.filename,
-                    "summary": summary,
-                    "content_id": content_id,
-                    "stored_in_db": content_id is not None,
-                    "embedding_status": embedding_status,
-                }
+                return await ingest_upload(file, tags=tags, notes=notes, summarize=summarize)
+            except UploadTooLarge as e:
+                raise HTTPException(status_code=413, detail=str(e))
             except Exception as file_error:
                 raise HTTPException(status_code=400, detail=f"File processing failed: {str(file_error)}")
         else:
             raise HTTPException(status_code=400, detail="Either URL or file must be provided")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _job_response(job: dict) -> dict:
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "attempts": job["attempts"],
+        "error": job["error"],
+        "result": job["result"],
+        "payload": job["payload"],
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    """Get the status of a background ingest job"""
+    from app.ingest.jobs import get_job_store
+    
+    job = await asyncio.to_thread(get_job_store().get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+@router.get("/jobs/{job_id}/events")
+async def stream_ingest_job_events(job_id: str, request: Request):
+    """Stream job progress as server-sent events until the job finishes"""
+    from app.ingest.jobs import TERMINAL_STATUSES, get_job_store
+    
+    store = get_job_store()
+    if not await asyncio.to_thread(store.get, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    try:
+        last_seq = int(request.headers.get("last-event-id", "0"))
+    except ValueError:
+        last_seq = 0
+    
+    async def event_stream():
+        nonlocal last_seq
+        idle_polls = 0
+        while not await request.is_disconnected():
+            events = await asyncio.to_thread(store.events, job_id, last_seq)
+            for event in events:
+                last_seq = event["seq"]
+                yield f"id: {event['seq']}\nevent: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+            
+            job = await asyncio.to_thread(store.get, job_id)
+            if job is None or (job["status"] in TERMINAL_STATUSES and not events):
+                break
+            
+            idle_polls = 0 if events else idle_polls + 1
+            if idle_polls and idle_polls % 30 == 0:
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(0.5)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/ingest/bulk")
+async def ingest_content_bulk(request: BulkIngestRequest):
+    """Ingest many URLs through the staged fetch/extract/summarize/embed/write pipeline"""
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="At least one URL is required")
+    if len(request.urls) > MAX_BULK_URLS:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_BULK_URLS} URLs per request")
+    try:
+        from app.ingest.bulk import ingest_urls
+        
+        content_agent = get_content_agent()
+        result = await ingest_urls(
+            urls=request.urls,
+            tags=request.tags,
+            notes=request.notes,
+            summarize=content_agent.summarize_text,
+        )
+        return {
+            "status": "success",
+            "count": len(result["items"]),
+            **result,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _select_fields(results: List[dict], fields: Optional[str]) -> List[dict]:
+    """Keep ids, similarity and the requested content columns (summary,url,tags,created_at)"""
+    if not fields:
+        return results
+    keep = {"id", "content_id", "similarity", "score", "text_rank", "matched_chunks", "chunk_hits"} | {f"content_{f.strip()}" for f in fields.split(",") if f.strip()}
+    return [{k: v for k, v in row.items() if k in keep} for row in results]
+
 @router.get("/search")
-async def search_content(query: str, limit: int = 10, threshold: float = 0.7):
-    """Search content using vector similarity"""
+async def search_content(
+    query: str,
+    limit: int = 10,
+    threshold: float = 0.7,
+    exact: bool = False,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    fields: Optional[str] = None,
+    mode: str = "auto",
+    chunks: bool = False,
+    tags: Optional[List[str]] = Query(None),
+    tag_mode: str = "any",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    days: Optional[int] = None,
+    source_type: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+):
+    """Search content (``mode``: auto/hybrid/text/vector; ``exact`` bypasses the ANN
+    index; ``ef_search``/``probes`` tune HNSW/ivfflat breadth; ``fields`` trims columns;
+    ``tags``/``since``/``until``/``days``/``source_type`` filter inside the search;
+    ``chunks`` matches passages of long documents and groups them per item).
+
+    Responses are cached per content generation and carry an ETag, so a
+    repeated query returns 304 until something is ingested or deleted.
+    """
     try:
         from app.db.embeddings import search_similar_content
+        from app.search.filters import SearchFilters
+        from app.search.hybrid import hybrid_search_content, resolve_search_mode
+        from app.search.result_cache import get_search_cache, search_cache_key, search_etag, search_generation
+        
+        try:
+            auto = mode == "auto" and not exact
+            mode = "vector" if exact else resolve_search_mode(query, mode)
+            if days is not None and since is None:
+                # Hour granularity keeps "last N days" queries cacheable
+                since = (datetime.now(timezone.utc) - timedelta(days=days)).replace(minute=0, second=0, microsecond=0)
+            filters = SearchFilters(
+                tags=tags or [],
+                tag_mode=tag_mode,
+                since=since,
+                until=until,
+                source_type=source_type,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        results = await search_similar_content(
-            query_text=query,
-            limit=limit,
-            threshold=threshold
+        cache = get_search_cache()
+        generation = await asyncio.to_thread(search_generation)
+        cache_key = search_cache_key(
+            query, limit=limit, threshold=threshold, exact=exact, ef_search=ef_search, probes=probes,
+            fields=fields, mode=mode, chunks=chunks, filters=filters.to_rpc_params(),
         )
+        # Without a shared generation a cached response could outlive a change made by another worker
+        cache_headers = {"Cache-Control": "private, no-cache"}
+        if generation is not None:
+            etag = search_etag(cache_key, generation)
+            cache_headers["ETag"] = etag
+            if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+                return Response(status_code=304, headers=cache_headers)
+            cached = cache.get(cache_key, generation)
+            if cached is not None:
+                return JSONResponse({**cached, "query": query, "cached": True}, headers=cache_headers)
         
-        return {
+        results = None
+        if chunks:
+            from app.db.chunks import search_content_chunks
+            
+            results = await search_content_chunks(
+                query_text=query,
+                limit=limit,
+                threshold=threshold,
+                ef_search=ef_search,
+                filters=filters,
+            )
+            if results is not None:
+                mode = "chunks"
+        if results is None and mode in ("hybrid", "text"):
+            # Keyword-like queries ("text") never pay for an embedding call
+            results = await hybrid_search_content(
+                query_text=query,
+                limit=limit,
+                threshold=threshold,
+                mode=mode,
+                ef_search=ef_search,
+                filters=filters,
+            )
+            if auto and mode == "text" and results == []:
+                # No lexical hit: a paraphrase can still match by meaning
+                mode = "hybrid"
+                results = await hybrid_search_content(
+                    query_text=query,
+                    limit=limit,
+                    threshold=threshold,
+                    mode=mode,
+                    ef_search=ef_search,
+                    filters=filters,
+                )
+        if results is None:
+            mode = "vector"
+            results = await search_similar_content(
+                query_text=query,
+                limit=limit,
+                threshold=threshold,
+                exact=exact,
+                ef_search=ef_search,
+                probes=probes,
+                filters=filters,
+            )
+        results = _select_fields(results, fields)
+        
+        response = jsonable_encoder({
             "query": query,
+            "mode": mode,
             "results": results,
             "count": len(results),
-            "threshold": threshold
+            "threshold": threshold,
+            "filters": None if filters.is_empty() else filters.to_rpc_params(),
+        })
+        if generation is not None:
+            cache.set(cache_key, generation, response)
+        return JSONResponse({**response, "cached": False}, headers=cache_headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/neighbors")
+async def content_neighbors(request: NeighborsRequest):
+    """Precomputed nearest neighbors of many items at once (one indexed read, no embedding call)"""
+    if len(request.content_ids) > MAX_NEIGHBOR_IDS:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_NEIGHBOR_IDS} content IDs per request")
+    try:
+        from app.db.content import get_content_items
+        from app.search.ann import content_metadata
+        from app.search.knn import get_neighbors
+        
+        ids = [str(content_id) for content_id in request.content_ids]
+        graph = await asyncio.to_thread(get_neighbors, ids, request.limit, request.min_similarity)
+        items = {}
+        if request.include_content:
+            wanted = list({cid for neighbors in graph.values() for cid, _ in neighbors})
+            items = await asyncio.to_thread(get_content_items, wanted)
+        neighbors = {
+            content_id: [
+                {
+                    "content_id": cid,
+                    "similarity": similarity,
+                    **(content_metadata(items.get(cid)) if request.include_content else {}),
+                }
+                for cid, similarity in graph[content_id]
+            ]
+            for content_id in ids if content_id in graph
+        }
+        return {
+            "neighbors": neighbors,
+            "count": len(neighbors),
+            # Not in the graph yet (no embedding, or ingested before the graph was built)
+            "missing": [content_id for content_id in ids if content_id not in graph],
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.delete("/{content_id}")
+async def delete_content(content_id: UUID):
+    """Delete a content item and its embeddings"""
+    try:
+        from app.db.embeddings import delete_content_with_embedding
+        
+        if not await delete_content_with_embedding(str(content_id)):
+            raise HTTPException(status_code=404, detail="Content not found")
+        return {"status": "deleted", "content_id": str(content_id)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,3 +1,6 @@
+import asyncio
+import os
+import time
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional, List
@@ -8,6 +11,8 @@ from app.db.drafts import get_draft, list_drafts, create_draft_version
 router = APIRouter()
 registry = ModelRegistry()
 
+DRAFT_MODES = ("single", "sections", "cascade")
+
 # Lazy load DraftAgent to avoid import errors at startup
 def get_draft_agent(model_id: str):
     """Get DraftAgent instance for given model"""
@@ -27,6 +32,8 @@ class GenerateDraftRequest(BaseModel):
     system_prompt: Optional[str] = None
     temperature: float = 0.7
     max_tokens: Optional[int] = 2000
+    content_ids: Optional[List[UUID]] = None  # Seed items whose graph neighbors enrich the context
+    mode: Optional[str] = None  # "single", "sections" (outline + parallel sections) or "cascade" (cheap draft, premium fixes); default DRAFT_GENERATION_MODE
 
 class CompareModelsRequest(BaseModel):
     models: List[str]  # List of model IDs to compare
@@ -38,24 +45,71 @@ class CreateVersionRequest(BaseModel):
     content: str
     changes_summary: Optional[str] = None
 
+class RegenerateSectionRequest(BaseModel):
+    model: Optional[str] = None  # Defaults to the model that wrote the draft
+    instruction: Optional[str] = None  # What to change, e.g. "make the hook punchier"
+    refine: bool = True  # Improve the current text; False writes the section from scratch
+    content: Optional[str] = None  # The editor's current draft, if it has unsaved edits
+    temperature: float = 0.7
+    max_tokens: Optional[int] = None
+
+def _load_topic(topic_id: str) -> Optional[dict]:
+    from app.db.client import get_supabase
+    result = get_supabase().table("topics").select("title, description, content_ids").eq("id", topic_id).limit(1).execute()
+    return result.data[0] if result.data else None
+
+def _single_usage(context: str, content: str, model_id: str, seconds: float) -> dict:
+    """Estimated usage of a DraftAgent run (the agent doesn't report token counts)"""
+    from app.drafts.sections import DRAFT_INSTRUCTIONS, stage_usage
+    from app.ingest.chunking import count_tokens
+    call = {
+        "input_tokens": count_tokens(DRAFT_INSTRUCTIONS) + count_tokens(context),
+        "output_tokens": count_tokens(content),
+    }
+    call["cost"] = registry.estimate_cost(call["input_tokens"], call["output_tokens"], model_id)
+    stage = stage_usage([call], seconds, model_id)
+    return {"stages": {"draft": stage}, "total": {k: v for k, v in stage.items() if k != "model"}}
+
+def _cascade_writer(premium_model: str):
+    from app.drafts.cascade import DEFAULT_CHEAP_MODEL, CascadeDraftWriter
+    return CascadeDraftWriter(
+        registry,
+        premium_model,
+        cheap_model=os.getenv("DRAFT_CASCADE_MODEL") or DEFAULT_CHEAP_MODEL,
+        scorer_model=os.getenv("DRAFT_CASCADE_SCORER_MODEL") or None,
+        min_score=float(os.getenv("DRAFT_CASCADE_MIN_SCORE", "7")),
+        max_rewrites=int(os.getenv("DRAFT_CASCADE_MAX_REWRITES", "2")),
+    )
+
 @router.post("/generate")
 async def generate_draft(request: GenerateDraftRequest):
     """Generate newsletter draft using Agno agent"""
     try:
         from app.db.embeddings import search_similar_content
         from app.db.drafts import create_draft
+        from app.db.analytics import record_draft_run
+        from app.drafts.sections import SectionedDraftWriter, draft_generation_mode, track_draft_calls
+        from app.search.knn import related_summaries
         
-        # Use Agno DraftAgent for better orchestration
-        draft_agent = get_draft_agent(request.model)
+        mode = (request.mode or draft_generation_mode()).lower()
+        if mode not in DRAFT_MODES:
+            raise HTTPException(status_code=400, detail=f"mode must be one of: {', '.join(DRAFT_MODES)}")
         
         # Build context: use provided context or search knowledge base
         context = request.context
+        seed_ids = [str(content_id) for content_id in request.content_ids or []]
         if not context and request.topic_id:
-            # TODO: Get topic details and related content from DB
             context = "Generate a Hinglish newsletter draft on current trends for builders."
-        elif not context:
+            try:
+                topic = await asyncio.to_thread(_load_topic, request.topic_id)
+                if topic:
+                    context = f"Topic: {topic['title']}\n{topic.get('description') or ''}".strip()
+                    seed_ids = seed_ids or [str(cid) for cid in (topic.get("content_ids") or [])[:3]]
+            except Exception as e:
+                print(f"Topic lookup failed: {e}")
+        elif not context and not seed_ids:
             context = "Generate a Hinglish newsletter draft on current trends for builders."
-        else:
+        elif not seed_ids:
             # If context provided, search for related content in knowledge base
             try:
                 related_content = await search_similar_content(
@@ -71,41 +125,82 @@ async def generate_draft(request: GenerateDraftRequest):
             except Exception:
                 # If search fails, continue with original context
                 pass
+        if seed_ids:
+            # Known items: their related content is one read of the kNN graph, no embedding call
+            context = context or "Generate a Hinglish newsletter draft on current trends for builders."
+            try:
+                summaries = await asyncio.to_thread(related_summaries, seed_ids)
+                if summaries:
+                    context += "\n\nRelated insights from knowledge base:\n" + "\n".join(f"- {s}" for s in summaries)
+            except Exception as e:
+                print(f"Related content lookup failed: {e}")
         
-        result = await draft_agent.generate(
-            context=context,
-            temperature=request.temperature,
-            max_tokens=request.max_tokens
-        )
+        if mode in ("sections", "cascade"):
+            if mode == "cascade":
+                writer = _cascade_writer(request.model)
+            else:
+                writer = SectionedDraftWriter(registry, request.model, stitch_model=os.getenv("DRAFT_STITCH_MODEL") or None)
+            result = await writer.generate(
+                context=context,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens
+            )
+            try:
+                await asyncio.to_thread(track_draft_calls, result["usage"]["calls"])
+            except Exception as e:
+                print(f"Draft usage tracking failed: {e}")
+        else:
+            # Use Agno DraftAgent for better orchestration
+            draft_agent = get_draft_agent(request.model)
+            started = time.perf_counter()
+            result = await draft_agent.generate(
+                context=context,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens
+            )
+            result["usage"] = _single_usage(context, result["content"], request.model, time.perf_counter() - started)
         
-        # Save draft to database
+        # Save draft to database (with the outline and context section reworks reuse)
         try:
             saved_draft = create_draft(
                 content=result["content"],
                 topic_id=request.topic_id,
-                title="",  # Extract from content later
+                title=result.get("title", ""),
                 model_used=result["model"],
-                status="draft"
+                prompt_used=context,
+                status="draft",
+                outline=result.get("outline"),
             )
             draft_id = saved_draft.get("id")
         except Exception as db_error:
             draft_id = None
             print(f"Draft save failed: {db_error}")
         
+        await asyncio.to_thread(
+            record_draft_run, mode, result["model"], result["usage"], str(draft_id) if draft_id else None
+        )
+        
         return {
             "draft": {
                 "id": draft_id,
                 "content": result["content"],
-                "title": "",  # TODO: Extract from content
+                "title": result.get("title", ""),
                 "model": result["model"],
                 "agent": result.get("agent", "DraftAgent"),
+                "sections": result.get("sections"),
             },
             "metadata": {
                 "model_used": result["model"],
-                "agent_framework": "Agno",
+                "agent_framework": "Agno" if mode == "single" else "ModelRegistry",
+                "mode": mode,
+                "usage": result.get("usage"),
+                "scores": result.get("scores"),
+                "rewritten": result.get("rewritten"),
                 "saved_to_db": draft_id is not None,
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -181,6 +276,111 @@ async def get_draft_by_id(draft_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _draft_outline(draft: dict):
+    """The outline a draft was generated with, or a minimal one for single-shot and older drafts"""
+    from app.drafts.sections import DraftOutline
+    if draft.get("outline"):
+        return DraftOutline.model_validate(draft["outline"])
+    return DraftOutline(title=draft.get("title") or "", thesis=draft.get("title") or "")
+
+@router.get("/{draft_id}/sections")
+async def get_draft_sections(draft_id: str):
+    """Get a draft split into its addressable ``## Section`` parts (default sections for heading-less drafts)"""
+    try:
+        from app.drafts.sections import draft_sections
+        draft = get_draft(UUID(draft_id))
+        if not draft:
+            raise HTTPException(status_code=404, detail="Draft not found")
+        return {
+            "draft_id": draft_id,
+            "version": draft.get("version"),
+            "sections": [{"name": name, "content": text} for name, text in draft_sections(draft["content"])[1].items()],
+            "outline": draft.get("outline"),
+        }
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid draft ID format")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{draft_id}/sections/{section}")
+async def regenerate_draft_section(draft_id: str, section: str, request: RegenerateSectionRequest):
+    """Regenerate or refine one section and save the result as a new draft version"""
+    try:
+        from app.db.analytics import record_draft_run
+        from app.drafts.sections import (
+            SectionedDraftWriter,
+            assemble_draft,
+            draft_sections,
+            replace_section,
+            split_sections,
+            track_draft_calls,
+        )
+        
+        try:
+            draft = get_draft(UUID(draft_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid draft ID format")
+        if not draft:
+            raise HTTPException(status_code=404, detail="Draft not found")
+        
+        content = request.content or draft["content"]
+        title, texts = draft_sections(content)
+        if section not in texts:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Section '{section}' not found; draft has: {', '.join(texts)}"
+            )
+        model = request.model or draft.get("model_used")
+        if not model:
+            raise HTTPException(status_code=400, detail="model is required for drafts without a recorded model")
+        
+        # Reuse the stored outline and context: no outline call, no knowledge-base search
+        outline = _draft_outline(draft)
+        context = draft.get("prompt_used") or outline.title or "A Hinglish newsletter for builders."
+        result = await SectionedDraftWriter(registry, model).regenerate_section(
+            context=context,
+            outline=outline,
+            texts=texts,
+            name=section,
+            note=request.instruction or "",
+            refine=request.refine,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+        )
+        
+        action = "Refined" if request.refine else "Regenerated"
+        if split_sections(content):
+            updated = replace_section(content, section, result["content"])
+        else:
+            # Heading-less draft: the new version gets ## headings, so later reworks splice in place
+            updated = assemble_draft(title or draft.get("title") or "", {**texts, section: result["content"]})
+        version = create_draft_version(
+            draft_id=UUID(draft_id),
+            content=updated,
+            changes_summary=f"{action} {section} section" + (f": {request.instruction}" if request.instruction else ""),
+        )
+        try:
+            await asyncio.to_thread(track_draft_calls, result["usage"]["calls"])
+        except Exception as e:
+            print(f"Draft usage tracking failed: {e}")
+        await asyncio.to_thread(record_draft_run, "section", model, result["usage"], draft_id)
+        
+        return {
+            "version": version,
+            "section": {"name": section, "content": result["content"]},
+            "metadata": {
+                "model_used": model,
+                "refine": request.refine,
+                "usage": result["usage"],
+            }
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{draft_id}/versions")
 async def get_draft_versions(draft_id: str):
     """Get all versions of a draft"""
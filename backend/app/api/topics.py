@@ -1,8 +1,10 @@
+import asyncio
+import os
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from app.db.client import get_supabase
-from app.db.embeddings import search_similar_content
+from app.search.filters import SearchFilters
 
 router = APIRouter()
 
@@ -20,77 +22,78 @@ def get_topic_agent():
             detail=f"TopicAgent not available. Please install phidata: {str(e)}"
         )
 
+async def prioritize_online(interest_weights: Optional[Dict[str, float]], labeler) -> List[Dict]:
+    """Rank the online topic model's clusters for these interests"""
+    from app.topics.online import attach_items, get_topic_model, topic_reload_seconds
+    model = get_topic_model()
+    await model.refresh(topic_reload_seconds())
+    if not model.clusters:
+        # First run: build the model from stored embeddings
+        await model.rebalance()
+    limit = int(os.getenv("TOPIC_LABEL_CLUSTERS", "8"))
+    clusters = model.ranked(interest_weights, limit)
+    if labeler is not None:
+        try:
+            await model.relabel(labeler, clusters, interest_weights, limit)
+        except Exception as e:
+            print(f"Topic labeling failed, using tag labels: {e}")
+    await model.apersist()
+    return await asyncio.to_thread(attach_items, model.topics(interest_weights, limit))
+
 class PrioritizeTopicsRequest(BaseModel):
     content_items: Optional[List[Dict]] = None  # Optional: can query from DB
     interest_weights: Optional[Dict[str, float]] = None
     use_database: bool = True  # Whether to query stored content
+    tags: Optional[List[str]] = None  # Only consider content with any of these tags
+    days: Optional[int] = None  # Only consider content from the last N days
 
 @router.post("/prioritize")
 async def prioritize_topics(request: PrioritizeTopicsRequest):
-    """Prioritize topics from content items using Agno agent"""
+    """Cluster content embeddings into scored topics; TopicAgent only names the top clusters"""
     try:
-        content_items = request.content_items or []
+        from app.topics.engine import prioritize_topics as cluster_topics
+        from app.topics.online import topics_online_enabled
+        scope = SearchFilters.recent(request.days, tags=request.tags or []) if request.days else \
+            SearchFilters(tags=request.tags or [])
+        from_database = request.use_database and not request.content_items
         
-        # If use_database is True and no items provided, query from database
-        if request.use_database and not content_items:
-            supabase = get_supabase()
-            result = supabase.table("content_items").select(
-                "id, url, summary, extracted_text, tags, created_at"
-            ).order("created_at", desc=True).limit(50).execute()
-            
-            if result.data:
-                content_items = [
-                    {
-                        "id": item.get("id"),
-                        "summary": item.get("summary") or item.get("extracted_text", "")[:200],
-                        "tags": item.get("tags", []),
-                        "url": item.get("url"),
-                    }
-                    for item in result.data
-                ]
+        try:
+            labeler = get_topic_agent().label_clusters
+        except HTTPException as e:
+            # Clusters are still scored; titles fall back to their top tags
+            print(f"Topic labeling unavailable: {e.detail}")
+            labeler = None
         
-        # Use vector search to enhance topics with related content
-        if content_items:
-            # Cluster similar content items using embeddings
-            enhanced_items = []
-            for item in content_items[:10]:  # Limit for performance
-                try:
-                    search_query = item.get("summary", item.get("extracted_text", ""))[:100]
-                    if search_query:
-                        related = await search_similar_content(
-                            query_text=search_query,
-                            limit=3,
-                            threshold=0.7
-                        )
-                        item["related_content_count"] = len(related)
-                except Exception:
-                    item["related_content_count"] = 0
-                enhanced_items.append(item)
-            
-            topic_agent = get_topic_agent()
-            topics = await topic_agent.prioritize_topics(
-                content_items=enhanced_items,
-                interest_weights=request.interest_weights
-            )
+        if from_database and scope.is_empty() and topics_online_enabled():
+            # Maintained incrementally on ingest; only flagged clusters are relabeled
+            topics = await prioritize_online(request.interest_weights, labeler)
         else:
-            topics = []
+            topics = await cluster_topics(
+                scope,
+                interest_weights=request.interest_weights,
+                content_items=None if from_database else (request.content_items or []),
+                labeler=labeler,
+            )
         
         return {
             "topics": topics,
             "count": len(topics),
-            "source": "database" if request.use_database and not request.content_items else "provided"
+            "source": "database" if from_database else "provided"
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/list")
 async def list_topics(limit: int = 20):
-    """List prioritized topics from database"""
+    """List prioritized topics from database (kept current by the online topic model on ingest)"""
     try:
         supabase = get_supabase()
         result = supabase.table("topics").select(
-            "id, title, description, priority_score, tags, created_at, updated_at"
-        ).order("priority_score", desc=True).limit(limit).execute()
+            "id, title, description, reasoning, priority_score, tags, item_count, content_ids, "
+            "score_components, needs_relabel, created_at, updated_at"
+        ).gte("item_count", int(os.getenv("TOPIC_MIN_CLUSTER_SIZE", "2"))).order(
+            "priority_score", desc=True
+        ).limit(limit).execute()
         
         return {
             "topics": result.data if result.data else [],
@@ -0,0 +1,4 @@
+"""Process pool for CPU-bound work off the event loop"""
+from app.compute.pool import CpuPool, get_cpu_pool, run_cpu
+
+__all__ = ["CpuPool", "get_cpu_pool", "run_cpu"]
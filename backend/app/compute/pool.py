@@ -0,0 +1,184 @@
+"""Process pool for CPU-bound work (extraction, PDF parsing, hashing, tokenization, scoring)"""
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+@dataclass
+class TaskMetrics:
+    calls: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    in_flight: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "in_flight": self.in_flight,
+            "avg_ms": round(self.total_seconds / self.calls * 1000, 2) if self.calls else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 2),
+        }
+
+class CpuPool:
+    """ProcessPoolExecutor with an async task API, per-task timeouts and metrics.
+
+    ``run`` offloads a picklable top-level function. Until ``start`` is called
+    (tests, scripts, CPU_POOL_WORKERS=0) tasks run in a thread instead, which
+    still keeps the event loop responsive for I/O. A task that times out is
+    abandoned: the caller gets TimeoutError, but a worker already running it
+    finishes in the background.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        default_timeout: float = 60.0,
+        start_method: str = "forkserver",
+    ):
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.metrics: Dict[str, TaskMetrics] = {}
+        self.restarts = 0
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        if self._executor is None and self.max_workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+            )
+
+    def close(self, wait: bool = True) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None,
+        name: Optional[str] = None,
+    ) -> Any:
+        """Run ``fn(*args)`` in a worker process and await its result"""
+        metrics = self.metrics.setdefault(name or fn.__name__, TaskMetrics())
+        timeout = self.default_timeout if timeout is None else timeout
+        metrics.calls += 1
+        metrics.in_flight += 1
+        started = time.monotonic()
+        executor = self._executor
+        try:
+            if executor is not None:
+                future = asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+            else:
+                future = asyncio.to_thread(fn, *args)
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            metrics.timeouts += 1
+            raise
+        except BrokenProcessPool:
+            # A worker died (OOM, segfault in a parser); replace the pool for later tasks
+            metrics.failures += 1
+            self._restart(executor)
+            raise
+        except Exception:
+            metrics.failures += 1
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            metrics.in_flight -= 1
+            metrics.total_seconds += elapsed
+            metrics.max_seconds = max(metrics.max_seconds, elapsed)
+
+    def _restart(self, failed: Optional[ProcessPoolExecutor]) -> None:
+        # Every task in flight on the broken pool fails; only the first replaces it
+        if self._executor is None or self._executor is not failed:
+            return
+        self.close(wait=False)
+        self.restarts += 1
+        self.start()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "workers": self.max_workers if self.running else 0,
+            "restarts": self.restarts,
+            "tasks": {name: m.to_dict() for name, m in self.metrics.items()},
+        }
+
+class LoopLagMonitor:
+    """Samples event-loop lag: how late a sleep(interval) wakes up"""
+
+    def __init__(self, interval: float = 0.5, window: int = 120):
+        self.interval = interval
+        self.window = window
+        self.samples: list = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.monotonic() - started - self.interval))
+            del self.samples[:-self.window]
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.samples:
+            return {"samples": 0}
+        ordered = sorted(self.samples)
+        return {
+            "samples": len(ordered),
+            "p50_ms": round(ordered[len(ordered) // 2] * 1000, 2),
+            "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
+
+_cpu_pool: Optional[CpuPool] = None
+_loop_lag: Optional[LoopLagMonitor] = None
+
+def get_cpu_pool() -> CpuPool:
+    """Process-wide pool; the FastAPI lifespan (or worker entrypoint) starts and closes it"""
+    global _cpu_pool
+    if _cpu_pool is None:
+        _cpu_pool = CpuPool(
+            max_workers=int(os.getenv("CPU_POOL_WORKERS", "2")),
+            default_timeout=float(os.getenv("CPU_POOL_TASK_TIMEOUT", "60")),
+            start_method=os.getenv("CPU_POOL_START_METHOD", "forkserver"),
+        )
+    return _cpu_pool
+
+def get_loop_lag_monitor() -> LoopLagMonitor:
+    global _loop_lag
+    if _loop_lag is None:
+        _loop_lag = LoopLagMonitor()
+    return _loop_lag
+
+async def run_cpu(fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None, name: Optional[str] = None) -> Any:
+    """Offload a CPU-bound call to the shared pool"""
+    return await get_cpu_pool().run(fn, *args, timeout=timeout, name=name)
@@ -0,0 +1,4 @@
+"""Application settings: environment helpers and model configuration (models.yaml)"""
+from app.config.env import env_int
+
+__all__ = ["env_int"]
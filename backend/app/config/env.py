@@ -0,0 +1,5 @@
+"""Typed reads of optional environment settings"""
+import os
+
+def env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
@@ -1,12 +1,18 @@
 from .client import get_supabase, supabase_client
 from .schema import init_database
-from .embeddings import generate_embedding, create_content_with_embedding, search_similar_content
+from .embeddings import (
+    generate_embedding,
+    generate_embeddings,
+    create_content_with_embedding,
+    search_similar_content,
+)
 
 __all__ = [
     "get_supabase", 
     "supabase_client", 
     "init_database",
     "generate_embedding",
+    "generate_embeddings",
     "create_content_with_embedding",
     "search_similar_content",
 ]
@@ -1,5 +1,8 @@
 """Database operations for API usage tracking and analytics"""
-from typing import Dict, Any, Optional
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+from app.db.cache import TTLCache
 from app.db.client import get_supabase
 from uuid import UUID
 
@@ -31,72 +34,326 @@ def track_api_usage(
         print(f"API usage tracking failed: {e}")
         return {}
 
-def get_usage_stats(
+_usage_cache = TTLCache(ttl=float(os.getenv("ANALYTICS_CACHE_TTL", "30")))
+
+def _resolve_range(
+    days: Optional[int],
+    start: Optional[datetime],
+    end: Optional[datetime],
+) -> Tuple[datetime, datetime]:
+    """Turn days/start/end query arguments into a concrete UTC range"""
+    end = end or datetime.now(timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start is None:
+        start = end - timedelta(days=days) if days else datetime(1970, 1, 1, tzinfo=timezone.utc)
+    elif start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return start, end
+
+def _fetch_usage_totals(
+    start: datetime,
+    end: datetime,
     provider: Optional[str] = None,
-    days: int = 30,
-) -> Dict[str, Any]:
-    """Get API usage statistics"""
-    from datetime import datetime, timedelta
+) -> List[Dict[str, Any]]:
+    """Fetch usage totals grouped by provider/model/operation from the rollups"""
     supabase = get_supabase()
     
-    # Calculate date threshold
-    threshold_date = (datetime.now() - timedelta(days=days)).isoformat()
-    
-    query = supabase.table("api_usage").select("*").gte("created_at", threshold_date)
+    try:
+        result = supabase.rpc(
+            "get_usage_totals",
+            {
+                "range_start": start.isoformat(),
+                "range_end": end.isoformat(),
+                "filter_provider": provider,
+            }
+        ).execute()
+        return result.data or []
+    except Exception as e:
+        # Rollup migration not applied yet, aggregate raw rows instead
+        print(f"Usage rollup RPC unavailable, scanning api_usage: {e}")
     
+    query = supabase.table("api_usage").select(
+        "provider, model, operation_type, input_tokens, output_tokens, cost_estimated"
+    ).gte("created_at", start.isoformat()).lt("created_at", end.isoformat())
     if provider:
         query = query.eq("provider", provider)
-    
     result = query.execute()
     
-    if not result.data:
+    grouped: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    for r in result.data or []:
+        key = (
+            r.get("provider") or "unknown",
+            r.get("model") or "unknown",
+            r.get("operation_type") or "unknown",
+        )
+        row = grouped.setdefault(key, {
+            "provider": key[0],
+            "model": key[1],
+            "operation_type": key[2],
+            "request_count": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cost_estimated": 0.0,
+        })
+        row["request_count"] += 1
+        row["input_tokens"] += r.get("input_tokens") or 0
+        row["output_tokens"] += r.get("output_tokens") or 0
+        row["cost_estimated"] += r.get("cost_estimated") or 0.0
+    return list(grouped.values())
+
+def summarize_usage(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine grouped usage rows into totals and per-dimension breakdowns"""
+    totals = {"requests": 0, "input": 0, "output": 0, "cost": 0.0}
+    by_provider: Dict[str, Dict[str, Any]] = {}
+    by_model: Dict[str, Dict[str, Any]] = {}
+    by_operation: Dict[str, Dict[str, Any]] = {}
+    
+    for r in rows:
+        requests = int(r.get("request_count") or 0)
+        input_tokens = int(r.get("input_tokens") or 0)
+        output_tokens = int(r.get("output_tokens") or 0)
+        cost = float(r.get("cost_estimated") or 0.0)
+        
+        totals["requests"] += requests
+        totals["input"] += input_tokens
+        totals["output"] += output_tokens
+        totals["cost"] += cost
+        
+        model_key = f"{r.get('provider', 'unknown')}:{r.get('model', 'unknown')}"
+        for bucket, key in (
+            (by_provider, r.get("provider", "unknown")),
+            (by_model, model_key),
+            (by_operation, r.get("operation_type", "unknown")),
+        ):
+            entry = bucket.setdefault(key, {"cost": 0.0, "requests": 0, "tokens": 0})
+            entry["cost"] += cost
+            entry["requests"] += requests
+            entry["tokens"] += input_tokens + output_tokens
+    
+    def _round(group: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        return {k: {**v, "cost": round(v["cost"], 6)} for k, v in group.items()}
+    
+    return {
+        "total_requests": totals["requests"],
+        "total_input_tokens": totals["input"],
+        "total_output_tokens": totals["output"],
+        "total_tokens": totals["input"] + totals["output"],
+        "total_cost": round(totals["cost"], 6),
+        "by_provider": _round(by_provider),
+        "by_model": _round(by_model),
+        "by_operation": _round(by_operation),
+    }
+
+def get_usage_stats(
+    provider: Optional[str] = None,
+    days: int = 30,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Get API usage statistics (served from rollups, cached briefly)"""
+    start, end = _resolve_range(days, start, end)
+    # Round the cache key to the minute so repeated dashboard loads share it
+    cache_key = ("usage", provider, start.replace(second=0, microsecond=0),
+                 end.replace(second=0, microsecond=0))
+    
+    def _load() -> Dict[str, Any]:
+        stats = summarize_usage(_fetch_usage_totals(start, end, provider))
         return {
-            "total_requests": 0,
-            "total_tokens": 0,
-            "total_cost": 0.0,
+            **stats,
             "period_days": days,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
         }
     
-    total_input = sum(r.get("input_tokens", 0) for r in result.data)
-    total_output = sum(r.get("output_tokens", 0) for r in result.data)
-    total_cost = sum(r.get("cost_estimated", 0) for r in result.data)
+    return _usage_cache.get_or_set(cache_key, _load)
+
+def get_cost_breakdown(
+    provider: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Get cost breakdown by provider and model (all time unless a range is given)"""
+    all_time = start is None
+    start, end = _resolve_range(None, start, end)
+    cache_key = ("costs", provider, start.replace(second=0, microsecond=0),
+                 end.replace(second=0, microsecond=0))
     
-    # Group by provider
-    by_provider = {}
-    by_operation = {}
+    def _load() -> Dict[str, Any]:
+        stats = summarize_usage(_fetch_usage_totals(start, end, provider))
+        return {
+            "total_cost": stats["total_cost"],
+            "by_provider": {k: {
+                "total": v["cost"],
+                "count": v["requests"],
+                "avg_per_request": round(v["cost"] / v["requests"], 6) if v["requests"] > 0 else 0
+            } for k, v in stats["by_provider"].items()},
+            "by_model": {k: {
+                "total": v["cost"],
+                "count": v["requests"]
+            } for k, v in stats["by_model"].items()},
+            "period": "all_time" if all_time else f"{start.isoformat()}/{end.isoformat()}",
+            "total_requests": stats["total_requests"],
+        }
     
-    for r in result.data:
-        prov = r.get("provider", "unknown")
-        op_type = r.get("operation_type", "unknown")
-        
-        if prov not in by_provider:
-            by_provider[prov] = {"cost": 0.0, "requests": 0, "tokens": 0}
-        by_provider[prov]["cost"] += r.get("cost_estimated", 0)
-        by_provider[prov]["requests"] += 1
-        by_provider[prov]["tokens"] += r.get("input_tokens", 0) + r.get("output_tokens", 0)
-        
-        if op_type not in by_operation:
-            by_operation[op_type] = {"cost": 0.0, "requests": 0}
-        by_operation[op_type]["cost"] += r.get("cost_estimated", 0)
-        by_operation[op_type]["requests"] += 1
+    return _usage_cache.get_or_set(cache_key, _load)
+
+def _bucket_start(created_at: str, bucket: str) -> datetime:
+    value = datetime.fromisoformat(created_at.replace("Z", "+00:00")).astimezone(timezone.utc)
+    value = value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0) if bucket == "day" else value
+
+def _fetch_usage_timeseries(
+    start: datetime,
+    end: datetime,
+    bucket: str,
+    provider: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Fetch per-bucket usage totals by provider from the rollups"""
+    supabase = get_supabase()
     
-    return {
-        "total_requests": len(result.data),
-        "total_input_tokens": total_input,
-        "total_output_tokens": total_output,
-        "total_tokens": total_input + total_output,
-        "total_cost": round(total_cost, 6),
-        "by_provider": {k: {
-            "cost": round(v["cost"], 6),
-            "requests": v["requests"],
-            "tokens": v["tokens"]
-        } for k, v in by_provider.items()},
-        "by_operation": {k: {
-            "cost": round(v["cost"], 6),
-            "requests": v["requests"]
-        } for k, v in by_operation.items()},
-        "period_days": days,
-    }
+    try:
+        result = supabase.rpc(
+            "get_usage_timeseries",
+            {
+                "range_start": start.isoformat(),
+                "range_end": end.isoformat(),
+                "bucket": bucket,
+                "filter_provider": provider,
+            }
+        ).execute()
+        return result.data or []
+    except Exception as e:
+        # Rollup migration not applied yet, aggregate raw rows instead
+        print(f"Usage rollup RPC unavailable, scanning api_usage: {e}")
+    
+    query = supabase.table("api_usage").select(
+        "created_at, provider, input_tokens, output_tokens, cost_estimated"
+    ).gte("created_at", start.isoformat()).lt("created_at", end.isoformat())
+    if provider:
+        query = query.eq("provider", provider)
+    result = query.execute()
+    
+    grouped: Dict[Tuple[datetime, str], Dict[str, Any]] = {}
+    for r in result.data or []:
+        key = (_bucket_start(r["created_at"], bucket), r.get("provider") or "unknown")
+        row = grouped.setdefault(key, {
+            "bucket_start": key[0].isoformat(),
+            "provider": key[1],
+            "request_count": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cost_estimated": 0.0,
+        })
+        row["request_count"] += 1
+        row["input_tokens"] += r.get("input_tokens") or 0
+        row["output_tokens"] += r.get("output_tokens") or 0
+        row["cost_estimated"] += r.get("cost_estimated") or 0.0
+    return [grouped[key] for key in sorted(grouped)]
+
+def get_usage_timeseries(
+    bucket: str = "day",
+    provider: Optional[str] = None,
+    days: int = 30,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Get per-bucket usage totals ('hour' or 'day') from the rollups"""
+    if bucket not in ("hour", "day"):
+        raise ValueError("bucket must be 'hour' or 'day'")
+    start, end = _resolve_range(days, start, end)
+    cache_key = ("timeseries", bucket, provider, start.replace(second=0, microsecond=0),
+                 end.replace(second=0, microsecond=0))
+    
+    def _load() -> List[Dict[str, Any]]:
+        return _fetch_usage_timeseries(start, end, bucket, provider)
+    
+    return _usage_cache.get_or_set(cache_key, _load)
+
+def record_draft_run(
+    mode: str,
+    model: str,
+    usage: Dict[str, Any],
+    draft_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Store one draft generation's totals and per-stage usage in draft_runs"""
+    try:
+        total = usage.get("total") or {}
+        data = {
+            "draft_id": draft_id,
+            "mode": mode,
+            "model": model,
+            "input_tokens": total.get("input_tokens", 0),
+            "output_tokens": total.get("output_tokens", 0),
+            "cost_estimated": total.get("cost", 0.0),
+            "latency_ms": int(round(total.get("seconds", 0.0) * 1000)),
+            "stages": usage.get("stages") or {},
+        }
+        result = get_supabase().table("draft_runs").insert(data).execute()
+        return result.data[0] if result.data else {}
+    except Exception as e:
+        # Don't fail draft generation if tracking fails
+        print(f"Draft run tracking failed: {e}")
+        return {}
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+def summarize_draft_runs(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per mode: run count, cost and latency (avg / p50 / p90) and average cost and seconds per stage"""
+    by_mode: Dict[str, List[Dict[str, Any]]] = {}
+    for r in rows:
+        by_mode.setdefault(r.get("mode") or "unknown", []).append(r)
+    
+    summary = {}
+    for mode, runs in by_mode.items():
+        costs = [float(r.get("cost_estimated") or 0.0) for r in runs]
+        seconds = [(r.get("latency_ms") or 0) / 1000 for r in runs]
+        stages: Dict[str, Dict[str, Any]] = {}
+        for r in runs:
+            for name, stage in (r.get("stages") or {}).items():
+                entry = stages.setdefault(name, {"model": stage.get("model"), "runs": 0, "cost": 0.0, "seconds": 0.0})
+                entry["runs"] += 1
+                entry["cost"] += float(stage.get("cost") or 0.0)
+                entry["seconds"] += float(stage.get("seconds") or 0.0)
+        summary[mode] = {
+            "runs": len(runs),
+            "total_cost": round(sum(costs), 6),
+            "avg_cost": round(sum(costs) / len(runs), 6),
+            "avg_seconds": round(sum(seconds) / len(runs), 3),
+            "p50_seconds": round(_percentile(seconds, 0.5), 3),
+            "p90_seconds": round(_percentile(seconds, 0.9), 3),
+            "avg_output_tokens": round(sum(r.get("output_tokens") or 0 for r in runs) / len(runs), 1),
+            "stages": {name: {
+                "model": entry["model"],
+                "runs": entry["runs"],
+                "avg_cost": round(entry["cost"] / entry["runs"], 6),
+                "avg_seconds": round(entry["seconds"] / entry["runs"], 3),
+            } for name, entry in stages.items()},
+        }
+    return summary
+
+def get_draft_run_stats(
+    days: int = 30,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Compare draft generation modes (single, sections, cascade) by cost and latency"""
+    start, end = _resolve_range(days, start, end)
+    cache_key = ("drafts", start.replace(second=0, microsecond=0), end.replace(second=0, microsecond=0))
+    
+    def _load() -> Dict[str, Any]:
+        result = get_supabase().table("draft_runs").select(
+            "mode, input_tokens, output_tokens, cost_estimated, latency_ms, stages"
+        ).gte("created_at", start.isoformat()).lt("created_at", end.isoformat()).execute()
+        return {
+            "by_mode": summarize_draft_runs(result.data or []),
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+        }
+    
+    return _usage_cache.get_or_set(cache_key, _load)
 
 def track_newsletter_analytics(
     draft_id: UUID,
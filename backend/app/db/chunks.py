@@ -0,0 +1,159 @@
+"""Chunk-level embeddings: storage, incremental embedding and grouped retrieval"""
+import asyncio
+import os
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional, Union
+from app.compute.pool import run_cpu
+from app.db.client import get_supabase
+from app.db.embeddings import generate_embedding, generate_embeddings
+from app.ingest.chunking import Chunk, Chunker, chunk_text
+from app.search.filters import SearchFilters
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+def chunking_enabled() -> bool:
+    return os.getenv("CHUNK_EMBEDDINGS_ENABLED", "true").lower() == "true"
+
+def chunk_min_chars() -> int:
+    """Texts shorter than this are covered by the item-level embedding alone"""
+    return int(os.getenv("CHUNK_MIN_CHARS", "1000"))
+
+def new_chunker() -> Chunker:
+    return Chunker(
+        max_tokens=int(os.getenv("CHUNK_MAX_TOKENS", "400")),
+        overlap_tokens=int(os.getenv("CHUNK_OVERLAP_TOKENS", "60")),
+    )
+
+class ChunkEmbedder:
+    """Embeds and stores a document's chunks one batch at a time as they are produced.
+
+    At most ``batch_size`` chunks are held in memory; each full batch is sent
+    as one embeddings request and upserted before more text is read.
+    """
+
+    def __init__(self, content_id: str, batch_size: Optional[int] = None, model: str = EMBEDDING_MODEL):
+        self.content_id = content_id
+        self.batch_size = batch_size or int(os.getenv("CHUNK_EMBED_BATCH", "32"))
+        self.model = model
+        self.chunker = new_chunker()
+        self._batch: List[Chunk] = []
+        self.chunks_stored = 0
+        self.tokens = 0
+
+    async def feed(self, piece: str) -> None:
+        # Tokenizing a piece is CPU work; keep it off the event loop
+        for chunk in await asyncio.to_thread(self.chunker.feed, piece):
+            await self._add(chunk)
+
+    async def feed_text(self, text: str) -> None:
+        """Chunk a whole in-memory text in the CPU pool, then embed batch by batch"""
+        chunks = await run_cpu(
+            chunk_text, text, self.chunker.max_tokens, self.chunker.overlap_tokens, name="chunk_text"
+        )
+        for chunk in chunks:
+            await self._add(chunk)
+
+    async def finish(self) -> int:
+        """Flush the tail, drop chunks left over from a longer earlier version; returns chunk count"""
+        for chunk in self.chunker.finish():
+            await self._add(chunk)
+        await self._flush()
+        get_supabase().table("content_chunks").delete().eq(
+            "content_id", self.content_id
+        ).eq("model_used", self.model).gte("chunk_index", self.chunks_stored).execute()
+        return self.chunks_stored
+
+    async def _add(self, chunk: Chunk) -> None:
+        self._batch.append(chunk)
+        if len(self._batch) >= self.batch_size:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        embeddings = await generate_embeddings([chunk.text for chunk in batch], self.model)
+        get_supabase().table("content_chunks").upsert(
+            [
+                {
+                    "content_id": self.content_id,
+                    "chunk_index": chunk.index,
+                    "text": chunk.text,
+                    "token_count": chunk.token_count,
+                    "embedding": embedding,
+                    "model_used": self.model,
+                }
+                for chunk, embedding in zip(batch, embeddings)
+            ],
+            on_conflict="content_id,chunk_index,model_used",
+        ).execute()
+        self.chunks_stored += len(batch)
+        self.tokens += sum(chunk.token_count for chunk in batch)
+
+async def embed_content_chunks(
+    content_id: str,
+    text: Union[str, Iterable[str], AsyncIterable[str]],
+    batch_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Chunk, embed and store a document (a string or a sync/async stream of text pieces)"""
+    embedder = ChunkEmbedder(content_id, batch_size=batch_size)
+    if isinstance(text, str):
+        await embedder.feed_text(text)
+    elif hasattr(text, "__aiter__"):
+        async for piece in text:
+            await embedder.feed(piece)
+    else:
+        for piece in text:
+            await embedder.feed(piece)
+    count = await embedder.finish()
+    return {"chunk_status": "created", "chunk_count": count, "chunk_tokens": embedder.tokens}
+
+def group_chunk_hits(rows: List[Dict[str, Any]], limit: int, passages: int = 3) -> List[Dict[str, Any]]:
+    """Collapse chunk hits to one result per content item, scored by its best chunk"""
+    grouped: Dict[str, Dict[str, Any]] = {}
+    for row in sorted(rows, key=lambda r: r.get("similarity") or 0.0, reverse=True):
+        content_id = str(row["content_id"])
+        result = grouped.get(content_id)
+        if result is None:
+            result = grouped[content_id] = {
+                "content_id": content_id,
+                "similarity": row.get("similarity"),
+                **{k: v for k, v in row.items() if k.startswith("content_") and k != "content_id"},
+                "matched_chunks": [],
+                "chunk_hits": 0,
+            }
+        result["chunk_hits"] += 1
+        if len(result["matched_chunks"]) < passages:
+            result["matched_chunks"].append({
+                "chunk_index": row.get("chunk_index"),
+                "text": row.get("chunk_text"),
+                "similarity": row.get("similarity"),
+            })
+    return list(grouped.values())[:limit]
+
+async def search_content_chunks(
+    query_text: str,
+    limit: int = 10,
+    threshold: float = 0.5,
+    ef_search: Optional[int] = None,
+    filters: Optional[SearchFilters] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """Search chunk embeddings and return matching parent items with their best passages.
+
+    Over-fetches chunks so several hits in one document still leave ``limit``
+    distinct items. Returns None when match_content_chunks is not installed.
+    """
+    query_embedding = await generate_embedding(query_text)
+    params = {
+        "query_embedding": query_embedding,
+        "match_threshold": threshold,
+        "match_count": limit * int(os.getenv("CHUNK_SEARCH_OVERSAMPLE", "4")),
+        "ef_search": ef_search,
+    }
+    if filters and not filters.is_empty():
+        params.update(filters.to_rpc_params())
+    try:
+        result = get_supabase().rpc("match_content_chunks", params).execute()
+    except Exception as e:
+        print(f"Chunk search unavailable: {e}")
+        return None
+    return group_chunk_hits(result.data or [], limit)
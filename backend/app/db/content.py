@@ -10,6 +10,9 @@ def create_content_item(
     extracted_text: Optional[str] = None,
     summary: Optional[str] = None,
     tags: Optional[List[str]] = None,
+    canonical_url: Optional[str] = None,
+    content_hash: Optional[str] = None,
+    simhash: Optional[int] = None,
 ) -> Dict[str, Any]:
     """Create a new content item"""
     supabase = get_supabase()
@@ -25,16 +28,44 @@ def create_content_item(
         data["summary"] = summary
     if tags:
         data["tags"] = tags
+    if canonical_url:
+        data["canonical_url"] = canonical_url
+    if content_hash:
+        data["content_hash"] = content_hash
+    if simhash is not None:
+        data["simhash"] = simhash
     
     result = supabase.table("content_items").insert(data).execute()
     return result.data[0] if result.data else {}
 
+def create_content_items_bulk(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Insert many content items in one request (existing URLs are updated)"""
+    if not items:
+        return []
+    supabase = get_supabase()
+    result = supabase.table("content_items").upsert(items, on_conflict="url").execute()
+    return result.data if result.data else []
+
 def get_content_item(content_id: UUID) -> Optional[Dict[str, Any]]:
     """Get a content item by ID"""
     supabase = get_supabase()
     result = supabase.table("content_items").select("*").eq("id", str(content_id)).execute()
     return result.data[0] if result.data else None
 
+def get_content_items(content_ids: List[str], columns: str = "id, url, summary, tags") -> Dict[str, Dict[str, Any]]:
+    """Get many content items by ID in one query, keyed by ID"""
+    if not content_ids:
+        return {}
+    supabase = get_supabase()
+    result = supabase.table("content_items").select(columns).in_("id", list(content_ids)).execute()
+    return {str(row["id"]): row for row in result.data or []}
+
+def delete_content_item(content_id: UUID) -> bool:
+    """Delete a content item (its embeddings go with it via ON DELETE CASCADE)"""
+    supabase = get_supabase()
+    result = supabase.table("content_items").delete().eq("id", str(content_id)).execute()
+    return bool(result.data)
+
 def store_embedding(
     content_id: UUID,
     embedding: List[float],
@@ -57,6 +88,17 @@ def store_embedding(
     
     return result.data[0] if result.data else {}
 
+def store_embeddings_bulk(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Store many embeddings in one request"""
+    if not rows:
+        return []
+    supabase = get_supabase()
+    result = supabase.table("content_embeddings").upsert(
+        rows,
+        on_conflict="content_id,model_used"
+    ).execute()
+    return result.data if result.data else []
+
 def search_similar_content(
     query_embedding: List[float],
     limit: int = 10,
@@ -10,6 +10,7 @@ def create_draft(
     model_used: Optional[str] = None,
     prompt_used: Optional[str] = None,
     status: str = "draft",
+    outline: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     """Create a new draft"""
     supabase = get_supabase()
@@ -28,6 +29,8 @@ def create_draft(
         data["model_used"] = model_used
     if prompt_used:
         data["prompt_used"] = prompt_used
+    if outline:
+        data["outline"] = outline
     
     result = supabase.table("drafts").insert(data).execute()
     return result.data[0] if result.data else {}
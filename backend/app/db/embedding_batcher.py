@@ -0,0 +1,103 @@
+"""Micro-batching of concurrent embedding requests"""
+import asyncio
+import math
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+# OpenAI embeddings accept up to 2048 inputs and ~300k tokens per request
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_REQUEST = 300_000
+
+def estimate_tokens(text: str) -> int:
+    """Conservative token estimate (~3 chars per token) without a tokenizer"""
+    return max(1, math.ceil(len(text) / 3))
+
+class EmbeddingBatcher:
+    """Collects concurrent embed() calls and sends them as one batched request.
+
+    A batch is flushed when ``max_batch_size`` inputs are queued, when adding
+    another input would exceed ``max_batch_tokens``, or ``max_wait_ms`` after
+    the first input arrived, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        send_batch: Callable[[List[str]], Awaitable[List[List[float]]]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        max_batch_tokens: int = 250_000,
+    ):
+        self.send_batch = send_batch
+        self.max_batch_size = min(max_batch_size, MAX_INPUTS_PER_REQUEST)
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_tokens = min(max_batch_tokens, MAX_TOKENS_PER_REQUEST)
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches_sent = 0
+        self.inputs_sent = 0
+
+    async def embed(self, text: str) -> List[float]:
+        """Queue one text and wait for its embedding"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        tokens = estimate_tokens(text)
+
+        if self._pending and self._pending_tokens + tokens > self.max_batch_tokens:
+            self._dispatch()
+
+        self._pending.append((text, future))
+        self._pending_tokens += tokens
+
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._dispatch)
+
+        return await future
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list through the same batching path as single calls"""
+        return list(await asyncio.gather(*(self.embed(t) for t in texts)))
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        # Identical texts in one window are sent once and fanned back out
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = await self.send_batch(unique_texts)
+            if len(vectors) != len(unique_texts):
+                raise RuntimeError(
+                    f"Embedding batch returned {len(vectors)} vectors for {len(unique_texts)} inputs"
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_sent += 1
+        self.inputs_sent += len(unique_texts)
+        by_text = dict(zip(unique_texts, vectors))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+    def stats(self) -> dict:
+        """Batch counters for monitoring"""
+        return {
+            "batches_sent": self.batches_sent,
+            "inputs_sent": self.inputs_sent,
+            "avg_batch_size": round(self.inputs_sent / self.batches_sent, 2) if self.batches_sent else 0.0,
+        }
@@ -0,0 +1,135 @@
+"""Content-addressed cache for embeddings (in-memory LRU + Supabase table)"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+from app.db.cache import LRUCache
+from app.db.client import get_supabase
+
+# Safe limit for text-embedding-3-small
+MAX_EMBEDDING_CHARS = 8000
+
+def normalize_embedding_text(text: str) -> str:
+    """Normalize text the same way before hashing and before embedding"""
+    text = " ".join(text.split())
+    return text[:MAX_EMBEDDING_CHARS]
+
+def embedding_text_hash(text: str, model: str) -> str:
+    """Hash of (model, normalized text) used as the cache key"""
+    normalized = normalize_embedding_text(text)
+    return hashlib.sha256(f"{model}\n{normalized}".encode("utf-8")).hexdigest()
+
+def parse_embedding(value: Any) -> Optional[List[float]]:
+    """PostgREST returns pgvector columns as '[0.1,...]' strings; accept both forms"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return json.loads(value)
+    return list(value)
+
+class EmbeddingCache:
+    """Looks up embeddings in memory, then embedding_cache, then content_embeddings"""
+
+    def __init__(self, max_size: int = 2048, persistent: bool = True):
+        self.memory = LRUCache(max_size=max_size)
+        self.persistent = persistent
+        self.table_hits = 0
+        self.content_hits = 0
+        self.misses = 0
+
+    def get(self, text_hash: str, model: str) -> Optional[List[float]]:
+        """Return a cached embedding or None"""
+        return self.get_many([text_hash], model).get(text_hash)
+
+    def get_many(self, text_hashes: List[str], model: str) -> Dict[str, List[float]]:
+        """Cached embeddings by hash (misses are left out); at most one query per persistent table"""
+        found: Dict[str, List[float]] = {}
+        missing: List[str] = []
+        for text_hash in dict.fromkeys(text_hashes):
+            embedding = self.memory.get((model, text_hash))
+            if embedding is not None:
+                found[text_hash] = embedding
+            else:
+                missing.append(text_hash)
+
+        if missing and self.persistent:
+            stored = self._get_persistent(missing, model)
+            for text_hash, embedding in stored.items():
+                self.memory.set((model, text_hash), embedding)
+            found.update(stored)
+
+        self.misses += len(missing) - sum(1 for text_hash in missing if text_hash in found)
+        return found
+
+    def set(self, text_hash: str, model: str, embedding: List[float]) -> None:
+        """Store an embedding in memory and in the persistent table"""
+        self.set_many({text_hash: embedding}, model)
+
+    def set_many(self, embeddings: Dict[str, List[float]], model: str) -> None:
+        """Store embeddings by hash in memory and in the persistent table (one upsert)"""
+        for text_hash, embedding in embeddings.items():
+            self.memory.set((model, text_hash), embedding)
+        if not self.persistent or not embeddings:
+            return
+        try:
+            get_supabase().table("embedding_cache").upsert(
+                [
+                    {"text_hash": text_hash, "model_used": model, "embedding": embedding}
+                    for text_hash, embedding in embeddings.items()
+                ],
+                on_conflict="text_hash,model_used"
+            ).execute()
+        except Exception as e:
+            # Cache writes must never fail the embedding call
+            print(f"Embedding cache write failed: {e}")
+
+    def _get_persistent(self, text_hashes: List[str], model: str) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        try:
+            supabase = get_supabase()
+            result = supabase.table("embedding_cache").select("text_hash, embedding").in_(
+                "text_hash", text_hashes
+            ).eq("model_used", model).execute()
+            for row in result.data or []:
+                found.setdefault(row["text_hash"], parse_embedding(row["embedding"]))
+            self.table_hits += len(found)
+
+            # Reuse embeddings already stored for identical content
+            rest = [text_hash for text_hash in text_hashes if text_hash not in found]
+            if rest:
+                result = supabase.table("content_embeddings").select("text_hash, embedding").in_(
+                    "text_hash", rest
+                ).eq("model_used", model).execute()
+                before = len(found)
+                for row in result.data or []:
+                    found.setdefault(row["text_hash"], parse_embedding(row["embedding"]))
+                self.content_hits += len(found) - before
+        except Exception as e:
+            print(f"Embedding cache lookup failed: {e}")
+        return found
+
+    def stats(self) -> dict:
+        """Hit counts per tier and overall hit rate"""
+        memory_stats = self.memory.stats()
+        hits = memory_stats["hits"] + self.table_hits + self.content_hits
+        lookups = hits + self.misses
+        return {
+            "memory": memory_stats,
+            "table_hits": self.table_hits,
+            "content_hits": self.content_hits,
+            "misses": self.misses,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get or create the process-wide embedding cache"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(
+            max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "2048")),
+            persistent=os.getenv("EMBEDDING_CACHE_PERSIST", "true").lower() != "false",
+        )
+    return _embedding_cache
@@ -1,12 +1,37 @@
 """Embedding generation and storage operations"""
+import asyncio
 import os
-from typing import List, Optional
+from typing import Any, AsyncIterable, Dict, List, Optional
 from openai import AsyncOpenAI
 import httpx
+from app.compute.pool import run_cpu
 from app.db.client import get_supabase
-from app.db.content import create_content_item, get_content_item
+from app.db.content import create_content_item, delete_content_item, get_content_item
 from app.db.analytics import track_api_usage
+from app.db.embedding_batcher import EmbeddingBatcher
+from app.db.embedding_cache import (
+    embedding_text_hash,
+    get_embedding_cache,
+    normalize_embedding_text,
+    parse_embedding,
+)
+from app.ingest.dedup import dedup_fields, register_content, unregister_content
+from app.search.ann import (
+    aindex_content_embeddings,
+    content_metadata,
+    get_vector_index,
+    normalize_rows,
+    top_k_exact,
+    unindex_content,
+    vector_search_backend,
+    vector_store_enabled,
+)
+from app.search.filters import SearchFilters
+from app.search.quantize import get_quantized_index
+from app.search.result_cache import abump_search_generation, bump_search_generation
+from app.search.store import get_vector_store, sync_index_from_store
 from uuid import UUID
+import numpy as np
 
 # OpenAI client for embeddings
 _embedding_client: Optional[AsyncOpenAI] = None
@@ -23,23 +48,12 @@ def get_embedding_client() -> AsyncOpenAI:
         _embedding_client = AsyncOpenAI(api_key=api_key)
     return _embedding_client
 
-async def generate_embedding(text: str, model: str = "text-embedding-3-small") -> List[float]:
-    """Generate embedding for text using OpenAI"""
+async def _request_embeddings(texts: List[str], model: str) -> List[List[float]]:
+    """Send one batched embeddings request to OpenAI"""
     client = get_embedding_client()
-    
-    # Clean and prepare text
-    text = text.replace("\n", " ").strip()
-    if len(text) == 0:
-        raise ValueError("Text cannot be empty")
-    
-    # Limit text length (OpenAI embedding limit)
-    max_chars = 8000  # Safe limit for text-embedding-3-small
-    if len(text) > max_chars:
-        text = text[:max_chars]
-    
     response = await client.embeddings.create(
         model=model,
-        input=text
+        input=texts
     )
     
     # Track API usage (synchronous function)
@@ -55,7 +69,47 @@ async def generate_embedding(text: str, model: str = "text-embedding-3-small") -
     except Exception:
         pass  # Don't fail if tracking fails
     
-    return response.data[0].embedding
+    return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+_embedding_batchers: Dict[str, EmbeddingBatcher] = {}
+
+def get_embedding_batcher(model: str = "text-embedding-3-small") -> EmbeddingBatcher:
+    """Get or create the shared batcher for an embedding model"""
+    if model not in _embedding_batchers:
+        _embedding_batchers[model] = EmbeddingBatcher(
+            send_batch=lambda texts: _request_embeddings(texts, model),
+            max_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "64")),
+            max_wait_ms=float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5")),
+            max_batch_tokens=int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "250000")),
+        )
+    return _embedding_batchers[model]
+
+async def generate_embedding(text: str, model: str = "text-embedding-3-small") -> List[float]:
+    """Generate embedding for text using OpenAI (cached and micro-batched)"""
+    return (await generate_embeddings([text], model))[0]
+
+async def generate_embeddings(texts: List[str], model: str = "text-embedding-3-small") -> List[List[float]]:
+    """Generate embeddings for many texts, preserving input order.
+
+    The cache is checked with one lookup per table and new embeddings are
+    written back in one upsert, both in a thread; only misses are embedded.
+    """
+    # Clean and prepare text (also truncates to the embedding limit)
+    texts = [normalize_embedding_text(text) for text in texts]
+    if any(len(text) == 0 for text in texts):
+        raise ValueError("Text cannot be empty")
+    
+    cache = get_embedding_cache()
+    hashes = [embedding_text_hash(text, model) for text in texts]
+    found = await asyncio.to_thread(cache.get_many, hashes, model)
+    missing = {text_hash: text for text_hash, text in zip(hashes, texts) if text_hash not in found}
+    if missing:
+        batcher = get_embedding_batcher(model)
+        embedded = await asyncio.gather(*(batcher.embed(text) for text in missing.values()))
+        new = dict(zip(missing, embedded))
+        await asyncio.to_thread(cache.set_many, new, model)
+        found.update(new)
+    return [found[text_hash] for text_hash in hashes]
 
 async def create_content_with_embedding(
     url: Optional[str] = None,
@@ -63,18 +117,32 @@ async def create_content_with_embedding(
     extracted_text: Optional[str] = None,
     summary: Optional[str] = None,
     tags: Optional[List[str]] = None,
+    dedup: Optional[Dict[str, Any]] = None,
+    chunk_source: Optional[AsyncIterable[str]] = None,
 ) -> dict:
-    """Create content item and generate/store embedding"""
-    # Create content item first
+    """Create content item and generate/store embedding.
+
+    ``dedup`` overrides the fingerprint computed from ``extracted_text`` and
+    ``chunk_source`` streams the full text for chunking, for documents where
+    only a prefix is stored (file uploads).
+    """
+    # Create content item first, with the keys future ingests dedup against
+    fields = {
+        **await run_cpu(dedup_fields, url, None if dedup is not None else extracted_text),
+        **(dedup or {}),
+    }
     content_item = create_content_item(
         url=url,
         file_path=file_path,
         extracted_text=extracted_text,
         summary=summary,
         tags=tags or [],
+        **fields,
     )
     
     content_id = UUID(content_item["id"])
+    register_content(str(content_id), fields=fields)
+    await abump_search_generation()
     
     # Generate embedding from summary or extracted text
     text_for_embedding = summary or extracted_text
@@ -95,87 +163,222 @@ async def create_content_with_embedding(
             "content_id": str(content_id),
             "embedding": embedding,
             "model_used": "text-embedding-3-small",
+            "text_hash": embedding_text_hash(text_for_embedding, "text-embedding-3-small"),
         }
         
         result = supabase.table("content_embeddings").upsert(
             embedding_data,
             on_conflict="content_id,model_used"
         ).execute()
-        
-        return {
-            **content_item,
-            "embedding_status": "created",
-            "embedding_id": result.data[0]["id"] if result.data else None,
-        }
+        await aindex_content_embeddings([str(content_id)], [embedding], [content_item])
+        from app.topics.online import aobserve_content_embeddings
+        await aobserve_content_embeddings([str(content_id)], [embedding], [content_item])
+        await abump_search_generation()
+        from app.search.knn import duplicate_threshold, update_knn_graph
+        neighbors = (await update_knn_graph([str(content_id)], [embedding])).get(str(content_id), [])
     except Exception as e:
         return {
             **content_item,
             "embedding_status": "failed",
             "error": str(e)
         }
+    
+    return {
+        **content_item,
+        "embedding_status": "created",
+        "embedding_id": result.data[0]["id"] if result.data else None,
+        # Semantic near-duplicates that the URL/SimHash checks can't catch
+        "possible_duplicates": [
+            {"content_id": cid, "similarity": similarity}
+            for cid, similarity in neighbors if similarity >= duplicate_threshold()
+        ],
+        **(await _embed_chunks(str(content_id), chunk_source or extracted_text)),
+    }
+
+async def _embed_chunks(content_id: str, text: Any) -> dict:
+    """Chunk-level embeddings for long texts or text streams (never fails the ingest)"""
+    from app.db.chunks import chunk_min_chars, chunking_enabled, embed_content_chunks
+    
+    if not chunking_enabled() or not text or (isinstance(text, str) and len(text) < chunk_min_chars()):
+        return {}
+    try:
+        chunk_result = await embed_content_chunks(content_id, text)
+        await abump_search_generation()
+        return chunk_result
+    except Exception as e:
+        print(f"Chunk embedding failed for {content_id}: {e}")
+        return {"chunk_status": "failed", "chunk_error": str(e)}
+
+def _delete_content(content_id: str) -> bool:
+    deleted = delete_content_item(UUID(content_id))
+    unindex_content([content_id])
+    from app.topics.online import forget_content
+    forget_content([content_id])
+    unregister_content(content_id)
+    bump_search_generation()
+    return deleted
+
+async def delete_content_with_embedding(content_id: str) -> bool:
+    """Delete a content item and drop it from every local index, cache and the kNN graph"""
+    deleted = await asyncio.to_thread(_delete_content, content_id)
+    from app.search.knn import remove_from_knn_graph
+    await remove_from_knn_graph([content_id])
+    return deleted
+
+def score_embeddings(embeddings: List[Any], query_embedding: List[float], k: int):
+    """Exact top-k cosine scores of stored (possibly pgvector-text) embeddings"""
+    matrix = normalize_rows(np.array([parse_embedding(e) for e in embeddings], dtype=np.float32))
+    query_vec = normalize_rows(np.asarray(query_embedding, dtype=np.float32))[0]
+    idx, scores = top_k_exact(matrix, query_vec, k)
+    return [int(i) for i in idx], [float(s) for s in scores]
+
+def _local_search_results(hits, metadata) -> List[dict]:
+    return [
+        {"content_id": content_id, "similarity": similarity, **metadata.get(content_id, {})}
+        for content_id, similarity in hits
+    ]
+
+def match_content_rpc(
+    query_embedding: List[float],
+    limit: int = 10,
+    threshold: float = 0.7,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    filters: Optional[SearchFilters] = None,
+) -> Optional[List[dict]]:
+    """Vector search in Postgres without shipping embeddings back.
+
+    Uses match_content_items (migrations 005/007, which apply ``filters``
+    inside the scan); falls back to the older match_content_embeddings RPC
+    and drops its ``embedding`` column. Returns None if no usable RPC exists.
+    """
+    supabase = get_supabase()
+    params = {
+        "query_embedding": query_embedding,
+        "match_threshold": threshold,
+        "match_count": limit,
+        "ef_search": ef_search,
+        "match_probes": probes,
+    }
+    if filters and not filters.is_empty():
+        params.update(filters.to_rpc_params())
+    try:
+        result = supabase.rpc("match_content_items", params).execute()
+        return result.data or []
+    except Exception:
+        if filters and not filters.is_empty():
+            # The legacy RPC cannot filter; over-fetching would drop results
+            return None
+    
+    try:
+        result = supabase.rpc(
+            "match_content_embeddings",
+            {
+                "query_embedding": query_embedding,
+                "match_threshold": threshold,
+                "match_count": limit,
+            }
+        ).execute()
+        return [{k: v for k, v in row.items() if k != "embedding"} for row in (result.data or [])]
+    except Exception:
+        # RPC functions not installed
+        return None
 
 async def search_similar_content(
     query_text: str,
     limit: int = 10,
     threshold: float = 0.7,
+    exact: bool = False,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    filters: Optional[SearchFilters] = None,
 ) -> List[dict]:
-    """Search for similar content using vector similarity"""
+    """Search for similar content using vector similarity.
+
+    Served from the in-process HNSW index once it is ready (``exact`` forces
+    brute-force scoring for recall checks), or from the shared memory-mapped
+    store when VECTOR_INDEX_BACKEND=mmap/quantized, otherwise from the
+    Supabase RPC. Results never include the embedding vectors. ``filters``
+    are pushed down into the RPC so filtered queries return a full top-k.
+    """
     try:
-        # Generate embedding for query
         query_embedding = await generate_embedding(query_text)
+    except Exception as e:
+        print(f"Vector search error: {e}")
+        return []
+    return await search_by_embedding(query_embedding, limit, threshold, exact, ef_search, probes, filters)
+
+async def search_by_embedding(
+    query_embedding: List[float],
+    limit: int = 10,
+    threshold: float = 0.7,
+    exact: bool = False,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    filters: Optional[SearchFilters] = None,
+) -> List[dict]:
+    """search_similar_content for an embedding already at hand (no embedding API call)"""
+    try:
+        # Local indexes hold no filter metadata, so filtered queries go to Postgres
+        filtered = filters is not None and not filters.is_empty()
         
-        # Use Supabase RPC function if available
-        supabase = get_supabase()
+        if not filtered and vector_store_enabled() and vector_search_backend() in ("mmap", "quantized"):
+            store = get_vector_store()
+            quantized = get_quantized_index()
+            if quantized.ready and not exact:
+                sync_index_from_store(quantized, store)
+                hits = quantized.search(
+                    query_embedding,
+                    k=limit,
+                    threshold=threshold,
+                    mode=os.getenv("QUANTIZED_SEARCH_MODE", "int8"),
+                    oversample=int(os.getenv("QUANTIZED_SEARCH_OVERSAMPLE", "4")),
+                )
+                return _local_search_results(hits, store.metadata)
+            if len(store):
+                hits = store.search(query_embedding, k=limit, threshold=threshold)
+                return _local_search_results(hits, store.metadata)
+        
+        index = get_vector_index()
+        if index.ready and not filtered:
+            if vector_store_enabled():
+                # Pick up embeddings other workers published since the last query
+                sync_index_from_store(index, get_vector_store())
+            hits = index.search(query_embedding, k=limit, threshold=threshold, exact=exact, ef=ef_search)
+            return _local_search_results(hits, index.metadata)
         
-        try:
-            result = supabase.rpc(
-                "match_content_embeddings",
-                {
-                    "query_embedding": query_embedding,
-                    "match_threshold": threshold,
-                    "match_count": limit,
-                }
-            ).execute()
-            
-            if result.data:
-                return result.data
-        except Exception:
-            # RPC function not available, use fallback method
-            pass
+        rpc_results = match_content_rpc(
+            query_embedding, limit, threshold, ef_search=ef_search, probes=probes, filters=filters
+        )
+        if rpc_results is not None:
+            return rpc_results
         
-        # Fallback: Get all embeddings and compute similarity (not efficient, but works)
-        # For production, use the RPC function
+        supabase = get_supabase()
+        # Fallback: score every stored embedding in one vectorized pass
         all_embeddings = supabase.table("content_embeddings").select(
-            "*, content_items(*)"
+            "content_id, embedding, content_items(id, summary, url, tags, created_at)"
         ).execute()
-        
-        if not all_embeddings.data:
+        rows = [
+            row for row in (all_embeddings.data or [])
+            if row.get("embedding") and (not filtered or filters.matches(row.get("content_items") or {}))
+        ]
+        if not rows:
             return []
         
-        # Compute similarities (simple cosine similarity)
-        import numpy as np
-        
-        results = []
-        query_vec = np.array(query_embedding)
-        
-        for item in all_embeddings.data:
-            if not item.get("embedding"):
-                continue
-            
-            item_vec = np.array(item["embedding"])
-            similarity = float(np.dot(query_vec, item_vec) / (np.linalg.norm(query_vec) * np.linalg.norm(item_vec)))
-            
-            if similarity > threshold:
-                results.append({
-                    **item,
-                    "similarity": similarity,
-                })
-        
-        # Sort by similarity and limit
-        results.sort(key=lambda x: x["similarity"], reverse=True)
-        return results[:limit]
+        # Parsing and scoring thousands of vectors is CPU-bound; run it in the pool
+        idx, scores = await run_cpu(
+            score_embeddings, [row["embedding"] for row in rows], query_embedding, limit, name="score_embeddings"
+        )
+        return [
+            {
+                "content_id": rows[i]["content_id"],
+                "similarity": float(score),
+                **content_metadata(rows[i].get("content_items")),
+            }
+            for i, score in zip(idx, scores)
+            if score > threshold
+        ]
         
     except Exception as e:
         print(f"Vector search error: {e}")
         return []
-
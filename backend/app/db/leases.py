@@ -0,0 +1,28 @@
+"""Database leases so one worker process owns each background maintenance job"""
+import os
+import socket
+from app.db.client import get_supabase
+
+def lease_holder() -> str:
+    """Identifies this worker process across hosts"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def acquire_lease(name: str, ttl_seconds: float) -> bool:
+    """Take or renew the named lease for ``ttl_seconds``; False if another worker holds it"""
+    try:
+        result = get_supabase().rpc("acquire_lease", {
+            "p_name": name,
+            "p_holder": lease_holder(),
+            "p_ttl_seconds": max(1, int(ttl_seconds)),
+        }).execute()
+        return bool(result.data)
+    except Exception as e:
+        # Lease migration not applied yet: behave like a single worker
+        print(f"Lease RPC unavailable, running {name} here: {e}")
+        return True
+
+def release_lease(name: str) -> None:
+    try:
+        get_supabase().rpc("release_lease", {"p_name": name, "p_holder": lease_holder()}).execute()
+    except Exception as e:
+        print(f"Lease release failed for {name}: {e}")
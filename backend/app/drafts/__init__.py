@@ -0,0 +1,5 @@
+"""Newsletter draft generation strategies"""
+from app.drafts.cascade import CascadeDraftWriter
+from app.drafts.sections import SECTIONS, SectionedDraftWriter, replace_section, split_sections
+
+__all__ = ["SECTIONS", "CascadeDraftWriter", "SectionedDraftWriter", "replace_section", "split_sections"]
@@ -0,0 +1,152 @@
+"""Model cascade for drafts: a cheap model writes, a scorer flags weak sections, a premium model fixes them"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from app.drafts.sections import (
+    SECTIONS,
+    DraftOutline,
+    SectionedDraftWriter,
+    assemble_draft,
+    stage_usage,
+    total_usage,
+)
+
+DEFAULT_CHEAP_MODEL = "meta-llama/llama-3-8b-instruct"
+
+def build_score_prompt(outline: DraftOutline, texts: Dict[str, str]) -> str:
+    body = "\n\n".join(f"## {name}\n{text}" for name, text in texts.items())
+    names = ", ".join(f'"{name}": {{"score": 7, "issue": "what to fix, in a few words"}}' for name in texts)
+    return f"""Score each section of this Hinglish newsletter draft from 1 to 10 for clarity, insight,
+specificity and natural Hinglish, judged against the thesis: {outline.thesis}
+Reply with ONLY a JSON object: {{{names}}}
+
+{body}"""
+
+def parse_scores(raw: str, names: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Section name -> {"score", "issue"} for the sections the scorer answered for"""
+    start, end = raw.find("{"), raw.rfind("}")
+    if start == -1 or end < start:
+        return {}
+    try:
+        data = json.loads(raw[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    scores = {}
+    for name in names:
+        entry = data.get(name) if isinstance(data, dict) else None
+        if isinstance(entry, (int, float)):
+            entry = {"score": entry}
+        if isinstance(entry, dict) and isinstance(entry.get("score"), (int, float)):
+            scores[name] = {"score": float(entry["score"]), "issue": str(entry.get("issue") or "")}
+    return scores
+
+def weak_sections(
+    texts: Dict[str, str],
+    scores: Dict[str, Dict[str, Any]],
+    min_score: float,
+    sections=SECTIONS,
+) -> Dict[str, str]:
+    """Sections to rewrite -> why: scored below ``min_score``, or under half their target length"""
+    targets = {section.name: section.words for section in sections}
+    weak = {}
+    for name, text in texts.items():
+        words = len(text.split())
+        if name in targets and words < targets[name] / 2:
+            weak[name] = f"too short ({words} words, aim for about {targets[name]})"
+        elif name in scores and scores[name]["score"] < min_score:
+            weak[name] = scores[name]["issue"] or f"scored {scores[name]['score']:g}/10"
+    return weak
+
+class CascadeDraftWriter:
+    """Drafts with a cheap model and spends premium-model tokens only where the draft is weak.
+
+    Stages, each with its own cost and latency in ``usage["stages"]``:
+    draft (cheap model, outline + parallel sections), score (one call
+    rating every section), refine (premium model rewrites up to
+    ``max_rewrites`` of the lowest-scoring weak sections concurrently) and
+    edit (premium model's seam edits, short output).
+    """
+
+    def __init__(
+        self,
+        registry,
+        premium_model: str,
+        cheap_model: str = DEFAULT_CHEAP_MODEL,
+        scorer_model: Optional[str] = None,
+        min_score: float = 7.0,
+        max_rewrites: int = 2,
+        sections=SECTIONS,
+    ):
+        self.registry = registry
+        self.premium_model = premium_model
+        self.cheap_model = cheap_model
+        self.scorer_model = scorer_model or cheap_model
+        self.min_score = min_score
+        self.max_rewrites = max_rewrites
+        self.sections = tuple(sections)
+        self.drafter = SectionedDraftWriter(registry, cheap_model, sections=sections, stitch=False)
+        self.refiner = SectionedDraftWriter(registry, premium_model, sections=sections)
+
+    async def score(self, outline: DraftOutline, texts: Dict[str, str]) -> Tuple[Dict[str, Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Scores per section (empty if the scorer fails) and the call's usage"""
+        try:
+            response, usage = await self.drafter.call(build_score_prompt(outline, texts), self.scorer_model, 0.0, 300)
+        except Exception as e:
+            print(f"Draft scoring failed, falling back to the edit pass: {e}")
+            return {}, None
+        return parse_scores(response.content, list(texts)), usage
+
+    async def generate(self, context: str, temperature: float = 0.7, max_tokens: Optional[int] = 2000) -> Dict[str, Any]:
+        started = time.perf_counter()
+        draft = await self.drafter.generate(context, temperature, max_tokens)
+        outline = DraftOutline.model_validate(draft["outline"])
+        texts = {s["name"]: s["content"] for s in draft["sections"]}
+        draft_calls = [draft["usage"]["outline"], *draft["usage"]["sections"].values()]
+        stages = {"draft": stage_usage(draft_calls, draft["usage"]["total"]["seconds"], self.cheap_model)}
+        calls: List[Tuple[str, Dict[str, Any]]] = [("cascade_draft", call) for call in draft_calls]
+
+        stage_started = time.perf_counter()
+        scores, score_usage = await self.score(outline, texts)
+        stages["score"] = stage_usage([score_usage] if score_usage else [], time.perf_counter() - stage_started, self.scorer_model)
+        if score_usage:
+            calls.append(("cascade_score", score_usage))
+
+        weak = weak_sections(texts, scores, self.min_score, self.sections)
+        # Lowest scores first; unscored (too short) sections count as 0
+        rewrite = sorted(weak, key=lambda name: scores.get(name, {}).get("score", 0.0))[:self.max_rewrites]
+        stage_started = time.perf_counter()
+        by_name = {section.name: section for section in self.sections}
+        rewritten = await asyncio.gather(*(
+            self.refiner.rewrite_section(context, outline, by_name[name], texts[name], weak[name], temperature, max_tokens)
+            for name in rewrite
+        ))
+        for name, (text, _) in zip(rewrite, rewritten):
+            texts[name] = text
+        refine_calls = [usage for _, usage in rewritten]
+        stages["refine"] = stage_usage(refine_calls, time.perf_counter() - stage_started, self.premium_model)
+        calls += [("cascade_refine", usage) for usage in refine_calls]
+
+        stage_started = time.perf_counter()
+        edits_applied, edit_usage = await self.refiner.stitch_sections(outline, texts)
+        stages["edit"] = stage_usage([edit_usage] if edit_usage else [], time.perf_counter() - stage_started, self.premium_model)
+        if edit_usage:
+            calls.append(("cascade_edit", edit_usage))
+
+        return {
+            "content": assemble_draft(outline.title, texts),
+            "title": outline.title,
+            "model": self.premium_model,
+            "agent": "CascadeDraftWriter",
+            "mode": "cascade",
+            "outline": outline.model_dump(),
+            "sections": [{"name": name, "content": text} for name, text in texts.items()],
+            "scores": scores,
+            "rewritten": {name: weak[name] for name in rewrite},
+            "stitch_edits": edits_applied,
+            "usage": {
+                "stages": stages,
+                "calls": [{"operation": operation, **usage} for operation, usage in calls],
+                "total": total_usage([usage for _, usage in calls], time.perf_counter() - started),
+            },
+        }
@@ -0,0 +1,468 @@
+"""Section-parallel newsletter drafting: outline, concurrent sections, stitching pass, single-section reworks"""
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel, ValidationError
+
+DRAFT_INSTRUCTIONS = """You are a newsletter writer creating content in Hinglish (English script with Hindi words mixed naturally).
+
+Style Guidelines:
+- English for logic and technical concepts
+- Hindi for emotion and cultural context
+- Sharp, witty, builder-energy tone
+- Target audience: Engineers, designers, founders, builders
+- Length: 500-800 words
+
+Structure Required:
+1. Hook - Insightful or witty observation
+2. Context - Explain the topic simply
+3. Insight - Core argument or framework
+4. Takeaway - What reader learns / feels
+5. Closing - Punchline or curiosity loop
+
+References: Naval, Paul Graham, Sahil Bloom, Raj Shamani, Varun Mayya
+Write naturally, mixing English and Hindi words seamlessly."""
+
+@dataclass(frozen=True)
+class DraftSection:
+    name: str
+    purpose: str
+    words: int  # Target length; the five targets add up to ~670 words
+
+SECTIONS: Tuple[DraftSection, ...] = (
+    DraftSection("Hook", "an insightful or witty opening observation", 60),
+    DraftSection("Context", "explain the topic simply", 180),
+    DraftSection("Insight", "the core argument or framework", 250),
+    DraftSection("Takeaway", "what the reader learns and feels", 120),
+    DraftSection("Closing", "a punchline or curiosity loop", 60),
+)
+
+# Roughly 1.3 tokens per Hinglish word, with headroom so sections aren't cut off
+TOKENS_PER_WORD = 2.5
+MAX_STITCH_EDITS = 6
+
+class DraftOutline(BaseModel):
+    """What every section is written against, so parallel sections agree"""
+    title: str = ""
+    thesis: str
+    tone: str = ""
+    sections: Dict[str, str] = {}
+
+def _json_span(raw: str, open_char: str, close_char: str) -> Optional[str]:
+    start, end = raw.find(open_char), raw.rfind(close_char)
+    return raw[start:end + 1] if start != -1 and end > start else None
+
+def build_outline_prompt(context: str, sections=SECTIONS) -> str:
+    plan = ",\n    ".join(f'"{s.name}": "one line: what the {s.name} says ({s.purpose})"' for s in sections)
+    return f"""Plan a Hinglish newsletter from the context below. Reply with ONLY a JSON object:
+{{
+  "title": "a short punchy title",
+  "thesis": "the one-sentence argument the whole newsletter makes",
+  "tone": "a few words on voice and mood",
+  "sections": {{
+    {plan}
+  }}
+}}
+No markdown fences, no text outside the JSON.
+
+Context:
+{context}"""
+
+def parse_outline(raw: str) -> DraftOutline:
+    """Outline from the model's JSON; falls back to the raw reply as the thesis"""
+    span = _json_span(raw, "{", "}")
+    if span:
+        try:
+            outline = DraftOutline.model_validate(json.loads(span))
+            if outline.thesis.strip():
+                return outline
+        except (json.JSONDecodeError, ValidationError):
+            pass
+    return DraftOutline(thesis=" ".join(raw.split())[:500])
+
+def format_outline(outline: DraftOutline, sections=SECTIONS) -> str:
+    lines = []
+    if outline.title:
+        lines.append(f"Title: {outline.title}")
+    lines.append(f"Thesis: {outline.thesis}")
+    if outline.tone:
+        lines.append(f"Tone: {outline.tone}")
+    lines.append("Sections:")
+    for n, section in enumerate(sections, 1):
+        lines.append(f"{n}. {section.name}: {outline.sections.get(section.name) or section.purpose}")
+    return "\n".join(lines)
+
+def build_section_prompt(context: str, outline: DraftOutline, section: DraftSection, sections=SECTIONS) -> str:
+    return f"""Context:
+{context}
+
+Newsletter plan (other writers are writing the other sections at the same time):
+{format_outline(outline, sections)}
+
+Write ONLY the {section.name} section ({section.purpose}), about {section.words} words.
+It must follow from the section before it and lead into the one after it; don't cover what other sections cover.
+No heading, no preamble, no notes."""
+
+def build_draft_prompt(context: str, sections=SECTIONS) -> str:
+    """Single-shot prompt; asks for the ``## Section`` headings section reworks address"""
+    headings = ", ".join(f"## {s.name}" for s in sections)
+    return f"""Generate a Hinglish newsletter based on this context:
+
+{context}
+
+Follow the structure and style guidelines provided. Make it engaging, informative, and naturally mixing English and Hindi.
+Start with a "# Title" line, then put each part under its own markdown heading, in this order: {headings}."""
+
+def build_stitch_prompt(outline: DraftOutline, texts: Dict[str, str]) -> str:
+    body = "\n\n".join(f"## {name}\n{text}" for name, text in texts.items())
+    return f"""These sections of one Hinglish newsletter were written in parallel.
+Thesis: {outline.thesis}
+
+Check only the seams: transitions between sections, points repeated across sections,
+contradictions, and names or terms used inconsistently. Reply with ONLY a JSON array of at most
+{MAX_STITCH_EDITS} small edits, each replacing an exact snippet of one section:
+[{{"section": "Insight", "find": "exact text from that section", "replace": "new text"}}]
+Reply [] if the sections already read as one piece.
+
+{body}"""
+
+def build_rewrite_prompt(
+    context: str,
+    outline: DraftOutline,
+    section: DraftSection,
+    current: str,
+    note: str = "",
+    sections=SECTIONS,
+    around: str = "",
+) -> str:
+    """Section prompt plus the current text (refine) and the neighboring sections' edges"""
+    prompt = build_section_prompt(context, outline, section, sections)
+    if around:
+        prompt += f"\n\nThe text around it, which stays as is:\n{around}"
+    if current:
+        prompt += f"\n\nCurrent {section.name} section:\n{current}"
+    if note:
+        prompt += f"\n\nWhat to improve: {note}"
+    verb = "Rewrite" if current else "Write"
+    return prompt + f"\n\n{verb} the {section.name} section. Reply with the new section text only."
+
+def parse_stitch_edits(raw: str) -> List[Dict[str, str]]:
+    span = _json_span(raw, "[", "]")
+    if not span:
+        return []
+    try:
+        edits = json.loads(span)
+    except json.JSONDecodeError:
+        return []
+    return [
+        e for e in edits
+        if isinstance(e, dict) and isinstance(e.get("find"), str) and e["find"]
+        and isinstance(e.get("replace"), str) and isinstance(e.get("section"), str)
+    ][:MAX_STITCH_EDITS]
+
+def apply_stitch_edits(texts: Dict[str, str], edits: List[Dict[str, str]]) -> int:
+    """Apply edits whose snippet occurs in the named section; returns how many applied"""
+    applied = 0
+    for edit in edits:
+        text = texts.get(edit["section"])
+        if text is not None and edit["find"] in text:
+            texts[edit["section"]] = text.replace(edit["find"], edit["replace"], 1)
+            applied += 1
+    return applied
+
+def assemble_draft(title: str, texts: Dict[str, str]) -> str:
+    """Markdown draft with one ``## Section`` heading per section"""
+    parts = [f"# {title}"] if title else []
+    parts.extend(f"## {name}\n\n{text.strip()}" for name, text in texts.items())
+    return "\n\n".join(parts)
+
+_HEADING = re.compile(r"^##\s+(.+?)\s*$", re.MULTILINE)
+
+def split_sections(content: str) -> Dict[str, str]:
+    """Inverse of assemble_draft: section name -> text (empty if the draft has no ``##`` headings)"""
+    matches = list(_HEADING.finditer(content))
+    return {
+        match.group(1): content[match.end():matches[i + 1].start() if i + 1 < len(matches) else len(content)].strip()
+        for i, match in enumerate(matches)
+    }
+
+_TITLE = re.compile(r"^#\s+(.+?)\s*$")
+# "Hook", "**Hook:**", "### 1. Hook" or "Hook -" opening a paragraph of a heading-less draft
+_LABEL = re.compile(r"^[#*_ \t]*(?:\d+[.)][ \t]*)?(?P<name>[A-Za-z]+)[*_ \t]*(?:[:\-\u2013\u2014][*_ \t]*|\n|$)")
+
+def draft_sections(content: str, sections=SECTIONS) -> Tuple[str, Dict[str, str]]:
+    """(title, section texts) of any draft: its ``##`` sections, or a heading-less one mapped onto ``sections``
+
+    Heading-less drafts (single-shot and older ones) are split at paragraphs
+    labelled with a section name, or failing that, in proportion to the
+    sections' word targets.
+    """
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", content.strip()) if p.strip()]
+    title_match = _TITLE.match(paragraphs[0].split("\n", 1)[0]) if paragraphs else None
+    title = title_match.group(1) if title_match else ""
+    texts = split_sections(content)
+    if texts:
+        return title, texts
+    if title_match:
+        paragraphs[0] = paragraphs[0].split("\n", 1)[1].strip() if "\n" in paragraphs[0] else ""
+        paragraphs = [p for p in paragraphs if p]
+
+    names = {s.name.lower(): s.name for s in sections}
+    labelled: List[Tuple[Optional[str], str]] = []
+    for paragraph in paragraphs:
+        match = _LABEL.match(paragraph)
+        name = names.get(match.group("name").lower()) if match else None
+        labelled.append((name, paragraph[match.end():].strip() if name else paragraph))
+    groups: Dict[str, List[str]] = {s.name: [] for s in sections}
+    if len({name for name, _ in labelled if name}) >= 2:
+        current = sections[0].name
+        for name, text in labelled:
+            current = name or current
+            if text:
+                groups[current].append(text)
+    else:
+        counts = [len(p.split()) for p in paragraphs]
+        total = sum(counts) or 1
+        budget = sum(s.words for s in sections)
+        bounds, cumulative = [], 0
+        for section in sections:
+            cumulative += section.words
+            bounds.append(cumulative / budget)
+        seen = 0
+        for paragraph, count in zip(paragraphs, counts):
+            middle = (seen + count / 2) / total
+            index = next((i for i, bound in enumerate(bounds) if middle < bound), len(sections) - 1)
+            groups[sections[index].name].append(paragraph)
+            seen += count
+    return title, {name: "\n\n".join(texts) for name, texts in groups.items()}
+
+def replace_section(content: str, name: str, text: str) -> str:
+    """Swap one section's text, leaving every other byte of the draft untouched"""
+    matches = list(_HEADING.finditer(content))
+    for i, match in enumerate(matches):
+        if match.group(1) == name:
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+            tail = "\n\n" if i + 1 < len(matches) else ("\n" if content.endswith("\n") else "")
+            return f"{content[:match.end(1)]}\n\n{text.strip()}{tail}{content[end:]}"
+    raise KeyError(name)
+
+def surrounding_text(texts: Dict[str, str], name: str, words: int = 60) -> str:
+    """End of the section before ``name`` and start of the one after, for local coherence"""
+    names = list(texts)
+    i = names.index(name)
+    parts = []
+    if i > 0:
+        before = texts[names[i - 1]].split()
+        parts.append(f"...end of {names[i - 1]}: {' '.join(before[-words:])}")
+    if i + 1 < len(names):
+        after = texts[names[i + 1]].split()
+        parts.append(f"Start of {names[i + 1]}: {' '.join(after[:words])}...")
+    return "\n".join(parts)
+
+def section_spec(name: str, sections=SECTIONS, current: str = "") -> DraftSection:
+    """The named DraftSection, or one sized like ``current`` for headings the editor added"""
+    for section in sections:
+        if section.name == name:
+            return section
+    return DraftSection(name, "the section under this heading", max(60, len(current.split())))
+
+def _usage(response, seconds: float, cost: float) -> Dict[str, Any]:
+    return {
+        "model": response.model,
+        "provider": response.provider,
+        "input_tokens": response.input_tokens,
+        "output_tokens": response.output_tokens,
+        "cost": round(cost, 6),
+        "seconds": round(seconds, 3),
+    }
+
+def stage_usage(calls: List[Dict[str, Any]], seconds: float, model: str) -> Dict[str, Any]:
+    """total_usage of one pipeline stage, labeled with its model"""
+    return {"model": model, **total_usage(calls, seconds)}
+
+def total_usage(calls: List[Dict[str, Any]], seconds: float) -> Dict[str, Any]:
+    """Token, cost and call totals of several calls plus the wall-clock ``seconds`` they took"""
+    return {
+        "input_tokens": sum(c["input_tokens"] for c in calls),
+        "output_tokens": sum(c["output_tokens"] for c in calls),
+        "cost": round(sum(c["cost"] for c in calls), 6),
+        "calls": len(calls),
+        "seconds": round(seconds, 3),
+    }
+
+class SectionedDraftWriter:
+    """Writes a draft as an outline call, five concurrent section calls and a stitching call.
+
+    Latency is roughly outline + slowest section + stitch instead of one
+    generation of the whole newsletter; the stitch call only returns small
+    edits, so its output stays short. ``registry`` is a ModelRegistry (its
+    per-provider rate limiter bounds the concurrent section calls).
+    """
+
+    def __init__(self, registry, model_id: str, stitch_model: Optional[str] = None, sections=SECTIONS, stitch: bool = True):
+        self.registry = registry
+        self.model_id = model_id
+        self.stitch_model = stitch_model or model_id
+        self.sections = tuple(sections)
+        self.stitch = stitch
+
+    async def call(self, prompt: str, model_id: str, temperature: float, max_tokens: int):
+        """One registry call; returns (response, usage)"""
+        started = time.perf_counter()
+        response = await self.registry.generate(
+            prompt=prompt,
+            model_id=model_id,
+            system_prompt=DRAFT_INSTRUCTIONS,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        cost = self.registry.estimate_cost(response.input_tokens, response.output_tokens, model_id)
+        return response, _usage(response, time.perf_counter() - started, cost)
+
+    def _budget(self, section: DraftSection, max_tokens: Optional[int]) -> int:
+        budget = int(section.words * TOKENS_PER_WORD)
+        return min(budget, max_tokens) if max_tokens else budget
+
+    async def outline(self, context: str, temperature: float = 0.7) -> Tuple[DraftOutline, Dict[str, Any]]:
+        response, usage = await self.call(build_outline_prompt(context, self.sections), self.model_id, temperature, 400)
+        return parse_outline(response.content), usage
+
+    async def write_section(
+        self,
+        context: str,
+        outline: DraftOutline,
+        section: DraftSection,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        response, usage = await self.call(
+            build_section_prompt(context, outline, section, self.sections),
+            self.model_id,
+            temperature,
+            self._budget(section, max_tokens),
+        )
+        return response.content.strip(), usage
+
+    async def rewrite_section(
+        self,
+        context: str,
+        outline: DraftOutline,
+        section: DraftSection,
+        current: str,
+        note: str = "",
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Improve one existing section against the same outline"""
+        response, usage = await self.call(
+            build_rewrite_prompt(context, outline, section, current, note, self.sections),
+            self.model_id,
+            temperature,
+            self._budget(section, max_tokens),
+        )
+        return response.content.strip() or current, usage
+
+    async def regenerate_section(
+        self,
+        context: str,
+        outline: DraftOutline,
+        texts: Dict[str, str],
+        name: str,
+        note: str = "",
+        refine: bool = True,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Rework one section of an existing draft; the call is sized to that section only"""
+        current = texts[name]
+        section = section_spec(name, self.sections, current)
+        response, usage = await self.call(
+            build_rewrite_prompt(
+                context, outline, section, current if refine else "", note, self.sections,
+                around=surrounding_text(texts, name),
+            ),
+            self.model_id,
+            temperature,
+            self._budget(section, max_tokens),
+        )
+        operation = "draft_section_refine" if refine else "draft_section_regenerate"
+        return {
+            "section": name,
+            "content": response.content.strip() or current,
+            "usage": {
+                "stages": {"section": stage_usage([usage], usage["seconds"], self.model_id)},
+                "calls": [{"operation": operation, **usage}],
+                "total": total_usage([usage], usage["seconds"]),
+            },
+        }
+
+    async def stitch_sections(self, outline: DraftOutline, texts: Dict[str, str]) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Apply the stitch model's seam edits to ``texts`` in place; returns (edits applied, usage)"""
+        try:
+            response, usage = await self.call(build_stitch_prompt(outline, texts), self.stitch_model, 0.2, 600)
+        except Exception as e:
+            # The unstitched sections are still a complete draft
+            print(f"Draft stitching failed: {e}")
+            return 0, None
+        return apply_stitch_edits(texts, parse_stitch_edits(response.content)), usage
+
+    async def generate(self, context: str, temperature: float = 0.7, max_tokens: Optional[int] = 2000) -> Dict[str, Any]:
+        started = time.perf_counter()
+        outline, outline_usage = await self.outline(context, temperature)
+        sections_started = time.perf_counter()
+        written = await asyncio.gather(*(
+            self.write_section(context, outline, section, temperature, max_tokens)
+            for section in self.sections
+        ))
+        sections_seconds = time.perf_counter() - sections_started
+        texts = {section.name: text for section, (text, _) in zip(self.sections, written)}
+        section_usage = {section.name: usage for section, (_, usage) in zip(self.sections, written)}
+        calls = [("draft_outline", outline_usage)] + [("draft_section", usage) for usage in section_usage.values()]
+        stages = {
+            "outline": stage_usage([outline_usage], outline_usage["seconds"], self.model_id),
+            "sections": stage_usage(list(section_usage.values()), sections_seconds, self.model_id),
+        }
+        usage: Dict[str, Any] = {"outline": outline_usage, "sections": section_usage}
+
+        edits_applied = 0
+        if self.stitch:
+            edits_applied, stitch_usage = await self.stitch_sections(outline, texts)
+            if stitch_usage:
+                usage["stitch"] = stitch_usage
+                calls.append(("draft_stitch", stitch_usage))
+                stages["stitch"] = stage_usage([stitch_usage], stitch_usage["seconds"], self.stitch_model)
+
+        usage["stages"] = stages
+        usage["calls"] = [{"operation": operation, **call} for operation, call in calls]
+        usage["total"] = total_usage([call for _, call in calls], time.perf_counter() - started)
+        return {
+            "content": assemble_draft(outline.title, texts),
+            "title": outline.title,
+            "model": self.model_id,
+            "agent": "SectionedDraftWriter",
+            "mode": "sections",
+            "outline": outline.model_dump(),
+            "sections": [{"name": name, "content": text} for name, text in texts.items()],
+            "stitch_edits": edits_applied,
+            "usage": usage,
+        }
+
+def track_draft_calls(calls: List[Dict[str, Any]]) -> None:
+    """Record each call of a draft (``usage["calls"]``) in api_usage under its operation"""
+    from app.db.analytics import track_api_usage
+    for call in calls:
+        track_api_usage(
+            provider=call["provider"],
+            model=call["model"],
+            operation_type=call["operation"],
+            input_tokens=call["input_tokens"],
+            output_tokens=call["output_tokens"],
+            cost_estimated=call["cost"],
+        )
+
+def draft_generation_mode() -> str:
+    return os.getenv("DRAFT_GENERATION_MODE", "single").lower()
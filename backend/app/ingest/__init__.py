@@ -0,0 +1,4 @@
+"""Content ingestion pipeline and stages"""
+from app.ingest.pipeline import Pipeline, PipelineItem, Stage
+
+__all__ = ["Pipeline", "PipelineItem", "Stage"]
@@ -0,0 +1,196 @@
+"""Bulk URL ingestion: fetch -> extract -> dedup -> summarize -> embed -> write -> chunk"""
+from typing import Any, Callable, Dict, List, Optional
+import httpx
+from app.config import env_int
+from app.compute.pool import run_cpu
+from app.db.chunks import chunk_min_chars, chunking_enabled, embed_content_chunks
+from app.db.content import create_content_items_bulk, store_embeddings_bulk
+from app.db.embedding_cache import embedding_text_hash
+from app.db.embeddings import generate_embeddings
+from app.ingest.dedup import (
+    DedupIndex,
+    afind_duplicate,
+    canonicalize_url,
+    dedup_fields,
+    fields_simhash,
+    register_content,
+)
+from app.ingest.extractors import extract_html
+from app.ingest.pipeline import Pipeline, PipelineItem, Stage
+from app.search.ann import aindex_content_embeddings
+from app.search.knn import update_knn_graph
+from app.search.result_cache import abump_search_generation
+from app.topics.online import aobserve_content_embeddings
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Characters of extracted text sent to the summarizer per item; ContentAgent
+# condenses anything longer than one prompt with map-reduce summaries
+MAX_SUMMARY_INPUT_CHARS = 200_000
+
+def build_ingest_stages(
+    http_client: httpx.AsyncClient,
+    summarize: Callable[[str, str, Optional[str]], Any],
+    tags: List[str],
+    notes: Optional[str] = None,
+) -> List[Stage]:
+    """Create the bulk ingest stages around a shared HTTP client and summarizer"""
+
+    # Catches syndicated copies within this batch before any of them is stored
+    batch_index = DedupIndex()
+
+    async def fetch(item: PipelineItem) -> None:
+        duplicate = await afind_duplicate(url=item.key)
+        if duplicate:
+            item.data["content_id"] = duplicate["content_id"]
+            item.data["duplicate_of"] = duplicate
+            item.skip("duplicate")
+            return
+        response = await http_client.get(item.key)
+        response.raise_for_status()
+        item.data["_html"] = response.text
+        item.data["final_url"] = str(response.url)
+
+    async def extract(item: PipelineItem) -> None:
+        extracted = await run_cpu(extract_html, item.data.pop("_html"), item.key)
+        if not extracted["text"]:
+            item.status = "failed"
+            item.error = "extract: no readable text found"
+            return
+        item.data["title"] = extracted["title"]
+        item.data["_text"] = extracted["text"]
+
+    async def dedup(item: PipelineItem) -> None:
+        fields = await run_cpu(dedup_fields, item.key, item.data["_text"])
+        item.data["_dedup"] = fields
+        text_simhash = fields_simhash(fields)
+        duplicate = await afind_duplicate(fields={"content_hash": fields["content_hash"], "simhash": fields["simhash"]})
+        if duplicate is None:
+            in_batch = batch_index.find(text_hash=fields["content_hash"], text_simhash=text_simhash)
+            if in_batch:
+                # Matched another URL in this request that is not stored yet
+                duplicate = {**in_batch, "content_id": None, "duplicate_of_url": in_batch["content_id"]}
+        if duplicate:
+            item.data["content_id"] = duplicate["content_id"]
+            item.data["duplicate_of"] = duplicate
+            item.skip("duplicate")
+            return
+        batch_index.add(item.key, text_hash=fields["content_hash"], text_simhash=text_simhash)
+
+    async def summarize_item(item: PipelineItem) -> None:
+        text = item.data["_text"][:MAX_SUMMARY_INPUT_CHARS]
+        item.data["summary"] = await summarize(text, item.key, notes)
+
+    async def embed(batch: List[PipelineItem]) -> None:
+        texts = [item.data.get("summary") or item.data["_text"] for item in batch]
+        embeddings = await generate_embeddings(texts, EMBEDDING_MODEL)
+        for item, text, embedding in zip(batch, texts, embeddings):
+            item.data["_embedding"] = embedding
+            item.data["_embedding_hash"] = embedding_text_hash(text, EMBEDDING_MODEL)
+
+    async def write(batch: List[PipelineItem]) -> None:
+        rows = create_content_items_bulk([
+            {
+                "url": item.key,
+                "extracted_text": item.data["_text"],
+                "summary": item.data.get("summary"),
+                "tags": tags,
+                **item.data["_dedup"],
+            }
+            for item in batch
+        ])
+        ids_by_url = {row.get("url"): row.get("id") for row in rows}
+        embedding_rows = []
+        for item in batch:
+            content_id = ids_by_url.get(item.key)
+            if not content_id:
+                item.status = "failed"
+                item.error = "write: content item was not stored"
+                continue
+            item.data["content_id"] = content_id
+            register_content(content_id, fields=item.data["_dedup"])
+            embedding_rows.append({
+                "content_id": content_id,
+                "embedding": item.data["_embedding"],
+                "model_used": EMBEDDING_MODEL,
+                "text_hash": item.data["_embedding_hash"],
+            })
+        store_embeddings_bulk(embedding_rows)
+        stored = [item for item in batch if item.status != "failed"]
+        stored_ids = [item.data["content_id"] for item in stored]
+        stored_embeddings = [item.data["_embedding"] for item in stored]
+        stored_items = [{"summary": item.data.get("summary"), "url": item.key, "tags": tags} for item in stored]
+        await aindex_content_embeddings(stored_ids, stored_embeddings, stored_items)
+        await aobserve_content_embeddings(stored_ids, stored_embeddings, stored_items)
+        await update_knn_graph(stored_ids, stored_embeddings)
+        await abump_search_generation()
+        for item in batch:
+            if item.status == "failed":
+                item.data.pop("_text", None)
+            item.data.pop("_embedding", None)
+            item.data.pop("_dedup", None)
+
+    async def chunk(item: PipelineItem) -> None:
+        text = item.data.pop("_text", "")
+        if not chunking_enabled() or len(text) < chunk_min_chars():
+            return
+        try:
+            item.data.update(await embed_content_chunks(item.data["content_id"], text))
+            await abump_search_generation()
+        except Exception as e:
+            # The item and its summary embedding are stored; chunks can be rebuilt later
+            item.data["chunk_status"] = "failed"
+            item.data["chunk_error"] = str(e)
+
+    return [
+        Stage("fetch", fetch, concurrency=env_int("INGEST_FETCH_CONCURRENCY", 16), timeout=30),
+        Stage("extract", extract, concurrency=env_int("INGEST_EXTRACT_CONCURRENCY", 4), max_retries=0),
+        # Single worker so in-batch duplicates are checked in a consistent order
+        Stage("dedup", dedup, concurrency=1, max_retries=0),
+        Stage("summarize", summarize_item, concurrency=env_int("INGEST_SUMMARIZE_CONCURRENCY", 4),
+              retry_backoff=2.0, timeout=180),
+        Stage("embed", embed, concurrency=2, batch_size=env_int("INGEST_EMBED_BATCH", 64), batch_wait=0.2),
+        Stage("write", write, concurrency=1, batch_size=env_int("INGEST_WRITE_BATCH", 50), batch_wait=0.5),
+        Stage("chunk", chunk, concurrency=env_int("INGEST_CHUNK_CONCURRENCY", 2), max_retries=0, timeout=300),
+    ]
+
+async def ingest_urls(
+    urls: List[str],
+    tags: Optional[List[str]] = None,
+    notes: Optional[str] = None,
+    summarize: Optional[Callable[[str, str, Optional[str]], Any]] = None,
+    on_progress: Optional[Callable[[PipelineItem], None]] = None,
+) -> Dict[str, Any]:
+    """Run a batch of URLs through the staged ingest pipeline"""
+    if summarize is None:
+        from app.agents.content_agent import ContentAgent
+        summarize = ContentAgent().summarize_text
+
+    # URLs that canonicalize to the same page are ingested once
+    first_by_canonical: Dict[str, str] = {}
+    for url in urls:
+        first_by_canonical.setdefault(canonicalize_url(url), url)
+    items = [PipelineItem(key=url) for url in first_by_canonical.values()]
+
+    async with httpx.AsyncClient(
+        timeout=20.0,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        headers={"User-Agent": "Mozilla/5.0 (compatible; NewsletterEngine/0.1)"},
+    ) as http_client:
+        pipeline = Pipeline(
+            build_ingest_stages(http_client, summarize, tags or [], notes),
+            queue_size=env_int("INGEST_QUEUE_SIZE", 32),
+            on_progress=on_progress,
+        )
+        await pipeline.run(items)
+
+    counts: Dict[str, int] = {}
+    for item in items:
+        counts[item.status] = counts.get(item.status, 0) + 1
+
+    return {
+        "items": [item.to_dict() for item in items],
+        "counts": counts,
+        "metrics": pipeline.metrics_dict(),
+    }
@@ -0,0 +1,189 @@
+"""Streaming, token-aware text chunker with overlap"""
+import re
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Callable, Deque, Iterable, Iterator, List, Optional, Tuple, Union
+from app.db.embedding_batcher import estimate_tokens
+
+# Sentence or paragraph boundary: keep the punctuation with the sentence
+_BOUNDARY = re.compile(r"(?<=[.!?।])\s+|\n\s*\n")
+
+DEFAULT_MAX_TOKENS = 400
+DEFAULT_OVERLAP_TOKENS = 60
+
+_encoding = None
+_encoding_loaded = False
+
+def count_tokens(text: str) -> int:
+    """cl100k_base token count when tiktoken (and its encoding file) is available, else an estimate"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = None  # Optional dependency; estimate instead
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return estimate_tokens(text)
+
+@dataclass
+class Chunk:
+    index: int
+    text: str
+    token_count: int
+
+class Chunker:
+    """Incremental chunker: feed text pieces, collect finished chunks.
+
+    Memory is bounded by one chunk plus the unfinished sentence, whatever
+    the document size. Consecutive chunks share ``overlap_tokens`` worth of
+    trailing sentences so context that spans a boundary is not lost.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+        token_counter: Callable[[str], int] = count_tokens,
+    ):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count = token_counter
+        # Unfinished sentence text is force-split past this size (no punctuation)
+        self.max_pending_chars = max_tokens * 8
+        self._pending = ""
+        self._window: Deque[Tuple[str, int]] = deque()
+        self._window_tokens = 0
+        self._fresh = False  # Window holds text not yet emitted in a chunk
+        self._next_index = 0
+
+    def feed(self, piece: str) -> List[Chunk]:
+        self._pending += piece
+        parts = _BOUNDARY.split(self._pending)
+        self._pending = parts.pop()
+        while len(self._pending) > self.max_pending_chars:
+            cut = self._pending.rfind(" ", 0, self.max_pending_chars)
+            cut = cut if cut > 0 else self.max_pending_chars
+            parts.append(self._pending[:cut])
+            self._pending = self._pending[cut:]
+        chunks: List[Chunk] = []
+        for sentence in parts:
+            chunks.extend(self._add_sentence(sentence))
+        return chunks
+
+    def finish(self) -> List[Chunk]:
+        chunks = self._add_sentence(self._pending)
+        self._pending = ""
+        if self._fresh:
+            chunks.append(self._emit())
+        return chunks
+
+    def _add_sentence(self, sentence: str) -> List[Chunk]:
+        sentence = " ".join(sentence.split())
+        if not sentence:
+            return []
+        tokens = self.count(sentence)
+        if tokens > self.max_tokens:
+            # Very long "sentence" (tables, code, no punctuation): split on words
+            chunks: List[Chunk] = []
+            for part in self._split_words(sentence):
+                chunks.extend(self._add_sentence(part))
+            return chunks
+
+        chunks = []
+        if self._window and self._window_tokens + tokens > self.max_tokens:
+            chunks.append(self._emit())
+            while self._window and self._window_tokens > self.overlap_tokens:
+                _, dropped = self._window.popleft()
+                self._window_tokens -= dropped
+            # Trim overlap further if it would not leave room for the new sentence
+            while self._window and self._window_tokens + tokens > self.max_tokens:
+                _, dropped = self._window.popleft()
+                self._window_tokens -= dropped
+        self._window.append((sentence, tokens))
+        self._window_tokens += tokens
+        self._fresh = True
+        return chunks
+
+    def _split_words(self, sentence: str) -> Iterator[str]:
+        words = sentence.split(" ")
+        # Characters per token from this sentence, to size word groups
+        step = max(1, int(len(words) * self.max_tokens / max(self.count(sentence), 1) * 0.9))
+        for start in range(0, len(words), step):
+            yield " ".join(words[start:start + step])
+
+    def _emit(self) -> Chunk:
+        chunk = Chunk(
+            index=self._next_index,
+            text=" ".join(sentence for sentence, _ in self._window),
+            token_count=self._window_tokens,
+        )
+        self._next_index += 1
+        self._fresh = False
+        return chunk
+
+def chunk_text(text: str, max_tokens: int = DEFAULT_MAX_TOKENS, overlap_tokens: int = DEFAULT_OVERLAP_TOKENS) -> List[Chunk]:
+    """All chunks of an in-memory text (picklable entry point for the CPU pool)"""
+    return list(iter_chunks(text, max_tokens=max_tokens, overlap_tokens=overlap_tokens))
+
+def stable_chunks(
+    text: str,
+    max_tokens: int = 1500,
+    min_tokens: int = 300,
+    token_counter: Callable[[str], int] = count_tokens,
+) -> List[Chunk]:
+    """Non-overlapping chunks whose boundaries depend only on nearby sentences.
+
+    Once a chunk holds ``min_tokens`` it ends after an "anchor" sentence, picked
+    by the sentence's crc32 with odds proportional to its length (about one
+    anchor per half of the remaining budget); it is also cut before a sentence
+    that would exceed ``max_tokens``. Editing one passage changes the chunks
+    around it; later cut points fall on the same anchors as before, so their
+    chunks are unchanged.
+    """
+    splitter = Chunker(max_tokens, 0, token_counter)
+    chunks: List[Chunk] = []
+    window: List[str] = []
+    window_tokens = 0
+    for raw in _BOUNDARY.split(text):
+        sentence = " ".join(raw.split())
+        if not sentence:
+            continue
+        tokens = token_counter(sentence)
+        parts = [(sentence, tokens)] if tokens <= max_tokens else [
+            (part, token_counter(part)) for part in splitter._split_words(sentence)
+        ]
+        for part, part_tokens in parts:
+            if window and window_tokens + part_tokens > max_tokens:
+                chunks.append(Chunk(len(chunks), " ".join(window), window_tokens))
+                window, window_tokens = [], 0
+            window.append(part)
+            window_tokens += part_tokens
+            period = max(1, (max_tokens - min_tokens) // (2 * max(part_tokens, 1)))
+            if window_tokens >= min_tokens and zlib.crc32(part.encode("utf-8")) % period == 0:
+                chunks.append(Chunk(len(chunks), " ".join(window), window_tokens))
+                window, window_tokens = [], 0
+    if window:
+        chunks.append(Chunk(len(chunks), " ".join(window), window_tokens))
+    return chunks
+
+def iter_chunks(pieces: Union[str, Iterable[str]], **kwargs) -> Iterator[Chunk]:
+    """Chunk a string or a stream of text pieces"""
+    chunker = Chunker(**kwargs)
+    for piece in ([pieces] if isinstance(pieces, str) else pieces):
+        yield from chunker.feed(piece)
+    yield from chunker.finish()
+
+async def aiter_chunks(pieces: AsyncIterable[str], **kwargs) -> AsyncIterator[Chunk]:
+    """Chunk an async stream of text pieces (e.g. an upload being extracted)"""
+    chunker = Chunker(**kwargs)
+    async for piece in pieces:
+        for chunk in chunker.feed(piece):
+            yield chunk
+    for chunk in chunker.finish():
+        yield chunk
@@ -0,0 +1,394 @@
+"""Exact and near-duplicate detection for ingested content"""
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that never change the document being served
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "ref_url", "si", "spm",
+    "amp", "outputtype", "cmpid", "_hsenc", "_hsmi", "mkt_tok", "yclid",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_", "vero_")
+
+SIMHASH_BITS = 64
+# Hamming distance at or below which two documents are near-duplicates
+NEAR_DUPLICATE_DISTANCE = 3
+# 4 bands of 16 bits: any pair within distance 3 shares at least one band
+SIMHASH_BANDS = 4
+# SimHash is unreliable on very short texts, so only longer ones get one
+MIN_SIMHASH_WORDS = 50
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so syndication/tracking/AMP variants compare equal"""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    if scheme == "http":
+        scheme = "https"
+    host = (parts.hostname or "").lower()
+    path = parts.path or "/"
+
+    # Google AMP cache: https://www-example-com.cdn.ampproject.org/c/s/www.example.com/a
+    if host.endswith(".cdn.ampproject.org"):
+        match = re.match(r"^/(?:[a-z]/)*(?:s/)?(.+)$", path)
+        if match:
+            return canonicalize_url("https://" + match.group(1))
+
+    if host.startswith("www."):
+        host = host[4:]
+    if host.startswith("amp."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/{2,}", "/", path)
+    path = re.sub(r"(/amp)+/?$", "", path) or "/"
+    path = re.sub(r"\.amp(\.html?)$", r"\1", path)
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=False)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+def normalize_for_hash(text: str) -> str:
+    """Lowercase and collapse whitespace/punctuation before hashing"""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+def content_hash(text: str) -> str:
+    """sha256 of normalized text, for exact-duplicate detection"""
+    return hashlib.sha256(normalize_for_hash(text).encode("utf-8")).hexdigest()
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash over word shingles (unsigned)"""
+    words = normalize_for_hash(text).split()
+    if not words:
+        return 0
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    value = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            value |= 1 << bit
+    return value
+
+class StreamingFingerprint:
+    """content_hash and simhash of a text fed in pieces, without holding the whole text"""
+
+    def __init__(self, shingle_size: int = 3):
+        self.shingle_size = shingle_size
+        self.words = 0
+        self._sha = hashlib.sha256()
+        self._weights = [0] * SIMHASH_BITS
+        self._window: List[str] = []
+        self._carry = ""
+
+    def feed(self, piece: str) -> None:
+        normalized = re.sub(r"[^\w\s]", " ", (self._carry + piece).lower())
+        words = normalized.split()
+        # A word cut at the piece boundary is completed by the next piece
+        self._carry = words.pop() if words and not normalized[-1].isspace() else ""
+        for word in words:
+            self._add_word(word)
+
+    def _add_word(self, word: str) -> None:
+        self._sha.update(((" " if self.words else "") + word).encode("utf-8"))
+        self.words += 1
+        self._window.append(word)
+        if len(self._window) > self.shingle_size:
+            self._window.pop(0)
+        if len(self._window) == self.shingle_size:
+            self._add_shingle(" ".join(self._window))
+
+    def _add_shingle(self, shingle: str) -> None:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            self._weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    def fields(self) -> Dict[str, Any]:
+        """Same columns as dedup_fields(text=...) for the text fed so far"""
+        if self._carry:
+            self._add_word(self._carry)
+            self._carry = ""
+        if not self.words:
+            return {}
+        fields: Dict[str, Any] = {"content_hash": self._sha.hexdigest(), "simhash": None}
+        if self.words >= MIN_SIMHASH_WORDS:
+            value = 0
+            for bit, weight in enumerate(self._weights):
+                if weight > 0:
+                    value |= 1 << bit
+            fields["simhash"] = to_signed64(value)
+        return fields
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def to_signed64(value: int) -> int:
+    """Postgres BIGINT is signed; store the unsigned SimHash bit pattern"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+def from_signed64(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+class SimHashIndex:
+    """Banded LSH index over 64-bit SimHashes"""
+
+    def __init__(self, bands: int = SIMHASH_BANDS):
+        self.bands = bands
+        self.band_bits = SIMHASH_BITS // bands
+        self._tables: List[Dict[int, Set[str]]] = [{} for _ in range(bands)]
+        self._hashes: Dict[str, int] = {}
+
+    def _band_keys(self, value: int) -> List[int]:
+        mask = (1 << self.band_bits) - 1
+        return [(value >> (i * self.band_bits)) & mask for i in range(self.bands)]
+
+    def add(self, key: str, value: int) -> None:
+        self._hashes[key] = value
+        for table, band in zip(self._tables, self._band_keys(value)):
+            table.setdefault(band, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        value = self._hashes.pop(key, None)
+        if value is None:
+            return
+        for table, band in zip(self._tables, self._band_keys(value)):
+            table.get(band, set()).discard(key)
+
+    def query(self, value: int, max_distance: int = NEAR_DUPLICATE_DISTANCE) -> List[Tuple[str, int]]:
+        """Keys within ``max_distance`` bits, closest first"""
+        candidates: Set[str] = set()
+        for table, band in zip(self._tables, self._band_keys(value)):
+            candidates |= table.get(band, set())
+        matches = []
+        for key in candidates:
+            distance = hamming_distance(value, self._hashes[key])
+            if distance <= max_distance:
+                matches.append((key, distance))
+        return sorted(matches, key=lambda m: m[1])
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+class DedupIndex:
+    """In-memory lookup of canonical URLs, text hashes and SimHashes of stored items"""
+
+    def __init__(self):
+        self.by_url: Dict[str, str] = {}
+        self.by_hash: Dict[str, str] = {}
+        self.simhashes = SimHashIndex()
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        content_id: str,
+        canonical_url: Optional[str] = None,
+        text_hash: Optional[str] = None,
+        text_simhash: Optional[int] = None,
+    ) -> None:
+        with self._lock:
+            if canonical_url:
+                self.by_url.setdefault(canonical_url, content_id)
+            if text_hash:
+                self.by_hash.setdefault(text_hash, content_id)
+            if text_simhash:
+                self.simhashes.add(content_id, text_simhash)
+
+    def remove(self, content_id: str) -> None:
+        with self._lock:
+            self.by_url = {k: v for k, v in self.by_url.items() if v != content_id}
+            self.by_hash = {k: v for k, v in self.by_hash.items() if v != content_id}
+            self.simhashes.remove(content_id)
+
+    def find(
+        self,
+        canonical_url: Optional[str] = None,
+        text_hash: Optional[str] = None,
+        text_simhash: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Return the first stored item matching by URL, exact text, or near text"""
+        if canonical_url and canonical_url in self.by_url:
+            return {"content_id": self.by_url[canonical_url], "match": "url"}
+        if text_hash and text_hash in self.by_hash:
+            return {"content_id": self.by_hash[text_hash], "match": "exact"}
+        if text_simhash:
+            matches = self.simhashes.query(text_simhash)
+            if matches:
+                content_id, distance = matches[0]
+                return {"content_id": content_id, "match": "near", "distance": distance}
+        return None
+
+    def load(self, page_size: int = 1000) -> None:
+        """Populate from content_items (only the small dedup columns)"""
+        from app.db.client import get_supabase
+
+        supabase = get_supabase()
+        start = 0
+        while True:
+            result = supabase.table("content_items").select(
+                "id, url, canonical_url, content_hash, simhash"
+            ).range(start, start + page_size - 1).execute()
+            rows = result.data or []
+            for row in rows:
+                self.add(
+                    row["id"],
+                    canonical_url=row.get("canonical_url") or (
+                        canonicalize_url(row["url"]) if row.get("url") else None
+                    ),
+                    text_hash=row.get("content_hash"),
+                    text_simhash=from_signed64(row["simhash"]) if row.get("simhash") is not None else None,
+                )
+            if len(rows) < page_size:
+                break
+            start += page_size
+        self.loaded = True
+
+def dedup_fields(url: Optional[str] = None, text: Optional[str] = None) -> Dict[str, Any]:
+    """Columns to store on content_items for future dedup lookups.
+
+    ``simhash`` is None for texts too short to have one, so rows written
+    together in one bulk upsert always have the same keys.
+    """
+    fields: Dict[str, Any] = {}
+    if url:
+        fields["canonical_url"] = canonicalize_url(url)
+    if text:
+        fields["content_hash"] = content_hash(text)
+        fields["simhash"] = to_signed64(simhash(text)) if len(text.split()) >= MIN_SIMHASH_WORDS else None
+    return fields
+
+def fields_simhash(fields: Dict[str, Any]) -> Optional[int]:
+    """Unsigned SimHash from dedup_fields output (None if the text had none)"""
+    return from_signed64(fields["simhash"]) if fields.get("simhash") is not None else None
+
+_dedup_index: Optional[DedupIndex] = None
+_load_lock = threading.Lock()
+_load_failed_at: Optional[float] = None
+
+def dedup_retry_seconds() -> float:
+    return float(os.getenv("DEDUP_RETRY_SECONDS", "60"))
+
+def _needs_load() -> bool:
+    if _dedup_index is not None and _dedup_index.loaded:
+        return False
+    return _load_failed_at is None or time.monotonic() - _load_failed_at >= dedup_retry_seconds()
+
+def _load_dedup_index() -> None:
+    """Load the index once; after a failure, wait DEDUP_RETRY_SECONDS before trying again"""
+    global _dedup_index, _load_failed_at
+    with _load_lock:
+        if not _needs_load():
+            return
+        if _dedup_index is None:
+            _dedup_index = DedupIndex()
+        try:
+            _dedup_index.load()
+            _load_failed_at = None
+        except Exception as e:
+            # Dedup is an optimization; ingest still works without it
+            _load_failed_at = time.monotonic()
+            print(f"Dedup index load failed, retrying in {dedup_retry_seconds():.0f}s: {e}")
+
+def get_dedup_index() -> DedupIndex:
+    """Get the process-wide dedup index, loading it on first use"""
+    if _needs_load():
+        _load_dedup_index()
+    return _dedup_index or DedupIndex()
+
+async def aget_dedup_index() -> DedupIndex:
+    """get_dedup_index for async callers: the first load runs in a thread, off the event loop"""
+    if _needs_load():
+        await asyncio.to_thread(_load_dedup_index)
+    return _dedup_index or DedupIndex()
+
+def _find(index: DedupIndex, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return index.find(
+        canonical_url=fields.get("canonical_url"),
+        text_hash=fields.get("content_hash"),
+        text_simhash=fields_simhash(fields),
+    )
+
+def _find_stored(fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """URL or exact-text match in content_items, for items another process stored after our index loaded"""
+    from app.db.client import get_supabase
+
+    try:
+        supabase = get_supabase()
+        for column, match in (("canonical_url", "url"), ("content_hash", "exact")):
+            if not fields.get(column):
+                continue
+            rows = supabase.table("content_items").select(
+                "id, canonical_url, content_hash, simhash"
+            ).eq(column, fields[column]).limit(1).execute().data or []
+            if rows:
+                content_id = str(rows[0]["id"])
+                # Learn the item so the next lookup (and near-duplicate checks) stay in memory
+                register_content(content_id, fields=rows[0])
+                return {"content_id": content_id, "match": match}
+    except Exception as e:
+        print(f"Dedup lookup failed: {e}")
+    return None
+
+def find_duplicate(
+    url: Optional[str] = None,
+    text: Optional[str] = None,
+    fields: Optional[Dict[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Check a URL and/or extracted text (or precomputed ``fields``) against already-stored content.
+
+    The in-memory index only knows what this process loaded or wrote, so a
+    miss is checked against the database by URL and text hash (items other
+    workers stored); near-duplicate checks stay in memory.
+    """
+    fields = fields if fields is not None else dedup_fields(url, text)
+    return _find(get_dedup_index(), fields) or _find_stored(fields)
+
+async def afind_duplicate(
+    url: Optional[str] = None,
+    text: Optional[str] = None,
+    fields: Optional[Dict[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
+    """find_duplicate for async callers (index load and database lookup run in threads)"""
+    fields = fields if fields is not None else dedup_fields(url, text)
+    return _find(await aget_dedup_index(), fields) or await asyncio.to_thread(_find_stored, fields)
+
+def register_content(
+    content_id: str,
+    url: Optional[str] = None,
+    text: Optional[str] = None,
+    fields: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Add a newly stored item to the in-memory index"""
+    if _dedup_index is None:
+        return
+    fields = fields if fields is not None else dedup_fields(url, text)
+    _dedup_index.add(
+        content_id,
+        canonical_url=fields.get("canonical_url"),
+        text_hash=fields.get("content_hash"),
+        text_simhash=fields_simhash(fields),
+    )
+
+def unregister_content(content_id: str) -> None:
+    """Forget a deleted item so it is no longer reported as a duplicate"""
+    if _dedup_index is not None:
+        _dedup_index.remove(content_id)
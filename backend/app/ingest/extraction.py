@@ -0,0 +1,149 @@
+"""Structured single-call content extraction: schema, prompt and (streaming) parser"""
+import json
+import re
+from typing import List, Optional
+from pydantic import BaseModel, ValidationError, field_validator
+
+MAX_INSIGHTS = 7
+MAX_SUGGESTED_TAGS = 6
+MAX_QUESTIONS = 3
+
+class ContentExtraction(BaseModel):
+    """Everything ingest needs from one LLM call"""
+    summary: str
+    key_insights: List[str] = []
+    suggested_tags: List[str] = []
+    clarifying_questions: List[str] = []
+
+    @field_validator("summary")
+    @classmethod
+    def _summary_not_empty(cls, value: str) -> str:
+        value = value.strip()
+        if not value:
+            raise ValueError("summary is empty")
+        return value
+
+    @field_validator("key_insights")
+    @classmethod
+    def _clean_insights(cls, values: List[str]) -> List[str]:
+        return [v.strip() for v in values if v and v.strip()][:MAX_INSIGHTS]
+
+    @field_validator("suggested_tags")
+    @classmethod
+    def _clean_tags(cls, values: List[str]) -> List[str]:
+        tags = (re.sub(r"\s+", "-", v.strip().lstrip("#").lower()) for v in values if v and v.strip())
+        return list(dict.fromkeys(t for t in tags if t))[:MAX_SUGGESTED_TAGS]
+
+    @field_validator("clarifying_questions")
+    @classmethod
+    def _clean_questions(cls, values: List[str]) -> List[str]:
+        return [v.strip() for v in values if v and v.strip()][:MAX_QUESTIONS]
+
+def build_extraction_prompt(
+    text: str,
+    source: Optional[str] = None,
+    notes: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+) -> str:
+    """Prompt asking for one JSON object; ``summary`` comes first so it can stream"""
+    prompt = """Read the content below and reply with ONLY a JSON object, keys in this order:
+{
+  "summary": "the key insights of the content in a short structured summary",
+  "key_insights": ["3-5 one-sentence insights"],
+  "suggested_tags": ["3-6 short lowercase topic tags"],
+  "clarifying_questions": ["2-3 questions in Hinglish to learn what the user wants from it, e.g. \\"Kis lens se dekhna hai — builder, economy, ya design?\\""]
+}
+No markdown fences, no text outside the JSON."""
+    if source:
+        prompt += f"\nSource: {source}"
+    if tags:
+        prompt += f"\nUser tags: {', '.join(tags)}"
+    if notes:
+        prompt += f"\n\nUser notes: {notes}"
+    prompt += f"\n\nContent:\n{text}"
+    return prompt
+
+def _json_object(raw: str) -> str:
+    start, end = raw.find("{"), raw.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("No JSON object in model output")
+    return raw[start:end + 1]
+
+def parse_extraction(raw: str) -> ContentExtraction:
+    """Validate model output (tolerates fences or prose around the JSON); raises ValueError"""
+    try:
+        return ContentExtraction.model_validate(json.loads(_json_object(raw)))
+    except (json.JSONDecodeError, ValidationError) as e:
+        raise ValueError(f"Invalid extraction output: {e}") from e
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_SUMMARY_KEY = re.compile(r'"summary"\s*:\s*"')
+
+class StreamingExtractionParser:
+    """Incrementally decodes the ``summary`` string while the JSON is still arriving.
+
+    ``feed`` returns the newly decoded summary text (possibly empty);
+    ``finish`` validates the complete object.
+    """
+
+    def __init__(self):
+        self.raw = ""
+        self.summary = ""
+        self._pos: Optional[int] = None  # Next undecoded index inside the summary string
+        self.summary_done = False
+
+    def feed(self, delta: str) -> str:
+        self.raw += delta
+        if self.summary_done:
+            return ""
+        if self._pos is None:
+            match = _SUMMARY_KEY.search(self.raw)
+            if not match:
+                return ""
+            self._pos = match.end()
+        decoded = []
+        pos = self._pos
+        while pos < len(self.raw):
+            char = self.raw[pos]
+            if char == '"':
+                self.summary_done = True
+                pos += 1
+                break
+            if char == "\\":
+                if pos + 1 >= len(self.raw):
+                    break  # Escape split across deltas
+                code = self.raw[pos + 1]
+                if code == "u":
+                    if pos + 6 > len(self.raw):
+                        break
+                    codepoint = int(self.raw[pos + 2:pos + 6], 16)
+                    if 0xD800 <= codepoint < 0xDC00:
+                        # Emoji etc. arrive as a surrogate pair: wait for the low half
+                        if pos + 12 > len(self.raw):
+                            break
+                        low = int(self.raw[pos + 8:pos + 12], 16)
+                        decoded.append(chr(0x10000 + ((codepoint - 0xD800) << 10) + (low - 0xDC00)))
+                        pos += 12
+                        continue
+                    decoded.append(chr(codepoint))
+                    pos += 6
+                    continue
+                decoded.append(_ESCAPES.get(code, code))
+                pos += 2
+                continue
+            decoded.append(char)
+            pos += 1
+        self._pos = pos
+        text = "".join(decoded)
+        self.summary += text
+        return text
+
+    def finish(self) -> ContentExtraction:
+        return parse_extraction(self.raw)
+
+def merge_tags(user_tags: Optional[List[str]], suggested: List[str]) -> List[str]:
+    """User tags first, then suggested tags they don't already cover"""
+    merged = list(user_tags or [])
+    seen = {t.lower() for t in merged}
+    merged.extend(t for t in suggested if t.lower() not in seen)
+    return merged
@@ -0,0 +1,113 @@
+"""Text extraction from fetched documents"""
+import codecs
+import re
+from typing import BinaryIO, Callable, Dict, Iterator, Optional
+
+def _clean_text(text: str) -> str:
+    """Collapse runs of blank lines and trailing spaces"""
+    lines = (line.strip() for line in text.splitlines())
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+def extract_html(html: str, url: Optional[str] = None) -> Dict[str, str]:
+    """Extract the readable title and main text from an HTML page"""
+    from bs4 import BeautifulSoup
+
+    title = ""
+    try:
+        from readability import Document
+        doc = Document(html, url=url)
+        title = doc.short_title() or ""
+        main_html = doc.summary(html_partial=True)
+    except Exception:
+        # Readability can choke on unusual markup; fall back to the whole page
+        main_html = html
+
+    soup = BeautifulSoup(main_html, "lxml")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    text = _clean_text(soup.get_text("\n"))
+
+    if not title:
+        page = BeautifulSoup(html, "lxml")
+        title = page.title.get_text(strip=True) if page.title else ""
+
+    return {"title": title, "text": text}
+
+# Characters decoded per read when streaming text files
+TEXT_READ_CHARS = 64 * 1024
+
+def iter_text_file(fileobj: BinaryIO, encoding: str = "utf-8") -> Iterator[str]:
+    """Decode a binary file incrementally (invalid bytes are replaced, not fatal)"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    first = True
+    while True:
+        block = fileobj.read(TEXT_READ_CHARS)
+        text = decoder.decode(block, final=not block)
+        if first and text:
+            text = text.lstrip("\ufeff")
+            first = False
+        if text:
+            yield text
+        if not block:
+            return
+
+_MD_IMAGE = re.compile(r"!\[([^\]]*)\]\([^)]*\)")
+_MD_LINK = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+_MD_HEADING = re.compile(r"^\s{0,3}#{1,6}\s*")
+_MD_QUOTE = re.compile(r"^\s*>\s?")
+_MD_EMPHASIS = re.compile(r"(\*\*|__|\*|`)")
+_MD_TAG = re.compile(r"<[^>\n]+>")
+
+def markdown_line_text(line: str) -> str:
+    """Strip Markdown syntax from one line, keeping link and image text"""
+    if line.strip().startswith("```") or line.strip().startswith("~~~"):
+        return ""
+    line = _MD_IMAGE.sub(r"\1", line)
+    line = _MD_LINK.sub(r"\1", line)
+    line = _MD_HEADING.sub("", line)
+    line = _MD_QUOTE.sub("", line)
+    line = _MD_TAG.sub("", line)
+    return _MD_EMPHASIS.sub("", line)
+
+def iter_markdown_text(fileobj: BinaryIO) -> Iterator[str]:
+    """Plain text of a Markdown file, one decoded block at a time"""
+    carry = ""
+    for text in iter_text_file(fileobj):
+        lines = (carry + text).split("\n")
+        carry = lines.pop()
+        yield "\n".join(markdown_line_text(line) for line in lines) + "\n"
+    if carry:
+        yield markdown_line_text(carry)
+
+def iter_pdf_text(fileobj: BinaryIO) -> Iterator[str]:
+    """Text of a PDF one page at a time; parsed page objects are released as we go"""
+    import pdfplumber
+
+    with pdfplumber.open(fileobj) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text() or ""
+            page.flush_cache()
+            if text.strip():
+                # Blank line between pages so sentences don't run together
+                yield _clean_text(text) + "\n\n"
+
+def iter_html_text(fileobj: BinaryIO) -> Iterator[str]:
+    """Readable text of an HTML file (readability needs the whole document)"""
+    html = "".join(iter_text_file(fileobj))
+    extracted = extract_html(html)
+    if extracted["title"]:
+        yield extracted["title"] + "\n\n"
+    yield extracted["text"]
+
+DOCUMENT_EXTRACTORS: Dict[str, Callable[[BinaryIO], Iterator[str]]] = {
+    "pdf": iter_pdf_text,
+    "html": iter_html_text,
+    "markdown": iter_markdown_text,
+    "text": iter_text_file,
+}
+
+def iter_document_text(fileobj: BinaryIO, file_type: str) -> Iterator[str]:
+    """Stream the text of a document of a detected type (see DOCUMENT_EXTRACTORS)"""
+    if file_type not in DOCUMENT_EXTRACTORS:
+        raise ValueError(f"Unsupported file type: {file_type}")
+    return DOCUMENT_EXTRACTORS[file_type](fileobj)
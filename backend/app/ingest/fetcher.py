@@ -0,0 +1,210 @@
+"""First-party page fetcher with an on-disk, conditionally revalidated document cache"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+import httpx
+from app.compute.pool import run_cpu
+from app.ingest.dedup import canonicalize_url
+from app.ingest.extractors import extract_html
+
+USER_AGENT = "Mozilla/5.0 (compatible; NewsletterEngine/0.1)"
+
+@dataclass
+class FetchedPage:
+    url: str
+    final_url: str
+    title: str
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0
+    # "network" (full download), "revalidated" (304) or "fresh" (no request made)
+    source: str = "network"
+
+class DocumentCache:
+    """Cleaned page text keyed by canonical URL, with the validators needed to revalidate it.
+
+    Each entry is a JSON file written atomically, so several API workers can
+    share one directory.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 5000):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, canonical_url: str) -> str:
+        digest = hashlib.sha256(canonical_url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, canonical_url: str) -> Optional[FetchedPage]:
+        try:
+            with open(self._path(canonical_url), encoding="utf-8") as f:
+                return FetchedPage(**json.load(f))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+
+    def set(self, canonical_url: str, page: FetchedPage) -> None:
+        path = self._path(canonical_url)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(page), f)
+        os.replace(tmp, path)
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self.prune()
+
+    def prune(self) -> int:
+        """Drop the least recently written entries beyond max_entries"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except FileNotFoundError:
+                    pass
+        removed = 0
+        for _, path in sorted(entries)[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.unlink(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+class PageFetcher:
+    """Fetches and cleans pages once per TTL; later requests revalidate with ETag/Last-Modified.
+
+    Concurrent fetches of the same canonical URL share one request.
+    """
+
+    def __init__(
+        self,
+        cache: DocumentCache,
+        ttl: float = 3600.0,
+        http_client: Optional[httpx.AsyncClient] = None,
+        max_bytes: int = 10 * 1024 * 1024,
+    ):
+        self.cache = cache
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._client = http_client
+        self._owns_client = http_client is None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"network": 0, "revalidated": 0, "fresh": 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=float(os.getenv("PAGE_FETCH_TIMEOUT", "20")),
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+                headers={"User-Agent": USER_AGENT},
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch(self, url: str) -> FetchedPage:
+        """Cleaned title and text of a page (raises httpx errors for failed fetches)"""
+        key = canonicalize_url(url)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            page = await self._fetch(url, key)
+            future.set_result(page)
+            return page
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an error nobody else awaited isn't logged
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _fetch(self, url: str, key: str) -> FetchedPage:
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None and time.time() - cached.fetched_at < self.ttl:
+            self.stats["fresh"] += 1
+            return FetchedPage(**{**asdict(cached), "source": "fresh"})
+
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        async with self.client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and cached is not None:
+                page = FetchedPage(**{
+                    **asdict(cached),
+                    "etag": response.headers.get("etag") or cached.etag,
+                    "last_modified": response.headers.get("last-modified") or cached.last_modified,
+                    "fetched_at": time.time(),
+                    "source": "revalidated",
+                })
+                await asyncio.to_thread(self.cache.set, key, page)
+                self.stats["revalidated"] += 1
+                return page
+            response.raise_for_status()
+            body = bytearray()
+            async for block in response.aiter_bytes():
+                body.extend(block)
+                if len(body) > self.max_bytes:
+                    raise ValueError(f"Page exceeds {self.max_bytes // (1024 * 1024)} MB")
+            encoding = response.encoding or "utf-8"
+            final_url = str(response.url)
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+
+        html = bytes(body).decode(encoding, errors="replace")
+        extracted = await run_cpu(extract_html, html, final_url, name="extract_html")
+        page = FetchedPage(
+            url=url,
+            final_url=final_url,
+            title=extracted["title"],
+            text=extracted["text"],
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=time.time(),
+            source="network",
+        )
+        await asyncio.to_thread(self.cache.set, key, page)
+        self.stats["network"] += 1
+        return page
+
+_page_fetcher: Optional[PageFetcher] = None
+
+def get_page_fetcher() -> PageFetcher:
+    """Process-wide fetcher sharing one connection pool and the on-disk cache"""
+    global _page_fetcher
+    if _page_fetcher is None:
+        _page_fetcher = PageFetcher(
+            cache=DocumentCache(
+                os.getenv("PAGE_CACHE_DIR", "data/page_cache"),
+                max_entries=int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "5000")),
+            ),
+            ttl=float(os.getenv("PAGE_CACHE_TTL", "3600")),
+            max_bytes=int(os.getenv("PAGE_FETCH_MAX_BYTES", str(10 * 1024 * 1024))),
+        )
+    return _page_fetcher
+
+async def close_page_fetcher() -> None:
+    global _page_fetcher
+    if _page_fetcher is not None:
+        await _page_fetcher.close()
+        _page_fetcher = None
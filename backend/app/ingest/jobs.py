@@ -0,0 +1,352 @@
+"""Durable ingest job queue backed by a local SQLite database"""
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    idempotency_key TEXT UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',  -- 'queued', 'running', 'succeeded', 'failed'
+    stage TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    result TEXT,
+    error TEXT,
+    run_after REAL NOT NULL DEFAULT 0,
+    locked_by TEXT,
+    locked_at REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ingest_jobs_claim ON ingest_jobs(status, run_after, created_at);
+
+CREATE TABLE IF NOT EXISTS ingest_job_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ingest_job_events_job ON ingest_job_events(job_id, seq);
+"""
+
+class JobStore:
+    """SQLite job table shared by API processes and standalone workers.
+
+    Each call opens its own connection so the store is safe to use from
+    worker threads and from several processes at once (WAL mode).
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 600.0):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA_SQL)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row_to_job(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        max_attempts: int = 3,
+    ) -> Dict[str, Any]:
+        """Create a job, or return the existing one with the same idempotency key.
+
+        A previously failed job with the same key is re-queued instead.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if idempotency_key:
+                row = conn.execute(
+                    "SELECT * FROM ingest_jobs WHERE idempotency_key = ?", (idempotency_key,)
+                ).fetchone()
+                if row is not None:
+                    if row["status"] == "failed":
+                        conn.execute(
+                            "UPDATE ingest_jobs SET status = 'queued', attempts = 0, error = NULL, "
+                            "payload = ?, run_after = 0, updated_at = ? WHERE id = ?",
+                            (json.dumps(payload), now, row["id"]),
+                        )
+                        self._add_event(conn, row["id"], "queued", {"requeued": True})
+                    conn.execute("COMMIT")
+                    return self.get(row["id"])
+
+            job_id = str(uuid.uuid4())
+            conn.execute(
+                "INSERT INTO ingest_jobs (id, kind, idempotency_key, payload, max_attempts, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, idempotency_key, json.dumps(payload), max_attempts, now, now),
+            )
+            self._add_event(conn, job_id, "queued", {})
+            conn.execute("COMMIT")
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM ingest_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest runnable job (or one whose lease expired)
+
+        A job whose lease expired after its last allowed attempt is marked
+        failed instead of being run again.
+        """
+        now = time.time()
+        expired_before = now - self.lease_seconds
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            exhausted = conn.execute(
+                "SELECT id, attempts FROM ingest_jobs WHERE status = 'running' "
+                "AND locked_at < ? AND attempts >= max_attempts",
+                (expired_before,),
+            ).fetchall()
+            for job in exhausted:
+                error = f"Lease expired after {job['attempts']} attempts"
+                conn.execute(
+                    "UPDATE ingest_jobs SET status = 'failed', error = ?, locked_by = NULL, "
+                    "updated_at = ? WHERE id = ?",
+                    (error, now, job["id"]),
+                )
+                self._add_event(conn, job["id"], "failed", {"error": error, "attempts": job["attempts"]})
+            row = conn.execute(
+                "SELECT id FROM ingest_jobs WHERE "
+                "(status = 'queued' AND run_after <= ?) OR "
+                "(status = 'running' AND locked_at < ? AND attempts < max_attempts) "
+                "ORDER BY created_at LIMIT 1",
+                (now, expired_before),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE ingest_jobs SET status = 'running', attempts = attempts + 1, "
+                "locked_by = ?, locked_at = ?, updated_at = ? WHERE id = ?",
+                (worker_id, now, now, row["id"]),
+            )
+            self._add_event(conn, row["id"], "running", {"worker": worker_id})
+            conn.execute("COMMIT")
+        return self.get(row["id"])
+
+    def progress(
+        self, job_id: str, worker_id: str, stage: str, data: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Record a progress event and refresh the lease, if ``worker_id`` still holds it"""
+        now = time.time()
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE ingest_jobs SET stage = ?, locked_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND locked_by = ?",
+                (stage, now, now, job_id, worker_id),
+            ).rowcount
+            if updated:
+                self._add_event(conn, job_id, "progress", {"stage": stage, **(data or {})})
+        return bool(updated)
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """Mark the job succeeded; ignored once another worker has taken it over"""
+        now = time.time()
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE ingest_jobs SET status = 'succeeded', result = ?, error = NULL, "
+                "locked_by = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND locked_by = ?",
+                (json.dumps(result, default=str), now, job_id, worker_id),
+            ).rowcount
+            if updated:
+                self._add_event(conn, job_id, "succeeded", {"result": result})
+        return bool(updated)
+
+    def fail(
+        self, job_id: str, worker_id: str, error: str, retry_backoff: float = 5.0
+    ) -> Optional[str]:
+        """Record a failure; re-queue with backoff unless attempts are exhausted
+
+        Returns the new status, or None when ``worker_id`` no longer holds the job.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM ingest_jobs "
+                "WHERE id = ? AND status = 'running' AND locked_by = ?",
+                (job_id, worker_id),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            if row["attempts"] < row["max_attempts"]:
+                status = "queued"
+                run_after = now + retry_backoff * (2 ** (row["attempts"] - 1))
+            else:
+                status = "failed"
+                run_after = 0
+            conn.execute(
+                "UPDATE ingest_jobs SET status = ?, error = ?, run_after = ?, locked_by = NULL, "
+                "updated_at = ? WHERE id = ?",
+                (status, error, run_after, now, job_id),
+            )
+            event = "retrying" if status == "queued" else "failed"
+            self._add_event(conn, job_id, event, {"error": error, "attempts": row["attempts"]})
+            conn.execute("COMMIT")
+        return status
+
+    def events(self, job_id: str, after_seq: int = 0) -> List[Dict[str, Any]]:
+        """Events for a job with sequence number greater than ``after_seq``"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT seq, event, data, created_at FROM ingest_job_events "
+                "WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after_seq),
+            ).fetchall()
+        return [{**dict(r), "data": json.loads(r["data"])} for r in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS n FROM ingest_jobs GROUP BY status"
+            ).fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    @staticmethod
+    def _add_event(conn: sqlite3.Connection, job_id: str, event: str, data: Dict[str, Any]) -> None:
+        conn.execute(
+            "INSERT INTO ingest_job_events (job_id, event, data, created_at) VALUES (?, ?, ?, ?)",
+            (job_id, event, json.dumps(data, default=str), time.time()),
+        )
+
+JobHandler = Callable[[Dict[str, Any], Callable[..., None]], Awaitable[Dict[str, Any]]]
+
+class JobWorkerPool:
+    """Pulls jobs from a JobStore and runs them on a fixed number of async workers"""
+
+    def __init__(
+        self,
+        store: JobStore,
+        handlers: Dict[str, JobHandler],
+        concurrency: int = 2,
+        poll_interval: float = 1.0,
+    ):
+        self.store = store
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._run(f"{self.worker_prefix}:{i}"))
+            for i in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_once(self, worker_id: str) -> bool:
+        """Claim and run one job; returns False when the queue is empty"""
+        job = await asyncio.to_thread(self.store.claim, worker_id)
+        if job is None:
+            return False
+
+        writes: List[asyncio.Task] = []
+
+        def progress(stage: str, **data: Any) -> None:
+            # Handlers report progress synchronously; the SQLite write runs in a
+            # thread, chained after the previous one so events stay in order
+            previous = writes[-1] if writes else None
+
+            async def write() -> None:
+                if previous is not None:
+                    await previous
+                try:
+                    await asyncio.to_thread(self.store.progress, job["id"], worker_id, stage, data)
+                except Exception as e:
+                    print(f"Ingest job {job['id']} progress error: {e}")
+
+            writes.append(asyncio.create_task(write()))
+
+        handler = self.handlers.get(job["kind"])
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind '{job['kind']}'")
+            result = await handler(job["payload"], progress)
+            await asyncio.gather(*writes)
+            await asyncio.to_thread(self.store.complete, job["id"], worker_id, result)
+        except asyncio.CancelledError:
+            # Shutting down: leave the job to be re-claimed after its lease expires
+            for task in writes:
+                task.cancel()
+            raise
+        except Exception as e:
+            await asyncio.gather(*writes)
+            await asyncio.to_thread(self.store.fail, job["id"], worker_id, str(e))
+        return True
+
+    async def _run(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                ran = await self.run_once(worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Ingest worker {worker_id} error: {e}")
+                ran = False
+            if not ran:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+_job_store: Optional[JobStore] = None
+
+def get_job_store() -> JobStore:
+    """Get or create the process-wide ingest job store"""
+    global _job_store
+    if _job_store is None:
+        _job_store = JobStore(os.getenv("INGEST_JOB_DB", "data/ingest_jobs.sqlite3"))
+    return _job_store
@@ -0,0 +1,213 @@
+"""Staged async pipeline with bounded queues, per-stage concurrency and retries"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+@dataclass
+class PipelineItem:
+    """One unit of work flowing through the pipeline"""
+    key: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    status: str = "pending"  # 'pending', 'running', 'done', 'skipped', 'failed'
+    stage: Optional[str] = None
+    attempts: Dict[str, int] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def skip(self, reason: str) -> None:
+        """Stop processing this item without treating it as a failure"""
+        self.status = "skipped"
+        self.data["skip_reason"] = reason
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "status": self.status,
+            "stage": self.stage,
+            "attempts": self.attempts,
+            "error": self.error,
+            **{k: v for k, v in self.data.items() if not k.startswith("_")},
+        }
+
+ItemHandler = Callable[[PipelineItem], Awaitable[None]]
+BatchHandler = Callable[[List[PipelineItem]], Awaitable[None]]
+
+@dataclass
+class Stage:
+    """A pipeline stage.
+
+    With ``batch_size == 1`` the handler receives one item; otherwise it
+    receives a list of up to ``batch_size`` items collected within
+    ``batch_wait`` seconds.
+    """
+    name: str
+    handler: Union[ItemHandler, BatchHandler]
+    concurrency: int = 4
+    batch_size: int = 1
+    batch_wait: float = 0.05
+    max_retries: int = 2
+    retry_backoff: float = 0.5
+    timeout: Optional[float] = None
+
+@dataclass
+class StageMetrics:
+    """Throughput counters for one stage"""
+    processed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    retries: int = 0
+    calls: int = 0
+    busy_seconds: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = (self.finished_at or time.monotonic()) - (self.started_at or time.monotonic())
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "retries": self.retries,
+            "calls": self.calls,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "items_per_second": round(self.processed / elapsed, 3) if elapsed > 0 else 0.0,
+            "avg_call_seconds": round(self.busy_seconds / self.calls, 3) if self.calls else 0.0,
+        }
+
+_DONE = object()
+
+class Pipeline:
+    """Runs items through stages connected by bounded queues.
+
+    Every stage has its own worker pool, so a slow stage (e.g. LLM
+    summarization) fills its input queue and blocks upstream producers
+    instead of buffering the whole backlog in memory.
+    """
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        queue_size: int = 32,
+        on_progress: Optional[Callable[[PipelineItem], None]] = None,
+    ):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.on_progress = on_progress
+        self.metrics: Dict[str, StageMetrics] = {s.name: StageMetrics() for s in stages}
+
+    async def run(self, items: List[PipelineItem]) -> List[PipelineItem]:
+        """Process all items and return them with final status"""
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+
+        async def feed():
+            for item in items:
+                await queues[0].put(item)
+            for _ in range(self.stages[0].concurrency):
+                await queues[0].put(_DONE)
+
+        async def run_stage(index: int):
+            stage = self.stages[index]
+            metrics = self.metrics[stage.name]
+            metrics.started_at = time.monotonic()
+            out = queues[index + 1] if index + 1 < len(queues) else None
+            await asyncio.gather(*(
+                self._worker(stage, queues[index], out) for _ in range(stage.concurrency)
+            ))
+            metrics.finished_at = time.monotonic()
+            if out is not None:
+                for _ in range(self.stages[index + 1].concurrency):
+                    await out.put(_DONE)
+
+        await asyncio.gather(feed(), *(run_stage(i) for i in range(len(self.stages))))
+        return items
+
+    async def _worker(self, stage: Stage, inbox: asyncio.Queue, out: Optional[asyncio.Queue]):
+        while True:
+            first = await inbox.get()
+            if first is _DONE:
+                return
+            batch = [first]
+            finished = False
+            if stage.batch_size > 1:
+                finished = await self._fill_batch(stage, inbox, batch)
+
+            await self._process(stage, batch)
+
+            for item in batch:
+                if item.status == "running":
+                    if out is not None:
+                        await out.put(item)
+                        continue
+                    item.status = "done"
+                if self.on_progress:
+                    self.on_progress(item)
+            if finished:
+                return
+
+    async def _fill_batch(self, stage: Stage, inbox: asyncio.Queue, batch: List[PipelineItem]) -> bool:
+        """Collect up to batch_size items; returns True if the stop marker was consumed"""
+        deadline = time.monotonic() + stage.batch_wait
+        while len(batch) < stage.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                nxt = await asyncio.wait_for(inbox.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if nxt is _DONE:
+                return True
+            batch.append(nxt)
+        return False
+
+    async def _process(self, stage: Stage, batch: List[PipelineItem]) -> None:
+        metrics = self.metrics[stage.name]
+        for item in batch:
+            item.status = "running"
+            item.stage = stage.name
+
+        attempt = 0
+        while True:
+            attempt += 1
+            for item in batch:
+                item.attempts[stage.name] = attempt
+            started = time.monotonic()
+            try:
+                arg = batch[0] if stage.batch_size == 1 else batch
+                call = stage.handler(arg)
+                if stage.timeout:
+                    await asyncio.wait_for(call, timeout=stage.timeout)
+                else:
+                    await call
+                error = None
+            except Exception as e:
+                error = e
+            finally:
+                metrics.calls += 1
+                metrics.busy_seconds += time.monotonic() - started
+
+            if error is None:
+                break
+            if attempt > stage.max_retries:
+                for item in batch:
+                    if item.status == "running":
+                        item.status = "failed"
+                        item.error = f"{stage.name}: {error}"
+                break
+            metrics.retries += 1
+            await asyncio.sleep(stage.retry_backoff * (2 ** (attempt - 1)))
+
+        for item in batch:
+            if item.status == "running":
+                metrics.processed += 1
+            elif item.status == "skipped":
+                metrics.skipped += 1
+            elif item.status == "failed":
+                metrics.failed += 1
+
+    def metrics_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage throughput metrics"""
+        return {name: m.to_dict() for name, m in self.metrics.items()}
@@ -0,0 +1,166 @@
+"""Map-reduce summarization of long documents with cached chunk summaries"""
+import asyncio
+import hashlib
+import os
+from typing import Awaitable, Callable, Dict, Optional
+from app.compute.pool import run_cpu
+from app.db.cache import LRUCache
+from app.ingest.chunking import count_tokens, stable_chunks
+
+# Bump when the map/reduce prompts change so old cached summaries are not reused
+PROMPT_VERSION = "1"
+
+# No section number in the prompt, so a chunk's cached summary survives edits elsewhere
+MAP_PROMPT = """Summarize this section of a longer document in a few dense sentences.
+Keep concrete facts, numbers, names and arguments; skip filler.
+
+Section:
+{text}"""
+
+REDUCE_PROMPT = """These are summaries of consecutive sections of one document.
+Merge them into one dense summary that keeps the key facts, numbers, names and arguments.
+
+{text}"""
+
+class SummaryCache:
+    """Looks up summaries in memory, then in the summary_cache table"""
+
+    def __init__(self, max_size: int = 4096, persistent: bool = True):
+        self.memory = LRUCache(max_size=max_size)
+        self.persistent = persistent
+        self.table_hits = 0
+        self.misses = 0
+
+    def get(self, prompt_hash: str, model: str) -> Optional[str]:
+        key = (model, prompt_hash)
+        summary = self.memory.get(key)
+        if summary is not None:
+            return summary
+        if self.persistent:
+            try:
+                from app.db.client import get_supabase
+                result = get_supabase().table("summary_cache").select("summary").eq(
+                    "prompt_hash", prompt_hash
+                ).eq("model_used", model).limit(1).execute()
+                if result.data:
+                    self.table_hits += 1
+                    summary = result.data[0]["summary"]
+                    self.memory.set(key, summary)
+                    return summary
+            except Exception as e:
+                print(f"Summary cache lookup failed: {e}")
+        self.misses += 1
+        return None
+
+    def set(self, prompt_hash: str, model: str, summary: str) -> None:
+        self.memory.set((model, prompt_hash), summary)
+        if not self.persistent:
+            return
+        try:
+            from app.db.client import get_supabase
+            get_supabase().table("summary_cache").upsert(
+                {"prompt_hash": prompt_hash, "model_used": model, "summary": summary},
+                on_conflict="prompt_hash,model_used",
+            ).execute()
+        except Exception as e:
+            # Cache writes must never fail the summary
+            print(f"Summary cache write failed: {e}")
+
+    def stats(self) -> dict:
+        memory_stats = self.memory.stats()
+        hits = memory_stats["hits"] + self.table_hits
+        lookups = hits + self.misses
+        return {
+            "memory": memory_stats,
+            "table_hits": self.table_hits,
+            "misses": self.misses,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+_summary_cache: Optional[SummaryCache] = None
+
+def get_summary_cache() -> SummaryCache:
+    """Get or create the process-wide summary cache"""
+    global _summary_cache
+    if _summary_cache is None:
+        _summary_cache = SummaryCache(
+            max_size=int(os.getenv("SUMMARY_CACHE_SIZE", "4096")),
+            persistent=os.getenv("SUMMARY_CACHE_PERSIST", "true").lower() != "false",
+        )
+    return _summary_cache
+
+class MapReduceSummarizer:
+    """Condenses documents of any length to fit one prompt.
+
+    Text is split into stable token-bounded chunks, every chunk is summarized
+    concurrently (``complete`` is expected to go through the provider rate
+    limiter), then groups of ``fan_in`` summaries are merged level by level
+    until they fit ``budget_tokens``. Wall-clock time grows with the number of
+    levels, not the number of chunks. Every map/reduce call is cached by the
+    hash of its prompt, so an edited document only re-runs changed chunks and
+    the reduce steps whose inputs changed.
+    """
+
+    def __init__(
+        self,
+        complete: Callable[[str], Awaitable[str]],
+        model: str,
+        chunk_tokens: int = 1500,
+        budget_tokens: int = 3000,
+        fan_in: int = 4,
+        cache: Optional[SummaryCache] = None,
+    ):
+        if fan_in < 2:
+            raise ValueError("fan_in must be at least 2")
+        self.complete = complete
+        self.model = model
+        self.chunk_tokens = chunk_tokens
+        self.budget_tokens = budget_tokens
+        self.fan_in = fan_in
+        self.cache = cache if cache is not None else get_summary_cache()
+        self.stats: Dict[str, int] = {"chunks": 0, "levels": 0, "calls": 0, "cached": 0}
+
+    async def condense(self, text: str) -> str:
+        """The text itself when it fits ``budget_tokens``, else merged section summaries"""
+        # Cheap character check first; ~3 chars per token is the lower bound we estimate with
+        if len(text) <= self.budget_tokens * 3 or count_tokens(text) <= self.budget_tokens:
+            return text
+        chunks = await run_cpu(
+            stable_chunks, text, self.chunk_tokens, max(1, self.chunk_tokens // 5), name="stable_chunks"
+        )
+        self.stats["chunks"] += len(chunks)
+        summaries = await asyncio.gather(*(
+            self._cached(MAP_PROMPT.format(text=chunk.text))
+            for chunk in chunks
+        ))
+        self.stats["levels"] += 1
+        while len(summaries) > 1 and count_tokens("\n\n".join(summaries)) > self.budget_tokens:
+            groups = [summaries[i:i + self.fan_in] for i in range(0, len(summaries), self.fan_in)]
+            summaries = await asyncio.gather(*(
+                self._cached(REDUCE_PROMPT.format(text="\n\n".join(group))) if len(group) > 1 else _same(group[0])
+                for group in groups
+            ))
+            self.stats["levels"] += 1
+        return "\n\n".join(summaries)
+
+    async def _cached(self, prompt: str) -> str:
+        prompt_hash = hashlib.sha256(f"{PROMPT_VERSION}\n{prompt}".encode("utf-8")).hexdigest()
+        cached = await self._cache_call(self.cache.get, prompt_hash, self.model)
+        if cached is not None:
+            self.stats["cached"] += 1
+            return cached
+        self.stats["calls"] += 1
+        summary = (await self.complete(prompt)).strip()
+        if summary:
+            await self._cache_call(self.cache.set, prompt_hash, self.model, summary)
+        return summary
+
+    async def _cache_call(self, fn, *args):
+        # Table lookups block, so they run in a thread; memory-only lookups don't need one
+        if self.cache.persistent:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+async def _same(summary: str) -> str:
+    return summary
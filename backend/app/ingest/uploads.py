@@ -0,0 +1,203 @@
+"""File upload ingestion: streaming to a temp file, type detection, streamed extraction"""
+import asyncio
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from app.config import env_int
+from app.db.chunks import chunk_min_chars
+from app.compute.pool import run_cpu
+from app.db.embeddings import create_content_with_embedding
+from app.ingest.dedup import StreamingFingerprint, afind_duplicate
+from app.ingest.extractors import iter_document_text
+from app.ingest.url import duplicate_response
+
+# Characters of extracted text sent to the summarizer (same budget as bulk ingest);
+# ContentAgent condenses anything longer than one prompt with map-reduce summaries
+MAX_SUMMARY_INPUT_CHARS = 200_000
+
+class UploadTooLarge(ValueError):
+    """The upload exceeds UPLOAD_MAX_BYTES (or the HTML size limit)"""
+
+async def spool_upload(
+    upload: Any,
+    max_bytes: Optional[int] = None,
+    read_size: Optional[int] = None,
+) -> str:
+    """Copy an upload into a temp file in fixed-size reads, enforcing the size cap.
+
+    Returns the file path (extraction runs in worker processes, which need a
+    path rather than an open file); the caller deletes it.
+    """
+    max_bytes = max_bytes or env_int("UPLOAD_MAX_BYTES", 100 * 1024 * 1024)
+    read_size = read_size or env_int("UPLOAD_READ_CHUNK_BYTES", 1024 * 1024)
+    spool = tempfile.NamedTemporaryFile(prefix="upload-", dir=os.getenv("UPLOAD_TMP_DIR") or None, delete=False)
+    size = 0
+    try:
+        with spool:
+            while True:
+                block = await upload.read(read_size)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+                await asyncio.to_thread(spool.write, block)
+    except BaseException:
+        _unlink(spool.name)
+        raise
+    return spool.name
+
+def _unlink(path: Optional[str]) -> None:
+    if path:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+def detect_file_type(filename: Optional[str], content_type: Optional[str], head: bytes) -> str:
+    """pdf / html / markdown / text, from magic bytes first, then extension and MIME type"""
+    name = (filename or "").lower()
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    start = head.lstrip()[:64].lower()
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    if name.endswith(".pdf") or content_type == "application/pdf":
+        # Claims to be a PDF but isn't one
+        raise ValueError("File is not a valid PDF")
+    if name.endswith((".html", ".htm")) or content_type in ("text/html", "application/xhtml+xml") \
+            or start.startswith((b"<!doctype html", b"<html")):
+        return "html"
+    if name.endswith((".md", ".markdown")) or content_type == "text/markdown":
+        return "markdown"
+    if b"\x00" in head:
+        raise ValueError("Unsupported binary file type")
+    return "text"
+
+@dataclass
+class ExtractedUpload:
+    """Result of one streaming pass over an upload (picklable, returned from a worker)"""
+    file_type: str
+    text_path: str
+    chars: int = 0
+    head: str = ""
+    dedup: Dict[str, Any] = field(default_factory=dict)
+
+    def close(self) -> None:
+        _unlink(self.text_path)
+
+def extract_upload(path: str, file_type: str, head_chars: int) -> ExtractedUpload:
+    """Stream extracted text into a temp file, fingerprinting it on the way.
+
+    Only the first ``head_chars`` characters are kept in memory (for the
+    summary and the stored ``extracted_text``).
+    """
+    if file_type == "html":
+        limit = env_int("UPLOAD_HTML_MAX_BYTES", 10 * 1024 * 1024)
+        if os.path.getsize(path) > limit:
+            raise UploadTooLarge(f"HTML files are limited to {limit // (1024 * 1024)} MB")
+    text_file = tempfile.NamedTemporaryFile(
+        "w", prefix="upload-text-", suffix=".txt", dir=os.getenv("UPLOAD_TMP_DIR") or None,
+        encoding="utf-8", delete=False,
+    )
+    result = ExtractedUpload(file_type=file_type, text_path=text_file.name)
+    fingerprint = StreamingFingerprint()
+    head: List[str] = []
+    try:
+        with open(path, "rb") as source, text_file:
+            for piece in iter_document_text(source, file_type):
+                if result.chars < head_chars:
+                    head.append(piece[:head_chars - result.chars])
+                result.chars += len(piece)
+                fingerprint.feed(piece)
+                text_file.write(piece)
+    except BaseException:
+        result.close()
+        raise
+    result.head = "".join(head).strip()
+    result.dedup = fingerprint.fields()
+    return result
+
+async def iter_spooled_text(text_path: str, read_chars: int = 64 * 1024) -> AsyncIterator[str]:
+    """Read extracted text back in fixed-size pieces (for chunk embedding)"""
+    with open(text_path, encoding="utf-8") as text_file:
+        while True:
+            piece = await asyncio.to_thread(text_file.read, read_chars)
+            if not piece:
+                return
+            yield piece
+
+async def ingest_upload(
+    upload: Any,
+    tags: Optional[List[str]] = None,
+    notes: Optional[str] = None,
+    summarize: Optional[Callable[[str, str, Optional[str]], Any]] = None,
+) -> Dict[str, Any]:
+    """Ingest an uploaded file with memory bounded by the read/spool sizes, not the file size"""
+    filename = upload.filename or "upload"
+    stored_chars = env_int("UPLOAD_STORED_TEXT_CHARS", 100_000)
+    spool_path = await spool_upload(upload)
+    extracted: Optional[ExtractedUpload] = None
+    try:
+        with open(spool_path, "rb") as spool:
+            head = spool.read(1024)
+        file_type = detect_file_type(filename, getattr(upload, "content_type", None), head)
+        # Parsing (PDF layout analysis, readability, SimHash) runs in the process pool
+        extracted = await run_cpu(
+            extract_upload, spool_path, file_type, max(stored_chars, MAX_SUMMARY_INPUT_CHARS),
+            timeout=float(os.getenv("UPLOAD_EXTRACT_TIMEOUT", "300")), name="extract_upload",
+        )
+        _unlink(spool_path)
+        if not extracted.head:
+            raise ValueError("No readable text found in file")
+
+        duplicate = await afind_duplicate(fields=extracted.dedup)
+        if duplicate:
+            return duplicate_response(None, duplicate, filename=filename)
+
+        summary = None
+        if summarize is not None:
+            try:
+                summary = await summarize(extracted.head[:MAX_SUMMARY_INPUT_CHARS], filename, notes)
+            except Exception as e:
+                print(f"Upload summarization failed, using excerpt: {e}")
+        if not summary:
+            summary = extracted.head[:500]  # Simple summary from first 500 chars
+            if notes:
+                summary = f"{summary}\n\nUser notes: {notes}"
+
+        # Store in Supabase with embedding; chunks are embedded from the spooled text
+        try:
+            db_item = await create_content_with_embedding(
+                file_path=filename,
+                extracted_text=extracted.head[:stored_chars],
+                summary=summary,
+                tags=tags if tags else [],
+                dedup=extracted.dedup,
+                chunk_source=iter_spooled_text(extracted.text_path) if extracted.chars >= chunk_min_chars() else None,
+            )
+            content_id = db_item.get("id")
+            embedding_status = db_item.get("embedding_status", "unknown")
+            chunk_count = db_item.get("chunk_count", 0)
+        except Exception as db_error:
+            content_id = None
+            embedding_status = "failed"
+            chunk_count = 0
+            print(f"Database storage failed: {db_error}")
+
+        return {
+            "status": "success",
+            "type": "file",
+            "filename": filename,
+            "file_type": file_type,
+            "text_chars": extracted.chars,
+            "summary": summary,
+            "content_id": content_id,
+            "stored_in_db": content_id is not None,
+            "embedding_status": embedding_status,
+            "chunk_count": chunk_count,
+        }
+    finally:
+        _unlink(spool_path)
+        if extracted is not None:
+            extracted.close()
@@ -0,0 +1,144 @@
+"""Single-URL ingestion shared by the synchronous endpoint and job workers"""
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional
+from app.compute.pool import run_cpu
+from app.db.embeddings import create_content_with_embedding
+from app.ingest.dedup import afind_duplicate, dedup_fields
+from app.ingest.extraction import ContentExtraction, merge_tags
+from app.ingest.fetcher import get_page_fetcher
+
+def _noop_progress(stage: str, **data: Any) -> None:
+    pass
+
+# Characters of new summary text between streamed progress events
+SUMMARY_PROGRESS_CHARS = 200
+
+def extraction_mode() -> str:
+    """"structured" (one call) or "legacy" (separate summary and questions calls)"""
+    return os.getenv("CONTENT_EXTRACTION_MODE", "structured").lower()
+
+async def _extract(
+    content_agent: Any,
+    text: str,
+    url: str,
+    notes: Optional[str],
+    tags: Optional[List[str]],
+    progress: Callable[..., None],
+    stream_summary: bool,
+) -> ContentExtraction:
+    if not stream_summary:
+        return await content_agent.extract(text, url, notes, tags)
+    partial, reported = "", 0
+    async for event in content_agent.extract_stream(text, url, notes, tags):
+        if isinstance(event, ContentExtraction):
+            return event
+        partial += event
+        if len(partial) - reported >= SUMMARY_PROGRESS_CHARS:
+            reported = len(partial)
+            progress("summary", summary=partial, partial=True)
+    raise ValueError("Extraction stream ended without a result")
+
+def duplicate_response(url: Optional[str], duplicate: Dict[str, Any], **extra: Any) -> Dict[str, Any]:
+    """Response for content that is already in the knowledge base"""
+    return {
+        "status": "duplicate",
+        "type": "url" if url else "file",
+        "url": url,
+        "content_id": duplicate["content_id"],
+        "duplicate_of": duplicate,
+        "stored_in_db": True,
+        **extra,
+    }
+
+async def ingest_single_url(
+    url: str,
+    tags: Optional[List[str]] = None,
+    notes: Optional[str] = None,
+    content_agent: Any = None,
+    progress: Callable[..., None] = _noop_progress,
+    stream_summary: bool = False,
+) -> Dict[str, Any]:
+    """Fetch a URL once, summarize it with ContentAgent, ask clarifying questions and store it.
+
+    With ``stream_summary`` the partial summary is reported through
+    ``progress("summary", ...)`` while the rest of the extraction arrives.
+    """
+    # Short-circuit before paying for any LLM or embedding call
+    progress("dedup")
+    duplicate = await afind_duplicate(url=url)
+    if duplicate:
+        return duplicate_response(url, duplicate)
+
+    if content_agent is None:
+        from app.agents.content_agent import ContentAgent
+        content_agent = ContentAgent()
+
+    # One network fetch (or cache revalidation) shared by summary and questions
+    progress("fetch")
+    text, fields = "", None
+    try:
+        page = await get_page_fetcher().fetch(url)
+        text = page.text
+    except Exception as e:
+        print(f"Page fetch failed for {url}: {e}")
+
+    if text:
+        # Same article under another URL (syndication, AMP, mirrors)
+        progress("dedup_text")
+        fields = await run_cpu(dedup_fields, url, text)
+        duplicate = await afind_duplicate(fields=fields)
+        if duplicate:
+            return duplicate_response(url, duplicate)
+
+    key_insights: List[str] = []
+    suggested_tags: List[str] = []
+    if text and extraction_mode() == "structured" and hasattr(content_agent, "extract"):
+        # Summary, insights, tags and questions from a single LLM call
+        progress("extract")
+        extraction = await _extract(content_agent, text, url, notes, tags, progress, stream_summary)
+        summary = extraction.summary
+        questions = extraction.clarifying_questions
+        key_insights = extraction.key_insights
+        suggested_tags = extraction.suggested_tags
+        tags = merge_tags(tags, suggested_tags)
+    else:
+        # Empty text makes the agent fall back to its website reader tool
+        progress("summarize")
+        result, questions = await asyncio.gather(
+            content_agent.ingest_url(url, notes, text=text),
+            content_agent.ask_clarifying_questions(url, text=text),
+        )
+        summary = result.get("summary")
+
+    # Store in Supabase with embedding
+    progress("store")
+    try:
+        db_item = await create_content_with_embedding(
+            url=url,
+            extracted_text=text or summary or "",
+            summary=summary,
+            tags=tags if tags else [],
+            dedup=fields,
+        )
+        content_id = db_item.get("id")
+        embedding_status = db_item.get("embedding_status", "unknown")
+    except Exception as db_error:
+        # Continue even if DB fails (for testing)
+        content_id = None
+        embedding_status = "failed"
+        print(f"Database storage failed: {db_error}")
+
+    return {
+        "status": "success",
+        "type": "url",
+        "url": url,
+        "summary": summary,
+        "key_insights": key_insights,
+        "suggested_tags": suggested_tags,
+        "clarifying_questions": questions,
+        "tags": tags or [],
+        "content_id": content_id,
+        "stored_in_db": content_id is not None,
+        "embedding_status": embedding_status,
+    }
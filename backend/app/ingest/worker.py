@@ -0,0 +1,73 @@
+"""Ingest job handlers and standalone worker entrypoint.
+
+Run workers outside the API process with:
+
+    INGEST_WORKERS=4 python -m app.ingest.worker
+
+and set INGEST_WORKERS=0 for the API so slow ingests never share its event loop.
+"""
+import asyncio
+import os
+from typing import Any, Callable, Dict, Optional
+from app.ingest.jobs import JobWorkerPool, get_job_store
+from app.ingest.url import ingest_single_url
+
+_content_agent = None
+
+def _get_content_agent():
+    global _content_agent
+    if _content_agent is None:
+        from app.agents.content_agent import ContentAgent
+        _content_agent = ContentAgent()
+    return _content_agent
+
+async def run_url_job(payload: Dict[str, Any], progress: Callable[..., None]) -> Dict[str, Any]:
+    """Job handler for a single URL ingest"""
+    return await ingest_single_url(
+        url=payload["url"],
+        tags=payload.get("tags") or [],
+        notes=payload.get("notes"),
+        content_agent=_get_content_agent(),
+        progress=progress,
+        stream_summary=True,
+    )
+
+JOB_HANDLERS = {
+    "url": run_url_job,
+}
+
+def create_worker_pool(concurrency: Optional[int] = None) -> JobWorkerPool:
+    """Create a worker pool sized by INGEST_WORKERS unless given explicitly"""
+    if concurrency is None:
+        concurrency = int(os.getenv("INGEST_WORKERS", "2"))
+    return JobWorkerPool(
+        store=get_job_store(),
+        handlers=JOB_HANDLERS,
+        concurrency=concurrency,
+        poll_interval=float(os.getenv("INGEST_POLL_INTERVAL", "1.0")),
+    )
+
+async def main() -> None:
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    from app.compute.pool import get_cpu_pool
+
+    pool = create_worker_pool()
+    if pool.concurrency <= 0:
+        raise SystemExit("INGEST_WORKERS must be at least 1 for a standalone worker")
+    cpu_pool = get_cpu_pool()
+    cpu_pool.start()
+    pool.start()
+    print(f"Ingest worker started with {pool.concurrency} workers")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+        cpu_pool.close()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -1,3 +1,5 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -13,10 +15,72 @@ try:
 except ImportError:
     pass  # Phoenix is optional
 
+def topic_labeler():
+    """TopicAgent.label_clusters, or None when the agent can't be created"""
+    try:
+        from app.api.topics import get_topic_agent
+        return get_topic_agent().label_clusters
+    except Exception as e:
+        print(f"Topic labeling unavailable: {e}")
+        return None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background services owned by the API process"""
+    # CPU-bound extraction/hashing/scoring runs in worker processes so the
+    # event loop stays responsive during bulk ingest
+    from app.compute.pool import get_cpu_pool, get_loop_lag_monitor
+    cpu_pool = get_cpu_pool()
+    cpu_pool.start()
+    loop_lag = get_loop_lag_monitor()
+    loop_lag.start()
+    ingest_pool = None
+    if int(os.getenv("INGEST_WORKERS", "2")) > 0:
+        # Set INGEST_WORKERS=0 and run `python -m app.ingest.worker` to move
+        # ingest jobs out of the API process entirely
+        from app.ingest.worker import create_worker_pool
+        ingest_pool = create_worker_pool()
+        ingest_pool.start()
+    vector_index_task = None
+    if os.getenv("VECTOR_INDEX_ENABLED", "true").lower() == "true":
+        # Searches use the Supabase RPC until the index finishes loading
+        from app.search.ann import load_or_build_vector_index
+        vector_index_task = asyncio.create_task(asyncio.to_thread(load_or_build_vector_index))
+    knn_task = None
+    if os.getenv("KNN_GRAPH_ENABLED", "true").lower() == "true":
+        # Ingest keeps the graph current; this only fills it the first time
+        from app.search.knn import ensure_knn_graph
+        knn_task = asyncio.create_task(asyncio.to_thread(ensure_knn_graph))
+    topic_model = None
+    rebalance_interval = float(os.getenv("TOPIC_REBALANCE_INTERVAL", "3600"))
+    if rebalance_interval > 0:
+        # Ingest keeps topics current; the periodic rebalance corrects centroid drift
+        from app.topics.online import get_topic_model, topics_online_enabled
+        if topics_online_enabled():
+            topic_model = get_topic_model()
+            topic_model.start(rebalance_interval, topic_labeler)
+    try:
+        yield
+    finally:
+        if topic_model is not None:
+            await topic_model.stop()
+        if ingest_pool is not None:
+            await ingest_pool.stop()
+        if vector_index_task is not None:
+            from app.search.ann import get_vector_index, vector_index_dir
+            index = get_vector_index()
+            if vector_index_task.done() and index.ready and index.dirty:
+                await asyncio.to_thread(index.save, vector_index_dir())
+        from app.ingest.fetcher import close_page_fetcher
+        await close_page_fetcher()
+        await loop_lag.stop()
+        await asyncio.to_thread(cpu_pool.close)
+
 app = FastAPI(
     title="Newsletter Engine API",
     description="AI-powered Hinglish Newsletter Engine",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware for Next.js frontend
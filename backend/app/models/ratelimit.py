@@ -0,0 +1,60 @@
+"""Per-provider client-side rate limiting for LLM calls"""
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+class RateLimiter:
+    """Caps in-flight requests and spaces request starts to a requests-per-minute budget.
+
+    Use as ``async with limiter: ...`` around one provider call.
+    """
+
+    def __init__(self, max_concurrency: int = 4, requests_per_minute: float = 0):
+        self.max_concurrency = max_concurrency
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._next_start = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.wait_seconds = 0.0
+
+    async def __aenter__(self) -> "RateLimiter":
+        started = time.monotonic()
+        await self._semaphore.acquire()
+        if self.interval:
+            now = time.monotonic()
+            slot = max(now, self._next_start)
+            self._next_start = slot + self.interval
+            if slot > now:
+                await asyncio.sleep(slot - now)
+        self.wait_seconds += time.monotonic() - started
+        self.in_flight += 1
+        self.requests += 1
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "requests_per_minute": round(60.0 / self.interval, 2) if self.interval else None,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "avg_wait_ms": round(self.wait_seconds / self.requests * 1000, 2) if self.requests else 0.0,
+        }
+
+_limiters: Dict[str, RateLimiter] = {}
+
+def get_rate_limiter(provider: Optional[str] = None) -> RateLimiter:
+    """Process-wide limiter for a provider (LLM_MAX_CONCURRENCY / LLM_REQUESTS_PER_MINUTE)"""
+    key = provider or "default"
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limiter = _limiters[key] = RateLimiter(
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "5")),
+            requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")),
+        )
+    return limiter
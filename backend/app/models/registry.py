@@ -4,6 +4,7 @@ from .base import ModelProvider, ModelResponse, ModelInfo
 from .openrouter import OpenRouterProvider
 from .openai import OpenAIDirectProvider
 from .anthropic import AnthropicDirectProvider
+from .ratelimit import get_rate_limiter
 import yaml
 
 class ModelRegistry:
@@ -77,14 +78,15 @@ class ModelRegistry:
         provider = self.providers[provider_name]
         
         try:
-            return await provider.generate(
-                prompt=prompt,
-                model=model_id,
-                system_prompt=system_prompt,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                **kwargs
-            )
+            async with get_rate_limiter(provider_name):
+                return await provider.generate(
+                    prompt=prompt,
+                    model=model_id,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **kwargs
+                )
         except Exception as e:
             # Fallback logic: if OpenRouter fails, try direct API
             if use_fallback and provider_name == "openrouter":
@@ -0,0 +1,6 @@
+"""Local vector search structures over content embeddings"""
+from app.search.ann import VectorIndex, get_vector_index
+from app.search.quantize import QuantizedIndex, get_quantized_index
+from app.search.store import VectorStore, get_vector_store
+
+__all__ = ["VectorIndex", "get_vector_index", "VectorStore", "get_vector_store", "QuantizedIndex", "get_quantized_index"]
@@ -0,0 +1,453 @@
+"""In-process HNSW approximate nearest-neighbor index over content embeddings"""
+import asyncio
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False  # Falls back to exact vectorized search
+
+EMBEDDING_DIM = 1536
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so inner product equals cosine similarity"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def top_k_exact(matrix: np.ndarray, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices and scores of the k highest inner products (vectorized brute force)"""
+    scores = matrix @ query
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    idx = idx[np.argsort(-scores[idx])]
+    return idx, scores[idx]
+
+@contextmanager
+def _directory_lock(directory: str, exclusive: bool):
+    """flock shared by every worker saving or loading the index in ``directory``"""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+class VectorIndex:
+    """HNSW index (hnswlib) with an exact NumPy mode and light result metadata.
+
+    Labels are dense integers; ``content_id`` strings map to labels so
+    re-ingesting an item replaces its vector in place.
+    """
+
+    def __init__(
+        self,
+        dim: int = EMBEDDING_DIM,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        initial_capacity: int = 1024,
+    ):
+        self.dim = dim
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._lock = threading.RLock()
+        self._capacity = initial_capacity
+        self._vectors = np.zeros((initial_capacity, dim), dtype=np.float32)
+        self._ids: List[str] = []
+        self._labels: Dict[str, int] = {}
+        self._deleted: set = set()
+        self.metadata: Dict[str, Dict[str, Any]] = {}
+        self.ready = False
+        self.dirty = False
+        # Last shared-store segment folded into this index (see app.search.store)
+        self.store_position: Optional[str] = None
+        self._hnsw = self._new_hnsw(initial_capacity) if HNSWLIB_AVAILABLE else None
+
+    def _new_hnsw(self, capacity: int):
+        index = hnswlib.Index(space="ip", dim=self.dim)
+        index.init_index(
+            max_elements=capacity,
+            ef_construction=self.ef_construction,
+            M=self.m,
+            allow_replace_deleted=True,
+        )
+        index.set_ef(self.ef_search)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._ids) - len(self._deleted)
+
+    def _grow(self, needed: int) -> None:
+        if needed <= self._capacity:
+            return
+        capacity = max(needed, self._capacity * 2)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:self._capacity] = self._vectors
+        self._vectors = vectors
+        if self._hnsw is not None:
+            self._hnsw.resize_index(capacity)
+        self._capacity = capacity
+
+    def add(
+        self,
+        ids: List[str],
+        vectors: Iterable[Iterable[float]],
+        metadata: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """Insert or replace vectors for the given content ids"""
+        if not ids:
+            return
+        vectors = normalize_rows(np.asarray(list(vectors), dtype=np.float32))
+        with self._lock:
+            labels = []
+            for content_id in ids:
+                label = self._labels.get(content_id)
+                if label is None:
+                    label = len(self._ids)
+                    self._ids.append(content_id)
+                    self._labels[content_id] = label
+                labels.append(label)
+            self._grow(len(self._ids))
+
+            label_array = np.asarray(labels, dtype=np.int64)
+            self._vectors[label_array] = vectors
+            if self._hnsw is not None:
+                for label in labels:
+                    if label in self._deleted:
+                        self._hnsw.unmark_deleted(label)
+                self._hnsw.add_items(vectors, label_array)
+            self._deleted.difference_update(labels)
+
+            for i, content_id in enumerate(ids):
+                if metadata and metadata[i] is not None:
+                    self.metadata[content_id] = metadata[i]
+            self.dirty = True
+
+    def remove(self, content_id: str) -> None:
+        with self._lock:
+            label = self._labels.get(content_id)
+            if label is None or label in self._deleted:
+                return
+            self._deleted.add(label)
+            if self._hnsw is not None:
+                self._hnsw.mark_deleted(label)
+            self.metadata.pop(content_id, None)
+            self.dirty = True
+
+    def search(
+        self,
+        query: Iterable[float],
+        k: int = 10,
+        threshold: Optional[float] = None,
+        exact: bool = False,
+        ef: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """Return (content_id, cosine similarity) pairs, best first (``ef`` widens the HNSW search)"""
+        q = normalize_rows(np.asarray(list(query), dtype=np.float32))[0]
+        with self._lock:
+            live = len(self)
+            if live == 0:
+                return []
+            k = min(k, live)
+            if exact or self._hnsw is None:
+                labels, scores = self._search_exact(q, k)
+            else:
+                if ef:
+                    self._hnsw.set_ef(max(ef, k))
+                try:
+                    found, distances = self._hnsw.knn_query(q, k=k)
+                    labels, scores = found[0], 1.0 - distances[0]
+                except RuntimeError:
+                    # Too many deleted neighbours for this ef; answer exactly
+                    labels, scores = self._search_exact(q, k)
+                finally:
+                    if ef:
+                        self._hnsw.set_ef(self.ef_search)
+            results = [(self._ids[int(l)], float(s)) for l, s in zip(labels, scores)]
+        if threshold is not None:
+            results = [r for r in results if r[1] > threshold]
+        return results
+
+    def _search_exact(self, q: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        matrix = self._vectors[:len(self._ids)]
+        if not self._deleted:
+            return top_k_exact(matrix, q, k)
+        scores = matrix @ q
+        scores[list(self._deleted)] = -np.inf
+        idx = np.argpartition(-scores, k - 1)[:k]
+        idx = idx[np.argsort(-scores[idx])]
+        return idx, scores[idx]
+
+    def recall_at_k(self, queries: np.ndarray, k: int = 10) -> float:
+        """Fraction of exact top-k neighbours the HNSW search also returns"""
+        if self._hnsw is None or len(self) == 0:
+            return 1.0
+        hits = total = 0
+        for q in queries:
+            approx = {cid for cid, _ in self.search(q, k)}
+            exact = {cid for cid, _ in self.search(q, k, exact=True)}
+            hits += len(approx & exact)
+            total += len(exact)
+        return hits / total if total else 1.0
+
+    def save(self, directory: str) -> None:
+        """Persist the index; workers sharing ``directory`` save one at a time, manifest last"""
+        # Per-process temp names and the directory lock keep concurrent saves from mixing files
+        suffix = f"{os.getpid()}.tmp"
+        with _directory_lock(directory, exclusive=True), self._lock:
+            count = len(self._ids)
+            vectors_tmp = os.path.join(directory, f"vectors.{suffix}.npy")
+            np.save(vectors_tmp, self._vectors[:count], allow_pickle=False)
+            os.replace(vectors_tmp, os.path.join(directory, "vectors.npy"))
+            if self._hnsw is not None:
+                hnsw_tmp = os.path.join(directory, f"hnsw.bin.{suffix}")
+                self._hnsw.save_index(hnsw_tmp)
+                os.replace(hnsw_tmp, os.path.join(directory, "hnsw.bin"))
+            manifest = {
+                "dim": self.dim,
+                "count": count,
+                "ids": self._ids,
+                "deleted": sorted(self._deleted),
+                "metadata": self.metadata,
+                "has_hnsw": self._hnsw is not None,
+                "store_position": self.store_position,
+            }
+            tmp = os.path.join(directory, f"manifest.json.{suffix}")
+            with open(tmp, "w") as f:
+                json.dump(manifest, f)
+            os.replace(tmp, os.path.join(directory, "manifest.json"))
+            self.dirty = False
+
+    def load(self, directory: str) -> bool:
+        """Load a saved index; returns False if nothing usable is on disk"""
+        manifest_path = os.path.join(directory, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return False
+        with _directory_lock(directory, exclusive=False):
+            return self._load_files(directory, manifest_path)
+
+    def _load_files(self, directory: str, manifest_path: str) -> bool:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest["dim"] != self.dim:
+            return False
+        vectors = np.load(os.path.join(directory, "vectors.npy"), allow_pickle=False)
+        count = manifest["count"]
+        if len(vectors) != count:
+            return False
+
+        with self._lock:
+            self._capacity = max(count, 1024)
+            self._vectors = np.zeros((self._capacity, self.dim), dtype=np.float32)
+            self._vectors[:count] = vectors
+            self._ids = manifest["ids"]
+            self._labels = {cid: i for i, cid in enumerate(self._ids)}
+            self._deleted = set(manifest["deleted"])
+            self.metadata = manifest.get("metadata", {})
+            self.store_position = manifest.get("store_position")
+            if HNSWLIB_AVAILABLE:
+                hnsw_path = os.path.join(directory, "hnsw.bin")
+                if manifest.get("has_hnsw") and os.path.exists(hnsw_path):
+                    self._hnsw = hnswlib.Index(space="ip", dim=self.dim)
+                    self._hnsw.load_index(hnsw_path, max_elements=self._capacity, allow_replace_deleted=True)
+                    self._hnsw.set_ef(self.ef_search)
+                else:
+                    # Saved without hnswlib: rebuild the graph from the vectors
+                    self._hnsw = self._new_hnsw(self._capacity)
+                    if count:
+                        self._hnsw.add_items(self._vectors[:count], np.arange(count))
+                        for label in self._deleted:
+                            self._hnsw.mark_deleted(label)
+            self.ready = True
+            self.dirty = False
+        return True
+
+    def build_from_supabase(self, page_size: int = 500) -> int:
+        """Load every stored content embedding into the index"""
+        total = 0
+        for ids, vectors, metadata in iter_supabase_embeddings(page_size):
+            self.add(ids, vectors, metadata)
+            total += len(ids)
+        self.ready = True
+        return total
+
+def iter_supabase_embeddings(page_size: int = 500):
+    """Yield (ids, vectors, metadata) pages of content_embeddings"""
+    from app.db.client import get_supabase
+    from app.db.embedding_cache import parse_embedding
+
+    supabase = get_supabase()
+    start = 0
+    while True:
+        result = supabase.table("content_embeddings").select(
+            "content_id, embedding, content_items(summary, url, tags)"
+        ).range(start, start + page_size - 1).execute()
+        rows = [r for r in (result.data or []) if r.get("embedding")]
+        if rows:
+            yield (
+                [r["content_id"] for r in rows],
+                [parse_embedding(r["embedding"]) for r in rows],
+                [content_metadata(r.get("content_items")) for r in rows],
+            )
+        if len(result.data or []) < page_size:
+            break
+        start += page_size
+
+def content_metadata(item: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fields returned with search hits (same names as the match RPC)"""
+    item = item or {}
+    return {
+        "content_summary": item.get("summary"),
+        "content_url": item.get("url"),
+        "content_tags": item.get("tags") or [],
+    }
+
+_vector_index: Optional[VectorIndex] = None
+_pending_saves = 0
+_pending_lock = threading.Lock()
+
+def vector_index_dir() -> str:
+    return os.getenv("VECTOR_INDEX_DIR", "data/vector_index")
+
+def vector_store_enabled() -> bool:
+    return os.getenv("VECTOR_STORE_ENABLED", "true").lower() == "true"
+
+def vector_search_backend() -> str:
+    """"hnsw" (per-process graph), "mmap" (exact search over the shared store)
+    or "quantized" (binary/int8 candidates rescored from the shared store).
+
+    Defaults to "mmap" when the shared store is enabled, so workers hold no
+    private copy of the vectors and per-worker memory stays flat.
+    """
+    default = "mmap" if vector_store_enabled() else "hnsw"
+    return (os.getenv("VECTOR_INDEX_BACKEND") or default).lower()
+
+def get_vector_index() -> VectorIndex:
+    """Get the process-wide vector index (may not be ready yet)"""
+    global _vector_index
+    if _vector_index is None:
+        _vector_index = VectorIndex(ef_search=int(os.getenv("VECTOR_INDEX_EF_SEARCH", "64")))
+    return _vector_index
+
+def load_or_build_vector_index() -> VectorIndex:
+    """Startup hook: load the persisted index, or build it (from the shared store or Supabase) and save"""
+    index = get_vector_index()
+    directory = vector_index_dir()
+    store = None
+    if vector_store_enabled():
+        from app.search.store import get_vector_store
+        try:
+            store = get_vector_store()
+            # Only the first worker to start downloads from Supabase
+            seeded = store.seed(iter_supabase_embeddings)
+            if seeded:
+                print(f"Vector store seeded: {seeded} vectors")
+        except Exception as e:
+            print(f"Vector store unavailable: {e}")
+            store = None
+        if store is not None and vector_search_backend() == "mmap":
+            return index
+        if store is not None and vector_search_backend() == "quantized":
+            from app.search.quantize import get_quantized_index
+            from app.search.store import sync_index_from_store
+            quantized = get_quantized_index()
+            sync_index_from_store(quantized, store)
+            quantized.ready = True
+            print(f"Quantized index ready: {len(quantized)} vectors, {quantized.memory_bytes() / 1e6:.1f} MB")
+            return index
+
+    try:
+        loaded = index.load(directory)
+    except Exception as e:
+        print(f"Vector index load failed, rebuilding: {e}")
+        loaded = False
+    try:
+        if store is not None:
+            from app.search.store import sync_index_from_store
+            added = sync_index_from_store(index, store)
+            index.ready = True
+            print(f"Vector index ready: {len(index)} vectors ({added} read from the shared store)")
+        elif loaded:
+            print(f"Vector index loaded: {len(index)} vectors")
+        else:
+            count = index.build_from_supabase()
+            print(f"Vector index built: {count} vectors")
+        if index.dirty:
+            index.save(directory)
+    except Exception as e:
+        print(f"Vector index build failed: {e}")
+    return index
+
+def index_content_embeddings(
+    ids: List[str],
+    embeddings: List[List[float]],
+    items: Optional[List[Optional[Dict[str, Any]]]] = None,
+) -> None:
+    """Publish newly stored embeddings to the shared store and this process's index"""
+    global _pending_saves
+    if not ids:
+        return
+    metadata = [content_metadata(item) for item in (items or [None] * len(ids))]
+    index = get_vector_index()
+    store = None
+    if vector_store_enabled():
+        from app.search.store import get_vector_store, sync_index_from_store
+        try:
+            store = get_vector_store()
+            store.append(ids, embeddings, metadata)
+        except Exception as e:
+            print(f"Vector store append failed: {e}")
+            store = None
+    if not index.ready:
+        return
+    if store is not None:
+        sync_index_from_store(index, store)
+    else:
+        index.add(ids, embeddings, metadata)
+    with _pending_lock:
+        _pending_saves += len(ids)
+        save = _pending_saves >= int(os.getenv("VECTOR_INDEX_SAVE_EVERY", "50"))
+        if save:
+            _pending_saves = 0
+    if save:
+        try:
+            index.save(vector_index_dir())
+        except Exception as e:
+            print(f"Vector index save failed: {e}")
+
+async def aindex_content_embeddings(
+    ids: List[str],
+    embeddings: List[List[float]],
+    items: Optional[List[Optional[Dict[str, Any]]]] = None,
+) -> None:
+    """index_content_embeddings for async callers: the store append, HNSW add and periodic save run in a thread"""
+    await asyncio.to_thread(index_content_embeddings, ids, embeddings, items)
+
+def unindex_content(content_ids: List[str]) -> None:
+    """Drop deleted content from the shared store and this process's index"""
+    if not content_ids:
+        return
+    if vector_store_enabled():
+        from app.search.store import get_vector_store
+        try:
+            get_vector_store().delete(content_ids)
+        except Exception as e:
+            print(f"Vector store delete failed: {e}")
+    index = get_vector_index()
+    for content_id in content_ids:
+        index.remove(content_id)
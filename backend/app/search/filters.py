@@ -0,0 +1,86 @@
+"""Metadata filters for content search, pushed down into the search RPCs"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+SOURCE_TYPES = ("url", "file")
+TAG_MODES = ("any", "all")
+
+@dataclass
+class SearchFilters:
+    """Tag / date-range / source-type restrictions on search results"""
+    tags: List[str] = field(default_factory=list)
+    tag_mode: str = "any"
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    source_type: Optional[str] = None
+    exclude_ids: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.tags = sorted({t.strip() for t in self.tags if t and t.strip()})
+        self.since, self.until = _aware(self.since), _aware(self.until)
+        if self.tag_mode not in TAG_MODES:
+            raise ValueError(f"tag_mode must be one of {TAG_MODES}")
+        if self.source_type is not None and self.source_type not in SOURCE_TYPES:
+            raise ValueError(f"source_type must be one of {SOURCE_TYPES}")
+
+    @classmethod
+    def recent(cls, days: int, **kwargs: Any) -> "SearchFilters":
+        return cls(since=datetime.now(timezone.utc) - timedelta(days=days), **kwargs)
+
+    def is_empty(self) -> bool:
+        return not (self.tags or self.since or self.until or self.source_type or self.exclude_ids)
+
+    def to_rpc_params(self) -> Dict[str, Any]:
+        """Arguments for match_content_items / hybrid_search_content"""
+        return {
+            "filter_tags": self.tags or None,
+            "filter_tag_mode": self.tag_mode,
+            "filter_since": self.since.isoformat() if self.since else None,
+            "filter_until": self.until.isoformat() if self.until else None,
+            "filter_source_type": self.source_type,
+            "filter_exclude_ids": self.exclude_ids or None,
+        }
+
+    def matches(self, item: Dict[str, Any]) -> bool:
+        """Check a content_items row (used where the RPC is unavailable)"""
+        if str(item.get("id")) in self.exclude_ids:
+            return False
+        if self.tags:
+            item_tags = set(item.get("tags") or [])
+            wanted = set(self.tags)
+            if self.tag_mode == "all" and not wanted <= item_tags:
+                return False
+            if self.tag_mode == "any" and not wanted & item_tags:
+                return False
+        if self.source_type == "url" and not item.get("url"):
+            return False
+        if self.source_type == "file" and item.get("url"):
+            return False
+        if self.since or self.until:
+            created = _parse_timestamp(item.get("created_at"))
+            if created is None:
+                return False
+            if self.since and created < self.since:
+                return False
+            if self.until and created >= self.until:
+                return False
+        return True
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    return _aware(parsed)
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    """Treat naive datetimes as UTC (created_at is timestamptz)"""
+    if value is None or value.tzinfo:
+        return value
+    return value.replace(tzinfo=timezone.utc)
@@ -0,0 +1,69 @@
+"""Hybrid full-text + vector search (reciprocal-rank fusion in the hybrid_search_content RPC)"""
+import re
+from typing import List, Optional
+from app.search.filters import SearchFilters
+
+SEARCH_MODES = ("auto", "hybrid", "text", "vector")
+
+# Words that mark a natural-language question rather than a lookup
+QUESTION_WORDS = {
+    "how", "what", "why", "when", "where", "which", "who", "should", "can",
+    "does", "is", "are", "explain", "compare", "ideas", "about",
+}
+MAX_KEYWORD_TERMS = 3
+
+def is_keyword_query(query: str) -> bool:
+    """Heuristic: short lookups, quoted phrases and identifiers don't need embeddings"""
+    query = query.strip()
+    if not query:
+        return True
+    if query.startswith('"') and query.endswith('"'):
+        return True
+    terms = query.split()
+    if any(term.lower().strip("?,.") in QUESTION_WORDS for term in terms) or query.endswith("?"):
+        return False
+    if len(terms) <= MAX_KEYWORD_TERMS:
+        return True
+    # Proper nouns, product names, versions, handles: Mistral, GPT-4o, Next.js, @sahil
+    identifiers = [t for t in terms if t[0].isupper() or re.search(r"\d|[._@/-]\w", t)]
+    return len(identifiers) * 2 >= len(terms)
+
+def resolve_search_mode(query: str, mode: str = "auto") -> str:
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode: {mode}")
+    if mode == "auto":
+        return "text" if is_keyword_query(query) else "hybrid"
+    return mode
+
+async def hybrid_search_content(
+    query_text: str,
+    limit: int = 10,
+    threshold: float = 0.0,
+    mode: str = "hybrid",
+    ef_search: Optional[int] = None,
+    filters: Optional[SearchFilters] = None,
+) -> Optional[List[dict]]:
+    """Run hybrid_search_content; ``text`` mode skips the embedding call.
+
+    Returns None when the RPC is not installed so callers can fall back to
+    vector search.
+    """
+    from app.db.client import get_supabase
+    from app.db.embeddings import generate_embedding
+
+    query_embedding = await generate_embedding(query_text) if mode == "hybrid" else None
+    params = {
+        "query_text": query_text,
+        "query_embedding": query_embedding,
+        "match_count": limit,
+        "match_threshold": threshold,
+        "ef_search": ef_search,
+    }
+    if filters and not filters.is_empty():
+        params.update(filters.to_rpc_params())
+    try:
+        result = get_supabase().rpc("hybrid_search_content", params).execute()
+    except Exception as e:
+        print(f"Hybrid search unavailable: {e}")
+        return None
+    return result.data or []
@@ -0,0 +1,280 @@
+"""Materialized k-nearest-neighbor graph over content embeddings (content_neighbors table)"""
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from app.db.client import get_supabase
+from app.search.ann import normalize_rows
+
+# (neighbor content_id, cosine similarity), best first
+Neighbors = List[Tuple[str, float]]
+
+BUILD_LEASE = "knn_build"
+
+def knn_graph_enabled() -> bool:
+    return os.getenv("KNN_GRAPH_ENABLED", "true").lower() == "true"
+
+def knn_k() -> int:
+    return int(os.getenv("KNN_K", "20"))
+
+def knn_blocks(matrix: np.ndarray, k: int, block_size: int = 256) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """Exact top-k neighbors of every row, excluding itself; yields (first row, indices, scores) per block.
+
+    Each block is one (block_size x n) matmul, so peak memory is
+    ``block_size * n`` floats however large the corpus gets. Rows must be
+    L2-normalized.
+    """
+    n = len(matrix)
+    k = min(k, n - 1)
+    for start in range(0, n, block_size):
+        block = matrix[start:start + block_size]
+        rows = np.arange(len(block))
+        if k <= 0:
+            yield start, np.empty((len(block), 0), dtype=np.int64), np.empty((len(block), 0), dtype=np.float32)
+            continue
+        scores = block @ matrix.T
+        scores[rows, start + rows] = -np.inf
+        idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(scores, idx, axis=1)
+        order = np.argsort(-top, axis=1)
+        yield start, np.take_along_axis(idx, order, axis=1), np.take_along_axis(top, order, axis=1)
+
+def merge_neighbors(current: Neighbors, candidates: Sequence[Tuple[str, float]], k: int, exclude: Optional[str] = None) -> Neighbors:
+    """Best ``k`` of both lists (one entry per neighbor, highest similarity kept)"""
+    best: Dict[str, float] = {}
+    for content_id, similarity in list(current) + list(candidates):
+        if content_id != exclude and similarity > best.get(content_id, -np.inf):
+            best[content_id] = float(similarity)
+    return sorted(best.items(), key=lambda pair: -pair[1])[:k]
+
+def _row(content_id: str, neighbors: Neighbors) -> Dict[str, Any]:
+    return {
+        "content_id": content_id,
+        "neighbor_ids": [cid for cid, _ in neighbors],
+        "similarities": [round(similarity, 6) for _, similarity in neighbors],
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+def _upsert(rows: List[Dict[str, Any]], page_size: int = 500) -> None:
+    supabase = get_supabase()
+    for start in range(0, len(rows), page_size):
+        supabase.table("content_neighbors").upsert(rows[start:start + page_size], on_conflict="content_id").execute()
+
+def load_graph_vectors() -> Tuple[List[str], np.ndarray]:
+    """All stored embeddings as (ids, normalized matrix), from the shared store when possible"""
+    from app.search.ann import iter_supabase_embeddings, vector_store_enabled
+    ids: List[str] = []
+    parts: List[np.ndarray] = []
+    if vector_store_enabled():
+        try:
+            from app.search.store import get_vector_store
+            store = get_vector_store()
+            store.refresh()
+            for segment_ids, matrix in store.items():
+                ids.extend(segment_ids)
+                parts.append(np.asarray(matrix, dtype=np.float32))
+        except Exception as e:
+            print(f"Vector store unavailable for the kNN graph: {e}")
+            ids, parts = [], []
+    if not ids:
+        for page_ids, vectors, _ in iter_supabase_embeddings():
+            ids.extend(str(cid) for cid in page_ids)
+            parts.append(np.asarray(vectors, dtype=np.float32))
+    if not ids:
+        return [], np.empty((0, 0), dtype=np.float32)
+    return ids, normalize_rows(np.vstack(parts))
+
+def build_knn_graph(k: Optional[int] = None, block_size: Optional[int] = None) -> int:
+    """Recompute every item's neighbors with blocked matmuls and rewrite the table; returns items written"""
+    k = k or knn_k()
+    block_size = block_size or int(os.getenv("KNN_BLOCK_SIZE", "256"))
+    ids, matrix = load_graph_vectors()
+    for start, idx, scores in knn_blocks(matrix, k, block_size):
+        _upsert([
+            _row(ids[start + i], [(ids[j], float(s)) for j, s in zip(row_idx, row_scores)])
+            for i, (row_idx, row_scores) in enumerate(zip(idx.tolist(), scores.tolist()))
+        ])
+    return len(ids)
+
+def ensure_knn_graph() -> int:
+    """Startup hook: (re)build the graph when it covers fewer than 90% of stored embeddings.
+
+    Only the worker holding the ``knn_build`` lease checks and builds; the
+    others return right away instead of repeating the same full build.
+    """
+    from app.db.leases import acquire_lease, release_lease
+    if not acquire_lease(BUILD_LEASE, float(os.getenv("KNN_BUILD_LEASE_SECONDS", "3600"))):
+        return 0
+    try:
+        supabase = get_supabase()
+        rows = supabase.table("content_neighbors").select("content_id", count="exact").limit(1).execute().count or 0
+        embedded = supabase.table("content_embeddings").select("content_id", count="exact").limit(1).execute().count or 0
+        if rows >= 0.9 * embedded:
+            return 0
+        count = build_knn_graph()
+        print(f"kNN graph built: {count} items")
+        return count
+    except Exception as e:
+        print(f"kNN graph build failed: {e}")
+        return 0
+    finally:
+        release_lease(BUILD_LEASE)
+
+def get_neighbors(
+    content_ids: List[str],
+    limit: Optional[int] = None,
+    min_similarity: float = 0.0,
+    page_size: int = 200,
+) -> Dict[str, Neighbors]:
+    """Stored neighbors of each item (items missing from the graph are omitted); one read per page"""
+    graph: Dict[str, Neighbors] = {}
+    ids = list(dict.fromkeys(str(cid) for cid in content_ids))
+    for start in range(0, len(ids), page_size):
+        result = get_supabase().table("content_neighbors").select(
+            "content_id, neighbor_ids, similarities"
+        ).in_("content_id", ids[start:start + page_size]).execute()
+        for row in result.data or []:
+            neighbors = [
+                (str(cid), float(similarity))
+                for cid, similarity in zip(row.get("neighbor_ids") or [], row.get("similarities") or [])
+                if similarity >= min_similarity
+            ]
+            graph[str(row["content_id"])] = neighbors[:limit]
+    return graph
+
+def related_counts(content_ids: List[str], threshold: float) -> Dict[str, int]:
+    """Number of stored neighbors at or above ``threshold`` per item (capped at KNN_K)"""
+    return {cid: len(neighbors) for cid, neighbors in get_neighbors(content_ids, min_similarity=threshold).items()}
+
+def related_summaries(seed_ids: List[str], limit: int = 5, per_seed: int = 3) -> List[str]:
+    """Summaries of the seed items and their closest stored neighbors, seeds first"""
+    from app.db.content import get_content_items
+    graph = get_neighbors(seed_ids, limit=per_seed, min_similarity=related_threshold())
+    ids = list(dict.fromkeys(
+        [str(cid) for cid in seed_ids] + [cid for seed in seed_ids for cid, _ in graph.get(str(seed), [])]
+    ))
+    items = get_content_items(ids)
+    summaries = [items[cid].get("summary") for cid in ids if cid in items]
+    return [summary for summary in summaries if summary][:limit]
+
+def related_threshold() -> float:
+    return float(os.getenv("KNN_RELATED_THRESHOLD", "0.7"))
+
+def duplicate_threshold() -> float:
+    return float(os.getenv("KNN_DUPLICATE_THRESHOLD", "0.95"))
+
+def merge_edges(edges: List[Tuple[str, str, float]], k: int) -> int:
+    """Merge (list owner, neighbor, similarity) edges into stored lists; returns lists changed.
+
+    The merge runs in SQL under each row's lock (``merge_knn_edges``), so
+    concurrent workers can't drop each other's edges. Owners missing from
+    the graph are skipped, so a partial graph never masquerades as a built one.
+    """
+    if not edges:
+        return 0
+    result = get_supabase().rpc("merge_knn_edges", {
+        "p_edges": [
+            {"content_id": owner, "neighbor_id": neighbor, "similarity": round(float(similarity), 6)}
+            for owner, neighbor, similarity in edges
+        ],
+        "p_k": k,
+    }).execute()
+    return int(result.data or 0)
+
+def write_edges(forward: Dict[str, Neighbors], k: int) -> int:
+    """Store new items' neighbor lists and add them to their neighbors' lists; returns rows written"""
+    rows = [_row(cid, neighbors) for cid, neighbors in forward.items()]
+    _upsert(rows)
+    reverse = [
+        (target, source, similarity)
+        for source, neighbors in forward.items()
+        for target, similarity in neighbors
+        if target not in forward
+    ]
+    return len(rows) + merge_edges(reverse, k)
+
+async def update_knn_graph(
+    ids: List[str],
+    embeddings: List[List[float]],
+    k: Optional[int] = None,
+) -> Dict[str, Neighbors]:
+    """Ingest hook: neighbors of newly stored items (found without an embedding call) plus reverse edges.
+
+    Call after the items are indexed so items in one batch see each other.
+    Never raises; returns the new items' neighbor lists.
+    """
+    if not ids or not knn_graph_enabled():
+        return {}
+    from app.db.embeddings import search_by_embedding
+    k = k or knn_k()
+    try:
+        hits = await asyncio.gather(*(
+            search_by_embedding(embedding, limit=k + 1, threshold=0.0) for embedding in embeddings
+        ))
+        forward = {
+            str(cid): merge_neighbors([], [(str(h["content_id"]), h["similarity"]) for h in found], k, exclude=str(cid))
+            for cid, found in zip(ids, hits)
+        }
+        await asyncio.to_thread(write_edges, forward, k)
+        return forward
+    except Exception as e:
+        print(f"kNN graph update failed: {e}")
+        return {}
+
+def _drop_neighbors(content_ids: List[str]) -> List[str]:
+    """Remove the items from every list in SQL; returns the owners of the lists that shrank"""
+    result = get_supabase().rpc("drop_knn_neighbors", {"p_ids": content_ids}).execute()
+    return [str(cid) for cid in result.data or []]
+
+def _stored_embeddings(content_ids: List[str], page_size: int = 200) -> Dict[str, List[float]]:
+    from app.db.embedding_cache import parse_embedding
+    embeddings: Dict[str, List[float]] = {}
+    for start in range(0, len(content_ids), page_size):
+        result = get_supabase().table("content_embeddings").select(
+            "content_id, embedding"
+        ).in_("content_id", content_ids[start:start + page_size]).execute()
+        for row in result.data or []:
+            embedding = parse_embedding(row.get("embedding"))
+            if embedding:
+                embeddings[str(row["content_id"])] = embedding
+    return embeddings
+
+async def remove_from_knn_graph(content_ids: List[str], k: Optional[int] = None) -> int:
+    """Delete hook: drop deleted items from other items' lists, then refill those lists; returns lists refilled.
+
+    Ingest only adds edges from new items, so without the refill every list
+    that lost a neighbor would stay short of ``k`` for good. Each one is
+    searched again with its stored embedding (no embedding call) and the hits
+    merged back in. The deleted items' own rows cascade. Call after the items
+    are unindexed; never raises.
+    """
+    if not content_ids or not knn_graph_enabled():
+        return 0
+    from app.db.embeddings import search_by_embedding
+    gone = {str(cid) for cid in content_ids}
+    k = k or knn_k()
+    try:
+        affected = await asyncio.to_thread(_drop_neighbors, list(gone))
+        embeddings = await asyncio.to_thread(_stored_embeddings, affected) if affected else {}
+        owners = [cid for cid in affected if cid in embeddings]
+        hits = await asyncio.gather(*(
+            search_by_embedding(embeddings[cid], limit=k + len(gone) + 1, threshold=0.0) for cid in owners
+        ))
+        edges = [
+            (owner, str(hit["content_id"]), hit["similarity"])
+            for owner, found in zip(owners, hits)
+            for hit in found
+            if str(hit["content_id"]) not in gone and str(hit["content_id"]) != owner
+        ]
+        await asyncio.to_thread(merge_edges, edges, k)
+        return len(owners)
+    except Exception as e:
+        print(f"kNN graph cleanup failed: {e}")
+        return 0
+
+if __name__ == "__main__":
+    # Full rebuild, e.g. after changing KNN_K: python -m app.search.knn
+    from dotenv import load_dotenv
+    load_dotenv()
+    print(f"kNN graph rebuilt: {build_knn_graph()} items")
@@ -0,0 +1,193 @@
+"""Int8 and 1-bit quantized embeddings with two-stage (candidates, then exact rescore) search"""
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.search.ann import EMBEDDING_DIM, normalize_rows
+
+INT8_BLOCK_ROWS = 4096
+
+# Popcount of every byte value, for NumPy versions without np.bitwise_count
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row scalar quantization: vector ~= codes * scale"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+def binarize(vectors: np.ndarray) -> np.ndarray:
+    """Sign bits packed 8 per byte (1536 dims -> 192 bytes)"""
+    return np.packbits(np.asarray(vectors) > 0, axis=-1)
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """Bit differences between each packed row and the packed query"""
+    xor = np.bitwise_xor(codes, query_code)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(xor).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[xor].sum(axis=1, dtype=np.int32)
+
+def _top_k_smallest(values: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(values))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    return np.argpartition(values, k - 1)[:k]
+
+class QuantizedIndex:
+    """Binary and int8 codes for every vector; full vectors only read for rescoring.
+
+    ``vector_source(ids)`` returns the full (normalized) rows used in the
+    second stage -- e.g. rows of the memory-mapped VectorStore -- so only
+    the compressed codes have to stay resident. Without a source the index
+    keeps its own float32 copy.
+    """
+
+    def __init__(
+        self,
+        dim: int = EMBEDDING_DIM,
+        vector_source: Optional[Callable[[List[str]], np.ndarray]] = None,
+        initial_capacity: int = 1024,
+    ):
+        self.dim = dim
+        self.vector_source = vector_source
+        self._lock = threading.RLock()
+        self._capacity = initial_capacity
+        self._binary = np.zeros((initial_capacity, (dim + 7) // 8), dtype=np.uint8)
+        self._int8 = np.zeros((initial_capacity, dim), dtype=np.int8)
+        self._scales = np.zeros(initial_capacity, dtype=np.float32)
+        self._full = None if vector_source else np.zeros((initial_capacity, dim), dtype=np.float32)
+        self._live = np.zeros(initial_capacity, dtype=bool)
+        self._ids: List[str] = []
+        self._labels: Dict[str, int] = {}
+        self.metadata: Dict[str, Dict[str, Any]] = {}
+        self.store_position: Optional[str] = None
+        self.ready = False
+
+    def __len__(self) -> int:
+        return int(self._live[:len(self._ids)].sum())
+
+    def memory_bytes(self) -> int:
+        """Resident size of the codes (and full copy, if the index keeps one)"""
+        n = len(self._ids)
+        size = self._binary[:n].nbytes + self._int8[:n].nbytes + self._scales[:n].nbytes
+        if self._full is not None:
+            size += self._full[:n].nbytes
+        return size
+
+    def _grow(self, needed: int) -> None:
+        if needed <= self._capacity:
+            return
+        capacity = max(needed, self._capacity * 2)
+
+        def grown(array: np.ndarray) -> np.ndarray:
+            bigger = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            bigger[:self._capacity] = array
+            return bigger
+
+        self._binary, self._int8 = grown(self._binary), grown(self._int8)
+        self._scales, self._live = grown(self._scales), grown(self._live)
+        if self._full is not None:
+            self._full = grown(self._full)
+        self._capacity = capacity
+
+    def add(
+        self,
+        ids: List[str],
+        vectors: Iterable[Iterable[float]],
+        metadata: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """Insert or replace vectors for the given content ids"""
+        if not ids:
+            return
+        vectors = normalize_rows(vectors if isinstance(vectors, np.ndarray) else np.asarray(list(vectors), dtype=np.float32))
+        codes, scales = quantize_int8(vectors)
+        with self._lock:
+            labels = []
+            for content_id in ids:
+                label = self._labels.get(content_id)
+                if label is None:
+                    label = len(self._ids)
+                    self._ids.append(content_id)
+                    self._labels[content_id] = label
+                labels.append(label)
+            self._grow(len(self._ids))
+            labels = np.asarray(labels, dtype=np.int64)
+            self._binary[labels] = binarize(vectors)
+            self._int8[labels] = codes
+            self._scales[labels] = scales
+            self._live[labels] = True
+            if self._full is not None:
+                self._full[labels] = vectors
+            for i, content_id in enumerate(ids):
+                if metadata and metadata[i] is not None:
+                    self.metadata[content_id] = metadata[i]
+
+    def remove(self, content_id: str) -> None:
+        with self._lock:
+            label = self._labels.get(content_id)
+            if label is not None:
+                self._live[label] = False
+                self.metadata.pop(content_id, None)
+
+    def _full_vectors(self, labels: np.ndarray) -> np.ndarray:
+        if self._full is not None:
+            return self._full[labels]
+        return normalize_rows(self.vector_source([self._ids[int(l)] for l in labels]))
+
+    def candidates(self, query: np.ndarray, count: int, mode: str = "binary") -> np.ndarray:
+        """Stage one: labels of the ``count`` best rows by Hamming or int8 score"""
+        n = len(self._ids)
+        if mode == "binary":
+            distances = hamming_distances(self._binary[:n], binarize(query[None, :])[0])
+            distances[~self._live[:n]] = np.iinfo(np.int32).max
+            labels = _top_k_smallest(distances, count)
+        elif mode == "int8":
+            q_codes, _ = quantize_int8(query[None, :])
+            q_codes = q_codes[0].astype(np.float32)
+            scores = np.empty(n, dtype=np.float32)
+            # Widen int8 codes in blocks (float32 for BLAS) so the temporary stays small
+            for start in range(0, n, INT8_BLOCK_ROWS):
+                end = min(start + INT8_BLOCK_ROWS, n)
+                scores[start:end] = (self._int8[start:end].astype(np.float32) @ q_codes) * self._scales[start:end]
+            scores[~self._live[:n]] = -np.inf
+            labels = _top_k_smallest(-scores, count)
+        else:
+            raise ValueError(f"Unknown quantized search mode: {mode}")
+        return labels[self._live[labels]]
+
+    def search(
+        self,
+        query: Iterable[float],
+        k: int = 10,
+        threshold: Optional[float] = None,
+        mode: str = "binary",
+        oversample: int = 10,
+    ) -> List[Tuple[str, float]]:
+        """Two-stage search: ``k * oversample`` candidates, then exact cosine rescoring"""
+        q = normalize_rows(np.asarray(list(query), dtype=np.float32))[0]
+        with self._lock:
+            if len(self) == 0:
+                return []
+            labels = self.candidates(q, max(k * oversample, k), mode)
+            scores = self._full_vectors(labels) @ q
+            order = np.argsort(-scores)[:k]
+            results = [(self._ids[int(labels[i])], float(scores[i])) for i in order]
+        if threshold is not None:
+            results = [r for r in results if r[1] > threshold]
+        return results
+
+_quantized_index: Optional[QuantizedIndex] = None
+
+def get_quantized_index() -> QuantizedIndex:
+    """Process-wide quantized index that rescores from the shared vector store"""
+    global _quantized_index
+    if _quantized_index is None:
+        from app.search.store import get_vector_store
+
+        def from_store(ids: List[str]) -> np.ndarray:
+            store = get_vector_store()
+            return np.stack([store.get(content_id) for content_id in ids])
+
+        _quantized_index = QuantizedIndex(vector_source=from_store)
+    return _quantized_index
@@ -0,0 +1,106 @@
+"""Cache of /api/content/search responses, invalidated by a content generation shared by all workers"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from app.db.cache import LRUCache
+
+# Last shared generation seen by this process and when it was read
+_shared: Optional[Tuple[str, float]] = None
+_shared_lock = threading.Lock()
+
+def search_generation_ttl() -> float:
+    return float(os.getenv("SEARCH_GENERATION_TTL", "1"))
+
+def _rpc_generation(name: str) -> str:
+    from app.db.client import get_supabase
+    return str(get_supabase().rpc(name, {}).execute().data)
+
+def _store_generation() -> Optional[str]:
+    from app.search.ann import vector_store_enabled
+    if not vector_store_enabled():
+        return None
+    try:
+        from app.search.store import get_vector_store
+        store = get_vector_store()
+        store.refresh()
+        return f"store.{store.generation}"
+    except Exception:
+        return None
+
+def _remember(generation: Optional[str]) -> None:
+    global _shared
+    with _shared_lock:
+        _shared = (generation, time.monotonic()) if generation is not None else None
+
+def bump_search_generation() -> Optional[str]:
+    """Call after searchable content is added, changed or deleted (once the write is stored)"""
+    try:
+        generation = _rpc_generation("bump_search_generation")
+    except Exception as e:
+        print(f"Search generation bump failed: {e}")
+        generation = None
+    _remember(generation)
+    return generation
+
+async def abump_search_generation() -> Optional[str]:
+    """bump_search_generation for async callers (the RPC runs in a thread)"""
+    return await asyncio.to_thread(bump_search_generation)
+
+def search_generation() -> Optional[str]:
+    """The content generation every worker shares, or None if there is none (responses are then not cached).
+
+    Read from ``search_generation_seq`` (migration 017) at most every
+    SEARCH_GENERATION_TTL seconds, else from the shared vector store's
+    manifest. Nothing process-local goes into it, so every worker keys the
+    cache and ETags the same way.
+    """
+    cached = _shared
+    if cached is not None and time.monotonic() - cached[1] < search_generation_ttl():
+        return cached[0]
+    try:
+        generation = _rpc_generation("search_generation")
+    except Exception:
+        generation = _store_generation()
+    _remember(generation)
+    return generation
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+def search_cache_key(query: str, **params: Any) -> str:
+    """Stable key for (normalized query, limit, threshold, filters, ...)"""
+    payload = json.dumps({"q": normalize_query(query), **params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def search_etag(key: str, generation: str) -> str:
+    return '"' + hashlib.sha256(f"{generation}:{key}".encode("utf-8")).hexdigest()[:32] + '"'
+
+class SearchResultCache:
+    """Bounded LRU of search responses; entries from older generations never hit"""
+
+    def __init__(self, max_size: int = 512):
+        self._cache = LRUCache(max_size)
+
+    def get(self, key: str, generation: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get((generation, key))
+
+    def set(self, key: str, generation: str, response: Dict[str, Any]) -> None:
+        self._cache.set((generation, key), response)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+_search_cache: Optional[SearchResultCache] = None
+
+def get_search_cache() -> SearchResultCache:
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = SearchResultCache(max_size=int(os.getenv("SEARCH_CACHE_SIZE", "512")))
+    return _search_cache
@@ -0,0 +1,320 @@
+"""Append-only on-disk vector store, memory-mapped read-only by every worker"""
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.search.ann import EMBEDDING_DIM, normalize_rows
+
+MANIFEST = "manifest.json"
+
+class VectorStore:
+    """Segmented float32 matrix plus id map, shared through the OS page cache.
+
+    Each segment is a raw ``.f32`` row-major matrix and a ``.json`` file with
+    its ids and result metadata. ``manifest.json`` lists the published
+    segments and is replaced atomically, so readers only ever see complete
+    segments. Writers serialize on an ``flock`` so any worker may append.
+    Later segments override earlier rows with the same id.
+    """
+
+    def __init__(self, directory: str, dim: int = EMBEDDING_DIM, max_segments: int = 64):
+        self.directory = directory
+        self.dim = dim
+        self.max_segments = max_segments
+        self._manifest_stat: Optional[Tuple[int, int]] = None
+        self._lock = threading.RLock()
+        self._generation = -1
+        self._segments: List[Dict[str, Any]] = []
+        self._latest: Dict[str, Tuple[int, int]] = {}
+        self._deleted: set = set()
+        self._live_count = 0
+        self.metadata: Dict[str, Dict[str, Any]] = {}
+
+    # Writer side
+
+    @contextmanager
+    def _write_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.directory, MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"dim": self.dim, "generation": 0, "next_segment": 1, "segments": [], "deleted": []}
+
+    def _publish(self, manifest: Dict[str, Any]) -> None:
+        manifest["generation"] += 1
+        tmp = os.path.join(self.directory, MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.directory, MANIFEST))
+
+    def _write_segment(self, name: str, ids: List[str], vectors: np.ndarray, metadata: List[Dict[str, Any]]) -> None:
+        base = os.path.join(self.directory, name)
+        with open(base + ".f32.tmp", "wb") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(base + ".json.tmp", "w") as f:
+            json.dump({"ids": ids, "metadata": metadata}, f)
+        os.replace(base + ".f32.tmp", base + ".f32")
+        os.replace(base + ".json.tmp", base + ".json")
+
+    def append(
+        self,
+        ids: List[str],
+        vectors: Iterable[Iterable[float]],
+        metadata: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """Write a new segment and publish it (vectors are stored L2-normalized)"""
+        if not ids:
+            return
+        with self._write_lock():
+            self._append_locked(ids, vectors, metadata)
+            if len(self._read_manifest()["segments"]) > self.max_segments:
+                self._compact_locked()
+
+    def _append_locked(
+        self,
+        ids: List[str],
+        vectors: Iterable[Iterable[float]],
+        metadata: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        vectors = normalize_rows(np.asarray(list(vectors), dtype=np.float32))
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+        manifest = self._read_manifest()
+        name = f"seg-{manifest['next_segment']:06d}"
+        self._write_segment(name, list(ids), vectors, metadata or [{} for _ in ids])
+        manifest["next_segment"] += 1
+        manifest["segments"].append({"name": name, "rows": len(ids)})
+        appended = set(ids)
+        manifest["deleted"] = [d for d in manifest["deleted"] if d not in appended]
+        self._publish(manifest)
+
+    def seed(self, pages: Callable[[], Iterable[Tuple[List[str], List[List[float]], List[Dict[str, Any]]]]]) -> int:
+        """Fill an empty store from ``pages()``; concurrent callers wait and skip"""
+        with self._write_lock():
+            if self._read_manifest()["segments"]:
+                return 0
+            total = 0
+            for ids, vectors, metadata in pages():
+                self._append_locked(ids, vectors, metadata)
+                total += len(ids)
+            if len(self._read_manifest()["segments"]) > 1:
+                self._compact_locked()
+            return total
+
+    def delete(self, ids: List[str]) -> None:
+        with self._write_lock():
+            manifest = self._read_manifest()
+            manifest["deleted"] = sorted(set(manifest["deleted"]) | set(ids))
+            self._publish(manifest)
+
+    def compact(self) -> None:
+        """Merge all segments into one, dropping superseded and deleted rows"""
+        with self._write_lock():
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        self.refresh()
+        with self._lock:
+            live_ids = [cid for cid in self._latest if cid not in self._deleted]
+            vectors = np.stack([self._row(cid) for cid in live_ids]) if live_ids else \
+                np.zeros((0, self.dim), dtype=np.float32)
+            metadata = [self.metadata.get(cid, {}) for cid in live_ids]
+            old = [segment["name"] for segment in self._segments]
+        manifest = self._read_manifest()
+        name = f"seg-{manifest['next_segment']:06d}"
+        self._write_segment(name, live_ids, vectors, metadata)
+        manifest["next_segment"] += 1
+        manifest["segments"] = [{"name": name, "rows": len(live_ids)}]
+        manifest["deleted"] = []
+        self._publish(manifest)
+        # Readers that still map old segments keep their open file handles
+        for segment_name in old:
+            for ext in (".f32", ".json"):
+                try:
+                    os.remove(os.path.join(self.directory, segment_name + ext))
+                except FileNotFoundError:
+                    pass
+        self.refresh()
+
+    # Reader side
+
+    def refresh(self) -> bool:
+        """Map any newly published segments; returns True if anything changed"""
+        try:
+            return self._refresh()
+        except FileNotFoundError:
+            # A compaction removed segments between reading the manifest and
+            # opening them; the next manifest no longer references them
+            with self._lock:
+                self._segments, self._latest, self.metadata = [], {}, {}
+                self._live_count = 0
+                self._generation = -1
+                self._manifest_stat = None
+            return self._refresh()
+
+    def _refresh(self) -> bool:
+        try:
+            stat = os.stat(os.path.join(self.directory, MANIFEST))
+            manifest_stat = (stat.st_mtime_ns, stat.st_ino)
+        except FileNotFoundError:
+            manifest_stat = None
+        if manifest_stat is not None and manifest_stat == self._manifest_stat:
+            return False  # Cheap path taken on every search
+        manifest = self._read_manifest()
+        with self._lock:
+            self._manifest_stat = manifest_stat
+            if manifest["generation"] == self._generation:
+                return False
+            if manifest.get("dim", self.dim) != self.dim:
+                raise ValueError(f"Store dimension {manifest['dim']} does not match {self.dim}")
+
+            names = [segment["name"] for segment in manifest["segments"]]
+            known = [segment["name"] for segment in self._segments]
+            if names[:len(known)] != known:
+                # Compacted since the last refresh: start over from the manifest
+                self._segments, self._latest, self.metadata = [], {}, {}
+                known = []
+
+            for segment in manifest["segments"][len(known):]:
+                self._open_segment(segment)
+            self._deleted = set(manifest["deleted"])
+            self._update_live_masks()
+            self._generation = manifest["generation"]
+            return True
+
+    def _open_segment(self, segment: Dict[str, Any]) -> None:
+        base = os.path.join(self.directory, segment["name"])
+        rows = segment["rows"]
+        matrix = np.memmap(base + ".f32", dtype=np.float32, mode="r", shape=(rows, self.dim)) if rows else \
+            np.zeros((0, self.dim), dtype=np.float32)
+        with open(base + ".json") as f:
+            info = json.load(f)
+        index = len(self._segments)
+        current = np.ones(rows, dtype=bool)
+        for row, content_id in enumerate(info["ids"]):
+            previous = self._latest.get(content_id)
+            if previous is not None:
+                masks = current if previous[0] == index else self._segments[previous[0]]["current"]
+                masks[previous[1]] = False
+            self._latest[content_id] = (index, row)
+        for content_id, meta in zip(info["ids"], info["metadata"]):
+            self.metadata[content_id] = meta
+        self._segments.append({
+            "name": segment["name"],
+            "matrix": matrix,
+            "ids": info["ids"],
+            # Rows not superseded by a later segment / additionally not deleted
+            "current": current,
+            "live": np.ones(rows, dtype=bool),
+        })
+
+    def _update_live_masks(self) -> None:
+        for segment in self._segments:
+            segment["live"] = segment["current"].copy()
+        for content_id in self._deleted:
+            location = self._latest.get(content_id)
+            if location is not None:
+                self._segments[location[0]]["live"][location[1]] = False
+        self._live_count = sum(int(segment["live"].sum()) for segment in self._segments)
+
+    def _row(self, content_id: str) -> np.ndarray:
+        segment, row = self._latest[content_id]
+        return np.asarray(self._segments[segment]["matrix"][row])
+
+    def __len__(self) -> int:
+        """Live rows, counted when segments are mapped (searches call this on every request)"""
+        return self._live_count
+
+    def get(self, content_id: str) -> Optional[np.ndarray]:
+        with self._lock:
+            if content_id not in self._latest or content_id in self._deleted:
+                return None
+            return self._row(content_id)
+
+    def items(self, start_segment: int = 0):
+        """Yield (ids, matrix) of live rows per segment, for bulk consumers"""
+        with self._lock:
+            for segment in self._segments[start_segment:]:
+                mask = segment["live"]
+                if mask.any():
+                    ids = [cid for cid, keep in zip(segment["ids"], mask) if keep]
+                    yield ids, segment["matrix"][mask]
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def deleted(self) -> List[str]:
+        return list(self._deleted)
+
+    @property
+    def segment_names(self) -> List[str]:
+        return [segment["name"] for segment in self._segments]
+
+    def search(self, query: Iterable[float], k: int = 10, threshold: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Exact cosine top-k across all segments, reading straight from the mmap"""
+        q = normalize_rows(np.asarray(list(query), dtype=np.float32))[0]
+        best: List[Tuple[str, float]] = []
+        with self._lock:
+            for segment in self._segments:
+                if not len(segment["ids"]):
+                    continue
+                scores = segment["matrix"] @ q
+                scores[~segment["live"]] = -np.inf
+                n = min(k, len(scores))
+                idx = np.argpartition(-scores, n - 1)[:n]
+                best.extend((segment["ids"][i], float(scores[i])) for i in idx if np.isfinite(scores[i]))
+        best.sort(key=lambda hit: hit[1], reverse=True)
+        if threshold is not None:
+            best = [hit for hit in best if hit[1] > threshold]
+        return best[:k]
+
+def sync_index_from_store(index: Any, store: VectorStore) -> int:
+    """Fold store segments the VectorIndex has not seen yet into it"""
+    store.refresh()
+    names = store.segment_names
+    if index.store_position in names:
+        start = names.index(index.store_position) + 1
+    else:
+        # New index, or the store was compacted since: replay everything
+        # (re-adding an id replaces its vector in place)
+        start = 0
+    added = 0
+    for ids, matrix in store.items(start_segment=start):
+        index.add(ids, matrix, [store.metadata.get(cid, {}) for cid in ids])
+        added += len(ids)
+    for content_id in store.deleted:
+        index.remove(content_id)
+    if names:
+        index.store_position = names[-1]
+    return added
+
+_vector_store: Optional[VectorStore] = None
+
+def get_vector_store() -> VectorStore:
+    """Get the process-wide store mapped from VECTOR_STORE_DIR"""
+    global _vector_store
+    if _vector_store is None:
+        _vector_store = VectorStore(
+            os.getenv("VECTOR_STORE_DIR", "data/vector_store"),
+            max_segments=int(os.getenv("VECTOR_STORE_MAX_SEGMENTS", "64")),
+        )
+    _vector_store.refresh()
+    return _vector_store
@@ -0,0 +1,5 @@
+"""Embedding-based topic clustering and prioritization"""
+from app.topics.clustering import TopicCluster, cluster_embeddings, score_clusters
+from app.topics.engine import prioritize_topics
+
+__all__ = ["TopicCluster", "cluster_embeddings", "score_clusters", "prioritize_topics"]
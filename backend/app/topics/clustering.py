@@ -0,0 +1,172 @@
+"""Vectorized clustering of content embeddings and topic scoring (NumPy only)"""
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from app.search.ann import normalize_rows
+
+NOISE = -1
+
+def auto_k(n: int, max_k: int = 12) -> int:
+    """Rule-of-thumb cluster count, sqrt(n/2), kept within [1, max_k]"""
+    return max(1, min(max_k, int(round(math.sqrt(n / 2)))))
+
+def spherical_kmeans(vectors: np.ndarray, k: int, iterations: int = 25, seed: int = 0):
+    """k-means on the unit sphere with k-means++ seeding; returns (labels, centroids).
+
+    ``vectors`` must be L2-normalized. Each iteration is one (n x k) matmul.
+    """
+    n = len(vectors)
+    k = max(1, min(k, n))
+    rng = np.random.default_rng(seed)
+    centroids = np.empty((k, vectors.shape[1]), dtype=np.float32)
+    centroids[0] = vectors[rng.integers(n)]
+    # Squared chord distance on the unit sphere is 2 - 2cos
+    closest = np.maximum(2.0 - 2.0 * (vectors @ centroids[0]), 0.0)
+    for i in range(1, k):
+        total = float(closest.sum())
+        pick = rng.integers(n) if total <= 0 else rng.choice(n, p=closest / total)
+        centroids[i] = vectors[pick]
+        closest = np.minimum(closest, np.maximum(2.0 - 2.0 * (vectors @ centroids[i]), 0.0))
+
+    labels = np.full(n, -1, dtype=np.int64)
+    for _ in range(iterations):
+        new_labels = np.argmax(vectors @ centroids.T, axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        # Per-cluster sums as one matmul (much faster than np.add.at)
+        assignment = np.zeros((k, n), dtype=np.float32)
+        assignment[labels, np.arange(n)] = 1.0
+        sums = assignment @ vectors
+        empty = ~sums.any(axis=1)
+        if empty.any():
+            # Re-seed empty clusters with the points worst served by their centroid
+            fit = np.einsum("ij,ij->i", vectors, centroids[labels])
+            sums[empty] = vectors[np.argsort(fit)[:int(empty.sum())]]
+        centroids = normalize_rows(sums)
+    return labels, centroids
+
+def merge_close_clusters(labels: np.ndarray, centroids: np.ndarray, threshold: float) -> np.ndarray:
+    """Agglomerative pass over centroids: clusters whose centroids exceed ``threshold`` cosine merge"""
+    k = len(centroids)
+    parent = list(range(k))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    similarity = centroids @ centroids.T
+    rows, cols = np.nonzero(np.triu(similarity, 1) > threshold)
+    for i, j in sorted(zip(rows.tolist(), cols.tolist()), key=lambda p: -similarity[p[0], p[1]]):
+        parent[find(j)] = find(i)
+    roots = np.array([find(i) for i in range(k)])
+    return roots[labels]
+
+def cluster_embeddings(
+    vectors: np.ndarray,
+    k: Optional[int] = None,
+    min_size: int = 2,
+    merge_threshold: float = 0.85,
+    seed: int = 0,
+) -> np.ndarray:
+    """Cluster labels 0..m-1 per row; members of clusters smaller than ``min_size`` get NOISE"""
+    vectors = normalize_rows(vectors)
+    if len(vectors) == 0:
+        return np.empty(0, dtype=np.int64)
+    labels, centroids = spherical_kmeans(vectors, k or auto_k(len(vectors)), seed=seed)
+    labels = merge_close_clusters(labels, centroids, merge_threshold)
+    ids, counts = np.unique(labels, return_counts=True)
+    keep = ids[counts >= min_size]
+    remap = {int(old): new for new, old in enumerate(keep)}
+    return np.array([remap.get(int(label), NOISE) for label in labels], dtype=np.int64)
+
+@dataclass
+class TopicCluster:
+    """One cluster of content items with its score components"""
+    members: List[int]  # Row indices into the clustered items
+    centroid: np.ndarray
+    medoid: int  # Row index of the member closest to the centroid
+    tags: List[str] = field(default_factory=list)
+    size_score: float = 0.0
+    recency_score: float = 0.0
+    interest_score: float = 0.0
+    priority_score: float = 0.0
+
+def _age_days(created_at, now: datetime) -> Optional[float]:
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(created_at, datetime):
+        return None
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (now - created_at).total_seconds() / 86400)
+
+def top_tags(items: Sequence[Dict], limit: int = 5) -> List[str]:
+    counts: Dict[str, int] = {}
+    for item in items:
+        for tag in item.get("tags") or []:
+            counts[tag] = counts.get(tag, 0) + 1
+    return [tag for tag, _ in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]]
+
+def score_clusters(
+    vectors: np.ndarray,
+    labels: np.ndarray,
+    items: Sequence[Dict],
+    interest_weights: Optional[Dict[str, float]] = None,
+    now: Optional[datetime] = None,
+    half_life_days: float = 7.0,
+    weights: Sequence[float] = (0.4, 0.4, 0.2),
+) -> List[TopicCluster]:
+    """Build clusters ranked by priority (0-10) from size, recency and interest.
+
+    size: log-scaled relative to the largest cluster; recency: mean of an
+    exponential decay with ``half_life_days``; interest: mean over members of
+    the highest interest weight among their tags (capped at 1).
+    """
+    vectors = normalize_rows(vectors)
+    now = now or datetime.now(timezone.utc)
+    interest_weights = {k.lower(): v for k, v in (interest_weights or {}).items()}
+    clusters: List[TopicCluster] = []
+    for label in sorted(set(labels.tolist()) - {NOISE}):
+        members = np.flatnonzero(labels == label)
+        centroid = normalize_rows(vectors[members].mean(axis=0))[0]
+        medoid = int(members[np.argmax(vectors[members] @ centroid)])
+        member_items = [items[i] for i in members]
+        ages = [_age_days(item.get("created_at"), now) for item in member_items]
+        decay = [0.5 ** (age / half_life_days) for age in ages if age is not None]
+        interest = [
+            max((interest_weights.get(t.lower(), 0.0) for t in item.get("tags") or []), default=0.0)
+            for item in member_items
+        ]
+        clusters.append(TopicCluster(
+            members=members.tolist(),
+            centroid=centroid,
+            medoid=medoid,
+            tags=top_tags(member_items),
+            recency_score=float(np.mean(decay)) if decay else 0.0,
+            interest_score=min(1.0, float(np.mean(interest))) if interest else 0.0,
+        ))
+    largest = max((len(c.members) for c in clusters), default=1)
+    size_weight, recency_weight, interest_weight = weights
+    for cluster in clusters:
+        cluster.size_score = math.log1p(len(cluster.members)) / math.log1p(largest)
+        cluster.priority_score = round(10 * (
+            size_weight * cluster.size_score
+            + recency_weight * cluster.recency_score
+            + interest_weight * cluster.interest_score
+        ), 2)
+    clusters.sort(key=lambda c: c.priority_score, reverse=True)
+    return clusters
+
+def representatives(vectors: np.ndarray, cluster: TopicCluster, limit: int = 3) -> List[int]:
+    """Row indices of the members closest to the centroid"""
+    members = np.asarray(cluster.members)
+    scores = normalize_rows(vectors[members]) @ cluster.centroid
+    return members[np.argsort(-scores)[:limit]].tolist()
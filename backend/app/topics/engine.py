@@ -0,0 +1,218 @@
+"""Topic prioritization: cluster stored embeddings, label compact digests, store in topics"""
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from app.config import env_int
+from app.compute.pool import run_cpu
+from app.db.client import get_supabase
+from app.db.embedding_cache import parse_embedding
+from app.search.filters import SearchFilters
+from app.topics.clustering import TopicCluster, cluster_embeddings, representatives, score_clusters
+
+# Characters of each representative summary shown to the labeling agent
+DIGEST_SUMMARY_CHARS = 200
+DIGEST_REPRESENTATIVES = 3
+
+# (digests, interest weights) -> {cluster number: {"title", "description", "reasoning"}}
+Labeler = Callable[[List[str], Optional[Dict[str, float]]], Awaitable[Dict[int, Dict[str, str]]]]
+
+def load_scoped_items(scope: SearchFilters, limit: int) -> List[Dict[str, Any]]:
+    """Latest content items in the tag/date scope (without their text bodies)"""
+    query = get_supabase().table("content_items").select("id, url, summary, tags, created_at")
+    if scope.tags:
+        query = query.ov("tags", scope.tags)
+    if scope.since:
+        query = query.gte("created_at", scope.since.isoformat())
+    if scope.until:
+        query = query.lt("created_at", scope.until.isoformat())
+    result = query.order("created_at", desc=True).limit(limit).execute()
+    return result.data or []
+
+def load_embeddings(content_ids: List[str], page_size: int = 200) -> Dict[str, np.ndarray]:
+    """Stored item embeddings, from the shared vector store when possible, else Supabase"""
+    vectors: Dict[str, np.ndarray] = {}
+    from app.search.ann import vector_store_enabled
+    if vector_store_enabled():
+        try:
+            from app.search.store import get_vector_store
+            store = get_vector_store()
+            for content_id in content_ids:
+                vector = store.get(content_id)
+                if vector is not None:
+                    vectors[content_id] = np.asarray(vector, dtype=np.float32)
+        except Exception as e:
+            print(f"Vector store unavailable for topics: {e}")
+    missing = [cid for cid in content_ids if cid not in vectors]
+    for start in range(0, len(missing), page_size):
+        result = get_supabase().table("content_embeddings").select("content_id, embedding").in_(
+            "content_id", missing[start:start + page_size]
+        ).execute()
+        for row in result.data or []:
+            if row.get("embedding"):
+                vectors[str(row["content_id"])] = np.asarray(parse_embedding(row["embedding"]), dtype=np.float32)
+    return vectors
+
+def format_digest(number: int, size: int, tags: List[str], summaries: List[str]) -> str:
+    """Fixed-size description of a cluster: its size, top tags and a few central summaries"""
+    lines = [f"Cluster {number} ({size} items; tags: {', '.join(tags) or 'none'})"]
+    for summary in summaries[:DIGEST_REPRESENTATIVES]:
+        lines.append(f"- {' '.join((summary or '').split())[:DIGEST_SUMMARY_CHARS]}")
+    return "\n".join(lines)
+
+def cluster_digest(number: int, cluster: TopicCluster, items: List[Dict[str, Any]], matrix: np.ndarray) -> str:
+    rows = representatives(matrix, cluster, DIGEST_REPRESENTATIVES)
+    return format_digest(number, len(cluster.members), cluster.tags, [items[row].get("summary") for row in rows])
+
+def parse_cluster_labels(content: str) -> Dict[int, Dict[str, str]]:
+    """Labels keyed by cluster number from the agent's JSON array (empty if unparseable)"""
+    start, end = content.find("["), content.rfind("]")
+    if start == -1 or end < start:
+        return {}
+    try:
+        entries = json.loads(content[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    labels = {}
+    for entry in entries:
+        if isinstance(entry, dict) and isinstance(entry.get("cluster"), int) and entry.get("title"):
+            labels[entry["cluster"]] = {
+                "title": str(entry["title"]).strip(),
+                "description": str(entry.get("description") or "").strip(),
+                "reasoning": str(entry.get("reasoning") or "").strip(),
+            }
+    return labels
+
+def fallback_label(cluster: TopicCluster) -> Dict[str, str]:
+    title = " / ".join(cluster.tags[:3]) or "Untitled topic"
+    return {"title": title, "description": f"{len(cluster.members)} related items", "reasoning": ""}
+
+def topic_from_cluster(
+    number: int,
+    cluster: TopicCluster,
+    items: List[Dict[str, Any]],
+    matrix: np.ndarray,
+    label: Dict[str, str],
+) -> Dict[str, Any]:
+    related = len(cluster.members) - 1
+    return {
+        "cluster": number,
+        "cluster_key": str(items[cluster.medoid].get("id")),
+        "title": label.get("title") or fallback_label(cluster)["title"],
+        "description": label.get("description") or "",
+        "reasoning": label.get("reasoning") or "",
+        "priority_score": cluster.priority_score,
+        "tags": cluster.tags,
+        "item_count": len(cluster.members),
+        "score_components": {
+            "size": round(cluster.size_score, 4),
+            "recency": round(cluster.recency_score, 4),
+            "interest": round(cluster.interest_score, 4),
+        },
+        "content_ids": [str(items[row].get("id")) for row in cluster.members if items[row].get("id")],
+        "items": [
+            {
+                "id": items[row].get("id"),
+                "url": items[row].get("url"),
+                "summary": items[row].get("summary"),
+                "tags": items[row].get("tags") or [],
+                "related_content_count": related,
+            }
+            for row in representatives(matrix, cluster, 5)
+        ],
+    }
+
+def apply_related_counts(topics: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Set each item's related_content_count from the kNN graph (one read; cluster size otherwise)"""
+    from app.search.knn import knn_graph_enabled, related_counts, related_threshold
+    ids = [str(item["id"]) for topic in topics for item in topic.get("items", []) if item.get("id")]
+    if not ids or not knn_graph_enabled():
+        return topics
+    try:
+        counts = related_counts(ids, related_threshold())
+    except Exception as e:
+        print(f"kNN graph unavailable for related counts: {e}")
+        return topics
+    for topic in topics:
+        for item in topic.get("items", []):
+            if str(item.get("id")) in counts:
+                item["related_content_count"] = counts[str(item["id"])]
+    return topics
+
+async def build_clusters(
+    content_items: List[Dict[str, Any]],
+    interest_weights: Optional[Dict[str, float]] = None,
+) -> Tuple[List[Dict[str, Any]], np.ndarray, List[TopicCluster]]:
+    """Embed (if needed), cluster and score items; returns (clustered items, their matrix, ranked clusters).
+
+    Items without a stored embedding are embedded from their summaries in one batch.
+    """
+    ids = [str(item["id"]) for item in content_items if item.get("id")]
+    vectors = await asyncio.to_thread(load_embeddings, ids) if ids else {}
+    missing = [item for item in content_items if str(item.get("id")) not in vectors and item.get("summary")]
+    if missing:
+        from app.db.embeddings import generate_embeddings
+        embedded = await generate_embeddings([item["summary"] for item in missing])
+        for i, (item, embedding) in enumerate(zip(missing, embedded)):
+            item["id"] = item.get("id") or f"provided-{i}"
+            vectors[str(item["id"])] = np.asarray(embedding, dtype=np.float32)
+    items = [item for item in content_items if str(item.get("id")) in vectors]
+    if not items:
+        return [], np.empty((0, 0), dtype=np.float32), []
+    matrix = np.stack([vectors[str(item["id"])] for item in items])
+
+    labels = await run_cpu(
+        cluster_embeddings,
+        matrix,
+        env_int("TOPIC_CLUSTERS", 0) or None,  # 0 = choose k from the item count
+        env_int("TOPIC_MIN_CLUSTER_SIZE", 2),
+        float(os.getenv("TOPIC_MERGE_THRESHOLD", "0.85")),
+        name="cluster_embeddings",
+    )
+    clusters = score_clusters(
+        matrix,
+        labels,
+        items,
+        interest_weights,
+        now=datetime.now(timezone.utc),
+        half_life_days=float(os.getenv("TOPIC_HALF_LIFE_DAYS", "7")),
+    )
+    return items, matrix, clusters
+
+async def prioritize_topics(
+    scope: SearchFilters,
+    interest_weights: Optional[Dict[str, float]] = None,
+    content_items: Optional[List[Dict[str, Any]]] = None,
+    labeler: Optional[Labeler] = None,
+) -> List[Dict[str, Any]]:
+    """Cluster the items in scope from scratch, score the clusters and name only the top ones.
+
+    Used for scoped or provided item sets; LLM input is bounded by
+    TOPIC_LABEL_CLUSTERS digests, whatever the corpus size. The unscoped topic
+    list is maintained incrementally by app.topics.online instead.
+    """
+    stored = content_items is None
+    if stored:
+        content_items = await asyncio.to_thread(load_scoped_items, scope, env_int("TOPIC_MAX_ITEMS", 1000))
+    if not content_items:
+        return []
+    items, matrix, clusters = await build_clusters(content_items, interest_weights)
+    clusters = clusters[:env_int("TOPIC_LABEL_CLUSTERS", 8)]
+    if not clusters:
+        return []
+
+    labels_by_number: Dict[int, Dict[str, str]] = {}
+    if labeler is not None:
+        digests = [cluster_digest(n, cluster, items, matrix) for n, cluster in enumerate(clusters, 1)]
+        try:
+            labels_by_number = await labeler(digests, interest_weights)
+        except Exception as e:
+            print(f"Topic labeling failed, using tag labels: {e}")
+    topics = [
+        topic_from_cluster(n, cluster, items, matrix, labels_by_number.get(n) or fallback_label(cluster))
+        for n, cluster in enumerate(clusters, 1)
+    ]
+    # Provided items have no graph rows
+    return await asyncio.to_thread(apply_related_counts, topics) if stored else topics
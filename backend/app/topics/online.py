@@ -0,0 +1,646 @@
+"""Online topic model: clusters updated as content is ingested, rebalanced in the background"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from app.db.client import get_supabase
+from app.db.embedding_cache import parse_embedding
+from app.db.leases import acquire_lease, release_lease
+from app.search.ann import normalize_rows
+from app.search.filters import SearchFilters
+from app.topics.engine import (
+    DIGEST_REPRESENTATIVES,
+    Labeler,
+    apply_related_counts,
+    build_clusters,
+    format_digest,
+    load_scoped_items,
+)
+
+# Priority weights for size, recency and interest (same as score_clusters)
+SCORE_WEIGHTS = (0.4, 0.4, 0.2)
+REBALANCE_LEASE = "topic_rebalance"
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+@dataclass
+class OnlineCluster:
+    """A topic cluster with a running centroid and the state needed to rescore it"""
+    cluster_key: str
+    centroid: np.ndarray
+    content_ids: List[str]
+    tag_counts: Dict[str, int] = field(default_factory=dict)
+    # Mean over members of 0.5 ** (age / half-life), as of scored_at; decays exactly with time
+    recency_score: float = 0.0
+    scored_at: float = field(default_factory=time.time)
+    interest_score: float = 0.0
+    last_item_at: Optional[datetime] = None
+    title: Optional[str] = None
+    description: str = ""
+    reasoning: str = ""
+    labeled_count: int = 0
+    needs_relabel: bool = True
+    id: Optional[str] = None
+    dirty: bool = True  # Scores or tags changed
+    # Changes since the last write. Stored topics are merged with them rather
+    # than overwritten, so members added by other workers are kept
+    replace: bool = True  # Write the whole row (new or rebalanced clusters)
+    added: List[Tuple[str, np.ndarray]] = field(default_factory=list)
+    removed_ids: List[str] = field(default_factory=list)
+    labels_changed: bool = False
+
+    @property
+    def size(self) -> int:
+        return len(self.content_ids)
+
+    @property
+    def tags(self) -> List[str]:
+        return [t for t, _ in sorted(self.tag_counts.items(), key=lambda kv: (-kv[1], kv[0]))[:5]]
+
+    def recency_at(self, now: float, half_life_days: float) -> float:
+        return self.recency_score * 0.5 ** (max(0.0, now - self.scored_at) / 86400 / half_life_days)
+
+class OnlineTopicModel:
+    """Assigns each new embedding to the nearest topic centroid or spawns a topic.
+
+    Centroids are running means, so ingest costs one (topics x dim) product.
+    A periodic rebalance re-clusters recent content from scratch and maps the
+    new clusters onto the old ones by membership overlap, keeping their ids
+    and titles. Topics whose membership changed by ``relabel_change`` since
+    they were last named are flagged for LLM relabeling.
+
+    Every worker keeps its own copy: ingest-time changes are written as
+    member merges (``merge_topic_members``), copies are reloaded after
+    ``refresh``'s max age, and only the worker holding the
+    ``topic_rebalance`` lease rebalances.
+    """
+
+    def __init__(
+        self,
+        assign_threshold: float = 0.75,
+        relabel_change: float = 0.3,
+        min_size: int = 2,
+        half_life_days: float = 7.0,
+        persistent: bool = True,
+    ):
+        self.assign_threshold = assign_threshold
+        self.relabel_change = relabel_change
+        self.min_size = min_size
+        self.half_life_days = half_life_days
+        self.persistent = persistent
+        self.clusters: Dict[str, OnlineCluster] = {}
+        self.loaded = False
+        self.loaded_at = 0.0
+        self._rebalancing = False
+        self._pending: List[Tuple[str, np.ndarray, List[str], Optional[datetime]]] = []
+        self._removed: List[str] = []
+        self._unwritten: List[Tuple[List, List, List, List]] = []
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"assigned": 0, "spawned": 0, "rebalances": 0, "relabeled": 0}
+
+    # State
+
+    def load(self) -> None:
+        """Read clusters persisted by any worker (rows without a centroid are ignored)"""
+        self.loaded, self.loaded_at = True, time.time()
+        if self.persistent:
+            self.clusters = self._read()
+
+    def _read(self) -> Dict[str, OnlineCluster]:
+        result = get_supabase().table("topics").select(
+            "id, cluster_key, title, description, reasoning, tags, content_ids, centroid, "
+            "score_components, needs_relabel, labeled_item_count, last_item_at"
+        ).not_.is_("centroid", "null").execute()
+        clusters = {}
+        for row in result.data or []:
+            components = row.get("score_components") or {}
+            clusters[row["cluster_key"]] = OnlineCluster(
+                cluster_key=row["cluster_key"],
+                centroid=normalize_rows(np.asarray(parse_embedding(row["centroid"]), dtype=np.float32))[0],
+                content_ids=[str(cid) for cid in row.get("content_ids") or []],
+                tag_counts={tag: 1 for tag in row.get("tags") or []},
+                recency_score=float(components.get("recency", 0.0)),
+                scored_at=float(components.get("scored_at", time.time())),
+                interest_score=float(components.get("interest", 0.0)),
+                last_item_at=_parse_time(row.get("last_item_at")),
+                title=row.get("title"),
+                description=row.get("description") or "",
+                reasoning=row.get("reasoning") or "",
+                labeled_count=row.get("labeled_item_count") or 0,
+                needs_relabel=bool(row.get("needs_relabel")),
+                id=row.get("id"),
+                dirty=False,
+                replace=False,
+            )
+        return clusters
+
+    async def refresh(self, max_age: float) -> None:
+        """Reload clusters written by other workers once this copy is ``max_age`` seconds old"""
+        if not self.persistent:
+            self.loaded = True
+            return
+        if self.loaded and time.time() - self.loaded_at < max_age:
+            return
+        if self.loaded:
+            await self.apersist()
+        clusters = await asyncio.to_thread(self._read)
+        # Changes made while reading are kept and merged on the next write
+        for key, cluster in self.clusters.items():
+            if cluster.replace or cluster.added or cluster.removed_ids or cluster.labels_changed:
+                clusters[key] = cluster
+        self.clusters = clusters
+        self.loaded, self.loaded_at = True, time.time()
+
+    def persist(self) -> None:
+        """Write changed clusters (merging members into stored topics) and delete removed ones"""
+        if self.persistent:
+            self._adopt(*self._write(*self._snapshot()))
+
+    async def apersist(self) -> None:
+        """persist() with the database round trips in a thread"""
+        if self.persistent:
+            self._adopt(*await asyncio.to_thread(self._write, *self._snapshot()))
+
+    def _snapshot(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]], List[str]]:
+        # Built on the caller's thread so later updates can't interleave
+        now, largest = time.time(), self._largest()
+        full, merges, updates = [], [], []
+        for retry in self._unwritten:
+            full, merges, updates = full + retry[0], merges + retry[1], updates + retry[2]
+            self._removed.extend(retry[3])
+        self._unwritten = []
+        for cluster in self.clusters.values():
+            if cluster.replace:
+                full.append(self._row(cluster, now, largest))
+            else:
+                members_changed = bool(cluster.added or cluster.removed_ids)
+                if members_changed:
+                    merges.append(self._merge(cluster, now, largest))
+                if cluster.labels_changed or (cluster.dirty and not members_changed):
+                    updates.append(self._update(cluster, now, largest))
+            cluster.replace = cluster.dirty = cluster.labels_changed = False
+            cluster.added, cluster.removed_ids = [], []
+        removed, self._removed = self._removed, []
+        return full, merges, updates, removed
+
+    def _write(
+        self,
+        full: List[Dict[str, Any]],
+        merges: List[Dict[str, Any]],
+        updates: List[Dict[str, Any]],
+        removed: List[str],
+    ) -> Tuple[Dict[str, str], Dict[str, Tuple[List[str], Optional[List[float]]]]]:
+        """Apply a snapshot; returns stored ids and the merged members / centroid per cluster"""
+        supabase = get_supabase()
+        ids: Dict[str, str] = {}
+        merged: Dict[str, Tuple[List[str], Optional[List[float]]]] = {}
+        try:
+            inserts = list(full)
+            for merge in merges:
+                params = {k: v for k, v in merge.items() if k != "row"}
+                result = supabase.rpc("merge_topic_members", params).execute()
+                if result.data:
+                    stored = result.data[0]
+                    merged[merge["p_cluster_key"]] = (
+                        [str(cid) for cid in stored.get("content_ids") or []],
+                        parse_embedding(stored.get("centroid")),
+                    )
+                else:
+                    # Another worker's rebalance deleted the topic; store this copy again
+                    inserts.append(merge["row"])
+            if inserts:
+                result = supabase.table("topics").upsert(inserts, on_conflict="cluster_key").execute()
+                ids = {row.get("cluster_key"): row.get("id") for row in result.data or []}
+            for update in updates:
+                fields = {k: v for k, v in update.items() if k != "cluster_key"}
+                supabase.table("topics").update(fields).eq("cluster_key", update["cluster_key"]).execute()
+            if removed:
+                supabase.table("topics").delete().in_("cluster_key", removed).execute()
+        except Exception:
+            # Retried with the next write; merges and upserts are safe to repeat
+            self._unwritten.append((full, merges, updates, removed))
+            raise
+        return ids, merged
+
+    def _adopt(self, ids: Dict[str, str], merged: Dict[str, Tuple[List[str], Optional[List[float]]]]) -> None:
+        """Take stored ids and other workers' members into this copy, keeping unwritten changes"""
+        for key, cluster_id in ids.items():
+            if key in self.clusters and cluster_id:
+                self.clusters[key].id = cluster_id
+        for key, (content_ids, centroid) in merged.items():
+            cluster = self.clusters.get(key)
+            if cluster is None or cluster.replace:
+                continue
+            stored = set(content_ids)
+            pending = [(cid, vector) for cid, vector in cluster.added if cid not in stored]
+            removed = set(cluster.removed_ids)
+            cluster.content_ids = [cid for cid in content_ids if cid not in removed] + [cid for cid, _ in pending]
+            if centroid is not None:
+                total = np.asarray(centroid, dtype=np.float32) * max(1, len(content_ids))
+                for _, vector in pending:
+                    total = total + vector
+                cluster.centroid = normalize_rows(total)[0]
+
+    def _merge(self, cluster: OnlineCluster, now: float, largest: int) -> Dict[str, Any]:
+        row = self._row(cluster, now, largest)
+        return {
+            "p_cluster_key": cluster.cluster_key,
+            "p_added": [cid for cid, _ in cluster.added],
+            "p_vectors": [vector.tolist() for _, vector in cluster.added],
+            "p_removed": list(cluster.removed_ids),
+            "p_last_item_at": row["last_item_at"],
+            "p_min_size": self.min_size,
+            "p_relabel_change": self.relabel_change,
+            "p_tags": row["tags"],
+            "p_priority_score": row["priority_score"],
+            "p_score_components": row["score_components"],
+            "row": row,
+        }
+
+    def _update(self, cluster: OnlineCluster, now: float, largest: int) -> Dict[str, Any]:
+        row = self._row(cluster, now, largest)
+        fields = ["priority_score", "score_components", "tags"]
+        if cluster.labels_changed:
+            fields += ["title", "description", "reasoning", "labeled_item_count", "needs_relabel"]
+        return {"cluster_key": cluster.cluster_key, **{f: row[f] for f in fields}}
+
+    def _row(self, cluster: OnlineCluster, now: float, largest: int) -> Dict[str, Any]:
+        payload = self.payload(cluster, now, largest)
+        del payload["id"]
+        payload["score_components"]["scored_at"] = now
+        return {
+            **payload,
+            "centroid": cluster.centroid.tolist(),
+            "labeled_item_count": cluster.labeled_count,
+            "last_item_at": cluster.last_item_at.isoformat() if cluster.last_item_at else None,
+        }
+
+    def payload(self, cluster: OnlineCluster, now: float, largest: int) -> Dict[str, Any]:
+        """API / table shape of a topic (same fields as the from-scratch engine)"""
+        return {
+            "id": cluster.id,
+            "cluster_key": cluster.cluster_key,
+            "title": cluster.title or " / ".join(cluster.tags[:3]) or "Untitled topic",
+            "description": cluster.description,
+            "reasoning": cluster.reasoning,
+            "priority_score": self._priority(cluster, now, largest),
+            "tags": cluster.tags,
+            "item_count": cluster.size,
+            "needs_relabel": cluster.needs_relabel,
+            "score_components": {
+                "size": round(self._size_score(cluster, largest), 4),
+                "recency": round(cluster.recency_at(now, self.half_life_days), 4),
+                "interest": round(cluster.interest_score, 4),
+            },
+            "content_ids": cluster.content_ids,
+        }
+
+    def topics(self, interest_weights: Optional[Dict[str, float]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        now, largest = time.time(), self._largest()
+        return [self.payload(c, now, largest) for c in self.ranked(interest_weights, limit)]
+
+    # Scoring
+
+    def _largest(self) -> int:
+        return max((c.size for c in self.clusters.values() if c.size >= self.min_size), default=1)
+
+    @staticmethod
+    def _size_score(cluster: OnlineCluster, largest: int) -> float:
+        return min(1.0, float(np.log1p(cluster.size) / np.log1p(largest)))
+
+    def _priority(self, cluster: OnlineCluster, now: float, largest: int, interest: Optional[float] = None) -> float:
+        size_weight, recency_weight, interest_weight = SCORE_WEIGHTS
+        return round(10 * (
+            size_weight * self._size_score(cluster, largest)
+            + recency_weight * cluster.recency_at(now, self.half_life_days)
+            + interest_weight * (cluster.interest_score if interest is None else interest)
+        ), 2)
+
+    def _flag(self, cluster: OnlineCluster) -> None:
+        if cluster.size < self.min_size:
+            return
+        if cluster.labeled_count == 0 or \
+                abs(cluster.size - cluster.labeled_count) / cluster.labeled_count >= self.relabel_change:
+            cluster.needs_relabel = True
+
+    # Online updates
+
+    def observe(
+        self,
+        content_id: str,
+        embedding: Sequence[float],
+        tags: Optional[List[str]] = None,
+        created_at: Any = None,
+    ) -> OnlineCluster:
+        """Assign one new item to its nearest topic (or a new one); call persist() afterwards"""
+        if not self.loaded:
+            self.load()
+        vector = normalize_rows(np.asarray(embedding, dtype=np.float32))[0]
+        created = _parse_time(created_at) or datetime.now(timezone.utc)
+        if self._rebalancing:
+            # Re-applied on top of the rebalanced clusters
+            self._pending.append((content_id, vector, list(tags or []), created))
+        now = time.time()
+        best, similarity = None, -1.0
+        if self.clusters:
+            keys = list(self.clusters)
+            scores = np.stack([self.clusters[k].centroid for k in keys]) @ vector
+            i = int(np.argmax(scores))
+            best, similarity = self.clusters[keys[i]], float(scores[i])
+        if best is not None and content_id in best.content_ids:
+            return best
+        decay = 0.5 ** (max(0.0, now - created.timestamp()) / 86400 / self.half_life_days)
+        if best is None or similarity < self.assign_threshold:
+            cluster = OnlineCluster(cluster_key=content_id, centroid=vector, content_ids=[content_id],
+                                    recency_score=decay, scored_at=now)
+            self.clusters[content_id] = cluster
+            self.stats["spawned"] += 1
+        else:
+            cluster = best
+            n = cluster.size
+            cluster.centroid = normalize_rows(cluster.centroid * n + vector)[0]
+            cluster.recency_score = (cluster.recency_at(now, self.half_life_days) * n + decay) / (n + 1)
+            cluster.scored_at = now
+            cluster.content_ids.append(content_id)
+            if self.persistent and not cluster.replace:
+                cluster.added.append((content_id, vector))
+            self.stats["assigned"] += 1
+        for tag in tags or []:
+            cluster.tag_counts[tag] = cluster.tag_counts.get(tag, 0) + 1
+        if cluster.last_item_at is None or created > cluster.last_item_at:
+            cluster.last_item_at = created
+        cluster.dirty = True
+        self._flag(cluster)
+        return cluster
+
+    def forget(self, content_ids: List[str]) -> None:
+        """Drop deleted items from their topics (centroids are corrected by the next rebalance)"""
+        gone = set(content_ids)
+        for key, cluster in list(self.clusters.items()):
+            if gone.intersection(cluster.content_ids):
+                if self.persistent and not cluster.replace:
+                    cluster.removed_ids.extend(gone.intersection(cluster.content_ids))
+                    cluster.added = [(cid, v) for cid, v in cluster.added if cid not in gone]
+                cluster.content_ids = [cid for cid in cluster.content_ids if cid not in gone]
+                cluster.dirty = True
+                if not cluster.content_ids:
+                    del self.clusters[key]
+                    self._removed.append(key)
+                else:
+                    self._flag(cluster)
+
+    # Background maintenance
+
+    async def rebalance(self, max_items: Optional[int] = None) -> Dict[str, int]:
+        """Re-cluster recent content from scratch, keeping ids and titles of matching topics"""
+        # Start from every worker's topics so stale ones are removed wherever they came from
+        await self.refresh(0)
+        self._rebalancing = True
+        self._pending = []
+        try:
+            limit = max_items or int(os.getenv("TOPIC_MAX_ITEMS", "1000"))
+            items = await asyncio.to_thread(load_scoped_items, SearchFilters(), limit)
+            items, matrix, clusters = await build_clusters(items) if items else ([], None, [])
+        finally:
+            self._rebalancing = False
+        now = time.time()
+        normalized = normalize_rows(matrix) if clusters else None
+        previous = dict(self.clusters)
+        claimed = set()
+        rebuilt: Dict[str, OnlineCluster] = {}
+        for topic in clusters:
+            member_rows = sorted(topic.members, key=lambda row: -float(normalized[row] @ topic.centroid))
+            ids = [str(items[row]["id"]) for row in member_rows]
+            old, overlap = _best_match(ids, previous, claimed)
+            tag_counts: Dict[str, int] = {}
+            for row in member_rows:
+                for tag in items[row].get("tags") or []:
+                    tag_counts[tag] = tag_counts.get(tag, 0) + 1
+            created = [_parse_time(items[row].get("created_at")) for row in member_rows]
+            cluster = OnlineCluster(
+                cluster_key=old.cluster_key if old else ids[0],
+                centroid=topic.centroid,
+                content_ids=ids,
+                tag_counts=tag_counts,
+                recency_score=topic.recency_score,
+                scored_at=now,
+                interest_score=old.interest_score if old else topic.interest_score,
+                last_item_at=max((c for c in created if c), default=None),
+            )
+            if old is not None:
+                claimed.add(old.cluster_key)
+                cluster.id, cluster.title = old.id, old.title
+                cluster.description, cluster.reasoning = old.description, old.reasoning
+                cluster.labeled_count = old.labeled_count
+                cluster.needs_relabel = old.needs_relabel or (1.0 - overlap) >= self.relabel_change
+            self._flag(cluster)
+            rebuilt[cluster.cluster_key] = cluster
+        self._removed.extend(key for key in previous if key not in rebuilt)
+        self.clusters = rebuilt
+        pending, self._pending = self._pending, []
+        members = {cid for cluster in rebuilt.values() for cid in cluster.content_ids}
+        for content_id, vector, tags, created in pending:
+            if content_id not in members:
+                self.observe(content_id, vector, tags, created)
+        self.stats["rebalances"] += 1
+        await self.apersist()
+        return {"topics": len(rebuilt), "removed": len(previous) - len(claimed), "items": len(items)}
+
+    def ranked(self, interest_weights: Optional[Dict[str, float]] = None, limit: Optional[int] = None) -> List[OnlineCluster]:
+        """Clusters of at least min_size by priority, optionally re-weighted for these interests"""
+        now, largest = time.time(), self._largest()
+        weights = {k.lower(): v for k, v in (interest_weights or {}).items()}
+        scored = []
+        for cluster in self.clusters.values():
+            if cluster.size < self.min_size:
+                continue
+            interest = None
+            if weights:
+                interest = min(1.0, sum(
+                    count * weights.get(tag.lower(), 0.0) for tag, count in cluster.tag_counts.items()
+                ) / cluster.size)
+                if interest != cluster.interest_score:
+                    cluster.interest_score = interest
+                    cluster.dirty = True
+            scored.append((self._priority(cluster, now, largest, interest), cluster))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return [cluster for _, cluster in scored[:limit]]
+
+    async def relabel(
+        self,
+        labeler: Labeler,
+        clusters: Optional[List[OnlineCluster]] = None,
+        interest_weights: Optional[Dict[str, float]] = None,
+        limit: int = 8,
+    ) -> int:
+        """Name flagged clusters (at most ``limit``) from compact digests in one LLM call"""
+        flagged = [c for c in (clusters if clusters is not None else self.ranked()) if c.needs_relabel][:limit]
+        if not flagged:
+            return 0
+        samples = {c.cluster_key: _sample_ids(c) for c in flagged}
+        wanted = [cid for ids in samples.values() for cid in ids]
+        summaries = await asyncio.to_thread(_load_summaries, wanted) if self.persistent else {}
+        digests = [
+            format_digest(n, c.size, c.tags, [summaries.get(cid, "") for cid in samples[c.cluster_key]])
+            for n, c in enumerate(flagged, 1)
+        ]
+        labels = await labeler(digests, interest_weights)
+        for n, cluster in enumerate(flagged, 1):
+            label = labels.get(n)
+            if not label:
+                continue
+            cluster.title = label["title"]
+            cluster.description = label.get("description", "")
+            cluster.reasoning = label.get("reasoning", "")
+            cluster.labeled_count = cluster.size
+            cluster.needs_relabel = False
+            cluster.labels_changed = True
+            self.stats["relabeled"] += 1
+        await self.apersist()
+        return sum(1 for c in flagged if not c.needs_relabel)
+
+    def start(self, interval: float, labeler_factory: Optional[Callable[[], Optional[Labeler]]] = None) -> None:
+        if self._task is None and interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run(interval, labeler_factory))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            if self.persistent:
+                await asyncio.to_thread(release_lease, REBALANCE_LEASE)
+
+    async def _run(self, interval: float, labeler_factory) -> None:
+        while True:
+            try:
+                # One worker rebalances; the others pick up its topics by reloading
+                if not self.persistent or await asyncio.to_thread(acquire_lease, REBALANCE_LEASE, interval * 1.5):
+                    await self.rebalance()
+                    labeler = labeler_factory() if labeler_factory else None
+                    if labeler is not None:
+                        await self.relabel(labeler, limit=int(os.getenv("TOPIC_LABEL_CLUSTERS", "8")))
+                else:
+                    await self.refresh(0)
+            except Exception as e:
+                print(f"Topic rebalance failed: {e}")
+            await asyncio.sleep(interval)
+
+def _best_match(ids: List[str], previous: Dict[str, OnlineCluster], claimed: set) -> Tuple[Optional[OnlineCluster], float]:
+    """Unclaimed previous cluster with the highest Jaccard overlap (at least 0.5)"""
+    members = set(ids)
+    best, best_overlap = None, 0.0
+    for key, cluster in previous.items():
+        if key in claimed:
+            continue
+        old = set(cluster.content_ids)
+        overlap = len(members & old) / len(members | old) if old else 0.0
+        if overlap > best_overlap:
+            best, best_overlap = cluster, overlap
+    return (best, best_overlap) if best_overlap >= 0.5 else (None, 0.0)
+
+def _sample_ids(cluster: OnlineCluster) -> List[str]:
+    """Most central members (rebalance orders by centrality) plus the newest one"""
+    ids = cluster.content_ids[:DIGEST_REPRESENTATIVES - 1] + cluster.content_ids[-1:]
+    return list(dict.fromkeys(ids))
+
+def _load_summaries(content_ids: List[str]) -> Dict[str, str]:
+    return {cid: item.get("summary") or "" for cid, item in load_items(content_ids).items()}
+
+def load_items(content_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """id -> content item (without text bodies) in one query"""
+    if not content_ids:
+        return {}
+    result = get_supabase().table("content_items").select("id, url, summary, tags").in_("id", content_ids).execute()
+    return {str(row["id"]): row for row in result.data or []}
+
+def attach_items(topics: List[Dict[str, Any]], per_topic: int = 5) -> List[Dict[str, Any]]:
+    """Add the first few member items of each topic, as the from-scratch engine returns them"""
+    wanted = [cid for topic in topics for cid in topic["content_ids"][:per_topic]]
+    items = load_items(wanted)
+    for topic in topics:
+        topic["items"] = [
+            {**items[cid], "related_content_count": topic["item_count"] - 1}
+            for cid in topic["content_ids"][:per_topic] if cid in items
+        ]
+    return apply_related_counts(topics)
+
+_topic_model: Optional[OnlineTopicModel] = None
+
+def topics_online_enabled() -> bool:
+    return os.getenv("TOPIC_ONLINE_ENABLED", "true").lower() == "true"
+
+def get_topic_model() -> OnlineTopicModel:
+    """Process-wide online topic model"""
+    global _topic_model
+    if _topic_model is None:
+        _topic_model = OnlineTopicModel(
+            assign_threshold=float(os.getenv("TOPIC_ASSIGN_THRESHOLD", "0.75")),
+            relabel_change=float(os.getenv("TOPIC_RELABEL_CHANGE", "0.3")),
+            min_size=int(os.getenv("TOPIC_MIN_CLUSTER_SIZE", "2")),
+            half_life_days=float(os.getenv("TOPIC_HALF_LIFE_DAYS", "7")),
+        )
+    return _topic_model
+
+def topic_reload_seconds() -> float:
+    return float(os.getenv("TOPIC_RELOAD_SECONDS", "300"))
+
+def _observe_all(model: OnlineTopicModel, ids, embeddings, items) -> None:
+    for content_id, embedding, item in zip(ids, embeddings, items or [None] * len(ids)):
+        item = item or {}
+        model.observe(str(content_id), embedding, item.get("tags"), item.get("created_at"))
+
+def observe_content_embeddings(
+    ids: List[str],
+    embeddings: List[List[float]],
+    items: Optional[List[Optional[Dict[str, Any]]]] = None,
+) -> None:
+    """Ingest hook for synchronous callers (scripts); async code uses aobserve_content_embeddings"""
+    if not ids or not topics_online_enabled():
+        return
+    try:
+        model = get_topic_model()
+        _observe_all(model, ids, embeddings, items)
+        model.persist()
+    except Exception as e:
+        print(f"Topic model update failed: {e}")
+
+async def aobserve_content_embeddings(
+    ids: List[str],
+    embeddings: List[List[float]],
+    items: Optional[List[Optional[Dict[str, Any]]]] = None,
+) -> None:
+    """Ingest hook: fold newly stored embeddings into the topic model off the event loop (never fails the ingest)"""
+    if not ids or not topics_online_enabled():
+        return
+    try:
+        model = get_topic_model()
+        await model.refresh(topic_reload_seconds())
+        _observe_all(model, ids, embeddings, items)
+        await model.apersist()
+    except Exception as e:
+        print(f"Topic model update failed: {e}")
+
+def forget_content(content_ids: List[str]) -> None:
+    """Delete hook: drop items from their topics (never fails the delete)"""
+    if not content_ids or not topics_online_enabled() or _topic_model is None:
+        return
+    try:
+        _topic_model.forget(content_ids)
+        _topic_model.persist()
+    except Exception as e:
+        print(f"Topic model update failed: {e}")
@@ -0,0 +1,113 @@
+"""Benchmark wall-clock latency and cost of single-shot, section-parallel and cascade draft generation
+
+Simulated provider (no API keys; latency = time to first token + output tokens / speed):
+    python -m benchmarks.draft_modes --simulate --runs 3
+Real models through the model registry (needs OPENROUTER_API_KEY etc.):
+    python -m benchmarks.draft_modes --model openai/gpt-4o-mini --runs 3
+Cascade drafts with --cheap-model and refines weak sections with --model.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List, Optional
+from app.drafts.cascade import DEFAULT_CHEAP_MODEL, CascadeDraftWriter
+from app.drafts.sections import DRAFT_INSTRUCTIONS, SECTIONS, SectionedDraftWriter, build_draft_prompt
+from app.models.base import ModelResponse
+
+CONTEXT = """AI coding agents are moving from autocomplete to opening pull requests on their own.
+Teams report faster prototyping but more time spent on review, and the cost of a bad merge is rising."""
+
+# Same prompt DraftAgent sends in single-shot mode
+SINGLE_SHOT_PROMPT = build_draft_prompt(CONTEXT)
+
+class SimulatedRegistry:
+    """Stands in for ModelRegistry with streaming-like latency proportional to output length
+
+    The cheap model is priced like Llama 3 8B in models.yaml, every other model like GPT-4o.
+    """
+
+    def __init__(self, first_token_seconds: float, tokens_per_second: float, cheap_model: str = DEFAULT_CHEAP_MODEL):
+        self.first_token_seconds = first_token_seconds
+        self.tokens_per_second = tokens_per_second
+        self.cheap_model = cheap_model
+
+    async def generate(self, prompt: str, model_id: str, system_prompt: Optional[str] = None,
+                       temperature: float = 0.7, max_tokens: Optional[int] = None, **kwargs) -> ModelResponse:
+        if prompt.startswith("Plan a Hinglish newsletter"):
+            content = json.dumps({"title": "Agents ka PR era", "thesis": "Review is the new bottleneck", "tone": "witty",
+                                  "sections": {s.name: s.purpose for s in SECTIONS}})
+            output_tokens = 150
+        elif "written in parallel" in prompt:
+            content, output_tokens = "[]", 40
+        elif prompt.startswith("Score each section"):
+            # Every other section falls short, so the cascade refines two of them
+            content = json.dumps({s.name: {"score": 6 if i % 2 else 8, "issue": "generic"} for i, s in enumerate(SECTIONS)})
+            output_tokens = 80
+        elif prompt.startswith("Context:"):
+            section = next(s for s in SECTIONS if f"Write ONLY the {s.name} section" in prompt)
+            output_tokens = int(section.words * 1.3)
+            content = "shabd " * section.words
+        else:
+            output_tokens = int(sum(s.words for s in SECTIONS) * 1.3)
+            content = "shabd " * sum(s.words for s in SECTIONS)
+        output_tokens = min(output_tokens, max_tokens or output_tokens)
+        await asyncio.sleep(self.first_token_seconds + output_tokens / self.tokens_per_second)
+        return ModelResponse(content=content, model=model_id, provider="simulated",
+                             input_tokens=len(prompt) // 4, output_tokens=output_tokens)
+
+    def estimate_cost(self, input_tokens: int, output_tokens: int, model_id: str) -> float:
+        if model_id == self.cheap_model:
+            return (input_tokens + output_tokens) / 1000 * 0.00005
+        return input_tokens / 1000 * 0.0025 + output_tokens / 1000 * 0.01
+
+async def single_shot(registry, model: str, cheap_model: str) -> Dict[str, float]:
+    response = await registry.generate(prompt=SINGLE_SHOT_PROMPT, model_id=model, system_prompt=DRAFT_INSTRUCTIONS,
+                                       temperature=0.7, max_tokens=2000)
+    cost = registry.estimate_cost(response.input_tokens, response.output_tokens, model)
+    return {"output_tokens": response.output_tokens, "calls": 1, "cost": cost}
+
+async def sectioned(registry, model: str, cheap_model: str) -> Dict[str, float]:
+    result = await SectionedDraftWriter(registry, model).generate(CONTEXT, temperature=0.7, max_tokens=2000)
+    total = result["usage"]["total"]
+    return {"output_tokens": total["output_tokens"], "calls": total["calls"], "cost": total["cost"]}
+
+async def cascade(registry, model: str, cheap_model: str) -> Dict[str, float]:
+    writer = CascadeDraftWriter(registry, model, cheap_model=cheap_model)
+    result = await writer.generate(CONTEXT, temperature=0.7, max_tokens=2000)
+    total = result["usage"]["total"]
+    return {"output_tokens": total["output_tokens"], "calls": total["calls"], "cost": total["cost"]}
+
+async def main_async(registry, model: str, cheap_model: str, runs: int) -> None:
+    print(f"{'mode':<10}{'median s':>10}{'min s':>8}{'out tok':>9}{'calls':>7}{'cost $':>10}")
+    for label, run in (("single", single_shot), ("sections", sectioned), ("cascade", cascade)):
+        seconds: List[float] = []
+        stats: Dict[str, float] = {}
+        for _ in range(runs):
+            started = time.perf_counter()
+            stats = await run(registry, model, cheap_model)
+            seconds.append(time.perf_counter() - started)
+        print(f"{label:<10}{statistics.median(seconds):>10.2f}{min(seconds):>8.2f}"
+              f"{stats['output_tokens']:>9}{stats['calls']:>7}{stats['cost']:>10.5f}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="openai/gpt-4o-mini")
+    parser.add_argument("--cheap-model", default=DEFAULT_CHEAP_MODEL, help="Drafting model for cascade mode")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--simulate", action="store_true")
+    parser.add_argument("--first-token", type=float, default=0.5, help="Simulated seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0, help="Simulated output speed")
+    args = parser.parse_args()
+    if args.simulate:
+        registry = SimulatedRegistry(args.first_token, args.tokens_per_second, args.cheap_model)
+    else:
+        from dotenv import load_dotenv
+        from app.models.registry import ModelRegistry
+        load_dotenv()
+        registry = ModelRegistry()
+    asyncio.run(main_async(registry, args.model, args.cheap_model, args.runs))
+
+if __name__ == "__main__":
+    main()
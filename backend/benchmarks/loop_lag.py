@@ -0,0 +1,80 @@
+"""Benchmark event-loop lag while CPU-bound ingest work runs inline, in threads, or in the process pool
+
+Run from backend/ (no API keys needed):
+    python -m benchmarks.loop_lag --docs 40 --workers 4
+"""
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict
+from app.compute.pool import CpuPool, LoopLagMonitor
+from app.ingest.dedup import dedup_fields
+from app.ingest.extractors import extract_html
+
+def synthetic_page(i: int, paragraphs: int = 400) -> str:
+    body = "".join(
+        f"<p>Paragraph {j} of article {i} about agents, retrieval and evaluation. "
+        f"Builders keep shipping faster loops for feature {j % 17}.</p>"
+        for j in range(paragraphs)
+    )
+    return f"<html><head><title>Article {i}</title></head><body><nav>menu</nav><article>{body}</article></body></html>"
+
+def process_page(html: str) -> Dict[str, object]:
+    """What the bulk extract + dedup stages do per page"""
+    text = extract_html(html)["text"]
+    return dedup_fields(None, text)
+
+async def measure(label: str, docs: int, concurrency: int, run: Callable[[str], Awaitable[object]]) -> None:
+    pages = [synthetic_page(i) for i in range(docs)]
+    monitor = LoopLagMonitor(interval=0.01, window=100_000)
+    monitor.start()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(page: str) -> None:
+        async with semaphore:
+            await run(page)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(page) for page in pages))
+    elapsed = time.perf_counter() - started
+    # Let the monitor record its last (possibly very late) wake-up
+    await asyncio.sleep(monitor.interval * 3)
+    await monitor.stop()
+    lag = monitor.stats()
+    print(f"{label:<10}{elapsed:>9.2f}{docs / elapsed:>10.1f}{lag.get('p50_ms', 0):>10.1f}"
+          f"{lag.get('p99_ms', 0):>10.1f}{lag.get('max_ms', 0):>10.1f}")
+
+async def main_async(docs: int, workers: int) -> None:
+    print(f"{docs} pages, {workers} workers")
+    print(f"{'mode':<10}{'seconds':>9}{'pages/s':>10}{'lag p50':>10}{'lag p99':>10}{'lag max':>10}")
+
+    async def inline(page: str) -> object:
+        return process_page(page)
+
+    async def threaded(page: str) -> object:
+        return await asyncio.to_thread(process_page, page)
+
+    pool = CpuPool(max_workers=workers)
+    pool.start()
+    # Warm the workers up so process start-up isn't measured
+    await asyncio.gather(*(pool.run(process_page, synthetic_page(0, 1)) for _ in range(workers)))
+
+    async def pooled(page: str) -> object:
+        return await pool.run(process_page, page)
+
+    try:
+        await measure("inline", docs, workers, inline)
+        await measure("thread", docs, workers, threaded)
+        await measure("process", docs, workers, pooled)
+    finally:
+        pool.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.docs, args.workers))
+
+if __name__ == "__main__":
+    main()
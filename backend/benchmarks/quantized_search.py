@@ -0,0 +1,71 @@
+"""Benchmark two-stage quantized search against exact search (recall@k, latency, memory)
+
+Run from backend/:
+    python -m benchmarks.quantized_search                 # synthetic embeddings
+    python -m benchmarks.quantized_search --store data/vector_store
+"""
+import argparse
+import time
+from typing import List, Tuple
+import numpy as np
+from app.search.ann import EMBEDDING_DIM, normalize_rows, top_k_exact
+from app.search.quantize import QuantizedIndex
+
+def synthetic_embeddings(n: int, dim: int, clusters: int = 50, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, closer to real text embeddings than pure noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    assignments = rng.integers(0, clusters, n)
+    return normalize_rows(centers[assignments] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32))
+
+def load_store(directory: str) -> np.ndarray:
+    from app.search.store import VectorStore
+
+    store = VectorStore(directory)
+    store.refresh()
+    return np.concatenate([np.asarray(matrix) for _, matrix in store.items()])
+
+def timed(fn, queries: np.ndarray) -> Tuple[List, float]:
+    results = []
+    start = time.perf_counter()
+    for q in queries:
+        results.append(fn(q))
+    return results, (time.perf_counter() - start) * 1000 / len(queries)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=20000, help="synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--store", help="benchmark a VectorStore directory instead of synthetic data")
+    args = parser.parse_args()
+
+    vectors = load_store(args.store) if args.store else synthetic_embeddings(args.n, EMBEDDING_DIM)
+    n = len(vectors)
+    rng = np.random.default_rng(1)
+    # Queries are perturbed corpus vectors so every query has real neighbours
+    queries = normalize_rows(vectors[rng.integers(0, n, args.queries)]
+                             + 0.3 * rng.standard_normal((args.queries, vectors.shape[1])).astype(np.float32))
+
+    ids = [str(i) for i in range(n)]
+    index = QuantizedIndex(dim=vectors.shape[1], initial_capacity=n)
+    index.add(ids, vectors)
+
+    exact, exact_ms = timed(lambda q: {str(i) for i in top_k_exact(vectors, q, args.k)[0]}, queries)
+
+    print(f"corpus: {n} x {vectors.shape[1]}, queries: {args.queries}, k={args.k}")
+    print(f"float32 matrix: {vectors.nbytes / 1e6:8.1f} MB")
+    print(f"int8 codes:     {(index._int8[:n].nbytes + index._scales[:n].nbytes) / 1e6:8.1f} MB")
+    print(f"binary codes:   {index._binary[:n].nbytes / 1e6:8.1f} MB")
+    print()
+    print(f"{'mode':<8}{'oversample':>11}{'recall@k':>10}{'ms/query':>10}")
+    print(f"{'exact':<8}{'-':>11}{1.0:>10.3f}{exact_ms:>10.2f}")
+    for mode in ("binary", "int8"):
+        for oversample in (1, 4, 10, 20):
+            found, ms = timed(lambda q: {cid for cid, _ in index.search(q, args.k, mode=mode, oversample=oversample)},
+                              queries)
+            recall = np.mean([len(a & e) / len(e) for a, e in zip(found, exact)])
+            print(f"{mode:<8}{oversample:>11}{recall:>10.3f}{ms:>10.2f}")
+
+if __name__ == "__main__":
+    main()
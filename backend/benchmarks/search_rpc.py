@@ -0,0 +1,59 @@
+"""Benchmark payload size and latency of the vector-search RPCs against Supabase
+
+Run from backend/ with SUPABASE_URL/SUPABASE_KEY set and migration 005 applied:
+    python -m benchmarks.search_rpc --queries 20 --limit 10
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Dict, List, Tuple
+from dotenv import load_dotenv
+from app.db.client import get_supabase
+from app.db.embedding_cache import parse_embedding
+
+def sample_queries(count: int) -> List[List[float]]:
+    """Use stored embeddings as queries so no embeddings API key is needed"""
+    result = get_supabase().table("content_embeddings").select("embedding").limit(count).execute()
+    return [parse_embedding(row["embedding"]) for row in (result.data or []) if row.get("embedding")]
+
+def run(function: str, params: Dict[str, Any], queries: List[List[float]]) -> Tuple[float, float, float]:
+    """Median latency (ms), median response size (KB) and mean rows"""
+    supabase = get_supabase()
+    latencies, sizes, rows = [], [], []
+    for query in queries:
+        start = time.perf_counter()
+        result = supabase.rpc(function, {"query_embedding": query, **params}).execute()
+        latencies.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(json.dumps(result.data)) / 1024)
+        rows.append(len(result.data or []))
+    return statistics.median(latencies), statistics.median(sizes), statistics.mean(rows)
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.0)
+    args = parser.parse_args()
+
+    queries = sample_queries(args.queries)
+    if not queries:
+        print("No stored embeddings to query with")
+        return
+
+    base = {"match_threshold": args.threshold, "match_count": args.limit}
+    cases = [("match_content_embeddings", {}, "")] + [
+        ("match_content_items", {"ef_search": ef}, f"ef_search={ef}" if ef else "default") for ef in (None, 40, 100, 200)
+    ]
+    # Warm up connections and caches
+    run(cases[0][0], base, queries[:1])
+
+    print(f"{len(queries)} queries, limit={args.limit}")
+    print(f"{'function':<26}{'params':<15}{'p50 ms':>9}{'p50 KB':>9}{'rows':>7}")
+    for function, extra, label in cases:
+        latency, size, rows = run(function, {**base, **{k: v for k, v in extra.items() if v}}, queries)
+        print(f"{function:<26}{label or '-':<15}{latency:>9.1f}{size:>9.1f}{rows:>7.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+from app.db import analytics
+from app.db.cache import TTLCache
+
+ROWS = [
+    {"provider": "openai", "model": "text-embedding-3-small", "operation_type": "embedding",
+     "request_count": 10, "input_tokens": 500, "output_tokens": 0, "cost_estimated": 0.01},
+    {"provider": "openrouter", "model": "openai/gpt-4", "operation_type": "draft",
+     "request_count": 2, "input_tokens": 100, "output_tokens": 200, "cost_estimated": 0.5},
+    {"provider": "openai", "model": "gpt-4", "operation_type": "draft",
+     "request_count": 1, "input_tokens": 10, "output_tokens": 20, "cost_estimated": 0.25},
+]
+
+@pytest.mark.unit
+class TestSummarizeUsage:
+    def test_totals(self):
+        stats = analytics.summarize_usage(ROWS)
+        assert stats["total_requests"] == 13
+        assert stats["total_tokens"] == 830
+        assert stats["total_cost"] == 0.76
+
+    def test_breakdowns(self):
+        stats = analytics.summarize_usage(ROWS)
+        assert stats["by_provider"]["openai"]["requests"] == 11
+        assert stats["by_operation"]["draft"]["cost"] == 0.75
+        assert stats["by_model"]["openrouter:openai/gpt-4"]["tokens"] == 300
+
+    def test_empty(self):
+        stats = analytics.summarize_usage([])
+        assert stats["total_requests"] == 0
+        assert stats["by_provider"] == {}
+
+@pytest.mark.unit
+class TestUsageStats:
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self, monkeypatch):
+        monkeypatch.setattr(analytics, "_usage_cache", TTLCache(ttl=60))
+
+    def test_reads_rollup_rpc_once_within_ttl(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.return_value.data = ROWS
+        end = datetime(2024, 1, 31, tzinfo=timezone.utc)
+        with patch.object(analytics, "get_supabase", return_value=supabase):
+            first = analytics.get_usage_stats(days=30, end=end)
+            second = analytics.get_usage_stats(days=30, end=end)
+        assert first == second
+        assert first["total_requests"] == 13
+        supabase.rpc.assert_called_once()
+        assert supabase.rpc.call_args[0][0] == "get_usage_totals"
+
+    def test_cost_breakdown_shape(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.return_value.data = ROWS
+        with patch.object(analytics, "get_supabase", return_value=supabase):
+            costs = analytics.get_cost_breakdown()
+        assert costs["period"] == "all_time"
+        assert costs["by_provider"]["openrouter"]["avg_per_request"] == 0.25
+        assert costs["by_model"]["openai:gpt-4"]["count"] == 1
+
+    def test_timeseries_falls_back_to_raw_usage_without_rollups(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.side_effect = Exception("function get_usage_timeseries does not exist")
+        query = supabase.table.return_value.select.return_value.gte.return_value.lt.return_value
+        query.execute.return_value.data = [
+            {"created_at": "2024-01-02T10:15:00+00:00", "provider": "openai",
+             "input_tokens": 10, "output_tokens": 5, "cost_estimated": 0.1},
+            {"created_at": "2024-01-01T23:59:00Z", "provider": "openai",
+             "input_tokens": 1, "output_tokens": None, "cost_estimated": 0.2},
+            {"created_at": "2024-01-02T18:00:00Z", "provider": "openai",
+             "input_tokens": 20, "output_tokens": 0, "cost_estimated": 0.3},
+        ]
+        end = datetime(2024, 1, 31, tzinfo=timezone.utc)
+        with patch.object(analytics, "get_supabase", return_value=supabase):
+            series = analytics.get_usage_timeseries(bucket="day", days=30, end=end)
+        supabase.table.assert_called_with("api_usage")
+        assert [(p["bucket_start"], p["request_count"], p["input_tokens"]) for p in series] == [
+            ("2024-01-01T00:00:00+00:00", 1, 1),
+            ("2024-01-02T00:00:00+00:00", 2, 30),
+        ]
+        assert series[1]["cost_estimated"] == pytest.approx(0.4)
+
+@pytest.mark.unit
+class TestTTLCache:
+    def test_expired_entries_are_misses(self):
+        cache = TTLCache(ttl=-1)
+        cache.set("k", 1)
+        assert cache.get("k") is None
+        assert cache.stats()["hits"] == 0
@@ -0,0 +1,91 @@
+import threading
+import numpy as np
+import pytest
+from unittest.mock import patch
+from app.search import ann
+from app.search.ann import VectorIndex
+
+DIM = 32
+
+def _vectors(n, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+def _index(n=500):
+    index = VectorIndex(dim=DIM, initial_capacity=64)
+    vectors = _vectors(n)
+    index.add([f"id-{i}" for i in range(n)], vectors, [{"content_url": f"https://example.com/{i}"} for i in range(n)])
+    index.ready = True
+    return index, vectors
+
+@pytest.mark.unit
+class TestVectorIndex:
+    def test_exact_search_finds_itself(self):
+        index, vectors = _index()
+        hits = index.search(vectors[42], k=3, exact=True)
+        assert hits[0][0] == "id-42"
+        assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+        assert [s for _, s in hits] == sorted((s for _, s in hits), reverse=True)
+
+    def test_hnsw_recall_against_exact(self):
+        index, _ = _index()
+        assert index.recall_at_k(_vectors(20, seed=1), k=10) >= 0.9
+
+    def test_replace_and_remove(self):
+        index, vectors = _index(50)
+        index.add(["id-0"], [vectors[1]])
+        assert len(index) == 50
+        assert {cid for cid, _ in index.search(vectors[1], k=2, exact=True)} == {"id-0", "id-1"}
+
+        index.remove("id-1")
+        assert len(index) == 49
+        assert "id-1" not in [cid for cid, _ in index.search(vectors[1], k=5)]
+        assert "id-1" not in [cid for cid, _ in index.search(vectors[1], k=5, exact=True)]
+
+    def test_threshold_filters_results(self):
+        index, vectors = _index(50)
+        hits = index.search(vectors[3], k=10, threshold=0.99, exact=True)
+        assert [cid for cid, _ in hits] == ["id-3"]
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        index, vectors = _index(100)
+        index.remove("id-7")
+        index.save(str(tmp_path))
+
+        loaded = VectorIndex(dim=DIM)
+        assert loaded.load(str(tmp_path))
+        assert loaded.ready and len(loaded) == 99
+        assert loaded.metadata["id-5"]["content_url"] == "https://example.com/5"
+        assert loaded.search(vectors[5], k=1)[0][0] == "id-5"
+        loaded.add(["id-new"], [vectors[9]])
+        assert len(loaded) == 100
+
+    def test_load_missing_directory(self, tmp_path):
+        assert not VectorIndex(dim=DIM).load(str(tmp_path / "missing"))
+
+    def test_concurrent_saves_publish_a_consistent_index(self, tmp_path):
+        small, _ = _index(40)
+        large, _ = _index(120)
+        threads = [threading.Thread(target=index.save, args=(str(tmp_path),)) for index in (small, large) * 3]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not list(tmp_path.glob("*.tmp*"))
+        loaded = VectorIndex(dim=DIM)
+        assert loaded.load(str(tmp_path))
+        assert len(loaded) in (40, 120)
+
+    async def test_ingest_indexing_and_saves_run_off_the_event_loop(self, tmp_path, monkeypatch):
+        index, _ = _index(10)
+        monkeypatch.setattr(ann, "_vector_index", index)
+        monkeypatch.setattr(ann, "_pending_saves", 0)
+        monkeypatch.setenv("VECTOR_STORE_ENABLED", "false")
+        monkeypatch.setenv("VECTOR_INDEX_SAVE_EVERY", "2")
+        monkeypatch.setenv("VECTOR_INDEX_DIR", str(tmp_path))
+        threads = []
+        with patch.object(VectorIndex, "save", autospec=True, side_effect=lambda *a: threads.append(threading.current_thread())):
+            for i, vector in enumerate(_vectors(4, seed=1)):
+                await ann.aindex_content_embeddings([f"new-{i}"], [vector.tolist()])
+        assert len(index) == 14
+        assert len(threads) == 2
+        assert threading.main_thread() not in threads
@@ -0,0 +1,48 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.ingest import bulk
+from app.ingest.dedup import MIN_SIMHASH_WORDS
+from app.ingest.pipeline import PipelineItem
+
+SHORT = "A short note about agents."
+LONG = " ".join(f"word{i}" for i in range(MIN_SIMHASH_WORDS * 2))
+
+def stages():
+    return {stage.name: stage.handler for stage in bulk.build_ingest_stages(MagicMock(), AsyncMock(), ["ai"])}
+
+@pytest.mark.unit
+class TestBulkWrite:
+    async def test_batch_mixing_short_and_long_texts_has_uniform_rows(self):
+        items = [
+            PipelineItem("https://a.com/short", {"_text": SHORT, "summary": "s"}),
+            PipelineItem("https://b.com/long", {"_text": LONG, "summary": "l"}),
+        ]
+        for item in items:
+            item.data["_embedding"] = [0.1, 0.2]
+            item.data["_embedding_hash"] = "h"
+
+        def upsert(rows):
+            # PostgREST rejects a bulk payload whose objects have different keys
+            assert len({frozenset(row) for row in rows}) == 1
+            return [{"url": row["url"], "id": f"id-{n}"} for n, row in enumerate(rows)]
+
+        handlers = stages()
+        with patch.object(bulk, "afind_duplicate", AsyncMock(return_value=None)), \
+             patch.object(bulk, "create_content_items_bulk", side_effect=upsert) as create, \
+             patch.object(bulk, "store_embeddings_bulk"), \
+             patch.object(bulk, "aindex_content_embeddings", AsyncMock()), \
+             patch.object(bulk, "aobserve_content_embeddings", AsyncMock()), \
+             patch.object(bulk, "update_knn_graph", AsyncMock()), \
+             patch.object(bulk, "abump_search_generation", AsyncMock()), \
+             patch.object(bulk, "register_content") as register:
+            for item in items:
+                await handlers["dedup"](item)
+            fields = [item.data["_dedup"] for item in items]
+            await handlers["write"](items)
+        rows = create.call_args.args[0]
+        assert rows[0]["simhash"] is None and rows[1]["simhash"] is not None
+        assert [item.status for item in items] == ["pending", "pending"]
+        assert [item.data["content_id"] for item in items] == ["id-0", "id-1"]
+        # The dedup stage's fields are reused instead of rehashing the text on the event loop
+        register.assert_any_call("id-0", fields=fields[0])
+        register.assert_any_call("id-1", fields=fields[1])
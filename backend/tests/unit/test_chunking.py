@@ -0,0 +1,95 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.db import chunks
+from app.ingest.chunking import Chunker, iter_chunks
+
+def words(text):
+    return len(text.split())
+
+def sentences(n):
+    return " ".join(f"Sentence number {i} talks about topic {i % 7}." for i in range(n))
+
+@pytest.mark.unit
+class TestChunker:
+    def test_chunks_respect_token_budget_and_overlap(self):
+        result = list(iter_chunks(sentences(200), max_tokens=50, overlap_tokens=10, token_counter=words))
+        assert len(result) > 10
+        assert [c.index for c in result] == list(range(len(result)))
+        assert all(c.token_count <= 50 for c in result)
+        for prev, nxt in zip(result, result[1:]):
+            # The first sentence of each chunk repeats the tail of the previous one
+            assert nxt.text.split(".")[0] in prev.text
+        assert "Sentence number 199" in result[-1].text
+
+    def test_streamed_pieces_match_whole_text(self):
+        text = sentences(120)
+        whole = [c.text for c in iter_chunks(text, max_tokens=40, overlap_tokens=8, token_counter=words)]
+        pieces = (text[i:i + 37] for i in range(0, len(text), 37))
+        streamed = [c.text for c in iter_chunks(pieces, max_tokens=40, overlap_tokens=8, token_counter=words)]
+        assert streamed == whole
+
+    def test_unpunctuated_text_is_split_and_buffer_stays_bounded(self):
+        chunker = Chunker(max_tokens=30, overlap_tokens=5, token_counter=words)
+        produced = []
+        for _ in range(500):
+            produced.extend(chunker.feed("word " * 10))
+            assert len(chunker._pending) <= chunker.max_pending_chars
+        produced.extend(chunker.finish())
+        assert produced and all(c.token_count <= 30 for c in produced)
+
+    def test_short_text_is_one_chunk(self):
+        result = list(iter_chunks("Just one line.", max_tokens=50, overlap_tokens=10, token_counter=words))
+        assert len(result) == 1 and result[0].text == "Just one line."
+        assert list(iter_chunks("   ", token_counter=words)) == []
+
+    def test_overlap_must_be_smaller(self):
+        with pytest.raises(ValueError):
+            Chunker(max_tokens=10, overlap_tokens=10)
+
+@pytest.mark.unit
+class TestChunkEmbeddings:
+    async def test_chunks_are_embedded_in_batches(self, monkeypatch):
+        monkeypatch.setenv("CHUNK_MAX_TOKENS", "60")
+        monkeypatch.setenv("CHUNK_OVERLAP_TOKENS", "10")
+        supabase = MagicMock()
+        embed = AsyncMock(side_effect=lambda texts, model: [[0.1] * 3 for _ in texts])
+        with patch.object(chunks, "get_supabase", return_value=supabase), \
+             patch.object(chunks, "generate_embeddings", embed):
+            result = await chunks.embed_content_chunks("c1", sentences(300), batch_size=4)
+        assert result["chunk_count"] > 4
+        assert all(len(call.args[0]) <= 4 for call in embed.call_args_list)
+        upserted = [row for call in supabase.table.return_value.upsert.call_args_list for row in call.args[0]]
+        assert [row["chunk_index"] for row in upserted] == list(range(result["chunk_count"]))
+        # Chunks beyond the new count (from a longer earlier version) are removed
+        supabase.table.return_value.delete.return_value.eq.return_value.eq.return_value.gte.assert_called_with(
+            "chunk_index", result["chunk_count"]
+        )
+
+    def test_group_chunk_hits(self):
+        rows = [
+            {"content_id": "a", "chunk_index": 0, "chunk_text": "x", "similarity": 0.7, "content_summary": "A"},
+            {"content_id": "b", "chunk_index": 3, "chunk_text": "y", "similarity": 0.9, "content_summary": "B"},
+            {"content_id": "a", "chunk_index": 5, "chunk_text": "z", "similarity": 0.8, "content_summary": "A"},
+        ]
+        grouped = chunks.group_chunk_hits(rows, limit=10)
+        assert [g["content_id"] for g in grouped] == ["b", "a"]
+        assert grouped[1]["similarity"] == 0.8
+        assert grouped[1]["chunk_hits"] == 2
+        assert [c["chunk_index"] for c in grouped[1]["matched_chunks"]] == [5, 0]
+        assert chunks.group_chunk_hits(rows, limit=1)[0]["content_id"] == "b"
+
+    async def test_search_returns_none_without_rpc(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.side_effect = Exception("missing")
+        with patch.object(chunks, "get_supabase", return_value=supabase), \
+             patch.object(chunks, "generate_embedding", AsyncMock(return_value=[0.1])):
+            assert await chunks.search_content_chunks("query") is None
+
+    async def test_search_overfetches_chunks(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.return_value = SimpleNamespace(data=[])
+        with patch.object(chunks, "get_supabase", return_value=supabase), \
+             patch.object(chunks, "generate_embedding", AsyncMock(return_value=[0.1])):
+            assert await chunks.search_content_chunks("query", limit=5) == []
+        assert supabase.rpc.call_args.args[1]["match_count"] == 20
@@ -0,0 +1,60 @@
+import asyncio
+import math
+import os
+import time
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from app.compute.pool import CpuPool, LoopLagMonitor
+
+@pytest.fixture
+def pool():
+    cpu_pool = CpuPool(max_workers=2, default_timeout=30)
+    cpu_pool.start()
+    yield cpu_pool
+    cpu_pool.close()
+
+@pytest.mark.unit
+class TestCpuPool:
+    async def test_runs_in_worker_process_with_metrics(self, pool):
+        assert await pool.run(math.factorial, 20) == math.factorial(20)
+        assert await pool.run(os.getpid) != os.getpid()
+        stats = pool.stats()
+        assert stats["running"] and stats["workers"] == 2
+        assert stats["tasks"]["factorial"]["calls"] == 1
+        assert stats["tasks"]["factorial"]["in_flight"] == 0
+
+    async def test_timeout_is_counted(self, pool):
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.run(time.sleep, 2, timeout=0.1, name="sleep")
+        assert pool.stats()["tasks"]["sleep"]["timeouts"] == 1
+
+    async def test_broken_worker_restarts_pool(self, pool):
+        with pytest.raises(BrokenProcessPool):
+            await pool.run(os._exit, 1)
+        assert pool.restarts == 1
+        assert await pool.run(math.factorial, 5) == 120
+
+    async def test_tasks_on_a_broken_pool_restart_it_once(self, pool):
+        results = await asyncio.gather(
+            pool.run(os._exit, 1), *(pool.run(time.sleep, 0.5) for _ in range(3)), return_exceptions=True,
+        )
+        assert all(isinstance(r, BrokenProcessPool) for r in results)
+        assert pool.restarts == 1
+        assert await pool.run(math.factorial, 5) == 120
+
+    async def test_falls_back_to_thread_when_not_started(self):
+        idle = CpuPool(max_workers=2)
+        assert await idle.run(os.getpid) == os.getpid()
+        with pytest.raises(ValueError):
+            await idle.run(int, "not a number")
+        assert idle.stats()["tasks"]["int"]["failures"] == 1
+
+    async def test_loop_stays_responsive_while_pool_is_busy(self, pool):
+        monitor = LoopLagMonitor(interval=0.02)
+        monitor.start()
+        # Two CPU-heavy tasks in workers while the loop keeps ticking
+        await asyncio.gather(*(pool.run(math.factorial, 60000) for _ in range(2)))
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+        assert monitor.stats()["samples"] > 0
+        assert monitor.stats()["max_ms"] < 200
@@ -0,0 +1,120 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from app.ingest import dedup
+from app.ingest.dedup import (
+    DedupIndex,
+    SimHashIndex,
+    canonicalize_url,
+    content_hash,
+    hamming_distance,
+    simhash,
+)
+
+ARTICLE = " ".join(
+    f"Builders in Bangalore are shipping AI tools faster than ever, sentence number {i} explains why."
+    for i in range(40)
+)
+
+@pytest.mark.unit
+class TestCanonicalizeUrl:
+    @pytest.mark.parametrize("variant", [
+        "https://www.example.com/post/ai-tools/",
+        "http://example.com/post/ai-tools?utm_source=twitter&utm_medium=social",
+        "https://example.com/post/ai-tools/amp",
+        "https://amp.example.com/post/ai-tools#comments",
+        "https://example.com/post/ai-tools?fbclid=abc",
+        "https://www-example-com.cdn.ampproject.org/c/s/www.example.com/post/ai-tools",
+    ])
+    def test_variants_collapse(self, variant):
+        assert canonicalize_url(variant) == "https://example.com/post/ai-tools"
+
+    def test_meaningful_params_are_kept_and_sorted(self):
+        assert canonicalize_url("https://example.com/search?q=ai&page=2&utm_campaign=x") == \
+            "https://example.com/search?page=2&q=ai"
+
+@pytest.mark.unit
+class TestTextHashes:
+    def test_content_hash_ignores_case_and_spacing(self):
+        assert content_hash("Hello,  World!") == content_hash("hello world")
+
+    def test_simhash_close_for_small_edits(self):
+        edited = ARTICLE.replace("sentence number 7", "line number 7")
+        assert hamming_distance(simhash(ARTICLE), simhash(edited)) <= 3
+        unrelated = " ".join(f"Cricket score update {i} from the stadium tonight." for i in range(60))
+        assert hamming_distance(simhash(ARTICLE), simhash(unrelated)) > 10
+
+    def test_simhash_index_finds_within_distance(self):
+        index = SimHashIndex()
+        index.add("a", 0b1011)
+        index.add("b", (1 << 63) | 0b1011)
+        assert index.query(0b1111, max_distance=1) == [("a", 1)]
+
+@pytest.mark.unit
+class TestDedupIndex:
+    def test_match_priority(self):
+        index = DedupIndex()
+        index.add("id-1", canonical_url="https://example.com/a", text_hash="h1", text_simhash=simhash(ARTICLE))
+        assert index.find(canonical_url="https://example.com/a")["match"] == "url"
+        assert index.find(text_hash="h1")["match"] == "exact"
+        near = index.find(text_simhash=simhash(ARTICLE + " one more word"))
+        assert near["match"] == "near"
+        assert near["content_id"] == "id-1"
+        assert index.find(canonical_url="https://example.com/b", text_hash="h2") is None
+
+@pytest.mark.unit
+class TestDedupIndexLoading:
+    @pytest.fixture(autouse=True)
+    def fresh_index(self, monkeypatch):
+        monkeypatch.setattr(dedup, "_dedup_index", None)
+        monkeypatch.setattr(dedup, "_load_failed_at", None)
+        monkeypatch.setenv("DEDUP_RETRY_SECONDS", "60")
+
+    async def test_failed_load_backs_off(self):
+        clock = [1000.0]
+        with patch.object(DedupIndex, "load", side_effect=RuntimeError("db down")) as load, \
+             patch.object(dedup.time, "monotonic", side_effect=lambda: clock[0]):
+            assert dedup.find_duplicate(url="https://example.com/a") is None
+            assert await dedup.afind_duplicate(url="https://example.com/a") is None
+            clock[0] += 30
+            dedup.get_dedup_index()
+            assert load.call_count == 1
+            clock[0] += 31
+            await dedup.aget_dedup_index()
+            assert load.call_count == 2
+
+    async def test_async_lookup_loads_off_the_event_loop(self):
+        def load(index):
+            index.add("id-1", canonical_url="https://example.com/a")
+            index.loaded = True
+
+        with patch.object(DedupIndex, "load", autospec=True, side_effect=load) as loader, \
+             patch.object(dedup, "_find_stored", return_value=None), \
+             patch.object(dedup.asyncio, "to_thread", wraps=dedup.asyncio.to_thread) as to_thread:
+            found = await dedup.afind_duplicate(url="https://example.com/a?utm_source=x")
+            assert await dedup.afind_duplicate(url="https://example.com/b") is None
+        assert found == {"content_id": "id-1", "match": "url"}
+        assert loader.call_count == 1
+        # One load, then only the miss goes to the database
+        assert to_thread.call_count == 2
+        assert to_thread.call_args_list[0].args[0] is dedup._load_dedup_index
+
+    async def test_miss_falls_back_to_items_other_workers_stored(self):
+        stored = {"id": "other-worker", "canonical_url": None, "content_hash": content_hash(ARTICLE), "simhash": None}
+        supabase = MagicMock()
+        query = supabase.table.return_value.select.return_value.eq.return_value.limit.return_value
+        query.execute.side_effect = lambda: SimpleNamespace(
+            data=[stored] if supabase.table.return_value.select.return_value.eq.call_args.args[0] == "content_hash" else []
+        )
+
+        def load(index):
+            index.loaded = True
+
+        with patch.object(DedupIndex, "load", autospec=True, side_effect=load), \
+             patch("app.db.client.get_supabase", return_value=supabase):
+            found = await dedup.afind_duplicate(url="https://example.com/a", text=ARTICLE)
+            assert found == {"content_id": "other-worker", "match": "exact"}
+            assert supabase.table.return_value.select.return_value.eq.call_count == 2  # URL, then text hash
+            # Learned: the next lookup is answered from memory
+            assert dedup.find_duplicate(text=ARTICLE) == found
+            assert supabase.table.return_value.select.return_value.eq.call_count == 2
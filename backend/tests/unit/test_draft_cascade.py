@@ -0,0 +1,89 @@
+import json
+import pytest
+from app.drafts.cascade import CascadeDraftWriter, parse_scores, weak_sections
+from app.drafts.sections import SECTIONS, split_sections
+from app.models.base import ModelResponse
+
+OUTLINE = json.dumps({
+    "title": "Agents ka PR era",
+    "thesis": "Review is the new bottleneck",
+    "tone": "witty",
+    "sections": {s.name: f"plan for {s.name}" for s in SECTIONS},
+})
+
+class CascadeRegistry:
+    """Cheap model writes full-length sections, premium model rewrites; prices differ 10x"""
+
+    def __init__(self, score_reply: str = "{}", score_error: bool = False):
+        self.score_reply = score_reply
+        self.score_error = score_error
+        self.calls = []
+
+    async def generate(self, prompt, model_id, system_prompt=None, temperature=0.7, max_tokens=None, **kwargs):
+        if prompt.startswith("Plan a Hinglish newsletter"):
+            kind, content = "outline", OUTLINE
+        elif prompt.startswith("Score each section"):
+            if self.score_error:
+                raise RuntimeError("scorer down")
+            kind, content = "score", self.score_reply
+        elif "written in parallel" in prompt:
+            kind, content = "stitch", "[]"
+        else:
+            section = next(s for s in SECTIONS if f"Write ONLY the {s.name} section" in prompt)
+            if f"Rewrite the {section.name} section" in prompt:
+                kind, content = f"rewrite:{section.name}", f"Better {section.name}, yaar. " * section.words
+            else:
+                kind, content = f"section:{section.name}", "shabd " * section.words
+        self.calls.append((kind, model_id))
+        return ModelResponse(content=content, model=model_id, provider="fake", input_tokens=100, output_tokens=100)
+
+    def estimate_cost(self, input_tokens, output_tokens, model_id):
+        return (input_tokens + output_tokens) / 1000 * (10 if model_id == "premium" else 1)
+
+@pytest.mark.unit
+class TestCascadeDrafts:
+    async def test_only_weak_sections_use_the_premium_model(self):
+        registry = CascadeRegistry(json.dumps({
+            "Hook": {"score": 9}, "Context": {"score": 5, "issue": "vague"},
+            "Insight": {"score": 8}, "Takeaway": {"score": 6.5, "issue": "generic"}, "Closing": 9,
+        }))
+        result = await CascadeDraftWriter(registry, "premium", cheap_model="cheap").generate("context")
+        premium = [kind for kind, model in registry.calls if model == "premium"]
+        assert sorted(premium) == ["rewrite:Context", "rewrite:Takeaway", "stitch"]
+        assert all(model == "cheap" for kind, model in registry.calls if kind.startswith(("outline", "section", "score")))
+        assert result["rewritten"] == {"Context": "vague", "Takeaway": "generic"}
+        texts = split_sections(result["content"])
+        assert texts["Context"].startswith("Better Context")
+        assert texts["Hook"].startswith("shabd")
+
+    async def test_stage_costs_add_up(self):
+        registry = CascadeRegistry(json.dumps({"Hook": {"score": 3, "issue": "flat"}}))
+        usage = (await CascadeDraftWriter(registry, "premium", cheap_model="cheap").generate("context"))["usage"]
+        stages = usage["stages"]
+        assert stages["draft"]["calls"] == 6 and stages["draft"]["cost"] == pytest.approx(1.2)
+        assert stages["score"]["model"] == "cheap" and stages["score"]["calls"] == 1
+        assert stages["refine"]["model"] == "premium" and stages["refine"]["cost"] == pytest.approx(2.0)
+        assert usage["total"]["cost"] == pytest.approx(sum(stage["cost"] for stage in stages.values()))
+        assert [c["operation"] for c in usage["calls"]].count("cascade_refine") == 1
+
+    async def test_rewrites_are_capped_and_lowest_first(self):
+        scores = {s.name: {"score": i + 1} for i, s in enumerate(SECTIONS)}
+        result = await CascadeDraftWriter(CascadeRegistry(json.dumps(scores)), "premium", max_rewrites=2).generate("context")
+        assert list(result["rewritten"]) == ["Hook", "Context"]
+
+    async def test_scorer_failure_falls_back_to_the_edit_pass(self):
+        registry = CascadeRegistry(score_error=True)
+        result = await CascadeDraftWriter(registry, "premium", cheap_model="cheap").generate("context")
+        assert result["rewritten"] == {}
+        assert [kind for kind, model in registry.calls if model == "premium"] == ["stitch"]
+        assert result["usage"]["stages"]["score"]["calls"] == 0
+
+    def test_scores_parse_and_short_sections_are_weak(self):
+        raw = 'Sure! {"Hook": {"score": 4, "issue": "no hook"}, "Context": 8, "Insight": "great"}'
+        scores = parse_scores(raw, ["Hook", "Context", "Insight"])
+        assert scores == {"Hook": {"score": 4.0, "issue": "no hook"}, "Context": {"score": 8.0, "issue": ""}}
+        assert parse_scores("no json", ["Hook"]) == {}
+        weak = weak_sections({"Hook": "x " * 60, "Context": "too short", "Insight": "y " * 250}, scores, 7.0)
+        assert weak["Hook"] == "no hook"
+        assert weak["Context"].startswith("too short")
+        assert "Insight" not in weak
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+from app.drafts.sections import (
+    SECTIONS,
+    DraftOutline,
+    SectionedDraftWriter,
+    apply_stitch_edits,
+    assemble_draft,
+    draft_sections,
+    parse_outline,
+    parse_stitch_edits,
+    replace_section,
+    split_sections,
+)
+from app.models.base import ModelResponse
+
+OUTLINE = json.dumps({
+    "title": "Agents ka PR era",
+    "thesis": "Review is the new bottleneck",
+    "tone": "witty",
+    "sections": {s.name: f"plan for {s.name}" for s in SECTIONS},
+})
+
+class FakeRegistry:
+    """Answers outline/section/stitch prompts after a delay, tracking concurrency"""
+
+    def __init__(self, stitch_reply: str = "[]", delay: float = 0.05):
+        self.stitch_reply = stitch_reply
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.prompts = []
+        self.max_tokens = []
+
+    async def generate(self, prompt, model_id, system_prompt=None, temperature=0.7, max_tokens=None, **kwargs):
+        self.prompts.append(prompt)
+        self.max_tokens.append(max_tokens)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        if prompt.startswith("Plan a Hinglish newsletter"):
+            content = OUTLINE
+        elif "written in parallel" in prompt:
+            content = self.stitch_reply
+        else:
+            name = next(s.name for s in SECTIONS if f"Write ONLY the {s.name} section" in prompt)
+            content = f"{name} text, yaar."
+        return ModelResponse(content=content, model=model_id, provider="fake", input_tokens=10, output_tokens=len(content))
+
+    def estimate_cost(self, input_tokens, output_tokens, model_id):
+        return (input_tokens + output_tokens) / 1000
+
+@pytest.mark.unit
+class TestSectionedDrafts:
+    async def test_sections_run_concurrently_and_are_stitched_in_order(self):
+        registry = FakeRegistry(delay=0.1)
+        started = asyncio.get_running_loop().time()
+        result = await SectionedDraftWriter(registry, "m").generate("context")
+        elapsed = asyncio.get_running_loop().time() - started
+        assert registry.max_in_flight == len(SECTIONS)
+        assert elapsed < 0.5  # outline + one section round + stitch; sequential would be 0.7
+        assert [s["name"] for s in result["sections"]] == [s.name for s in SECTIONS]
+        assert result["content"].startswith("# Agents ka PR era\n\n## Hook\n\nHook text, yaar.")
+        assert all("Thesis: Review is the new bottleneck" in p for p in registry.prompts[1:6])
+
+    async def test_usage_is_tracked_per_section(self):
+        result = await SectionedDraftWriter(FakeRegistry(), "m").generate("context")
+        usage = result["usage"]
+        assert set(usage["sections"]) == {s.name for s in SECTIONS}
+        assert usage["sections"]["Insight"]["output_tokens"] == len("Insight text, yaar.")
+        assert usage["total"]["calls"] == 7
+        assert usage["total"]["output_tokens"] == sum(
+            u["output_tokens"] for u in [usage["outline"], usage["stitch"], *usage["sections"].values()]
+        )
+        assert [c["operation"] for c in usage["calls"]] == ["draft_outline"] + ["draft_section"] * 5 + ["draft_stitch"]
+        assert usage["stages"]["sections"]["calls"] == 5
+        assert usage["total"]["cost"] == pytest.approx(sum(c["cost"] for c in usage["calls"]))
+
+    async def test_stitch_edits_fix_seams(self):
+        reply = 'Edits: [{"section": "Context", "find": "Context text", "replace": "Toh context yeh hai"}, ' \
+                '{"section": "Closing", "find": "not there", "replace": "x"}]'
+        result = await SectionedDraftWriter(FakeRegistry(stitch_reply=reply), "m").generate("context")
+        assert result["stitch_edits"] == 1
+        assert split_sections(result["content"])["Context"] == "Toh context yeh hai, yaar."
+
+    def test_unparseable_outline_becomes_the_thesis(self):
+        assert parse_outline("Just write about agents.").thesis == "Just write about agents."
+        assert parse_outline(OUTLINE).sections["Hook"] == "plan for Hook"
+
+    def test_stitch_edits_are_validated(self):
+        edits = parse_stitch_edits('[{"section": "Hook", "find": "", "replace": "x"}, {"section": "Hook", "find": "a", "replace": "b"}]')
+        texts = {"Hook": "a a"}
+        assert apply_stitch_edits(texts, edits) == 1
+        assert texts == {"Hook": "b a"}
+        assert parse_stitch_edits("no edits") == []
+
+    async def test_one_section_is_regenerated_with_its_neighbors(self):
+        registry = FakeRegistry()
+        texts = {s.name: f"old {s.name} words" for s in SECTIONS}
+        outline = parse_outline(OUTLINE)
+        result = await SectionedDraftWriter(registry, "m").regenerate_section(
+            "context", outline, texts, "Takeaway", note="more concrete"
+        )
+        assert result["content"] == "Takeaway text, yaar."
+        assert len(registry.prompts) == 1
+        prompt = registry.prompts[0]
+        assert "Current Takeaway section:\nold Takeaway words" in prompt
+        assert "...end of Insight: old Insight words" in prompt and "Start of Closing" in prompt
+        assert "What to improve: more concrete" in prompt
+        assert registry.max_tokens == [int(120 * 2.5)]  # sized to the section, not the newsletter
+        assert [c["operation"] for c in result["usage"]["calls"]] == ["draft_section_refine"]
+
+    async def test_regenerate_from_scratch_omits_current_text(self):
+        registry = FakeRegistry()
+        texts = {"Hook": "old hook", "My aside": "an added section"}
+        result = await SectionedDraftWriter(registry, "m").regenerate_section(
+            "context", DraftOutline(thesis="t"), texts, "Hook", refine=False
+        )
+        assert "Current Hook section" not in registry.prompts[0]
+        assert result["usage"]["calls"][0]["operation"] == "draft_section_regenerate"
+
+    def test_replace_section_keeps_the_rest_of_the_draft(self):
+        content = assemble_draft("Title", {"Hook": "h", "Context": "c\n\nmore c", "Closing": "z"}) + "\n"
+        updated = replace_section(content, "Context", "new c")
+        assert split_sections(updated) == {"Hook": "h", "Context": "new c", "Closing": "z"}
+        assert updated.startswith("# Title\n\n## Hook\n\nh\n\n## Context\n\nnew c\n\n## Closing")
+        assert replace_section(updated, "Closing", "end").endswith("## Closing\n\nend\n")
+        with pytest.raises(KeyError):
+            replace_section(content, "Missing", "x")
+
+    def test_heading_less_drafts_map_onto_the_default_sections(self):
+        labelled = "# T\n\n**Hook:** hi\n\n### 2. Context\nctx\n\nmore ctx\n\nInsight - deep\n\nTakeaway: t\n\nClosing: bye"
+        assert draft_sections(labelled) == ("T", {
+            "Hook": "hi", "Context": "ctx\n\nmore ctx", "Insight": "deep", "Takeaway": "t", "Closing": "bye",
+        })
+        title, texts = draft_sections("\n\n".join(f"para {i} " + "w " * 40 for i in range(10)))
+        assert title == "" and list(texts) == [s.name for s in SECTIONS]
+        assert texts["Hook"].startswith("para 0") and texts["Closing"].endswith(f"para 9 {'w ' * 39}w")
+
+    async def test_single_mode_draft_section_is_regenerated(self):
+        from app.api import drafts as api
+        content = "# Agents ka PR era\n\n" + "\n\n".join(f"{s.name} para " + "w " * s.words for s in SECTIONS)
+        draft = {"content": content, "title": "Agents ka PR era", "model_used": "m", "prompt_used": "context"}
+        with patch.object(api, "registry", FakeRegistry(delay=0)), \
+                patch.object(api, "get_draft", return_value=draft), \
+                patch.object(api, "create_draft_version", return_value={"version": 2}) as create_version, \
+                patch("app.db.analytics.track_api_usage"), patch("app.db.analytics.record_draft_run"):
+            sections = await api.get_draft_sections("00000000-0000-0000-0000-000000000001")
+            result = await api.regenerate_draft_section(
+                "00000000-0000-0000-0000-000000000001", "Insight", api.RegenerateSectionRequest()
+            )
+        assert [s["name"] for s in sections["sections"]] == [s.name for s in SECTIONS]
+        assert result["section"] == {"name": "Insight", "content": "Insight text, yaar."}
+        updated = create_version.call_args.kwargs["content"]
+        assert updated.startswith("# Agents ka PR era\n\n## Hook\n\nHook para")
+        assert split_sections(updated)["Insight"] == "Insight text, yaar."
+        assert split_sections(updated)["Closing"].startswith("Closing para")
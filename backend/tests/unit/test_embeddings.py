@@ -0,0 +1,139 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.db import embeddings
+from app.db.embedding_batcher import EmbeddingBatcher
+from app.db.embedding_cache import EmbeddingCache, embedding_text_hash, parse_embedding
+
+def fake_client(vector):
+    client = MagicMock()
+    client.embeddings.create = AsyncMock(return_value=SimpleNamespace(
+        data=[SimpleNamespace(embedding=vector, index=0)],
+        usage=SimpleNamespace(total_tokens=5),
+    ))
+    return client
+
+@pytest.mark.unit
+class TestEmbeddingCache:
+    def test_hash_ignores_whitespace_but_not_model(self):
+        a = embedding_text_hash("hello\n  world", "m1")
+        assert a == embedding_text_hash(" hello world ", "m1")
+        assert a != embedding_text_hash("hello world", "m2")
+
+    def test_parse_embedding_accepts_pgvector_string(self):
+        assert parse_embedding("[0.5,1,2]") == [0.5, 1, 2]
+        assert parse_embedding((1.0, 2.0)) == [1.0, 2.0]
+
+    async def test_repeated_text_calls_api_once(self):
+        client = fake_client([0.1, 0.2])
+        cache = EmbeddingCache(persistent=False)
+        with patch.object(embeddings, "get_embedding_client", return_value=client), \
+             patch.object(embeddings, "get_embedding_cache", return_value=cache), \
+             patch.object(embeddings, "track_api_usage"):
+            first = await embeddings.generate_embedding("same text")
+            second = await embeddings.generate_embedding("same   text\n")
+        assert first == second == [0.1, 0.2]
+        client.embeddings.create.assert_awaited_once()
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_reuses_content_embeddings(self):
+        supabase = MagicMock()
+        table = supabase.table.return_value
+        query = table.select.return_value.in_.return_value.eq.return_value
+        query.execute.side_effect = [
+            SimpleNamespace(data=[]),
+            SimpleNamespace(data=[{"text_hash": "abc", "embedding": "[1,2,3]"}]),
+        ]
+        cache = EmbeddingCache()
+        with patch("app.db.embedding_cache.get_supabase", return_value=supabase):
+            assert cache.get("abc", "m") == [1, 2, 3]
+            # Second lookup is served from memory
+            assert cache.get("abc", "m") == [1, 2, 3]
+        assert cache.content_hits == 1
+        assert supabase.table.call_args_list[-1][0][0] == "content_embeddings"
+
+    async def test_batch_uses_one_lookup_per_table_and_one_upsert(self):
+        supabase = MagicMock()
+        table = supabase.table.return_value
+        table.select.return_value.in_.return_value.eq.return_value.execute.side_effect = [
+            SimpleNamespace(data=[{"text_hash": embedding_text_hash("cached", "m"), "embedding": [9.0]}]),
+            SimpleNamespace(data=[]),
+        ]
+        async def request(texts, model):
+            return [[float(len(text))] for text in texts]
+
+        cache = EmbeddingCache()
+        with patch("app.db.embedding_cache.get_supabase", return_value=supabase), \
+             patch.object(embeddings, "_request_embeddings", side_effect=request), \
+             patch.object(embeddings, "get_embedding_cache", return_value=cache):
+            result = await embeddings.generate_embeddings(["cached", "new one", "new three", "new one"], "m")
+        assert result == [[9.0], [7.0], [9.0], [7.0]]
+        assert table.select.call_count == 2  # embedding_cache, then content_embeddings for the rest
+        lookup = table.select.return_value.in_.call_args_list
+        assert len(lookup[1].args[1]) == 2  # only the two distinct misses
+        table.upsert.assert_called_once()
+        assert len(table.upsert.call_args.args[0]) == 2
+        assert cache.misses == 2
+
+@pytest.mark.unit
+class TestEmbeddingBatcher:
+    async def test_concurrent_calls_share_one_request(self):
+        calls = []
+
+        async def send(texts):
+            calls.append(list(texts))
+            return [[float(len(t))] for t in texts]
+
+        batcher = EmbeddingBatcher(send, max_batch_size=10, max_wait_ms=5)
+        results = await asyncio.gather(*(batcher.embed(t) for t in ["a", "bb", "a", "ccc"]))
+        assert results == [[1.0], [2.0], [1.0], [3.0]]
+        assert calls == [["a", "bb", "ccc"]]
+
+    async def test_splits_on_size_and_token_budget(self):
+        calls = []
+
+        async def send(texts):
+            calls.append(len(texts))
+            return [[0.0] for _ in texts]
+
+        batcher = EmbeddingBatcher(send, max_batch_size=2, max_wait_ms=5)
+        await batcher.embed_many(["a", "b", "c"])
+        assert calls == [2, 1]
+
+        calls.clear()
+        batcher = EmbeddingBatcher(send, max_batch_size=10, max_wait_ms=5, max_batch_tokens=4)
+        await batcher.embed_many(["x" * 9, "y" * 9])  # 3 tokens each
+        assert calls == [1, 1]
+
+    async def test_errors_propagate_to_every_caller(self):
+        async def send(texts):
+            raise RuntimeError("rate limited")
+
+        batcher = EmbeddingBatcher(send, max_wait_ms=1)
+        results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+@pytest.mark.unit
+class TestMatchContentRpc:
+    def test_prefers_slim_rpc_with_search_params(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.return_value = SimpleNamespace(data=[{"content_id": "a", "similarity": 0.9}])
+        with patch.object(embeddings, "get_supabase", return_value=supabase):
+            rows = embeddings.match_content_rpc([0.1], limit=5, threshold=0.5, ef_search=80)
+        assert rows == [{"content_id": "a", "similarity": 0.9}]
+        name, params = supabase.rpc.call_args.args
+        assert name == "match_content_items"
+        assert params["ef_search"] == 80 and params["match_count"] == 5
+
+    def test_falls_back_and_drops_embeddings(self):
+        supabase = MagicMock()
+        legacy = MagicMock()
+        legacy.execute.return_value = SimpleNamespace(data=[{"content_id": "a", "embedding": "[1,2]", "similarity": 0.8}])
+        missing = MagicMock()
+        missing.execute.side_effect = Exception("function match_content_items does not exist")
+        supabase.rpc.side_effect = lambda name, params: missing if name == "match_content_items" else legacy
+        with patch.object(embeddings, "get_supabase", return_value=supabase):
+            rows = embeddings.match_content_rpc([0.1])
+        assert rows == [{"content_id": "a", "similarity": 0.8}]
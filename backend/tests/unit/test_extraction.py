@@ -0,0 +1,114 @@
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.ingest import url as url_ingest
+from app.ingest.extraction import (
+    ContentExtraction,
+    StreamingExtractionParser,
+    merge_tags,
+    parse_extraction,
+)
+
+REPLY = {
+    "summary": "Agents ship when the loop is \"boring\".\nEval first 🚀",
+    "key_insights": ["Evals before features", "  ", "Small loops win"],
+    "suggested_tags": ["#AI Agents", "evals", "ai agents"],
+    "clarifying_questions": ["Kis lens se?", "Builder ya economy?", "Design?", "Extra?"],
+}
+
+@pytest.mark.unit
+class TestParseExtraction:
+    def test_fenced_reply_is_validated_and_cleaned(self):
+        raw = "```json\n" + json.dumps(REPLY) + "\n```"
+        extraction = parse_extraction(raw)
+        assert extraction.summary == REPLY["summary"]
+        assert extraction.key_insights == ["Evals before features", "Small loops win"]
+        assert extraction.suggested_tags == ["ai-agents", "evals"]
+        assert len(extraction.clarifying_questions) == 3
+
+    @pytest.mark.parametrize("raw", ["not json", '{"summary": ""}', '{"key_insights": []}'])
+    def test_invalid_replies_raise(self, raw):
+        with pytest.raises(ValueError):
+            parse_extraction(raw)
+
+    def test_merge_keeps_user_tags_first(self):
+        assert merge_tags(["AI-Agents", "mine"], ["ai-agents", "evals"]) == ["AI-Agents", "mine", "evals"]
+        assert merge_tags(None, ["evals"]) == ["evals"]
+
+@pytest.mark.unit
+class TestStreamingParser:
+    @pytest.mark.parametrize("size", [1, 2, 5, 7, 64])
+    def test_summary_decodes_across_split_escapes(self, size):
+        # ensure_ascii turns the emoji into a surrogate pair escape
+        raw = json.dumps(REPLY, ensure_ascii=True)
+        parser = StreamingExtractionParser()
+        streamed = "".join(parser.feed(raw[i:i + size]) for i in range(0, len(raw), size))
+        assert streamed == REPLY["summary"]
+        assert parser.summary_done
+        assert parser.finish().suggested_tags == ["ai-agents", "evals"]
+
+    def test_summary_is_available_before_the_object_completes(self):
+        parser = StreamingExtractionParser()
+        assert parser.feed('{"summ') == ""
+        assert parser.feed('ary": "Agents ship') == "Agents ship"
+        assert not parser.summary_done
+        with pytest.raises(ValueError):
+            parser.finish()
+
+def stream_agent(extraction, deltas):
+    async def extract_stream(text, source, notes, tags):
+        for delta in deltas:
+            yield delta
+        yield extraction
+    return SimpleNamespace(
+        extract=AsyncMock(return_value=extraction),
+        extract_stream=extract_stream,
+        ingest_url=AsyncMock(),
+        ask_clarifying_questions=AsyncMock(),
+    )
+
+@pytest.mark.unit
+class TestStructuredIngest:
+    async def ingest(self, agent, **kwargs):
+        page = SimpleNamespace(text="Agents in production. " * 200)
+        fetcher = SimpleNamespace(fetch=AsyncMock(return_value=page))
+        create = AsyncMock(return_value={"id": "c1", "embedding_status": "created"})
+        with patch.object(url_ingest, "get_page_fetcher", return_value=fetcher), \
+             patch.object(url_ingest, "afind_duplicate", new_callable=AsyncMock, return_value=None), \
+             patch.object(url_ingest, "create_content_with_embedding", create):
+            result = await url_ingest.ingest_single_url("https://example.com/a", content_agent=agent, **kwargs)
+        return result, create
+
+    async def test_one_call_fills_response_and_enriches_tags(self):
+        extraction = ContentExtraction(**REPLY)
+        agent = stream_agent(extraction, [])
+        result, create = await self.ingest(agent, tags=["mine"])
+        agent.extract.assert_awaited_once()
+        agent.ingest_url.assert_not_called()
+        agent.ask_clarifying_questions.assert_not_called()
+        assert result["summary"] == extraction.summary
+        assert result["key_insights"] == extraction.key_insights
+        assert result["clarifying_questions"] == extraction.clarifying_questions
+        assert result["tags"] == ["mine", "ai-agents", "evals"]
+        assert create.call_args.kwargs["tags"] == ["mine", "ai-agents", "evals"]
+
+    async def test_streamed_summary_is_reported_in_throttled_progress(self):
+        extraction = ContentExtraction(summary="x" * 500)
+        progress = MagicMock()
+        agent = stream_agent(extraction, ["x" * 50] * 10)
+        result, _ = await self.ingest(agent, progress=progress, stream_summary=True)
+        partials = [c.kwargs["summary"] for c in progress.call_args_list if c.args == ("summary",)]
+        assert [len(p) for p in partials] == [200, 400]
+        assert result["summary"] == extraction.summary
+        agent.extract.assert_not_called()
+
+    async def test_legacy_mode_keeps_two_calls(self, monkeypatch):
+        monkeypatch.setenv("CONTENT_EXTRACTION_MODE", "legacy")
+        agent = stream_agent(ContentExtraction(summary="unused"), [])
+        agent.ingest_url.return_value = {"summary": "Legacy summary"}
+        agent.ask_clarifying_questions.return_value = ["Kis lens se?"]
+        result, _ = await self.ingest(agent)
+        agent.extract.assert_not_called()
+        assert result["summary"] == "Legacy summary"
+        assert result["suggested_tags"] == []
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from app.ingest import url as url_ingest
+from app.ingest.fetcher import DocumentCache, FetchedPage, PageFetcher
+
+ARTICLE = (
+    "<html><head><title>Agents in production</title></head><body><article>"
+    + "".join(f"<p>Paragraph {i} explains how builders ship agent loops that actually work.</p>" for i in range(30))
+    + "</article></body></html>"
+)
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves one article with an ETag and honours If-None-Match"""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        etag = f'"v{server.version}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        body = server.body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", "Mon, 05 Oct 2026 10:00:00 GMT")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    httpd.requests, httpd.version, httpd.body = [], 1, ARTICLE
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def page_url(server, path="/article"):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+@pytest.mark.unit
+class TestPageFetcher:
+    async def test_one_network_fetch_per_ttl(self, server, tmp_path):
+        fetcher = PageFetcher(DocumentCache(str(tmp_path)), ttl=3600)
+        first = await fetcher.fetch(page_url(server))
+        second = await fetcher.fetch(page_url(server) + "?utm_source=newsletter")
+        await fetcher.close()
+        assert first.source == "network" and second.source == "fresh"
+        assert first.title == "Agents in production"
+        assert "Paragraph 29" in second.text
+        assert len(server.requests) == 1
+
+    async def test_stale_entry_is_revalidated_with_etag(self, server, tmp_path):
+        fetcher = PageFetcher(DocumentCache(str(tmp_path)), ttl=0)
+        await fetcher.fetch(page_url(server))
+        revalidated = await fetcher.fetch(page_url(server))
+        assert revalidated.source == "revalidated"
+        assert server.requests[1]["If-None-Match"] == '"v1"'
+        assert server.requests[1]["If-Modified-Since"] == "Mon, 05 Oct 2026 10:00:00 GMT"
+
+        server.version, server.body = 2, ARTICLE.replace("Paragraph 0", "Updated paragraph")
+        changed = await fetcher.fetch(page_url(server))
+        await fetcher.close()
+        assert changed.source == "network" and "Updated paragraph" in changed.text
+
+    async def test_cache_is_shared_across_fetchers(self, server, tmp_path):
+        first_worker = PageFetcher(DocumentCache(str(tmp_path)))
+        await first_worker.fetch(page_url(server))
+        await first_worker.close()
+        other_worker = PageFetcher(DocumentCache(str(tmp_path)))
+        assert (await other_worker.fetch(page_url(server))).source == "fresh"
+        assert len(server.requests) == 1
+
+    async def test_concurrent_fetches_share_one_request(self, server, tmp_path):
+        fetcher = PageFetcher(DocumentCache(str(tmp_path)))
+        pages = await asyncio.gather(*(fetcher.fetch(page_url(server)) for _ in range(5)))
+        await fetcher.close()
+        assert len({page.text for page in pages}) == 1
+        assert len(server.requests) == 1
+
+    def test_prune_keeps_newest_entries(self, tmp_path):
+        cache = DocumentCache(str(tmp_path), max_entries=2)
+        for i in range(4):
+            cache.set(f"https://example.com/{i}", FetchedPage(url="u", final_url="u", title="", text=str(i)))
+        assert cache.prune() >= 1
+        assert len(list(tmp_path.glob("*.json"))) == 2
+
+@pytest.mark.unit
+class TestSingleUrlIngest:
+    async def test_agent_gets_fetched_text_and_text_duplicates_short_circuit(self, server, tmp_path):
+        fetcher = PageFetcher(DocumentCache(str(tmp_path)))
+        agent = SimpleNamespace(
+            ingest_url=AsyncMock(return_value={"summary": "Agents summary"}),
+            ask_clarifying_questions=AsyncMock(return_value=["Kis lens se?"]),
+        )
+        create = AsyncMock(return_value={"id": "c1", "embedding_status": "created"})
+        with patch.object(url_ingest, "get_page_fetcher", return_value=fetcher), \
+             patch.object(url_ingest, "afind_duplicate", new_callable=AsyncMock, side_effect=[None, None]), \
+             patch.object(url_ingest, "create_content_with_embedding", create):
+            result = await url_ingest.ingest_single_url(page_url(server), content_agent=agent)
+        assert result["content_id"] == "c1"
+        text = agent.ingest_url.call_args.kwargs["text"]
+        assert "Paragraph 12" in text
+        assert agent.ask_clarifying_questions.call_args.kwargs["text"] == text
+        assert create.call_args.kwargs["extracted_text"] == text
+        assert "content_hash" in create.call_args.kwargs["dedup"]
+
+        # A mirror of the same article is caught by its text before any LLM call
+        agent.ingest_url.reset_mock()
+        with patch.object(url_ingest, "get_page_fetcher", return_value=fetcher), \
+             patch.object(url_ingest, "afind_duplicate", new_callable=AsyncMock, side_effect=[None, {"content_id": "c1", "match": "exact"}]):
+            duplicate = await url_ingest.ingest_single_url(page_url(server, "/mirror"), content_agent=agent)
+        await fetcher.close()
+        assert duplicate["status"] == "duplicate" and duplicate["content_id"] == "c1"
+        agent.ingest_url.assert_not_called()
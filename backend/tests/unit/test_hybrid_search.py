@@ -0,0 +1,69 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.search.hybrid import hybrid_search_content, is_keyword_query, resolve_search_mode
+
+@pytest.mark.unit
+class TestKeywordDetection:
+    @pytest.mark.parametrize("query", [
+        "LangChain", "GPT-4o pricing", '"vector database benchmarks for startups"',
+        "Next.js app router", "Claude Sonnet Gemini Llama-3 Mistral",
+    ])
+    def test_keyword_like(self, query):
+        assert is_keyword_query(query)
+        assert resolve_search_mode(query) == "text"
+
+    @pytest.mark.parametrize("query", [
+        "how are indian startups using ai agents",
+        "ideas for a newsletter on developer productivity in small teams",
+        "rag?",
+    ])
+    def test_natural_language(self, query):
+        assert not is_keyword_query(query)
+        assert resolve_search_mode(query) == "hybrid"
+
+    def test_explicit_mode_and_validation(self):
+        assert resolve_search_mode("LangChain", "vector") == "vector"
+        with pytest.raises(ValueError):
+            resolve_search_mode("x", "fuzzy")
+
+@pytest.mark.unit
+class TestHybridSearch:
+    async def test_text_mode_skips_embedding(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.return_value = SimpleNamespace(data=[{"content_id": "a", "score": 0.03}])
+        embed = AsyncMock()
+        with patch("app.db.client.get_supabase", return_value=supabase), \
+                patch("app.db.embeddings.generate_embedding", embed):
+            rows = await hybrid_search_content("LangChain", mode="text")
+        assert rows == [{"content_id": "a", "score": 0.03}]
+        embed.assert_not_called()
+        assert supabase.rpc.call_args.args[1]["query_embedding"] is None
+
+    async def test_hybrid_mode_sends_embedding(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.return_value = SimpleNamespace(data=[])
+        with patch("app.db.client.get_supabase", return_value=supabase), \
+                patch("app.db.embeddings.generate_embedding", AsyncMock(return_value=[0.1, 0.2])):
+            assert await hybrid_search_content("how do agents plan", mode="hybrid") == []
+        assert supabase.rpc.call_args.args[1]["query_embedding"] == [0.1, 0.2]
+
+    async def test_missing_rpc_returns_none(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.side_effect = Exception("not found")
+        with patch("app.db.client.get_supabase", return_value=supabase):
+            assert await hybrid_search_content("LangChain", mode="text") is None
+
+@pytest.mark.unit
+class TestAutoModeFallback:
+    def test_keyword_query_without_text_hits_falls_back_to_hybrid(self, monkeypatch):
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.search import result_cache
+        monkeypatch.setenv("VECTOR_STORE_ENABLED", "false")
+        monkeypatch.setattr(result_cache, "_search_cache", result_cache.SearchResultCache(max_size=8))
+        search = AsyncMock(side_effect=[[], [{"content_id": "a", "score": 0.02}]])
+        with patch("app.search.hybrid.hybrid_search_content", search):
+            body = TestClient(app).get("/api/content/search", params={"query": "agent memory"}).json()
+        assert [call.kwargs["mode"] for call in search.await_args_list] == ["text", "hybrid"]
+        assert body["mode"] == "hybrid" and body["count"] == 1
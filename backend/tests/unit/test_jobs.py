@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from app.ingest.jobs import JobStore, JobWorkerPool
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+@pytest.mark.unit
+class TestJobStore:
+    def test_enqueue_is_idempotent_by_key(self, store):
+        first = store.enqueue("url", {"url": "https://a.com"}, idempotency_key="url:https://a.com")
+        second = store.enqueue("url", {"url": "https://a.com"}, idempotency_key="url:https://a.com")
+        assert first["id"] == second["id"]
+        assert store.counts() == {"queued": 1}
+
+    def test_claim_is_exclusive(self, store):
+        store.enqueue("url", {"url": "x"})
+        job = store.claim("w1")
+        assert job["status"] == "running"
+        assert job["attempts"] == 1
+        assert store.claim("w2") is None
+
+    def test_failure_retries_then_fails(self, store):
+        job = store.enqueue("url", {}, idempotency_key="url:https://a.com", max_attempts=2)
+        store.claim("w")
+        assert store.fail(job["id"], "w", "boom", retry_backoff=0) == "queued"
+        store.claim("w")
+        assert store.fail(job["id"], "w", "boom again", retry_backoff=0) == "failed"
+        assert store.get(job["id"])["error"] == "boom again"
+
+        # Re-submitting a failed URL queues the same job again with a fresh attempt budget
+        again = store.enqueue("url", {"retry": True}, idempotency_key="url:https://a.com")
+        assert again["id"] == job["id"]
+        assert again["status"] == "queued"
+        assert again["attempts"] == 0
+        assert again["error"] is None
+        assert again["payload"] == {"retry": True}
+        assert store.events(job["id"])[-1]["data"] == {"requeued": True}
+        assert store.claim("w")["id"] == job["id"]
+
+    def test_events_are_ordered(self, store):
+        job = store.enqueue("url", {})
+        store.claim("w")
+        store.progress(job["id"], "w", "summarize")
+        store.complete(job["id"], "w", {"content_id": "abc"})
+        events = store.events(job["id"])
+        assert [e["event"] for e in events] == ["queued", "running", "progress", "succeeded"]
+        assert store.events(job["id"], after_seq=events[1]["seq"])[0]["data"]["stage"] == "summarize"
+
+    def test_expired_lease_is_reclaimed_only_while_attempts_remain(self, tmp_path):
+        store = JobStore(str(tmp_path / "jobs.sqlite3"), lease_seconds=0)
+        job = store.enqueue("url", {}, max_attempts=2)
+        store.claim("w1")
+        assert store.claim("w2")["attempts"] == 2
+        # The second worker died too: the job is out of attempts, so it fails instead of running again
+        assert store.claim("w3") is None
+        failed = store.get(job["id"])
+        assert failed["status"] == "failed"
+        assert failed["locked_by"] is None
+        assert "Lease expired" in failed["error"]
+        assert [e["event"] for e in store.events(job["id"])][-1] == "failed"
+
+    def test_stale_worker_cannot_finish_a_reclaimed_job(self, tmp_path):
+        store = JobStore(str(tmp_path / "jobs.sqlite3"), lease_seconds=0)
+        job = store.enqueue("url", {})
+        store.claim("w1")
+        store.claim("w2")
+        assert store.progress(job["id"], "w1", "summarize") is False
+        assert store.complete(job["id"], "w1", {"content_id": "stale"}) is False
+        assert store.fail(job["id"], "w1", "boom") is None
+        current = store.get(job["id"])
+        assert (current["status"], current["locked_by"], current["result"]) == ("running", "w2", None)
+        assert store.complete(job["id"], "w2", {"content_id": "abc"}) is True
+        assert store.get(job["id"])["result"] == {"content_id": "abc"}
+
+@pytest.mark.unit
+class TestJobWorkerPool:
+    async def test_runs_handler_and_records_result(self, store):
+        async def handler(payload, progress):
+            progress("work", step=1)
+            return {"echo": payload["value"]}
+
+        job = store.enqueue("echo", {"value": 42})
+        pool = JobWorkerPool(store, {"echo": handler}, concurrency=1)
+        assert await pool.run_once("w") is True
+        assert await pool.run_once("w") is False
+        done = store.get(job["id"])
+        assert done["status"] == "succeeded"
+        assert done["result"] == {"echo": 42}
+        assert done["stage"] == "work"
+
+    async def test_progress_writes_run_off_the_event_loop_in_order(self, store):
+        async def handler(payload, progress):
+            for stage in ("fetch", "extract", "summarize"):
+                progress(stage)
+            return {}
+
+        job = store.enqueue("echo", {})
+        pool = JobWorkerPool(store, {"echo": handler}, concurrency=1)
+        with patch("app.ingest.jobs.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+            await pool.run_once("w")
+        assert [c.args[0] for c in to_thread.call_args_list].count(store.progress) == 3
+        events = store.events(job["id"])
+        assert [e["data"].get("stage") for e in events if e["event"] == "progress"] == ["fetch", "extract", "summarize"]
+        assert events[-1]["event"] == "succeeded"
+
+    async def test_unknown_kind_fails_job(self, store):
+        job = store.enqueue("mystery", {}, max_attempts=1)
+        pool = JobWorkerPool(store, {}, concurrency=1)
+        await pool.run_once("w")
+        assert store.get(job["id"])["status"] == "failed"
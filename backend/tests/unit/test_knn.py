@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.search import knn
+from app.search.ann import normalize_rows
+
+def fake_supabase(rows):
+    supabase = MagicMock()
+    supabase.table.return_value.select.return_value.in_.return_value.execute.return_value = SimpleNamespace(data=rows)
+    return supabase
+
+@pytest.mark.unit
+class TestKnnGraph:
+    @pytest.mark.parametrize("block_size", [1, 7, 64])
+    def test_blocked_build_matches_brute_force(self, block_size):
+        matrix = normalize_rows(np.random.default_rng(0).normal(size=(50, 16)))
+        scores = matrix @ matrix.T
+        np.fill_diagonal(scores, -np.inf)
+        expected = np.argsort(-scores, axis=1)[:, :5]
+        rows = {}
+        for start, idx, top in knn.knn_blocks(matrix, 5, block_size):
+            for i, (row_idx, row_scores) in enumerate(zip(idx, top)):
+                rows[start + i] = row_idx
+                assert list(row_scores) == sorted(row_scores, reverse=True)
+        assert len(rows) == 50
+        assert all(list(rows[i]) == list(expected[i]) for i in range(50))
+
+    def test_merge_keeps_best_k_without_self(self):
+        merged = knn.merge_neighbors([("a", 0.9), ("b", 0.5)], [("b", 0.6), ("c", 0.7), ("self", 1.0)], 3, exclude="self")
+        assert merged == [("a", 0.9), ("c", 0.7), ("b", 0.6)]
+
+    def test_reverse_edges_are_merged_in_sql(self):
+        forward = {"new": [("old1", 0.9), ("new2", 0.5)], "new2": [("new", 0.5)]}
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.return_value = SimpleNamespace(data=1)
+        with patch.object(knn, "get_supabase", return_value=supabase), \
+             patch.object(knn, "_upsert") as upsert:
+            assert knn.write_edges(forward, k=2) == 3
+        assert [row["content_id"] for row in upsert.call_args.args[0]] == ["new", "new2"]
+        name, params = supabase.rpc.call_args.args
+        assert name == "merge_knn_edges"
+        # Only the edge to an item outside the batch; the RPC skips owners missing from the graph
+        assert params == {"p_edges": [{"content_id": "old1", "neighbor_id": "new", "similarity": 0.9}], "p_k": 2}
+
+    async def test_deleted_items_are_dropped_and_lists_refilled(self):
+        search = AsyncMock(return_value=[
+            {"content_id": "a", "similarity": 1.0},
+            {"content_id": "gone", "similarity": 0.9},
+            {"content_id": "c", "similarity": 0.6},
+        ])
+        with patch.object(knn, "_drop_neighbors", return_value=["a", "b"]) as drop, \
+             patch.object(knn, "_stored_embeddings", return_value={"a": [0.1, 0.2]}), \
+             patch("app.db.embeddings.search_by_embedding", search), \
+             patch.object(knn, "merge_edges") as merge:
+            assert await knn.remove_from_knn_graph(["gone"], k=2) == 1
+        drop.assert_called_once_with(["gone"])
+        assert search.await_args.kwargs["limit"] == 4
+        merge.assert_called_once_with([("a", "c", 0.6)], 2)
+
+    def test_startup_build_is_skipped_without_the_lease(self):
+        with patch("app.db.leases.acquire_lease", return_value=False), \
+             patch.object(knn, "build_knn_graph") as build, \
+             patch.object(knn, "get_supabase") as supabase:
+            assert knn.ensure_knn_graph() == 0
+        build.assert_not_called()
+        supabase.assert_not_called()
+
+    async def test_ingest_update_finds_neighbors_without_embedding_call(self):
+        search = AsyncMock(return_value=[
+            {"content_id": "new", "similarity": 1.0},
+            {"content_id": "old", "similarity": 0.8},
+        ])
+        with patch("app.db.embeddings.search_by_embedding", search), \
+             patch("app.db.embeddings.generate_embedding") as embed, \
+             patch.object(knn, "write_edges") as write:
+            forward = await knn.update_knn_graph(["new"], [[0.1, 0.2]], k=5)
+        assert forward == {"new": [("old", 0.8)]}
+        embed.assert_not_called()
+        write.assert_called_once_with({"new": [("old", 0.8)]}, 5)
+
+    async def test_ingest_update_never_raises(self):
+        with patch("app.db.embeddings.search_by_embedding", AsyncMock(side_effect=RuntimeError("down"))):
+            assert await knn.update_knn_graph(["new"], [[0.1]]) == {}
+
+    def test_batch_read_filters_and_truncates(self):
+        rows = [{"content_id": "a", "neighbor_ids": ["b", "c", "d"], "similarities": [0.9, 0.75, 0.5]}]
+        with patch.object(knn, "get_supabase", return_value=fake_supabase(rows)):
+            assert knn.get_neighbors(["a", "missing"], limit=1, min_similarity=0.7) == {"a": [("b", 0.9)]}
+            assert knn.related_counts(["a"], 0.7) == {"a": 2}
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from app.ingest.pipeline import Pipeline, PipelineItem, Stage
+
+def make_items(n):
+    return [PipelineItem(key=str(i), data={"value": i}) for i in range(n)]
+
+@pytest.mark.unit
+class TestPipeline:
+    async def test_items_flow_through_all_stages(self):
+        async def double(item):
+            item.data["value"] *= 2
+
+        async def add_batch(batch):
+            for item in batch:
+                item.data["value"] += 1
+
+        pipeline = Pipeline([
+            Stage("double", double, concurrency=3),
+            Stage("add", add_batch, concurrency=1, batch_size=4, batch_wait=0.01),
+        ])
+        items = await pipeline.run(make_items(10))
+        assert [i.data["value"] for i in items] == [2 * n + 1 for n in range(10)]
+        assert all(i.status == "done" for i in items)
+        metrics = pipeline.metrics_dict()
+        assert metrics["double"]["processed"] == 10
+        assert metrics["add"]["calls"] < 10
+
+    async def test_stage_concurrency_is_bounded(self):
+        active = 0
+        peak = 0
+
+        async def slow(item):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+        pipeline = Pipeline([Stage("slow", slow, concurrency=2)], queue_size=1)
+        await pipeline.run(make_items(8))
+        assert peak == 2
+
+    async def test_retries_then_fails(self):
+        attempts = {}
+
+        async def flaky(item):
+            attempts[item.key] = attempts.get(item.key, 0) + 1
+            if item.key == "1" or attempts[item.key] < 2:
+                raise RuntimeError("boom")
+
+        seen = []
+        pipeline = Pipeline(
+            [Stage("flaky", flaky, max_retries=2, retry_backoff=0)],
+            on_progress=seen.append,
+        )
+        items = await pipeline.run(make_items(2))
+        assert items[0].status == "done"
+        assert items[0].attempts["flaky"] == 2
+        assert items[1].status == "failed"
+        assert "boom" in items[1].error
+        assert len(seen) == 2
+        assert pipeline.metrics_dict()["flaky"]["retries"] == 3
+
+    async def test_skipped_items_stop_early(self):
+        async def skip_odd(item):
+            if item.data["value"] % 2:
+                item.skip("odd")
+
+        async def mark(item):
+            item.data["marked"] = True
+
+        pipeline = Pipeline([Stage("filter", skip_odd), Stage("mark", mark)])
+        items = await pipeline.run(make_items(4))
+        assert [i.status for i in items] == ["done", "skipped", "done", "skipped"]
+        assert "marked" not in items[1].data
+        assert items[1].to_dict()["skip_reason"] == "odd"
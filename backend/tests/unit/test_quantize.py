@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from app.search.ann import normalize_rows, top_k_exact
+from app.search.quantize import QuantizedIndex, binarize, hamming_distances, quantize_int8
+
+DIM = 64
+
+def _vectors(n, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((8, DIM))
+    return normalize_rows(centers[rng.integers(0, 8, n)] + 0.5 * rng.standard_normal((n, DIM)))
+
+@pytest.mark.unit
+class TestQuantization:
+    def test_int8_round_trip_error_is_small(self):
+        vectors = _vectors(20)
+        codes, scales = quantize_int8(vectors)
+        assert codes.dtype == np.int8
+        assert np.abs(codes * scales[:, None] - vectors).max() < 0.01
+
+    def test_binary_codes_and_hamming(self):
+        vectors = np.array([[1.0] * 16, [-1.0] * 16, [1.0] * 8 + [-1.0] * 8])
+        codes = binarize(vectors)
+        assert codes.shape == (3, 2)
+        assert hamming_distances(codes, codes[0]).tolist() == [0, 16, 8]
+
+@pytest.mark.unit
+class TestQuantizedIndex:
+    # 64 sign bits are a coarse filter; real 1536-dim codes do much better
+    @pytest.mark.parametrize("mode,oversample,min_recall", [("int8", 4, 0.9), ("binary", 20, 0.5)])
+    def test_two_stage_recall(self, mode, oversample, min_recall):
+        vectors = _vectors(1000)
+        index = QuantizedIndex(dim=DIM, initial_capacity=16)
+        index.add([str(i) for i in range(1000)], vectors)
+        queries = _vectors(20, seed=1)
+        recall = []
+        for q in queries:
+            exact = {str(i) for i in top_k_exact(vectors, q, 10)[0]}
+            found = {cid for cid, _ in index.search(q, 10, mode=mode, oversample=oversample)}
+            recall.append(len(found & exact) / 10)
+        assert np.mean(recall) >= min_recall
+
+    def test_rescoring_reads_from_vector_source(self):
+        vectors = _vectors(50)
+        rows = {str(i): vectors[i] for i in range(50)}
+        requested = []
+
+        def source(ids):
+            requested.extend(ids)
+            return np.stack([rows[i] for i in ids])
+
+        index = QuantizedIndex(dim=DIM, vector_source=source)
+        index.add(list(rows), vectors)
+        hits = index.search(vectors[7], k=3, oversample=2)
+        assert hits[0][0] == "7"
+        assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+        assert len(requested) == 6
+
+    def test_removed_ids_are_not_returned(self):
+        vectors = _vectors(30)
+        index = QuantizedIndex(dim=DIM)
+        index.add([str(i) for i in range(30)], vectors)
+        index.remove("4")
+        assert len(index) == 29
+        assert "4" not in [cid for cid, _ in index.search(vectors[4], k=5)]
@@ -0,0 +1,128 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.search import result_cache
+from app.search.result_cache import SearchResultCache, bump_search_generation, search_cache_key
+
+client = TestClient(app)
+
+class FakeSequence:
+    """Postgres sequence semantics: last_value starts at 1 with is_called false"""
+
+    def __init__(self):
+        self.last_value = 1
+        self.is_called = False
+
+    def nextval(self):
+        if self.is_called:
+            self.last_value += 1
+        self.is_called = True
+        return self.last_value
+
+    def generation(self):
+        # search_generation() in 017_search_generation.sql
+        return self.last_value if self.is_called else 0
+
+@pytest.fixture(autouse=True)
+def shared_generation(monkeypatch):
+    """Stands in for search_generation_seq (fresh, as after the migration), which every worker shares"""
+    sequence = FakeSequence()
+
+    def rpc(name):
+        return str(sequence.nextval() if name == "bump_search_generation" else sequence.generation())
+
+    monkeypatch.setenv("VECTOR_STORE_ENABLED", "false")
+    monkeypatch.setattr(result_cache, "_search_cache", SearchResultCache(max_size=8))
+    monkeypatch.setattr(result_cache, "_shared", None)
+    monkeypatch.setattr(result_cache, "_rpc_generation", rpc)
+    return sequence
+
+@pytest.mark.unit
+class TestSearchResultCache:
+    def test_key_normalizes_query(self):
+        assert search_cache_key("  LangChain   Agents ", limit=5) == search_cache_key("langchain agents", limit=5)
+        assert search_cache_key("langchain", limit=5) != search_cache_key("langchain", limit=10)
+
+    def test_first_bump_after_deploy_changes_the_generation(self):
+        fresh = result_cache.search_generation()
+        assert bump_search_generation() != fresh
+        assert result_cache.search_generation() != fresh
+
+    def test_generation_bump_misses(self):
+        cache = SearchResultCache()
+        generation = result_cache.search_generation()
+        cache.set("k", generation, {"results": []})
+        assert cache.get("k", generation) == {"results": []}
+        bump_search_generation()
+        assert cache.get("k", result_cache.search_generation()) is None
+
+@pytest.mark.unit
+class TestSearchEndpointCaching:
+    def test_repeat_query_is_cached_then_304(self):
+        search = AsyncMock(return_value=[{"content_id": "a", "similarity": 0.9}])
+        with patch("app.db.embeddings.search_similar_content", search):
+            first = client.get("/api/content/search", params={"query": "how do agents plan", "mode": "vector"})
+            second = client.get("/api/content/search", params={"query": "How do  agents plan", "mode": "vector"})
+            etag = first.headers["etag"]
+            not_modified = client.get(
+                "/api/content/search",
+                params={"query": "how do agents plan", "mode": "vector"},
+                headers={"If-None-Match": etag},
+            )
+        assert first.status_code == 200 and first.json()["cached"] is False
+        assert second.json()["cached"] is True
+        assert second.json()["results"] == first.json()["results"]
+        assert not_modified.status_code == 304
+        assert search.await_count == 1
+
+    def test_ingest_invalidates(self):
+        search = AsyncMock(return_value=[])
+        with patch("app.db.embeddings.search_similar_content", search):
+            etag = client.get("/api/content/search", params={"query": "rag evals", "mode": "vector"}).headers["etag"]
+            bump_search_generation()
+            response = client.get(
+                "/api/content/search",
+                params={"query": "rag evals", "mode": "vector"},
+                headers={"If-None-Match": etag},
+            )
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert search.await_count == 2
+
+    def test_another_workers_change_invalidates_after_the_ttl(self, shared_generation, monkeypatch):
+        search = AsyncMock(return_value=[])
+        with patch("app.db.embeddings.search_similar_content", search):
+            etag = client.get("/api/content/search", params={"query": "rag evals", "mode": "vector"}).headers["etag"]
+            shared_generation.nextval()  # bumped by another worker
+            monkeypatch.setenv("SEARCH_GENERATION_TTL", "0")
+            response = client.get(
+                "/api/content/search",
+                params={"query": "rag evals", "mode": "vector"},
+                headers={"If-None-Match": etag},
+            )
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert search.await_count == 2
+
+    def test_etag_depends_only_on_shared_state(self, monkeypatch):
+        with patch("app.db.embeddings.search_similar_content", AsyncMock(return_value=[])):
+            first = client.get("/api/content/search", params={"query": "rag evals", "mode": "vector"}).headers["etag"]
+            # A fresh worker with the same shared generation answers with the same ETag
+            monkeypatch.setattr(result_cache, "_shared", None)
+            monkeypatch.setattr(result_cache, "_search_cache", SearchResultCache(max_size=8))
+            second = client.get("/api/content/search", params={"query": "rag evals", "mode": "vector"}).headers["etag"]
+        assert first == second
+
+    def test_no_shared_generation_disables_caching(self, monkeypatch):
+        def unavailable(name):
+            raise RuntimeError("migration 017 not applied")
+
+        monkeypatch.setattr(result_cache, "_rpc_generation", unavailable)
+        search = AsyncMock(return_value=[])
+        with patch("app.db.embeddings.search_similar_content", search):
+            first = client.get("/api/content/search", params={"query": "rag evals", "mode": "vector"})
+            second = client.get("/api/content/search", params={"query": "rag evals", "mode": "vector"})
+        assert "etag" not in first.headers
+        assert second.json()["cached"] is False
+        assert search.await_count == 2
@@ -0,0 +1,57 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from app.db import embeddings
+from app.search.filters import SearchFilters
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+ITEM = {"id": "a", "tags": ["ai", "startups"], "url": "https://example.com", "created_at": "2026-09-28T10:00:00+00:00"}
+
+@pytest.mark.unit
+class TestSearchFilters:
+    def test_empty(self):
+        assert SearchFilters().is_empty()
+        assert SearchFilters(tags=[" ", ""]).is_empty()
+        assert SearchFilters().matches(ITEM)
+
+    def test_tags_any_and_all(self):
+        assert SearchFilters(tags=["ai", "crypto"]).matches(ITEM)
+        assert not SearchFilters(tags=["ai", "crypto"], tag_mode="all").matches(ITEM)
+        assert SearchFilters(tags=["ai", "startups"], tag_mode="all").matches(ITEM)
+
+    def test_date_range_and_source(self):
+        assert SearchFilters(since=NOW - timedelta(days=7)).matches(ITEM)
+        assert not SearchFilters(since=NOW).matches(ITEM)
+        assert not SearchFilters(until=datetime(2026, 9, 1)).matches(ITEM)  # naive -> UTC
+        assert SearchFilters(source_type="url").matches(ITEM)
+        assert not SearchFilters(source_type="file").matches(ITEM)
+        assert not SearchFilters(exclude_ids=["a"]).matches(ITEM)
+
+    def test_validation(self):
+        with pytest.raises(ValueError):
+            SearchFilters(source_type="pdf")
+        with pytest.raises(ValueError):
+            SearchFilters(tag_mode="some")
+
+    def test_rpc_params(self):
+        params = SearchFilters(tags=["ai", "ai"], since=NOW).to_rpc_params()
+        assert params["filter_tags"] == ["ai"]
+        assert params["filter_since"] == NOW.isoformat()
+        assert params["filter_exclude_ids"] is None
+
+@pytest.mark.unit
+class TestFilteredRpc:
+    def test_filters_are_sent_to_rpc(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.return_value = SimpleNamespace(data=[])
+        with patch.object(embeddings, "get_supabase", return_value=supabase):
+            assert embeddings.match_content_rpc([0.1], filters=SearchFilters(tags=["ai"])) == []
+        assert supabase.rpc.call_args.args[1]["filter_tags"] == ["ai"]
+
+    def test_filtered_query_does_not_use_unfiltered_legacy_rpc(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.side_effect = Exception("missing")
+        with patch.object(embeddings, "get_supabase", return_value=supabase):
+            assert embeddings.match_content_rpc([0.1], filters=SearchFilters(tags=["ai"])) is None
+        assert supabase.rpc.call_count == 1
@@ -0,0 +1,110 @@
+import asyncio
+import time
+import pytest
+from app.ingest.chunking import stable_chunks
+from app.ingest.summarizer import MapReduceSummarizer, SummaryCache
+from app.models.ratelimit import RateLimiter
+
+def words(text):
+    return len(text.split())
+
+def document(n, edit_at=None):
+    sentences = [f"Paragraph {i} covers agent topic {i % 11} in some detail." for i in range(n)]
+    if edit_at is not None:
+        sentences[edit_at] = "This sentence was rewritten by the author after publishing."
+    return " ".join(sentences)
+
+class FakeModel:
+    """Echoes a short summary after a fixed delay, tracking concurrency"""
+
+    def __init__(self, delay=0.02, limiter=None):
+        self.delay = delay
+        self.limiter = limiter or RateLimiter(max_concurrency=64)
+        self.prompts = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def complete(self, prompt):
+        async with self.limiter:
+            self.prompts.append(prompt)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            await asyncio.sleep(self.delay)
+            self.in_flight -= 1
+        return f"summary-{len(self.prompts)} of {words(prompt)} words"
+
+def summarizer(model, **kwargs):
+    params = {"chunk_tokens": 120, "budget_tokens": 160, "fan_in": 3, "cache": SummaryCache(persistent=False)}
+    params.update(kwargs)
+    return MapReduceSummarizer(model.complete, model="test-model", **params)
+
+@pytest.mark.unit
+class TestStableChunks:
+    def test_chunks_are_bounded_and_cover_the_text(self):
+        chunks = stable_chunks(document(300), max_tokens=60, min_tokens=20, token_counter=words)
+        assert all(c.token_count <= 60 for c in chunks)
+        assert " ".join(c.text for c in chunks) == document(300)
+
+    def test_an_edit_only_changes_nearby_chunks(self):
+        before = [c.text for c in stable_chunks(document(600), 60, 20, token_counter=words)]
+        after = [c.text for c in stable_chunks(document(600, edit_at=300), 60, 20, token_counter=words)]
+        changed = set(after) - set(before)
+        assert 1 <= len(changed) <= 3
+        assert len(after) - len(changed) >= len(before) - 3
+
+@pytest.mark.unit
+class TestMapReduceSummarizer:
+    async def test_short_text_is_returned_unchanged(self):
+        model = FakeModel()
+        assert await summarizer(model, budget_tokens=3000).condense("Short text.") == "Short text."
+        assert model.prompts == []
+
+    async def test_long_text_is_reduced_hierarchically(self):
+        model = FakeModel()
+        engine = summarizer(model)
+        condensed = await engine.condense(document(400))
+        assert engine.stats["chunks"] > 9
+        assert engine.stats["levels"] >= 2
+        assert len(condensed) <= 160 * 3
+        # Every chunk summary of one level ran concurrently
+        assert model.peak >= 9
+
+    async def test_wall_clock_follows_depth_not_length(self):
+        model = FakeModel(delay=0.05)
+        engine = summarizer(model, fan_in=8, budget_tokens=300)
+        started = time.perf_counter()
+        await engine.condense(document(800))
+        elapsed = time.perf_counter() - started
+        assert engine.stats["calls"] > 20
+        assert elapsed < engine.stats["levels"] * 0.05 + 0.5
+
+    async def test_reingesting_an_edited_document_reuses_unchanged_chunks(self):
+        cache = SummaryCache(persistent=False)
+        first = FakeModel()
+        await summarizer(first, cache=cache).condense(document(400))
+        second = FakeModel()
+        engine = summarizer(second, cache=cache)
+        await engine.condense(document(400, edit_at=200))
+        map_calls = [p for p in second.prompts if p.startswith("Summarize this section")]
+        assert 1 <= len(map_calls) <= 3
+        assert engine.stats["cached"] > engine.stats["calls"]
+
+    async def test_calls_respect_the_rate_limiter(self):
+        model = FakeModel(limiter=RateLimiter(max_concurrency=2))
+        await summarizer(model).condense(document(300))
+        assert model.peak == 2
+
+@pytest.mark.unit
+class TestRateLimiter:
+    async def test_requests_per_minute_spaces_starts(self):
+        limiter = RateLimiter(max_concurrency=10, requests_per_minute=600)
+        starts = []
+
+        async def call():
+            async with limiter:
+                starts.append(time.monotonic())
+
+        await asyncio.gather(*(call() for _ in range(4)))
+        gaps = [b - a for a, b in zip(starts, starts[1:])]
+        assert all(gap >= 0.09 for gap in gaps)
+        assert limiter.stats()["requests"] == 4
@@ -0,0 +1,202 @@
+import numpy as np
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.search.filters import SearchFilters
+from app.topics import engine, online
+from app.topics.clustering import NOISE, cluster_embeddings, score_clusters
+
+NOW = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+def blobs(sizes, dim=64, spread=0.05, seed=0):
+    """Tight groups of vectors around random directions, plus their group labels"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(len(sizes), dim))
+    vectors, groups = [], []
+    for group, (center, size) in enumerate(zip(centers, sizes)):
+        vectors.append(center + spread * rng.normal(size=(size, dim)) * np.linalg.norm(center))
+        groups += [group] * size
+    return np.vstack(vectors).astype(np.float32), np.array(groups)
+
+def items_for(groups, tags_by_group, age_by_group):
+    return [
+        {
+            "id": f"c{i}",
+            "summary": f"Item {i} from group {group}",
+            "tags": tags_by_group[group],
+            "created_at": (NOW - timedelta(days=age_by_group[group])).isoformat(),
+        }
+        for i, group in enumerate(groups)
+    ]
+
+@pytest.mark.unit
+class TestClustering:
+    def test_recovers_separated_groups(self):
+        vectors, groups = blobs([30, 20, 10])
+        labels = cluster_embeddings(vectors, k=3)
+        for group in range(3):
+            assert len(set(labels[groups == group])) == 1
+        assert len(set(labels)) == 3
+
+    def test_extra_clusters_merge_and_singletons_become_noise(self):
+        vectors, groups = blobs([40, 1], seed=1)
+        labels = cluster_embeddings(vectors, k=6, min_size=2, merge_threshold=0.8)
+        assert set(labels[groups == 0]) == {0}
+        assert labels[groups == 1][0] == NOISE
+
+    def test_scores_combine_size_recency_and_interest(self):
+        vectors, groups = blobs([20, 20, 5])
+        items = items_for(groups, [["agents"], ["crypto"], ["design"]], [1, 60, 1])
+        clusters = score_clusters(vectors, groups, items, {"design": 1.0}, now=NOW)
+        by_tag = {c.tags[0]: c for c in clusters}
+        assert by_tag["agents"].priority_score > by_tag["crypto"].priority_score
+        assert by_tag["design"].interest_score == 1.0
+        assert by_tag["agents"].size_score == 1.0
+        assert [c.priority_score for c in clusters] == sorted((c.priority_score for c in clusters), reverse=True)
+
+@pytest.mark.unit
+class TestPrioritizeTopics:
+    async def test_only_bounded_digests_reach_the_labeler(self, monkeypatch):
+        monkeypatch.setenv("TOPIC_LABEL_CLUSTERS", "2")
+        vectors, groups = blobs([200, 150, 100, 50])
+        items = items_for(groups, [["a"], ["b"], ["c"], ["d"]], [1, 2, 3, 4])
+        labeler = AsyncMock(return_value={1: {"title": "Agents", "description": "d", "reasoning": "r"}})
+        with patch.object(engine, "load_scoped_items", return_value=items), \
+             patch.object(engine, "load_embeddings", return_value={i["id"]: v for i, v in zip(items, vectors)}):
+            topics = await engine.prioritize_topics(SearchFilters(), labeler=labeler)
+        digests = labeler.call_args.args[0]
+        assert len(digests) == 2
+        assert all(len(d) < 1000 for d in digests)
+        assert topics[0]["title"] == "Agents"
+        assert topics[1]["title"] == topics[1]["tags"][0]  # Unlabeled clusters use their tags
+        assert topics[0]["item_count"] == 200
+        assert topics[0]["items"][0]["related_content_count"] == 199
+
+    async def test_provided_items_are_embedded_in_one_batch(self):
+        vectors, groups = blobs([6, 6])
+        items = [{"summary": f"text {i}", "tags": []} for i in range(len(groups))]
+        generate = AsyncMock(return_value=[v.tolist() for v in vectors])
+        with patch("app.db.embeddings.generate_embeddings", generate):
+            topics = await engine.prioritize_topics(SearchFilters(), content_items=items)
+        generate.assert_awaited_once()
+        assert sorted(t["item_count"] for t in topics) == [6, 6]
+
+    def test_cluster_labels_parse_from_json_array(self):
+        content = 'Sure:\n[{"cluster": 2, "title": " AI x Design ", "description": "x"}, {"cluster": "bad"}]'
+        assert engine.parse_cluster_labels(content) == {
+            2: {"title": "AI x Design", "description": "x", "reasoning": ""}
+        }
+        assert engine.parse_cluster_labels("no json") == {}
+
+def online_model(**kwargs):
+    model = online.OnlineTopicModel(persistent=False, **kwargs)
+    model.load()
+    return model
+
+@pytest.mark.unit
+class TestOnlineTopicModel:
+    def test_close_items_join_a_topic_and_distant_ones_spawn(self):
+        vectors, groups = blobs([3, 1], spread=0.01)
+        model = online_model(assign_threshold=0.8)
+        for i, vector in enumerate(vectors):
+            model.observe(f"c{i}", vector, ["a"] if groups[i] == 0 else ["b"])
+        assert sorted(c.size for c in model.clusters.values()) == [1, 3]
+        assert model.stats == {"assigned": 2, "spawned": 2, "rebalances": 0, "relabeled": 0}
+        topic = model.clusters["c0"]
+        expected = vectors[:3] / np.linalg.norm(vectors[:3], axis=1, keepdims=True)
+        mean = expected.sum(axis=0)
+        assert float(topic.centroid @ mean) / np.linalg.norm(mean) > 0.999
+        assert [c.cluster_key for c in model.ranked()] == ["c0"]  # Singletons are not topics
+
+    def test_growth_since_labeling_flags_relabel(self):
+        vectors, _ = blobs([10], spread=0.01)
+        model = online_model(relabel_change=0.5)
+        for i in range(4):
+            model.observe(f"c{i}", vectors[i])
+        topic = model.clusters["c0"]
+        topic.title, topic.labeled_count, topic.needs_relabel = "Agents", 4, False
+        model.observe("c4", vectors[4])
+        assert not topic.needs_relabel
+        model.observe("c5", vectors[5])
+        assert topic.needs_relabel
+
+    async def test_rebalance_keeps_keys_and_titles_of_overlapping_topics(self):
+        vectors, groups = blobs([8, 8], spread=0.01)
+        items = items_for(groups, [["a"], ["b"]], [1, 1])
+        model = online_model(assign_threshold=0.99)  # Online pass leaves group 1 fragmented
+        model.clusters["old"] = online.OnlineCluster(
+            cluster_key="old", centroid=vectors[0], content_ids=[f"c{i}" for i in range(6)],
+            title="Agents", labeled_count=6, needs_relabel=False,
+        )
+        model.clusters["stale"] = online.OnlineCluster(cluster_key="stale", centroid=vectors[0], content_ids=["gone"])
+        with patch.object(online, "load_scoped_items", return_value=items), \
+             patch.object(engine, "load_embeddings", return_value={i["id"]: v for i, v in zip(items, vectors)}):
+            result = await model.rebalance()
+        assert result["topics"] == 2
+        assert model.clusters["old"].title == "Agents"
+        assert model.clusters["old"].size == 8
+        assert model.clusters["old"].needs_relabel  # 6 -> 8 members crosses the 0.3 change
+        assert model._removed == ["stale"]
+
+    async def test_relabel_names_only_flagged_topics(self):
+        vectors, _ = blobs([3, 3], spread=0.01)
+        model = online_model()
+        for i, vector in enumerate(vectors):
+            model.observe(f"c{i}", vector)
+        named = model.clusters["c0"]
+        named.title, named.labeled_count, named.needs_relabel = "Named", 3, False
+        labeler = AsyncMock(return_value={1: {"title": "Fresh", "description": "d"}})
+        assert await model.relabel(labeler) == 1
+        assert len(labeler.call_args.args[0]) == 1
+        assert model.clusters["c3"].title == "Fresh"
+        assert named.title == "Named"
+
+    def test_interest_weights_rerank_topics(self):
+        vectors, _ = blobs([4, 2], spread=0.01)
+        model = online_model()
+        for i, vector in enumerate(vectors):
+            model.observe(f"c{i}", vector, ["crypto"] if i < 4 else ["design"])
+        assert model.ranked()[0].cluster_key == "c0"
+        assert model.ranked({"design": 1.0})[0].cluster_key == "c4"
+
+    async def test_ingest_hook_never_raises(self, monkeypatch):
+        monkeypatch.setattr(online, "get_topic_model", MagicMock(side_effect=RuntimeError("db down")))
+        online.observe_content_embeddings(["c1"], [[1.0, 0.0]], [{"tags": ["a"]}])
+        await online.aobserve_content_embeddings(["c1"], [[1.0, 0.0]], [{"tags": ["a"]}])
+
+    async def test_ingest_merges_members_instead_of_overwriting(self):
+        vectors, _ = blobs([3], spread=0.01)
+        stored = online.OnlineCluster(
+            cluster_key="c0", centroid=vectors[0], content_ids=["c0"], replace=False, dirty=False,
+        )
+        supabase = MagicMock()
+        # Another worker added "elsewhere" to the stored topic in the meantime
+        supabase.rpc.return_value.execute.return_value.data = [
+            {"content_ids": ["c0", "elsewhere", "c1"], "centroid": str(vectors[0].tolist())}
+        ]
+        model = online.OnlineTopicModel(assign_threshold=0.5)
+        with patch.object(model, "_read", return_value={"c0": stored}), \
+             patch.object(online, "get_supabase", return_value=supabase), \
+             patch.object(online, "get_topic_model", return_value=model):
+            await online.aobserve_content_embeddings(["c1"], [vectors[1].tolist()])
+        name, params = supabase.rpc.call_args.args
+        assert name == "merge_topic_members"
+        assert params["p_added"] == ["c1"] and len(params["p_vectors"]) == 1
+        supabase.table.return_value.upsert.assert_not_called()
+        assert model.clusters["c0"].content_ids == ["c0", "elsewhere", "c1"]
+        assert model.clusters["c0"].added == []
+
+    async def test_merge_into_a_deleted_topic_reinserts_it(self):
+        vectors, _ = blobs([2], spread=0.01)
+        model = online.OnlineTopicModel(assign_threshold=0.5)
+        model.loaded, model.loaded_at = True, float("inf")
+        model.clusters["c0"] = online.OnlineCluster(
+            cluster_key="c0", centroid=vectors[0], content_ids=["c0"], replace=False, dirty=False,
+        )
+        model.observe("c1", vectors[1])
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.return_value.data = []
+        with patch.object(online, "get_supabase", return_value=supabase):
+            await model.apersist()
+        rows = supabase.table.return_value.upsert.call_args.args[0]
+        assert [row["content_ids"] for row in rows] == [["c0", "c1"]]
@@ -0,0 +1,139 @@
+import io
+import os
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from app.ingest import uploads
+from app.ingest.dedup import StreamingFingerprint, dedup_fields
+from app.ingest.extractors import iter_document_text, markdown_line_text
+from app.ingest.uploads import UploadTooLarge, detect_file_type, extract_upload, spool_upload
+from app.main import app
+
+client = TestClient(app)
+
+def make_pdf(text: str) -> bytes:
+    """Smallest valid one-page PDF with a line of Helvetica text"""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+class FakeUpload:
+    def __init__(self, data: bytes, filename: str = "notes.txt", content_type: str = "text/plain"):
+        self._file = io.BytesIO(data)
+        self.filename = filename
+        self.content_type = content_type
+        self.read_sizes = []
+
+    async def read(self, size: int = -1) -> bytes:
+        self.read_sizes.append(size)
+        return self._file.read(size)
+
+@pytest.mark.unit
+class TestFileTypes:
+    def test_detection(self):
+        assert detect_file_type("x.bin", None, b"%PDF-1.7\n") == "pdf"
+        assert detect_file_type("page.htm", None, b"hello") == "html"
+        assert detect_file_type("upload", None, b"  <!DOCTYPE html><html>") == "html"
+        assert detect_file_type("README.md", None, b"# Title") == "markdown"
+        assert detect_file_type("notes.txt", "text/plain", b"plain") == "text"
+        with pytest.raises(ValueError):
+            detect_file_type("fake.pdf", None, b"not a pdf")
+        with pytest.raises(ValueError):
+            detect_file_type("image.png", "image/png", b"\x89PNG\x00\x00")
+
+    def test_markdown_syntax_is_stripped(self):
+        assert markdown_line_text("## Why **agents** fail") == "Why agents fail"
+        assert markdown_line_text("See [the docs](https://x.dev) ![chart](c.png)") == "See the docs chart"
+        assert markdown_line_text("```python") == ""
+
+    def test_pdf_and_html_extraction(self):
+        assert "Hello from a PDF page." in "".join(iter_document_text(io.BytesIO(make_pdf("Hello from a PDF page.")), "pdf"))
+        html = b"<html><head><title>T</title><script>x()</script></head><body><p>Body text here.</p></body></html>"
+        text = "".join(iter_document_text(io.BytesIO(html), "html"))
+        assert "Body text here." in text and "x()" not in text
+
+    def test_invalid_utf8_is_replaced_not_fatal(self):
+        assert "".join(iter_document_text(io.BytesIO(b"caf\xe9 ok"), "text")) == "caf\ufffd ok"
+
+@pytest.mark.unit
+class TestStreamingUpload:
+    async def test_spool_reads_fixed_chunks_and_enforces_cap(self):
+        upload = FakeUpload(b"x" * 10_000)
+        path = await spool_upload(upload, max_bytes=20_000, read_size=4096)
+        with open(path, "rb") as spooled:
+            assert spooled.read() == b"x" * 10_000
+        assert set(upload.read_sizes) == {4096}
+        os.unlink(path)
+        with pytest.raises(UploadTooLarge):
+            await spool_upload(FakeUpload(b"x" * 10_000), max_bytes=5_000, read_size=4096)
+
+    def test_extract_keeps_only_head_in_memory(self, tmp_path):
+        text = ("Sentence about retrieval quality and chunk sizes. " * 2000).encode()
+        source = tmp_path / "upload.txt"
+        source.write_bytes(text)
+        extracted = extract_upload(str(source), "text", head_chars=500)
+        assert len(extracted.head) <= 500
+        assert extracted.chars == len(text)
+        with open(extracted.text_path, encoding="utf-8") as text_file:
+            assert text_file.read() == text.decode()
+        assert extracted.dedup == dedup_fields(text=text.decode())
+        extracted.close()
+        assert not os.path.exists(extracted.text_path)
+
+    def test_streaming_fingerprint_matches_batch(self):
+        text = "Near-duplicate detection, with punctuation! And words split across pieces. " * 30
+        fingerprint = StreamingFingerprint()
+        for start in range(0, len(text), 7):
+            fingerprint.feed(text[start:start + 7])
+        assert fingerprint.fields() == dedup_fields(text=text)
+
+    async def test_ingest_upload_streams_full_text_to_chunking(self, monkeypatch):
+        monkeypatch.setenv("UPLOAD_STORED_TEXT_CHARS", "1000")
+        body = "Long uploaded report sentence that keeps going. " * 1000
+        streamed = []
+
+        async def create(**kwargs):
+            async for piece in kwargs["chunk_source"]:
+                streamed.append(piece)
+            return {"id": "c1", "embedding_status": "created", "chunk_count": 3}
+
+        with patch.object(uploads, "afind_duplicate", new_callable=AsyncMock, return_value=None), \
+             patch.object(uploads, "create_content_with_embedding", AsyncMock(side_effect=create)) as create_mock:
+            result = await uploads.ingest_upload(FakeUpload(body.encode()), tags=["ai"])
+        assert result["content_id"] == "c1" and result["chunk_count"] == 3
+        assert "".join(streamed) == body
+        kwargs = create_mock.call_args.kwargs
+        assert len(kwargs["extracted_text"]) <= 1000
+        assert kwargs["dedup"]["content_hash"] == dedup_fields(text=body)["content_hash"]
+
+    def test_endpoint_rejects_oversized_upload(self, monkeypatch):
+        monkeypatch.setenv("UPLOAD_MAX_BYTES", "1000")
+        response = client.post("/api/content/ingest", files={"file": ("big.txt", b"x" * 5000, "text/plain")})
+        assert response.status_code == 413
+
+    def test_endpoint_accepts_pdf(self):
+        create = AsyncMock(return_value={"id": "p1", "embedding_status": "created"})
+        with patch.object(uploads, "afind_duplicate", new_callable=AsyncMock, return_value=None), \
+             patch.object(uploads, "create_content_with_embedding", create):
+            response = client.post(
+                "/api/content/ingest",
+                files={"file": ("paper.pdf", make_pdf("Attention is all you need."), "application/pdf")},
+            )
+        assert response.status_code == 200
+        assert response.json()["file_type"] == "pdf"
+        assert "Attention is all you need." in create.call_args.kwargs["extracted_text"]
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from app.search.ann import VectorIndex, vector_search_backend
+from app.search.store import VectorStore, sync_index_from_store
+
+DIM = 16
+
+def _vectors(n, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+@pytest.mark.unit
+class TestVectorStore:
+    def test_reader_sees_new_segments_without_reload(self, tmp_path):
+        writer = VectorStore(str(tmp_path), dim=DIM)
+        reader = VectorStore(str(tmp_path), dim=DIM)
+        vectors = _vectors(20)
+
+        writer.append([f"a{i}" for i in range(10)], vectors[:10])
+        assert reader.refresh()
+        first_matrix = reader._segments[0]["matrix"]
+        assert isinstance(first_matrix, np.memmap)
+
+        writer.append([f"b{i}" for i in range(10)], vectors[10:], [{"content_url": "u"}] * 10)
+        assert reader.refresh()
+        assert not reader.refresh()
+        assert reader._segments[0]["matrix"] is first_matrix
+        assert len(reader) == 20
+        assert reader.search(vectors[15], k=1)[0][0] == "b5"
+        assert reader.metadata["b5"] == {"content_url": "u"}
+
+    def test_replace_delete_and_compact(self, tmp_path):
+        store = VectorStore(str(tmp_path), dim=DIM)
+        vectors = _vectors(5)
+        store.append(["x", "y", "z"], vectors[:3])
+        store.append(["x"], vectors[3:4])
+        store.delete(["y"])
+        store.refresh()
+
+        assert len(store) == 2
+        assert np.allclose(store.get("x"), vectors[3] / np.linalg.norm(vectors[3]))
+        assert store.get("y") is None
+        assert [cid for cid, _ in store.search(vectors[1], k=3)] != [] and \
+            "y" not in [cid for cid, _ in store.search(vectors[1], k=3)]
+
+        reader = VectorStore(str(tmp_path), dim=DIM)
+        reader.refresh()
+        store.compact()
+        assert len(store.segment_names) == 1
+        assert reader.refresh()
+        assert sorted(cid for ids, _ in reader.items() for cid in ids) == ["x", "z"]
+
+    def test_live_count_follows_replaces_deletes_and_compaction(self, tmp_path):
+        store = VectorStore(str(tmp_path), dim=DIM)
+        vectors = _vectors(4)
+        assert len(store) == 0
+        store.append(["x", "y", "z"], vectors[:3])
+        store.append(["x"], vectors[3:4])
+        store.delete(["y", "never-stored"])
+        store.refresh()
+        assert len(store) == 2
+        store.append(["y"], vectors[1:2])  # re-ingested after the delete
+        store.refresh()
+        assert len(store) == 3
+        store.compact()
+        assert len(store) == 3
+
+    def test_seed_only_fills_empty_store(self, tmp_path):
+        store = VectorStore(str(tmp_path), dim=DIM)
+        pages = lambda: iter([(["a"], _vectors(1), [{}]), (["b"], _vectors(1, seed=1), [{}])])
+        assert store.seed(pages) == 2
+        assert store.seed(pages) == 0
+        store.refresh()
+        assert len(store.segment_names) == 1 and len(store) == 2
+
+    def test_auto_compaction(self, tmp_path):
+        store = VectorStore(str(tmp_path), dim=DIM, max_segments=3)
+        for i, vector in enumerate(_vectors(5)):
+            store.append([f"id{i}"], [vector])
+        store.refresh()
+        assert len(store.segment_names) <= 3
+        assert len(store) == 5
+
+    def test_sync_index_from_store(self, tmp_path):
+        store = VectorStore(str(tmp_path), dim=DIM)
+        index = VectorIndex(dim=DIM, initial_capacity=8)
+        vectors = _vectors(12)
+        store.append([f"id{i}" for i in range(6)], vectors[:6])
+        assert sync_index_from_store(index, store) == 6
+        store.append([f"id{i}" for i in range(6, 12)], vectors[6:])
+        assert sync_index_from_store(index, store) == 6
+        assert sync_index_from_store(index, store) == 0
+        assert len(index) == 12
+        assert index.search(vectors[8], k=1)[0][0] == "id8"
+
+    def test_shared_store_is_the_default_backend(self, monkeypatch):
+        monkeypatch.delenv("VECTOR_INDEX_BACKEND", raising=False)
+        monkeypatch.setenv("VECTOR_STORE_ENABLED", "true")
+        assert vector_search_backend() == "mmap"
+        monkeypatch.setenv("VECTOR_STORE_ENABLED", "false")
+        assert vector_search_backend() == "hnsw"
+        monkeypatch.setenv("VECTOR_INDEX_BACKEND", "Quantized")
+        assert vector_search_backend() == "quantized"
@@ -37,9 +37,19 @@ interface CostBreakdown {
   total_requests: number
 }
 
+interface TimeseriesPoint {
+  bucket_start: string
+  provider: string
+  request_count: number
+  input_tokens: number
+  output_tokens: number
+  cost_estimated: number
+}
+
 export function CostDashboard() {
   const [usageStats, setUsageStats] = useState<UsageStats | null>(null)
   const [costBreakdown, setCostBreakdown] = useState<CostBreakdown | null>(null)
+  const [dailyCosts, setDailyCosts] = useState<{ day: string; cost: number }[]>([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
   const [days, setDays] = useState(30)
@@ -52,12 +62,20 @@ export function CostDashboard() {
     try {
       setLoading(true)
       setError(null)
-      const [usage, costs] = await Promise.all([
+      const [usage, costs, timeseries] = await Promise.all([
         api.analytics.usage(undefined, days),
-        api.analytics.costs()
+        api.analytics.costs(),
+        api.analytics.timeseries('day', days)
       ])
       setUsageStats(usage)
       setCostBreakdown(costs)
+      // Series rows are per provider; fold them into one total per day
+      const byDay: Record<string, number> = {}
+      for (const point of (timeseries.series || []) as TimeseriesPoint[]) {
+        const day = point.bucket_start.slice(0, 10)
+        byDay[day] = (byDay[day] || 0) + point.cost_estimated
+      }
+      setDailyCosts(Object.entries(byDay).map(([day, cost]) => ({ day, cost })))
     } catch (err: any) {
       setError(err.response?.data?.detail || 'Failed to load analytics')
     } finally {
@@ -87,6 +105,8 @@ export function CostDashboard() {
     )
   }
 
+  const maxDailyCost = Math.max(0, ...dailyCosts.map((d) => d.cost)) || 1
+
   return (
     <div className="space-y-6">
       <Card>
@@ -150,6 +170,26 @@ export function CostDashboard() {
         </Card>
       )}
 
+      {dailyCosts.length > 0 && (
+        <Card>
+          <CardHeader>
+            <CardTitle>Daily Cost</CardTitle>
+          </CardHeader>
+          <CardContent>
+            <div className="flex items-end gap-1 h-32">
+              {dailyCosts.map(({ day, cost }) => (
+                <div
+                  key={day}
+                  title={`${day}: $${cost.toFixed(4)}`}
+                  className="flex-1 bg-primary rounded-t"
+                  style={{ height: `${Math.max((cost / maxDailyCost) * 100, 2)}%` }}
+                />
+              ))}
+            </div>
+          </CardContent>
+        </Card>
+      )}
+
       {costBreakdown && (
         <>
           <Card>
@@ -6,6 +6,7 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/com
 import { Button } from '@/components/ui/button'
 import { Textarea } from '@/components/ui/textarea'
 import { Label } from '@/components/ui/label'
+import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select'
 
 interface Draft {
   id: string
@@ -18,6 +19,15 @@ interface Draft {
   version?: number
 }
 
+// Default sections the backend maps heading-less drafts onto
+const DEFAULT_SECTIONS = ['Hook', 'Context', 'Insight', 'Takeaway', 'Closing']
+
+// Same `## Section` headings the backend addresses sections by
+const sectionNames = (content: string) => {
+  const names = Array.from(content.matchAll(/^##\s+(.+?)\s*$/gm), (match) => match[1])
+  return names.length > 0 ? names : DEFAULT_SECTIONS
+}
+
 interface DraftEditorProps {
   draftId: string
   onClose?: () => void
@@ -30,6 +40,9 @@ export function DraftEditor({ draftId, onClose }: DraftEditorProps) {
   const [saving, setSaving] = useState(false)
   const [error, setError] = useState<string | null>(null)
   const [saveSuccess, setSaveSuccess] = useState(false)
+  const [section, setSection] = useState('')
+  const [instruction, setInstruction] = useState('')
+  const [reworking, setReworking] = useState(false)
 
   useEffect(() => {
     loadDraft()
@@ -71,6 +84,27 @@ export function DraftEditor({ draftId, onClose }: DraftEditorProps) {
     }
   }
 
+  const handleRework = async (refine: boolean) => {
+    if (!draft || !section) return
+
+    try {
+      setReworking(true)
+      setError(null)
+      // Sends the editor's text so unsaved edits to other sections are kept
+      await api.drafts.regenerateSection(draftId, section, {
+        instruction: instruction || undefined,
+        refine,
+        content: editedContent,
+      })
+      setInstruction('')
+      await loadDraft()
+    } catch (err: any) {
+      setError(err.response?.data?.detail || 'Failed to rework section')
+    } finally {
+      setReworking(false)
+    }
+  }
+
   if (loading) {
     return (
       <Card>
@@ -143,6 +177,38 @@ export function DraftEditor({ draftId, onClose }: DraftEditorProps) {
           />
         </div>
 
+        {sectionNames(editedContent).length > 0 && (
+          <div className="space-y-2">
+            <Label htmlFor="instruction">Rework one section</Label>
+            <div className="flex gap-2">
+              <Select value={section} onValueChange={setSection}>
+                <SelectTrigger className="w-40">
+                  <SelectValue placeholder="Section" />
+                </SelectTrigger>
+                <SelectContent>
+                  {sectionNames(editedContent).map((name) => (
+                    <SelectItem key={name} value={name}>{name}</SelectItem>
+                  ))}
+                </SelectContent>
+              </Select>
+              <Textarea
+                id="instruction"
+                value={instruction}
+                onChange={(e) => setInstruction(e.target.value)}
+                placeholder="What should change? e.g. make the hook punchier"
+                rows={1}
+                className="text-sm"
+              />
+              <Button onClick={() => handleRework(true)} disabled={reworking || !section} variant="outline">
+                {reworking ? 'Working...' : 'Refine'}
+              </Button>
+              <Button onClick={() => handleRework(false)} disabled={reworking || !section} variant="outline">
+                Regenerate
+              </Button>
+            </div>
+          </div>
+        )}
+
         <div className="flex gap-4 text-sm text-muted-foreground">
           {draft.model_used && (
             <span>Model: {draft.model_used}</span>
@@ -98,6 +98,33 @@ export const api = {
         changes_summary: changesSummary
       })
       return response.data
+    },
+    getSections: async (draftId: string) => {
+      const response = await axios.get(`${API_BASE}/api/drafts/${draftId}/sections`)
+      return response.data
+    },
+    regenerateSection: async (draftId: string, section: string, options?: {
+      model?: string
+      instruction?: string
+      refine?: boolean
+      content?: string
+      temperature?: number
+    }) => {
+      const response = await axios.post(
+        `${API_BASE}/api/drafts/${draftId}/sections/${encodeURIComponent(section)}`,
+        options ?? {}
+      )
+      return response.data
+    }
+  },
+  content: {
+    ingestBulk: async (urls: string[], tags?: string[], notes?: string) => {
+      const response = await axios.post(`${API_BASE}/api/content/ingest/bulk`, {
+        urls,
+        tags: tags ?? [],
+        notes
+      })
+      return response.data
     }
   },
   topics: {
@@ -127,6 +154,14 @@ export const api = {
     costs: async () => {
       const response = await axios.get(`${API_BASE}/api/analytics/costs`)
       return response.data
+    },
+    timeseries: async (bucket: 'hour' | 'day' = 'day', days?: number, provider?: string) => {
+      const params = new URLSearchParams()
+      params.append('bucket', bucket)
+      if (days) params.append('days', days.toString())
+      if (provider) params.append('provider', provider)
+      const response = await axios.get(`${API_BASE}/api/analytics/timeseries?${params.toString()}`)
+      return response.data
     }
   }
 }
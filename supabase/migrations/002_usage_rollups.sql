@@ -0,0 +1,151 @@
+-- API usage rollups
+-- Keeps hourly and daily aggregates of api_usage so analytics endpoints never
+-- scan the raw table. Run this in Supabase SQL Editor after 001_init_schema.sql
+
+-- Rollup Table (one row per bucket/provider/model/operation)
+CREATE TABLE IF NOT EXISTS api_usage_rollups (
+    granularity TEXT NOT NULL,  -- 'hour' or 'day'
+    bucket_start TIMESTAMPTZ NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    operation_type TEXT NOT NULL,
+    request_count BIGINT DEFAULT 0,
+    input_tokens BIGINT DEFAULT 0,
+    output_tokens BIGINT DEFAULT 0,
+    cost_estimated DOUBLE PRECISION DEFAULT 0.0,
+    PRIMARY KEY (granularity, bucket_start, provider, model, operation_type)
+);
+
+CREATE INDEX IF NOT EXISTS idx_api_usage_rollups_bucket
+ON api_usage_rollups(granularity, bucket_start DESC);
+
+-- Incrementally fold each new api_usage row into its hour and day buckets
+CREATE OR REPLACE FUNCTION rollup_api_usage()
+RETURNS TRIGGER AS $$
+DECLARE
+    g TEXT;
+BEGIN
+    FOREACH g IN ARRAY ARRAY['hour', 'day'] LOOP
+        INSERT INTO api_usage_rollups AS r (
+            granularity, bucket_start, provider, model, operation_type,
+            request_count, input_tokens, output_tokens, cost_estimated
+        ) VALUES (
+            g,
+            date_trunc(g, COALESCE(NEW.created_at, NOW()), 'UTC'),
+            NEW.provider,
+            NEW.model,
+            NEW.operation_type,
+            1,
+            COALESCE(NEW.input_tokens, 0),
+            COALESCE(NEW.output_tokens, 0),
+            COALESCE(NEW.cost_estimated, 0.0)
+        )
+        ON CONFLICT (granularity, bucket_start, provider, model, operation_type)
+        DO UPDATE SET
+            request_count = r.request_count + 1,
+            input_tokens = r.input_tokens + EXCLUDED.input_tokens,
+            output_tokens = r.output_tokens + EXCLUDED.output_tokens,
+            cost_estimated = r.cost_estimated + EXCLUDED.cost_estimated;
+    END LOOP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS rollup_api_usage_after_insert ON api_usage;
+CREATE TRIGGER rollup_api_usage_after_insert
+    AFTER INSERT ON api_usage
+    FOR EACH ROW EXECUTE FUNCTION rollup_api_usage();
+
+-- Backfill rollups from existing history (safe to re-run)
+TRUNCATE api_usage_rollups;
+INSERT INTO api_usage_rollups (
+    granularity, bucket_start, provider, model, operation_type,
+    request_count, input_tokens, output_tokens, cost_estimated
+)
+SELECT g, date_trunc(g, u.created_at, 'UTC'), u.provider, u.model, u.operation_type,
+       COUNT(*), SUM(COALESCE(u.input_tokens, 0)), SUM(COALESCE(u.output_tokens, 0)),
+       SUM(COALESCE(u.cost_estimated, 0.0))
+FROM api_usage u
+CROSS JOIN (VALUES ('hour'), ('day')) AS grains(g)
+GROUP BY 1, 2, 3, 4, 5;
+
+-- Grouped totals for an arbitrary time range.
+-- Whole days inside the range are read from daily buckets and the partial
+-- days at either edge from hourly buckets, so the rows touched depend on the
+-- range length and number of models, never on the size of api_usage.
+CREATE OR REPLACE FUNCTION get_usage_totals(
+  range_start timestamptz,
+  range_end timestamptz DEFAULT NOW(),
+  filter_provider text DEFAULT NULL
+)
+RETURNS TABLE (
+  provider text,
+  model text,
+  operation_type text,
+  request_count bigint,
+  input_tokens bigint,
+  output_tokens bigint,
+  cost_estimated double precision
+)
+LANGUAGE sql STABLE
+AS $$
+  WITH bounds AS (
+    SELECT
+      date_trunc('day', range_start, 'UTC') + interval '1 day' AS day_lo,
+      date_trunc('day', range_end, 'UTC') AS day_hi
+  )
+  SELECT
+    r.provider,
+    r.model,
+    r.operation_type,
+    SUM(r.request_count)::bigint,
+    SUM(r.input_tokens)::bigint,
+    SUM(r.output_tokens)::bigint,
+    SUM(r.cost_estimated)
+  FROM api_usage_rollups r, bounds b
+  WHERE (filter_provider IS NULL OR r.provider = filter_provider)
+    AND (
+      (r.granularity = 'day'
+        AND r.bucket_start >= b.day_lo
+        AND r.bucket_start < b.day_hi)
+      OR
+      (r.granularity = 'hour'
+        AND r.bucket_start >= date_trunc('hour', range_start, 'UTC')
+        AND r.bucket_start < range_end
+        AND (b.day_lo > b.day_hi OR r.bucket_start < b.day_lo OR r.bucket_start >= b.day_hi))
+    )
+  GROUP BY r.provider, r.model, r.operation_type;
+$$;
+
+-- Per-bucket totals for charts
+CREATE OR REPLACE FUNCTION get_usage_timeseries(
+  range_start timestamptz,
+  range_end timestamptz DEFAULT NOW(),
+  bucket text DEFAULT 'day',
+  filter_provider text DEFAULT NULL
+)
+RETURNS TABLE (
+  bucket_start timestamptz,
+  provider text,
+  request_count bigint,
+  input_tokens bigint,
+  output_tokens bigint,
+  cost_estimated double precision
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT
+    r.bucket_start,
+    r.provider,
+    SUM(r.request_count)::bigint,
+    SUM(r.input_tokens)::bigint,
+    SUM(r.output_tokens)::bigint,
+    SUM(r.cost_estimated)
+  FROM api_usage_rollups r
+  WHERE r.granularity = bucket
+    AND r.bucket_start >= date_trunc(bucket, range_start, 'UTC')
+    AND r.bucket_start < range_end
+    AND (filter_provider IS NULL OR r.provider = filter_provider)
+  GROUP BY r.bucket_start, r.provider
+  ORDER BY r.bucket_start;
+$$;
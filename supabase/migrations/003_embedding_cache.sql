@@ -0,0 +1,17 @@
+-- Content-addressed embedding cache
+-- Embeddings are keyed by sha256(model + normalized text) so identical text is
+-- never sent to the embeddings API twice. Run after 002_usage_rollups.sql
+
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    text_hash TEXT NOT NULL,
+    model_used TEXT NOT NULL,
+    embedding vector(1536),
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (text_hash, model_used)
+);
+
+-- Let stored content embeddings answer cache lookups for identical text
+ALTER TABLE content_embeddings ADD COLUMN IF NOT EXISTS text_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_content_embeddings_text_hash
+ON content_embeddings(text_hash, model_used);
@@ -0,0 +1,11 @@
+-- Content deduplication keys
+-- canonical_url catches tracking-param / AMP / trailing-slash variants,
+-- content_hash catches identical text, simhash catches near-duplicates.
+-- Run after 003_embedding_cache.sql
+
+ALTER TABLE content_items ADD COLUMN IF NOT EXISTS canonical_url TEXT;
+ALTER TABLE content_items ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE content_items ADD COLUMN IF NOT EXISTS simhash BIGINT;
+
+CREATE INDEX IF NOT EXISTS idx_content_items_canonical_url ON content_items(canonical_url);
+CREATE INDEX IF NOT EXISTS idx_content_items_content_hash ON content_items(content_hash);
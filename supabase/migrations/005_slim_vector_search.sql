@@ -0,0 +1,68 @@
+-- Lean vector search
+-- match_content_items returns ids, similarity and content columns only (no
+-- 1536-float embedding per hit) and takes the ANN search breadth per call.
+-- Also swaps the ivfflat (lists = 100) index for HNSW, which needs no
+-- training data and keeps recall as the table grows.
+-- Run after 004_content_dedup.sql
+
+DROP INDEX IF EXISTS content_embeddings_vector_idx;
+
+CREATE INDEX IF NOT EXISTS content_embeddings_hnsw_idx
+ON content_embeddings
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- To stay on ivfflat instead, skip the two statements above and size lists
+-- to roughly rows / 1000 (sqrt(rows) past 1M rows), e.g.:
+--   CREATE INDEX content_embeddings_vector_idx ON content_embeddings
+--   USING ivfflat (embedding vector_cosine_ops) WITH (lists = 20);
+-- and pass match_probes to match_content_items.
+
+CREATE OR REPLACE FUNCTION match_content_items(
+  query_embedding vector(1536),
+  match_threshold float DEFAULT 0.7,
+  match_count int DEFAULT 10,
+  ef_search int DEFAULT NULL,
+  match_probes int DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid,
+  content_id uuid,
+  similarity float,
+  content_summary text,
+  content_url text,
+  content_tags text[],
+  content_created_at timestamptz
+)
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+  -- Transaction-local, so each PostgREST call can tune its own search
+  IF ef_search IS NOT NULL THEN
+    PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+  END IF;
+  IF match_probes IS NOT NULL THEN
+    PERFORM set_config('ivfflat.probes', match_probes::text, true);
+  END IF;
+
+  RETURN QUERY
+  SELECT
+    nearest.id,
+    nearest.content_id,
+    nearest.similarity,
+    ci.summary,
+    ci.url,
+    ci.tags,
+    ci.created_at
+  FROM (
+    -- ORDER BY distance + LIMIT first so the ANN index drives the scan
+    SELECT ce.id, ce.content_id, 1 - (ce.embedding <=> query_embedding) AS similarity
+    FROM content_embeddings ce
+    ORDER BY ce.embedding <=> query_embedding
+    LIMIT match_count
+  ) nearest
+  JOIN content_items ci ON nearest.content_id = ci.id
+  WHERE nearest.similarity > match_threshold
+  ORDER BY nearest.similarity DESC;
+END;
+$$;
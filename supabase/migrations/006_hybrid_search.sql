@@ -0,0 +1,87 @@
+-- Hybrid full-text + vector search
+-- search_tsv indexes summary (weight A) and extracted_text (weight B);
+-- hybrid_search_content fuses text rank and vector similarity with
+-- reciprocal-rank fusion in one call. Pass a NULL query_embedding for a
+-- text-only search that needs no embeddings API call.
+-- Run after 005_slim_vector_search.sql
+
+ALTER TABLE content_items ADD COLUMN IF NOT EXISTS search_tsv tsvector
+GENERATED ALWAYS AS (
+  setweight(to_tsvector('english', coalesce(summary, '')), 'A') ||
+  -- tsvector values are capped at 1MB; the head of the text is enough to rank on
+  setweight(to_tsvector('english', left(coalesce(extracted_text, ''), 200000)), 'B')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_content_items_search_tsv ON content_items USING GIN(search_tsv);
+
+CREATE OR REPLACE FUNCTION hybrid_search_content(
+  query_text text,
+  query_embedding vector(1536) DEFAULT NULL,
+  match_count int DEFAULT 10,
+  match_threshold float DEFAULT 0.0,
+  full_text_weight float DEFAULT 1.0,
+  semantic_weight float DEFAULT 1.0,
+  rrf_k int DEFAULT 60,
+  ef_search int DEFAULT NULL
+)
+RETURNS TABLE (
+  content_id uuid,
+  score float,
+  similarity float,
+  text_rank float,
+  content_summary text,
+  content_url text,
+  content_tags text[],
+  content_created_at timestamptz
+)
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+  IF ef_search IS NOT NULL THEN
+    PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+  END IF;
+
+  RETURN QUERY
+  WITH full_text AS (
+    SELECT
+      ci.id,
+      ts_rank_cd(ci.search_tsv, websearch_to_tsquery('english', query_text))::float AS rank_score,
+      row_number() OVER (
+        ORDER BY ts_rank_cd(ci.search_tsv, websearch_to_tsquery('english', query_text)) DESC
+      ) AS rank_ix
+    FROM content_items ci
+    WHERE ci.search_tsv @@ websearch_to_tsquery('english', query_text)
+    ORDER BY rank_ix
+    LIMIT match_count * 2
+  ),
+  semantic AS (
+    SELECT
+      nearest.content_id AS id,
+      nearest.similarity,
+      row_number() OVER (ORDER BY nearest.similarity DESC) AS rank_ix
+    FROM (
+      SELECT ce.content_id, 1 - (ce.embedding <=> query_embedding) AS similarity
+      FROM content_embeddings ce
+      WHERE query_embedding IS NOT NULL
+      ORDER BY ce.embedding <=> query_embedding
+      LIMIT match_count * 2
+    ) nearest
+    WHERE nearest.similarity > match_threshold
+  )
+  SELECT
+    ci.id,
+    (coalesce(1.0 / (rrf_k + full_text.rank_ix), 0.0) * full_text_weight +
+     coalesce(1.0 / (rrf_k + semantic.rank_ix), 0.0) * semantic_weight)::float,
+    semantic.similarity::float,
+    full_text.rank_score,
+    ci.summary,
+    ci.url,
+    ci.tags,
+    ci.created_at
+  FROM full_text
+  FULL OUTER JOIN semantic ON full_text.id = semantic.id
+  JOIN content_items ci ON ci.id = coalesce(full_text.id, semantic.id)
+  ORDER BY 2 DESC
+  LIMIT match_count;
+END;
+$$;
@@ -0,0 +1,196 @@
+-- Metadata filters for vector and hybrid search
+-- Tag / date-range / source-type / excluded-id filters are applied in the
+-- WHERE clause before ORDER BY ... LIMIT, so filtered queries still return a
+-- full top-k. With pgvector >= 0.8 the HNSW scan keeps walking the graph
+-- until enough rows pass the filter (hnsw.iterative_scan); selective tag
+-- filters can use idx_content_items_tags instead.
+-- Run after 006_hybrid_search.sql
+
+-- pgvector reserves the hnsw./ivfflat. settings prefixes, so setting
+-- iterative_scan on pgvector < 0.8 raises "invalid configuration parameter
+-- name"; only set it when the installed version has it
+CREATE OR REPLACE FUNCTION enable_vector_iterative_scan()
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM pg_extension
+    WHERE extname = 'vector'
+      AND string_to_array(split_part(extversion, '-', 1), '.')::int[] >= ARRAY[0, 8]
+  ) THEN
+    PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+    PERFORM set_config('ivfflat.iterative_scan', 'relaxed_order', true);
+  END IF;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_content_items_created_at ON content_items(created_at DESC);
+
+DROP FUNCTION IF EXISTS match_content_items(vector, float, int, int, int);
+
+CREATE OR REPLACE FUNCTION match_content_items(
+  query_embedding vector(1536),
+  match_threshold float DEFAULT 0.7,
+  match_count int DEFAULT 10,
+  ef_search int DEFAULT NULL,
+  match_probes int DEFAULT NULL,
+  filter_tags text[] DEFAULT NULL,
+  filter_tag_mode text DEFAULT 'any',
+  filter_since timestamptz DEFAULT NULL,
+  filter_until timestamptz DEFAULT NULL,
+  filter_source_type text DEFAULT NULL,
+  filter_exclude_ids uuid[] DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid,
+  content_id uuid,
+  similarity float,
+  content_summary text,
+  content_url text,
+  content_tags text[],
+  content_created_at timestamptz
+)
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+  IF ef_search IS NOT NULL THEN
+    PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+  END IF;
+  IF match_probes IS NOT NULL THEN
+    PERFORM set_config('ivfflat.probes', match_probes::text, true);
+  END IF;
+  PERFORM enable_vector_iterative_scan();
+
+  RETURN QUERY
+  SELECT
+    nearest.id,
+    nearest.content_id,
+    nearest.similarity,
+    nearest.summary,
+    nearest.url,
+    nearest.tags,
+    nearest.created_at
+  FROM (
+    SELECT
+      ce.id,
+      ce.content_id,
+      1 - (ce.embedding <=> query_embedding) AS similarity,
+      ci.summary,
+      ci.url,
+      ci.tags,
+      ci.created_at
+    FROM content_embeddings ce
+    JOIN content_items ci ON ce.content_id = ci.id
+    WHERE (filter_tags IS NULL
+           OR (filter_tag_mode = 'all' AND ci.tags @> filter_tags)
+           OR (filter_tag_mode <> 'all' AND ci.tags && filter_tags))
+      AND (filter_since IS NULL OR ci.created_at >= filter_since)
+      AND (filter_until IS NULL OR ci.created_at < filter_until)
+      AND (filter_source_type IS NULL
+           OR (filter_source_type = 'url' AND ci.url IS NOT NULL)
+           OR (filter_source_type = 'file' AND ci.url IS NULL))
+      AND (filter_exclude_ids IS NULL OR ci.id <> ALL(filter_exclude_ids))
+    ORDER BY ce.embedding <=> query_embedding
+    LIMIT match_count
+  ) nearest
+  WHERE nearest.similarity > match_threshold
+  ORDER BY nearest.similarity DESC;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS hybrid_search_content(text, vector, int, float, float, float, int, int);
+
+CREATE OR REPLACE FUNCTION hybrid_search_content(
+  query_text text,
+  query_embedding vector(1536) DEFAULT NULL,
+  match_count int DEFAULT 10,
+  match_threshold float DEFAULT 0.0,
+  full_text_weight float DEFAULT 1.0,
+  semantic_weight float DEFAULT 1.0,
+  rrf_k int DEFAULT 60,
+  ef_search int DEFAULT NULL,
+  filter_tags text[] DEFAULT NULL,
+  filter_tag_mode text DEFAULT 'any',
+  filter_since timestamptz DEFAULT NULL,
+  filter_until timestamptz DEFAULT NULL,
+  filter_source_type text DEFAULT NULL,
+  filter_exclude_ids uuid[] DEFAULT NULL
+)
+RETURNS TABLE (
+  content_id uuid,
+  score float,
+  similarity float,
+  text_rank float,
+  content_summary text,
+  content_url text,
+  content_tags text[],
+  content_created_at timestamptz
+)
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+  IF ef_search IS NOT NULL THEN
+    PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+  END IF;
+  PERFORM enable_vector_iterative_scan();
+
+  RETURN QUERY
+  WITH filtered AS (
+    SELECT ci.id
+    FROM content_items ci
+    WHERE (filter_tags IS NULL
+           OR (filter_tag_mode = 'all' AND ci.tags @> filter_tags)
+           OR (filter_tag_mode <> 'all' AND ci.tags && filter_tags))
+      AND (filter_since IS NULL OR ci.created_at >= filter_since)
+      AND (filter_until IS NULL OR ci.created_at < filter_until)
+      AND (filter_source_type IS NULL
+           OR (filter_source_type = 'url' AND ci.url IS NOT NULL)
+           OR (filter_source_type = 'file' AND ci.url IS NULL))
+      AND (filter_exclude_ids IS NULL OR ci.id <> ALL(filter_exclude_ids))
+  ),
+  full_text AS (
+    SELECT
+      ci.id,
+      ts_rank_cd(ci.search_tsv, websearch_to_tsquery('english', query_text))::float AS rank_score,
+      row_number() OVER (
+        ORDER BY ts_rank_cd(ci.search_tsv, websearch_to_tsquery('english', query_text)) DESC
+      ) AS rank_ix
+    FROM content_items ci
+    WHERE ci.search_tsv @@ websearch_to_tsquery('english', query_text)
+      AND ci.id IN (SELECT filtered.id FROM filtered)
+    ORDER BY rank_ix
+    LIMIT match_count * 2
+  ),
+  semantic AS (
+    SELECT
+      nearest.content_id AS id,
+      nearest.similarity,
+      row_number() OVER (ORDER BY nearest.similarity DESC) AS rank_ix
+    FROM (
+      SELECT ce.content_id, 1 - (ce.embedding <=> query_embedding) AS similarity
+      FROM content_embeddings ce
+      WHERE query_embedding IS NOT NULL
+        AND ce.content_id IN (SELECT filtered.id FROM filtered)
+      ORDER BY ce.embedding <=> query_embedding
+      LIMIT match_count * 2
+    ) nearest
+    WHERE nearest.similarity > match_threshold
+  )
+  SELECT
+    ci.id,
+    (coalesce(1.0 / (rrf_k + full_text.rank_ix), 0.0) * full_text_weight +
+     coalesce(1.0 / (rrf_k + semantic.rank_ix), 0.0) * semantic_weight)::float,
+    semantic.similarity::float,
+    full_text.rank_score,
+    ci.summary,
+    ci.url,
+    ci.tags,
+    ci.created_at
+  FROM full_text
+  FULL OUTER JOIN semantic ON full_text.id = semantic.id
+  JOIN content_items ci ON ci.id = coalesce(full_text.id, semantic.id)
+  ORDER BY 2 DESC
+  LIMIT match_count;
+END;
+$$;
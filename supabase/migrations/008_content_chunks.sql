@@ -0,0 +1,93 @@
+-- Chunk-level embeddings
+-- Long documents are split into overlapping ~400-token chunks, each with its
+-- own embedding, so a passage deep inside an article is still retrievable
+-- (content_embeddings holds one vector per item, built from the summary).
+-- match_content_chunks returns chunk hits without their embeddings; the API
+-- groups them back to their parent content_items.
+-- Run after 007_filtered_vector_search.sql
+
+CREATE TABLE IF NOT EXISTS content_chunks (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    content_id UUID REFERENCES content_items(id) ON DELETE CASCADE,
+    chunk_index INT NOT NULL,
+    text TEXT NOT NULL,
+    token_count INT,
+    embedding vector(1536),
+    model_used TEXT DEFAULT 'text-embedding-3-small',
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE(content_id, chunk_index, model_used)
+);
+
+CREATE INDEX IF NOT EXISTS content_chunks_hnsw_idx
+ON content_chunks
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+CREATE OR REPLACE FUNCTION match_content_chunks(
+  query_embedding vector(1536),
+  match_threshold float DEFAULT 0.5,
+  match_count int DEFAULT 40,
+  ef_search int DEFAULT NULL,
+  filter_tags text[] DEFAULT NULL,
+  filter_tag_mode text DEFAULT 'any',
+  filter_since timestamptz DEFAULT NULL,
+  filter_until timestamptz DEFAULT NULL,
+  filter_source_type text DEFAULT NULL,
+  filter_exclude_ids uuid[] DEFAULT NULL
+)
+RETURNS TABLE (
+  content_id uuid,
+  chunk_index int,
+  chunk_text text,
+  similarity float,
+  content_summary text,
+  content_url text,
+  content_tags text[],
+  content_created_at timestamptz
+)
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+  IF ef_search IS NOT NULL THEN
+    PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+  END IF;
+  PERFORM enable_vector_iterative_scan();
+
+  RETURN QUERY
+  SELECT
+    nearest.content_id,
+    nearest.chunk_index,
+    nearest.text,
+    nearest.similarity,
+    nearest.summary,
+    nearest.url,
+    nearest.tags,
+    nearest.created_at
+  FROM (
+    SELECT
+      cc.content_id,
+      cc.chunk_index,
+      cc.text,
+      1 - (cc.embedding <=> query_embedding) AS similarity,
+      ci.summary,
+      ci.url,
+      ci.tags,
+      ci.created_at
+    FROM content_chunks cc
+    JOIN content_items ci ON cc.content_id = ci.id
+    WHERE (filter_tags IS NULL
+           OR (filter_tag_mode = 'all' AND ci.tags @> filter_tags)
+           OR (filter_tag_mode <> 'all' AND ci.tags && filter_tags))
+      AND (filter_since IS NULL OR ci.created_at >= filter_since)
+      AND (filter_until IS NULL OR ci.created_at < filter_until)
+      AND (filter_source_type IS NULL
+           OR (filter_source_type = 'url' AND ci.url IS NOT NULL)
+           OR (filter_source_type = 'file' AND ci.url IS NULL))
+      AND (filter_exclude_ids IS NULL OR ci.id <> ALL(filter_exclude_ids))
+    ORDER BY cc.embedding <=> query_embedding
+    LIMIT match_count
+  ) nearest
+  WHERE nearest.similarity > match_threshold
+  ORDER BY nearest.similarity DESC;
+END;
+$$;
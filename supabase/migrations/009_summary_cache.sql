@@ -0,0 +1,13 @@
+-- Cached map-reduce summaries
+-- Chunk and intermediate summaries of long documents are keyed by
+-- sha256(model + prompt), so re-ingesting an edited document only sends the
+-- changed chunks (and the reduce steps above them) to the LLM.
+-- Run after 008_content_chunks.sql
+
+CREATE TABLE IF NOT EXISTS summary_cache (
+    prompt_hash TEXT NOT NULL,
+    model_used TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (prompt_hash, model_used)
+);
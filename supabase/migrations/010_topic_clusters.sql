@@ -0,0 +1,12 @@
+-- Embedding-clustered topics
+-- /api/topics/prioritize clusters content embeddings, scores each cluster from
+-- size, recency and interest weights and upserts one topics row per cluster,
+-- keyed by the cluster's most central item. Run after 009_summary_cache.sql
+
+ALTER TABLE topics ADD COLUMN IF NOT EXISTS cluster_key TEXT;
+ALTER TABLE topics ADD COLUMN IF NOT EXISTS reasoning TEXT;
+ALTER TABLE topics ADD COLUMN IF NOT EXISTS item_count INTEGER DEFAULT 0;
+ALTER TABLE topics ADD COLUMN IF NOT EXISTS content_ids UUID[] DEFAULT '{}';
+ALTER TABLE topics ADD COLUMN IF NOT EXISTS score_components JSONB DEFAULT '{}';
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_topics_cluster_key ON topics(cluster_key);
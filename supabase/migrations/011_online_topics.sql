@@ -0,0 +1,16 @@
+-- Online topic model
+-- Topics are now maintained incrementally: each ingested embedding joins the
+-- nearest topic centroid (or starts a topic) and a periodic rebalance
+-- re-clusters from scratch. Topics whose membership changed enough since they
+-- were named are flagged for relabeling. Run after 010_topic_clusters.sql
+
+ALTER TABLE topics ADD COLUMN IF NOT EXISTS centroid vector(1536);
+ALTER TABLE topics ADD COLUMN IF NOT EXISTS needs_relabel BOOLEAN DEFAULT TRUE;
+ALTER TABLE topics ADD COLUMN IF NOT EXISTS labeled_item_count INTEGER DEFAULT 0;
+ALTER TABLE topics ADD COLUMN IF NOT EXISTS last_item_at TIMESTAMPTZ;
+
+-- Rows written by the from-scratch prioritizer have no centroid; the first
+-- rebalance recreates them
+DELETE FROM topics WHERE cluster_key IS NOT NULL AND centroid IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_topics_priority ON topics(priority_score DESC);
@@ -0,0 +1,15 @@
+-- Materialized k-nearest-neighbor graph
+-- One row per content item with its top-k most similar items (best first).
+-- Built in bulk on first start (or `python -m app.search.knn`) and updated on
+-- ingest, including reverse edges, so "related content" is one indexed read
+-- instead of an embedding call plus vector search. Run after 011_online_topics.sql
+
+CREATE TABLE IF NOT EXISTS content_neighbors (
+    content_id UUID PRIMARY KEY REFERENCES content_items(id) ON DELETE CASCADE,
+    neighbor_ids UUID[] NOT NULL DEFAULT '{}',
+    similarities REAL[] NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Finds the lists that mention a deleted item
+CREATE INDEX IF NOT EXISTS idx_content_neighbors_neighbor_ids ON content_neighbors USING GIN (neighbor_ids);
@@ -0,0 +1,20 @@
+-- Per-run draft generation metrics
+-- One row per /api/drafts/generate call with its mode (single, sections or
+-- cascade), total tokens, estimated cost and wall-clock latency, plus each
+-- stage's model, cost and seconds in `stages`, so cascade runs can be compared
+-- with single-model runs. Run after 012_content_neighbors.sql
+
+CREATE TABLE IF NOT EXISTS draft_runs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    draft_id UUID REFERENCES drafts(id) ON DELETE SET NULL,
+    mode TEXT NOT NULL,
+    model TEXT,
+    input_tokens INTEGER DEFAULT 0,
+    output_tokens INTEGER DEFAULT 0,
+    cost_estimated FLOAT DEFAULT 0.0,
+    latency_ms INTEGER DEFAULT 0,
+    stages JSONB DEFAULT '{}'::jsonb,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_draft_runs_mode_created ON draft_runs(mode, created_at DESC);
@@ -0,0 +1,7 @@
+-- Cached outline for section-level regeneration
+-- Sectioned and cascade drafts store the outline their sections were written
+-- against (and the generation context in prompt_used), so one section can be
+-- regenerated or refined without re-planning or re-searching the knowledge
+-- base. Run after 013_draft_runs.sql
+
+ALTER TABLE drafts ADD COLUMN IF NOT EXISTS outline JSONB;
@@ -0,0 +1,127 @@
+-- Multi-worker safe topic maintenance
+-- Every API / job worker folds ingested items into its copy of the online topic
+-- model. merge_topic_members applies one worker's additions and removals to the
+-- stored topic under a row lock (other workers' members are kept and the
+-- centroid is re-averaged in place) instead of overwriting content_ids and
+-- centroid. maintenance_leases lets a single worker own background jobs such as
+-- the topic rebalance. Run after 014_draft_outline.sql
+
+CREATE TABLE IF NOT EXISTS maintenance_leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+-- True if p_holder now holds the lease (it was free, expired or already theirs)
+CREATE OR REPLACE FUNCTION acquire_lease(p_name text, p_holder text, p_ttl_seconds int)
+RETURNS boolean
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  acquired boolean;
+BEGIN
+  INSERT INTO maintenance_leases AS lease (name, holder, expires_at)
+  VALUES (p_name, p_holder, NOW() + make_interval(secs => p_ttl_seconds))
+  ON CONFLICT (name) DO UPDATE
+    SET holder = EXCLUDED.holder, expires_at = EXCLUDED.expires_at
+    WHERE lease.holder = EXCLUDED.holder OR lease.expires_at < NOW()
+  RETURNING true INTO acquired;
+  RETURN COALESCE(acquired, false);
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION release_lease(p_name text, p_holder text)
+RETURNS void
+LANGUAGE sql
+AS $$
+  DELETE FROM maintenance_leases WHERE name = p_name AND holder = p_holder;
+$$;
+
+-- p_vectors holds the normalized embedding of each id in p_added, in order.
+-- Returns the merged members and centroid, or nothing when the topic no longer
+-- exists (the caller re-inserts it).
+CREATE OR REPLACE FUNCTION merge_topic_members(
+  p_cluster_key text,
+  p_added uuid[],
+  p_vectors jsonb,
+  p_removed uuid[],
+  p_last_item_at timestamptz DEFAULT NULL,
+  p_min_size int DEFAULT 2,
+  p_relabel_change float DEFAULT 0.3,
+  p_tags text[] DEFAULT NULL,
+  p_priority_score float DEFAULT NULL,
+  p_score_components jsonb DEFAULT NULL
+)
+RETURNS TABLE (content_ids uuid[], centroid vector)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  current_ids uuid[];
+  current_centroid vector;
+  fresh uuid[];
+  merged uuid[];
+  summed real[];
+  norm float;
+BEGIN
+  SELECT t.content_ids, t.centroid INTO current_ids, current_centroid
+  FROM topics t WHERE t.cluster_key = p_cluster_key
+  FOR UPDATE;
+  IF NOT FOUND THEN
+    RETURN;
+  END IF;
+  current_ids := COALESCE(current_ids, '{}');
+
+  -- New members in the order they were added, skipping ones already stored
+  fresh := ARRAY(
+    SELECT a.id FROM unnest(p_added) WITH ORDINALITY AS a(id, k)
+    WHERE NOT (a.id = ANY(current_ids)) ORDER BY a.k
+  );
+  merged := ARRAY(
+    SELECT c.id FROM unnest(current_ids) WITH ORDINALITY AS c(id, k)
+    WHERE NOT (c.id = ANY(COALESCE(p_removed, '{}'))) ORDER BY c.k
+  ) || fresh;
+
+  IF cardinality(fresh) > 0 THEN
+    -- Running mean: stored centroid weighted by its member count plus the new vectors
+    SELECT array_agg(parts.total ORDER BY parts.dim) INTO summed
+    FROM (
+      SELECT dim, sum(val) AS total FROM (
+        SELECT c.dim, c.val * GREATEST(cardinality(current_ids), 1) AS val
+        FROM unnest(current_centroid::real[]) WITH ORDINALITY AS c(val, dim)
+        WHERE current_centroid IS NOT NULL
+        UNION ALL
+        SELECT e.dim, e.val::real
+        FROM jsonb_array_elements(p_vectors) WITH ORDINALITY AS v(vec, k)
+        CROSS JOIN LATERAL jsonb_array_elements_text(v.vec) WITH ORDINALITY AS e(val, dim)
+        WHERE p_added[v.k] = ANY(fresh)
+      ) weighted GROUP BY dim
+    ) parts;
+    SELECT sqrt(sum(x * x)) INTO norm FROM unnest(summed) AS x;
+    IF norm > 0 THEN
+      current_centroid := ARRAY(
+        SELECT s.x / norm FROM unnest(summed) WITH ORDINALITY AS s(x, i) ORDER BY s.i
+      )::real[]::vector;
+    END IF;
+  END IF;
+
+  UPDATE topics t SET
+    content_ids = merged,
+    centroid = current_centroid,
+    item_count = cardinality(merged),
+    last_item_at = GREATEST(t.last_item_at, p_last_item_at),
+    -- Same rule as OnlineTopicModel._flag, against the merged member count
+    needs_relabel = t.needs_relabel OR (
+      cardinality(merged) >= p_min_size AND (
+        COALESCE(t.labeled_item_count, 0) = 0
+        OR abs(cardinality(merged) - t.labeled_item_count)::float / t.labeled_item_count >= p_relabel_change
+      )
+    ),
+    tags = COALESCE(p_tags, t.tags),
+    priority_score = COALESCE(p_priority_score, t.priority_score),
+    score_components = COALESCE(p_score_components, t.score_components),
+    updated_at = NOW()
+  WHERE t.cluster_key = p_cluster_key;
+
+  RETURN QUERY SELECT merged, current_centroid;
+END;
+$$;
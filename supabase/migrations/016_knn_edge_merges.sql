@@ -0,0 +1,78 @@
+-- Multi-worker safe kNN graph updates
+-- Reverse edges (an ingested item added to its neighbors' lists) and deletions
+-- used to be read-modify-writes from Python, so two workers updating the same
+-- list could drop each other's edges. merge_knn_edges and drop_knn_neighbors
+-- change each list under its row lock instead. Run after 015_topic_merges.sql
+
+-- p_edges: [{"content_id": list owner, "neighbor_id": ..., "similarity": ...}]
+-- Merges the edges into lists already in the graph, keeping the best p_k
+-- (one entry per neighbor, never the owner itself). Returns lists changed.
+CREATE OR REPLACE FUNCTION merge_knn_edges(p_edges jsonb, p_k int)
+RETURNS int
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  target uuid;
+  current_ids uuid[];
+  current_similarities real[];
+  merged_ids uuid[];
+  merged_similarities real[];
+  changed int := 0;
+BEGIN
+  FOR target IN
+    SELECT DISTINCT (e->>'content_id')::uuid FROM jsonb_array_elements(p_edges) e ORDER BY 1
+  LOOP
+    SELECT n.neighbor_ids, n.similarities INTO current_ids, current_similarities
+    FROM content_neighbors n
+    WHERE n.content_id = target
+    FOR UPDATE;
+    IF NOT FOUND THEN
+      CONTINUE;
+    END IF;
+
+    SELECT COALESCE(array_agg(best.id ORDER BY best.similarity DESC, best.id), '{}'),
+           COALESCE(array_agg(best.similarity ORDER BY best.similarity DESC, best.id), '{}')
+    INTO merged_ids, merged_similarities
+    FROM (
+      SELECT candidates.id, max(candidates.similarity) AS similarity
+      FROM (
+        SELECT t.id, t.similarity FROM unnest(current_ids, current_similarities) AS t(id, similarity)
+        UNION ALL
+        SELECT (e->>'neighbor_id')::uuid, (e->>'similarity')::real
+        FROM jsonb_array_elements(p_edges) e
+        WHERE (e->>'content_id')::uuid = target
+      ) candidates
+      WHERE candidates.id <> target
+      GROUP BY candidates.id
+      ORDER BY similarity DESC, candidates.id
+      LIMIT p_k
+    ) best;
+
+    IF merged_ids IS DISTINCT FROM current_ids OR merged_similarities IS DISTINCT FROM current_similarities THEN
+      UPDATE content_neighbors
+      SET neighbor_ids = merged_ids, similarities = merged_similarities, updated_at = NOW()
+      WHERE content_id = target;
+      changed := changed + 1;
+    END IF;
+  END LOOP;
+  RETURN changed;
+END;
+$$;
+
+-- Removes deleted items from every other list; returns the owners of the lists
+-- that shrank so the caller can refill them
+CREATE OR REPLACE FUNCTION drop_knn_neighbors(p_ids uuid[])
+RETURNS SETOF uuid
+LANGUAGE sql
+AS $$
+  UPDATE content_neighbors n
+  SET (neighbor_ids, similarities, updated_at) = (
+    SELECT COALESCE(array_agg(t.id ORDER BY t.position), '{}'),
+           COALESCE(array_agg(t.similarity ORDER BY t.position), '{}'),
+           NOW()
+    FROM unnest(n.neighbor_ids, n.similarities) WITH ORDINALITY AS t(id, similarity, position)
+    WHERE t.id <> ALL(p_ids)
+  )
+  WHERE n.neighbor_ids && p_ids AND n.content_id <> ALL(p_ids)
+  RETURNING n.content_id;
+$$;
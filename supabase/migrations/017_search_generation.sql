@@ -0,0 +1,25 @@
+-- Shared search content generation
+-- /api/content/search caches responses and answers If-None-Match by a content
+-- generation. Every worker bumps this sequence after it adds, changes or
+-- deletes searchable content and reads it to key the cache and ETags, so
+-- all workers agree on one generation. A sequence never takes a row lock, so
+-- concurrent ingests don't serialize on it. Run after 016_knn_edge_merges.sql
+
+CREATE SEQUENCE IF NOT EXISTS search_generation_seq;
+
+CREATE OR REPLACE FUNCTION bump_search_generation()
+RETURNS bigint
+LANGUAGE sql
+AS $$
+  SELECT nextval('search_generation_seq');
+$$;
+
+-- A fresh sequence reports last_value 1 before nextval has ever returned it;
+-- report 0 until then so the first bump changes the generation
+CREATE OR REPLACE FUNCTION search_generation()
+RETURNS bigint
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM search_generation_seq;
+$$;